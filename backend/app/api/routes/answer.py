@@ -1,10 +1,11 @@
 # backend/app/api/routes/answer.py
-from fastapi import APIRouter, UploadFile, File, Form, HTTPException
+from fastapi import APIRouter, HTTPException, Request
 from pydantic import BaseModel
-from pathlib import Path
-import shutil
 import uuid
-import json
+
+from backend.app.core.inference_pool import run_in_pool
+from backend.app.core.session_store import get_store
+from backend.app.core.uploads import safe_filename, streamed_upload, upload_openapi
 
 router = APIRouter(tags=["Answer"])
 
@@ -21,36 +22,42 @@ class TextAnswerOut(BaseModel):
 
 @router.post("/answer/text", response_model=TextAnswerOut)
 async def submit_text_answer(payload: TextAnswerIn):
-    base = Path.cwd() / "storage" / payload.session_id / "text_answers"
-    if not base.exists():
+    store = get_store()
+    if not store.session_exists(payload.session_id):
         raise HTTPException(status_code=404, detail="Session not found")
     aid = str(uuid.uuid4())
-    out_file = base / f"{payload.question_id}_{aid}.json"
     out_data = {
         "id": aid,
         "session_id": payload.session_id,
         "question_id": payload.question_id,
         "answer_text": payload.answer_text
     }
-    with out_file.open("w", encoding="utf8") as f:
-        json.dump(out_data, f, ensure_ascii=False, indent=2)
-    return {"id": aid, "session_id": payload.session_id, "question_id": payload.question_id, "saved_path": str(out_file)}
+    saved = await run_in_pool("io", store.put_text_answer, payload.session_id, f"{payload.question_id}_{aid}", out_data)
+    return {"id": aid, "session_id": payload.session_id, "question_id": payload.question_id, "saved_path": saved}
 
 class AudioAnswerOut(BaseModel):
     id: str
     session_id: str
     question_id: str
     saved_path: str
+    sha256: str
+    size: int
+    deduplicated: bool
 
-@router.post("/answer/audio", response_model=AudioAnswerOut)
-async def submit_audio_answer(session_id: str = Form(...), question_id: str = Form(...), file: UploadFile = File(...)):
-    base = Path.cwd() / "storage" / session_id / "audio"
-    if not base.exists():
-        raise HTTPException(status_code=404, detail="Session not found")
-    aid = str(uuid.uuid4())
-    filename = f"{question_id}_{aid}_{file.filename}"
-    out_path = base / filename
-    with out_path.open("wb") as f:
-        shutil.copyfileobj(file.file, f)
+@router.post("/answer/audio", response_model=AudioAnswerOut,
+             openapi_extra=upload_openapi("session_id", "question_id"))
+async def submit_audio_answer(request: Request):
+    # multipart body: session_id, question_id, file
+    async with streamed_upload(request, "audio") as upload:
+        session_id = upload.field("session_id")
+        question_id = upload.field("question_id")
+        store = get_store()
+        if not store.session_exists(session_id):
+            raise HTTPException(status_code=404, detail="Session not found")
+        base = await run_in_pool("io", store.media_dir, session_id, "audio")
+        aid = str(uuid.uuid4())
+        filename = f"{question_id}_{aid}_{safe_filename(upload.filename, 'audio')}"
+        saved = await upload.save(base / filename)
     # Dummy placeholder for ASR/transcription step: we will replace with real ASR later
-    return {"id": aid, "session_id": session_id, "question_id": question_id, "saved_path": str(out_path)}
+    return {"id": aid, "session_id": session_id, "question_id": question_id, "saved_path": saved["path"],
+            "sha256": saved["sha256"], "size": saved["size"], "deduplicated": saved["deduplicated"]}
@@ -1,59 +1,52 @@
 # backend/app/api/routes/answer_audio.py
-from fastapi import APIRouter, UploadFile, File, HTTPException
+from fastapi import APIRouter, HTTPException, Request, WebSocket, WebSocketDisconnect
 from pathlib import Path
-import shutil
+import asyncio
+import json
 import uuid
 import traceback
+import wave
+
+import numpy as np
 
 # we'll reuse the existing text-scoring endpoint function directly
 from backend.app.api.routes.score_text import score_text_answer
+from backend.app.core import config
+from backend.app.core.asr import ASR_SAMPLE_RATE, transcribe
+from backend.app.core.audio_preproc import transcribe_file
+from backend.app.core.inference_pool import run_in_pool
+from backend.app.core.session_store import get_store
+from backend.app.core.uploads import streamed_upload, upload_openapi
+from backend.app.core.streaming_asr import StreamingTranscriber
 
 router = APIRouter()
 
-# lazy ASR pipeline singleton (import transformers inside function)
-_asr = None
-def get_asr_pipeline(model_name: str = "openai/whisper-small"):
-    global _asr
-    if _asr is None:
-        # import inside function to avoid heavy import during FastAPI startup
-        try:
-            from transformers import pipeline as _pipeline
-        except Exception as e:
-            # provide a helpful message if transformers isn't importable
-            raise RuntimeError(f"Failed to import transformers.pipeline: {e}")
-        # this will download the model the first time it's called (may be slow)
-        _asr = _pipeline("automatic-speech-recognition", model=model_name)
-    return _asr
-
-@router.post("/answer/audio")
-async def answer_audio(session_id: str, question_id: str, file: UploadFile = File(...)):
+MAX_STREAM_SAMPLE_RATE = 192000
+
+@router.post("/answer/audio", openapi_extra=upload_openapi())
+async def answer_audio(session_id: str, question_id: str, request: Request):
     """
     Accept an uploaded audio file, save it, run ASR (Whisper), then call score_text_answer
     """
     try:
-        BASE_DIR = Path(__file__).resolve().parents[4]
-        STORAGE_DIR = BASE_DIR / "storage"
-        session_dir = STORAGE_DIR / session_id
-        if not session_dir.exists():
+        store = get_store()
+        if not store.session_exists(session_id):
             raise HTTPException(status_code=404, detail="session_id not found")
+        answers_dir = await run_in_pool("io", store.media_dir, session_id, "answers")
 
-        answers_dir = session_dir / "answers"
-        answers_dir.mkdir(parents=True, exist_ok=True)
+        # streamed, size-limited, deduplicated against earlier uploads
+        async with streamed_upload(request, "audio") as upload:
+            ext = Path(upload.filename or "").suffix or ".wav"
+            dest_name = f"{question_id}_{uuid.uuid4().hex}{ext}"
+            dest_path = answers_dir / dest_name
+            saved = await upload.save(dest_path)
 
-        # save uploaded file
-        ext = Path(file.filename).suffix or ".wav"
-        dest_name = f"{question_id}_{uuid.uuid4().hex}{ext}"
-        dest_path = answers_dir / dest_name
-
-        with dest_path.open("wb") as f:
-            shutil.copyfileobj(file.file, f)
-
-        # run ASR (may be slow the first time while model downloads)
+        # decode to 16 kHz mono in memory, VAD-trim, then batched ASR over the
+        # speech segments on the asr pool (slow the first time while the model downloads)
         try:
-            asr = get_asr_pipeline()
-            asr_result = asr(str(dest_path))
-            transcript = asr_result.get("text") if isinstance(asr_result, dict) else str(asr_result)
-            transcript = transcript.strip()
+            transcript, audio_stats = await run_in_pool("asr", transcribe_file, dest_path)
+        except HTTPException:
+            raise
         except Exception as e:
             # catch everything and return a clear 500 with logs on server
             print("ASR error:", e)
@@ -72,6 +65,8 @@ async def answer_audio(session_id: str, question_id: str, file: UploadFile = Fil
         # attach transcript + path
         scored["transcript"] = transcript
         scored["audio_path"] = str(dest_path)
+        scored["audio_sha256"] = saved["sha256"]
+        scored["audio"] = audio_stats
 
         return scored
 
@@ -81,3 +76,113 @@ async def answer_audio(session_id: str, question_id: str, file: UploadFile = Fil
         print("Error in /answer/audio:", e)
         print(traceback.format_exc())
         raise HTTPException(status_code=500, detail=f"Internal error: {e}")
+
+
+def _write_wav(path: Path, audio: np.ndarray, sample_rate: int = ASR_SAMPLE_RATE):
+    pcm = (np.clip(audio, -1.0, 1.0) * 32767.0).astype("<i2")
+    with wave.open(str(path), "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(sample_rate)
+        w.writeframes(pcm.tobytes())
+
+def _is_end_message(text: str) -> bool:
+    text = text.strip()
+    if text.lower() == "end":
+        return True
+    try:
+        data = json.loads(text)
+    except ValueError:
+        return False
+    return isinstance(data, dict) and data.get("event") == "end"
+
+@router.websocket("/answer/audio/stream")
+async def answer_audio_stream(websocket: WebSocket, session_id: str, question_id: str, sample_rate: int = ASR_SAMPLE_RATE):
+    """
+    Streaming variant of /answer/audio.
+
+    The client sends binary frames of mono 16-bit little-endian PCM at
+    `sample_rate`, then a text frame "end". Overlapping windows are
+    transcribed while audio is still arriving and every window produces a
+    {"type": "partial"} message; after "end" the last window is transcribed,
+    the transcript is scored and a {"type": "final"} message closes the stream.
+    """
+    await websocket.accept()
+    if not 0 < sample_rate <= MAX_STREAM_SAMPLE_RATE:
+        await websocket.send_json({"type": "error", "status_code": 400,
+                                   "detail": f"sample_rate must be between 1 and {MAX_STREAM_SAMPLE_RATE}"})
+        await websocket.close(code=1003)
+        return
+    store = get_store()
+    if not store.session_exists(session_id):
+        await websocket.send_json({"type": "error", "status_code": 404, "detail": "session_id not found"})
+        await websocket.close(code=1008)
+        return
+    answers_dir = await run_in_pool("io", store.media_dir, session_id, "answers")
+
+    async def on_partial(index: int, text: str, transcript: str):
+        await websocket.send_json({"type": "partial", "window": index, "text": text, "transcript": transcript})
+
+    streamer = StreamingTranscriber(
+        config.ASR_STREAM_WINDOW_S, config.ASR_STREAM_OVERLAP_S,
+        source_rate=sample_rate, on_partial=on_partial,
+        run_asr=lambda inputs: run_in_pool("asr", transcribe, inputs),
+    )
+    try:
+        while True:
+            receive = asyncio.ensure_future(websocket.receive())
+            await asyncio.wait({receive, streamer.worker}, return_when=asyncio.FIRST_COMPLETED)
+            if not receive.done():
+                # the ASR worker died while we were waiting for audio: report it now
+                receive.cancel()
+                streamer.check()
+                raise RuntimeError("ASR worker stopped")
+            message = receive.result()
+            if message.get("type") == "websocket.disconnect":
+                raise WebSocketDisconnect(message.get("code", 1000))
+            if message.get("bytes") is not None:
+                await streamer.feed_pcm16(message["bytes"])
+            elif message.get("text") is not None and _is_end_message(message["text"]):
+                break
+
+        transcript = await streamer.finish()
+
+        dest_path = answers_dir / f"{question_id}_{uuid.uuid4().hex}.wav"
+        await run_in_pool("io", _write_wav, dest_path, streamer.audio())
+
+        # scoring starts as soon as the final window is transcribed
+        try:
+            scored = await score_text_answer({
+                "session_id": session_id,
+                "question_id": question_id,
+                "answer_text": transcript
+            })
+        except HTTPException as e:
+            await websocket.send_json({"type": "error", "status_code": e.status_code, "detail": e.detail, "transcript": transcript})
+            await websocket.close()
+            return
+
+        scored["transcript"] = transcript
+        scored["audio_path"] = str(dest_path)
+        scored["audio_seconds"] = round(streamer.seconds_received, 3)
+        scored["windows"] = streamer.windows_done
+        await websocket.send_text(json.dumps({"type": "final", **scored}, default=float))
+        await websocket.close()
+
+    except WebSocketDisconnect:
+        streamer.cancel()
+    except HTTPException as e:
+        # e.g. PoolSaturated while a window was queued for ASR
+        streamer.cancel()
+        await websocket.send_json({"type": "error", "status_code": e.status_code, "detail": e.detail,
+                                   "retry_after": (e.headers or {}).get("Retry-After")})
+        await websocket.close(code=1013)
+    except Exception as e:
+        streamer.cancel()
+        print("Error in /answer/audio/stream:", e)
+        print(traceback.format_exc())
+        try:
+            await websocket.send_json({"type": "error", "status_code": 500, "detail": f"Internal error: {e}"})
+            await websocket.close(code=1011)
+        except Exception:
+            pass
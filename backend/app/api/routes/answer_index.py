@@ -0,0 +1,72 @@
+# backend/app/api/routes/answer_index.py
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel
+from typing import Optional
+import time
+
+from backend.app.core.answer_index import get_answer_index
+from backend.app.core.inference_pool import run_in_pool
+from backend.app.core.ml_models import encode_sentence_batched
+
+router = APIRouter(tags=["Answer index"])
+
+class AnswerQueryIn(BaseModel):
+    # query by free text, or by an already indexed answer
+    text: Optional[str] = None
+    session_id: Optional[str] = None
+    question_id: Optional[str] = None
+    topic: Optional[str] = None
+    k: int = 5
+    exclude_session: Optional[str] = None
+    exact: bool = False
+
+def _stored_answer(session_id: str, question_id: str):
+    # metadata + vector of an indexed answer; file reads under the index lock
+    index = get_answer_index()
+    info = index.get_info(session_id, question_id)
+    if info is None:
+        return None, None
+    return info, index.get_vector(session_id, question_id)
+
+def _search(vector, k: int, topic: Optional[str], exclude: Optional[str], exact: bool):
+    index = get_answer_index()
+    results = index.search(vector, k, topic, exclude, exact)
+    return results, "flat" if exact else index.stats()["mode"]
+
+def _index_stats() -> dict:
+    return get_answer_index().stats()
+
+@router.post("/index/answers/query")
+async def query_answers(payload: AnswerQueryIn):
+    """
+    Most similar indexed answers, best first. With session_id + question_id
+    (and no text) the stored answer is the query, its own topic the default
+    filter and its own session is excluded.
+    """
+    t0 = time.perf_counter()
+    topic = payload.topic
+    exclude = payload.exclude_session
+    if payload.text:
+        vector = await encode_sentence_batched(payload.text)
+    elif payload.session_id and payload.question_id:
+        info, vector = await run_in_pool("io", _stored_answer, payload.session_id, payload.question_id)
+        if info is None:
+            raise HTTPException(status_code=404, detail="answer not indexed")
+        topic = topic or info.get("topic")
+        exclude = exclude or payload.session_id
+    else:
+        raise HTTPException(status_code=400, detail="text, or session_id and question_id, required")
+
+    k = max(1, min(payload.k, 100))
+    results, mode = await run_in_pool("embedding", _search, vector, k, topic, exclude, payload.exact)
+    return {
+        "status": "ok",
+        "topic": topic,
+        "mode": mode,
+        "results": results,
+        "took_ms": round((time.perf_counter() - t0) * 1000.0, 3),
+    }
+
+@router.get("/index/answers/stats")
+async def answer_index_stats():
+    return await run_in_pool("io", _index_stats)
@@ -0,0 +1,98 @@
+# backend/app/api/routes/answer_video.py
+from fastapi import APIRouter, HTTPException, Request
+from pathlib import Path
+import asyncio
+import uuid
+import traceback
+
+from backend.app.api.routes.score_text import commit_score, prepare_score
+from backend.app.core.audio_preproc import transcribe_file
+from backend.app.core.inference_pool import run_in_pool
+from backend.app.core.session_store import get_store
+from backend.app.core.uploads import streamed_upload, upload_openapi
+
+router = APIRouter()
+
+@router.post("/answer/video", openapi_extra=upload_openapi())
+async def answer_video(session_id: str, question_id: str, request: Request):
+    """
+    Accept a recorded video answer. The audio track goes through the usual
+    decode + VAD + ASR + scoring path while, in parallel, sampled frames are
+    analyzed for non-verbal signals (face presence, gaze proxy, posture,
+    movement). Returns the scored answer plus the video feature summary.
+    Nothing is written unless both branches succeed; a recording without
+    usable speech returns its video summary with "score": null.
+    """
+    from backend.app.core.video import analyze_video
+
+    try:
+        store = get_store()
+        if not store.session_exists(session_id):
+            raise HTTPException(status_code=404, detail="session_id not found")
+        videos_dir = await run_in_pool("io", store.media_dir, session_id, "video")
+
+        async with streamed_upload(request, "video") as upload:
+            ext = Path(upload.filename or "").suffix or ".mp4"
+            dest_path = videos_dir / f"{question_id}_{uuid.uuid4().hex}{ext}"
+            saved = await upload.save(dest_path)
+
+        async def speech():
+            # ffmpeg pulls the audio track out of the container in memory;
+            # a silent recording still gets its video analyzed
+            try:
+                transcript, audio_stats = await run_in_pool("asr", transcribe_file, dest_path)
+            except Exception as e:
+                print("Video audio track error:", e)
+                return None, "", {"error": "no usable audio track"}
+            if not transcript.strip():
+                return None, transcript, audio_stats
+            # scored but not written yet: the video branch may still fail
+            pending = await prepare_score({
+                "session_id": session_id, "question_id": question_id, "answer_text": transcript
+            })
+            return pending, transcript, audio_stats
+
+        video_task = run_in_pool("video", analyze_video, dest_path)
+        results = await asyncio.gather(video_task, speech(), return_exceptions=True)
+        for result in results:
+            if isinstance(result, HTTPException):
+                raise result
+        video_summary, speech_result = results
+        if isinstance(video_summary, ValueError):
+            raise HTTPException(status_code=422, detail=str(video_summary))
+        if isinstance(video_summary, BaseException):
+            print("Video analysis error:", video_summary)
+            print("".join(traceback.format_exception(type(video_summary), video_summary, video_summary.__traceback__)))
+            raise HTTPException(status_code=500, detail="Video analysis failed. See server logs for details.")
+        if isinstance(speech_result, BaseException):
+            raise speech_result
+        pending, transcript, audio_stats = speech_result
+
+        if pending is not None:
+            scored = await commit_score(pending)
+        else:
+            scored = {"status": "ok", "question_id": question_id, "similarity": None, "score": None,
+                      "needs_human_review": True, "top_matches": [], "score_path": None}
+
+        await run_in_pool("io", store.put_video_features, session_id, question_id, {
+            "question_id": question_id,
+            "video_path": str(dest_path),
+            "video_sha256": saved["sha256"],
+            "transcript": transcript,
+            "audio": audio_stats,
+            "video": video_summary,
+        })
+
+        scored["transcript"] = transcript
+        scored["video_path"] = str(dest_path)
+        scored["video_sha256"] = saved["sha256"]
+        scored["audio"] = audio_stats
+        scored["video"] = video_summary
+        return scored
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        print("Error in /answer/video:", e)
+        print(traceback.format_exc())
+        raise HTTPException(status_code=500, detail=f"Internal error: {e}")
@@ -1,11 +1,90 @@
 from fastapi import APIRouter
+from fastapi.responses import JSONResponse
 
 router = APIRouter(tags=["Health"])
 
 @router.get("/health")
 async def health_check():
+    from backend.app.core.asr import asr_status
+    from backend.app.core.ml_models import sentence_model_info, sentence_model_loaded
+    from backend.app.core.startup import readiness
+    models = {
+        "sentence_transformer": {"loaded": sentence_model_loaded(), **sentence_model_info()},
+        "asr": asr_status(),
+    }
     return {
         "status": "ok",
         "service": "backend",
-        "stage": "development"
+        "stage": "development",
+        "ready": readiness()["ready"],
+        "models": models
+    }
+
+@router.get("/health/live")
+async def liveness():
+    """
+    Liveness: the process is up and serving. Never touches the models.
+    """
+    from backend.app.core.startup import uptime_s
+    return {"status": "alive", "uptime_s": uptime_s()}
+
+@router.get("/health/ready")
+async def readiness_check():
+    """
+    Readiness: 200 once every required model is loaded, 503 while warming up.
+    """
+    from backend.app.core.startup import readiness
+    result = readiness()
+    return JSONResponse(result, status_code=200 if result["ready"] else 503)
+
+@router.get("/health/startup")
+async def startup_profile():
+    """
+    Router import times (and any heavy libraries they pulled in) and the
+    duration / status of every prewarm step.
+    """
+    from backend.app.core.startup import get_prewarmer, import_profile, uptime_s
+    prewarmer = get_prewarmer()
+    return {
+        "uptime_s": uptime_s(),
+        "imports": import_profile(),
+        "prewarm": prewarmer.status() if prewarmer is not None else None,
     }
+
+@router.get("/health/embedding")
+async def embedding_stats():
+    """
+    Micro-batcher counters (queue depth, batch fill ratio) and
+    embedding cache stats (hits, misses, evictions).
+    """
+    from backend.app.core.ml_models import embedding_cache_stats, get_batcher
+    return {"batcher": get_batcher().stats(), "cache": embedding_cache_stats()}
+
+@router.get("/health/pools")
+async def pool_stats():
+    """
+    Per-pool (asr, embedding, io) concurrency, rejections, queue-wait and run-time.
+    """
+    from backend.app.core.inference_pool import pool_stats as _pool_stats
+    return _pool_stats()
+
+@router.get("/health/jobs")
+async def job_stats():
+    """
+    Pipeline job workers (busy, processed, avg run time per stage) and job counts by status.
+    """
+    from backend.app.core.jobs import job_stats as _job_stats
+    return _job_stats()
+
+@router.get("/health/memory")
+async def memory_stats():
+    """
+    RSS / PSS of the gunicorn master and each worker (this process only
+    under plain uvicorn) and what the models preloaded before fork share.
+    """
+    from backend.app.core.inference_pool import run_in_pool
+    from backend.app.core.memory import memory_report
+    from backend.app.core.serving import preload_status
+    report = await run_in_pool("io", memory_report)
+    report["preload"] = preload_status()
+    return report
@@ -1,25 +1,29 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, BackgroundTasks, HTTPException
 from pathlib import Path
-import json
+import traceback
 import uuid
 
+from backend.app.core.inference_pool import run_in_pool
+from backend.app.core.metrics import timed
+from backend.app.core.reference import precompute_reference_embeddings
+from backend.app.core.session_report import record_plan
+from backend.app.core.session_store import get_store
+
 router = APIRouter()
 
-@router.post("/interview/plan/{session_id}")
-async def create_interview_plan(session_id: str):
+def _precompute_in_background(session_dir: Path, parsed: dict, plan: dict):
+    try:
+        precompute_reference_embeddings(session_dir, parsed, plan)
+    except Exception as e:
+        # scoring falls back to encoding the reference on demand
+        print("Reference precompute error:", e)
+        print(traceback.format_exc())
+
+@timed("plan")
+def build_interview_plan(session_id: str, parsed: dict) -> dict:
     """
-    Create an interview plan based on parsed resume
+    Interview questions for a parsed resume: intro, one per top skill, behavioral.
     """
-    BASE_DIR = Path(__file__).resolve().parents[4]
-    STORAGE_DIR = BASE_DIR / "storage"
-
-    parsed_file = STORAGE_DIR / session_id / "parsed_resume.json"
-
-    if not parsed_file.exists():
-        raise HTTPException(status_code=404, detail="Parsed resume not found")
-
-    parsed = json.loads(parsed_file.read_text())
-
     skills = parsed.get("skills", [])
     summary = parsed.get("summary", "")
     name = parsed.get("name", "Candidate")
@@ -56,12 +60,54 @@ async def create_interview_plan(session_id: str):
         "total_questions": len(questions),
         "questions": questions
     }
+    return plan
+
+@router.post("/interview/plan/{session_id}")
+async def create_interview_plan(
+    session_id: str,
+    background_tasks: BackgroundTasks,
+    precompute: bool = True,
+    background: bool = False,
+):
+    """
+    Create an interview plan based on parsed resume.
+    With precompute=true the reference answers of every question are embedded
+    in one batch (after the response when background=true) so scoring only
+    has to encode the candidate's answer.
+    """
+    store = get_store()
+    try:
+        parsed = await run_in_pool("io", store.get_parsed, session_id)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Parsed resume not found")
+
+    plan = build_interview_plan(session_id, parsed)
+    questions = plan["questions"]
+
+    plan_path = await run_in_pool("io", store.put_plan, session_id, plan)
+    await run_in_pool("io", record_plan, session_id, plan)
 
-    out_file = STORAGE_DIR / session_id / "interview_plan.json"
-    out_file.write_text(json.dumps(plan, indent=2))
+    reference_embeddings = "skipped"
+    if precompute:
+        session_dir = await run_in_pool("io", store.session_dir, session_id)
+        if background:
+            background_tasks.add_task(_precompute_in_background, session_dir, parsed, plan)
+            reference_embeddings = "scheduled"
+        else:
+            try:
+                await run_in_pool("embedding", precompute_reference_embeddings, session_dir, parsed, plan)
+                reference_embeddings = "ok"
+            except HTTPException:
+                # embedding pool saturated: plan is saved, scoring encodes on demand
+                reference_embeddings = "deferred"
+            except Exception as e:
+                print("Reference precompute error:", e)
+                print(traceback.format_exc())
+                reference_embeddings = "failed"
 
     return {
         "status": "ok",
         "total_questions": len(questions),
-        "plan_path": str(out_file)
+        "plan_path": plan_path,
+        "reference_embeddings": reference_embeddings
     }
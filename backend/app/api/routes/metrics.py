@@ -0,0 +1,35 @@
+# backend/app/api/routes/metrics.py
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import PlainTextResponse
+
+from backend.app.core.inference_pool import run_in_pool
+from backend.app.core.metrics import load_profile, render_prometheus, stage_summary
+
+router = APIRouter(tags=["Metrics"])
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """
+    Stage / route latency histograms plus cache, batcher, pool, job and
+    answer-index stats, in the Prometheus text exposition format.
+    """
+    text = await run_in_pool("io", render_prometheus)
+    return PlainTextResponse(text, media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@router.get("/metrics/stages")
+async def stage_latencies():
+    """
+    Count and average latency per stage and per route, as JSON.
+    """
+    return stage_summary()
+
+@router.get("/metrics/profile/{profile_id}", response_class=PlainTextResponse)
+async def request_profile(profile_id: str):
+    """
+    Folded stacks recorded for a request sent with `X-Profile: 1`
+    (PROFILE_REQUESTS=1); feed them to flamegraph.pl or speedscope.
+    """
+    folded = await run_in_pool("io", load_profile, profile_id)
+    if folded is None:
+        raise HTTPException(status_code=404, detail="profile not found")
+    return PlainTextResponse(folded)
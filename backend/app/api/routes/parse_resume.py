@@ -1,11 +1,12 @@
 # parse_resume.py
 from fastapi import APIRouter, HTTPException
-from pathlib import Path
-import json
-import pdfplumber
-import docx2txt
 import re
 
+from backend.app.core.doc_extract import extract_document_text
+from backend.app.core.inference_pool import run_in_pool
+from backend.app.core.session_store import get_store
+from backend.app.core.skills import DEFAULT_TAXONOMY, get_taxonomy
+
 router = APIRouter()
 
 EMAIL_RE = re.compile(r"[a-zA-Z0-9.+-_]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}")
@@ -15,6 +16,13 @@ YEAR_RE = re.compile(r"(?:19|20)\d{2}")
 EDU_KEYWORDS = ["bachelor", "master", "b.sc", "m.sc", "b.tech", "m.tech", "bs", "ms", "phd", "degree"]
 PROJECT_KEYWORDS = ["project", "projects", "worked on", "implemented", "built", "developed"]
 
+# one pass per document / line instead of one scan per keyword;
+# word boundaries keep "bs" from matching inside "jobs" (plurals still match)
+EDU_RE = re.compile(r"(?<![\w.])(" + "|".join(
+    re.escape(k) for k in sorted(EDU_KEYWORDS, key=len, reverse=True)
+) + r")s?(?!\w)")
+PROJECT_RE = re.compile("|".join(re.escape(k) for k in PROJECT_KEYWORDS))
+
 def find_email(text: str):
     m = EMAIL_RE.search(text)
     return m.group(0) if m else None
@@ -39,22 +47,20 @@ def guess_name(text: str):
     return None
 
 def find_education(text: str):
-    found = []
     lower = text.lower()
-    for kw in EDU_KEYWORDS:
-        if kw in lower:
-            # extract nearest year if any
-            years = YEAR_RE.findall(text)
-            found.append({"keyword": kw, "years": list(set(YEAR_RE.findall(text)))})
-    return found
+    matched = set(EDU_RE.findall(lower))
+    if not matched:
+        return []
+    years = list(set(YEAR_RE.findall(text)))
+    # keep the EDU_KEYWORDS order of the original output
+    return [{"keyword": kw, "years": list(years)} for kw in EDU_KEYWORDS if kw in matched]
 
 def extract_projects(text: str, max_blocks=5):
     # Search for lines that include the project keywords and collect a small block around them
     lines = text.splitlines()
     blocks = []
     for i, line in enumerate(lines):
-        l = line.lower()
-        if any(p in l for p in PROJECT_KEYWORDS):
+        if PROJECT_RE.search(line.lower()):
             # take a small context window
             start = max(0, i-2)
             end = min(len(lines), i+3)
@@ -64,26 +70,21 @@ def extract_projects(text: str, max_blocks=5):
                 break
     return blocks
 
-SKILLS = [
-    "python", "java", "c", "c++", "pytorch", "tensorflow", "keras",
-    "scikit-learn", "machine learning", "deep learning",
-    "nlp", "computer vision", "opencv",
-    "sql", "mysql", "postgresql", "mongodb",
-    "docker", "kubernetes", "aws", "linux",
-    "react", "angular", "nodejs", "fastapi"
-]
+SKILLS = list(DEFAULT_TAXONOMY)
+
+def match_skills(text: str) -> dict:
+    """
+    Single-pass taxonomy match: {"skills", "counts", "spans"}.
+    """
+    return get_taxonomy().match(text)
 
 def extract_skills(text: str):
-    found = set()
-    lower = text.lower()
-    for skill in SKILLS:
-        if skill in lower:
-            found.add(skill)
-    return sorted(found)
+    return match_skills(text)["skills"]
 
 
 def build_parsed_schema(filename: str, raw_text: str) -> dict:
-    skills = extract_skills(raw_text)
+    skill_match = match_skills(raw_text)
+    skills = skill_match["skills"]
     email = find_email(raw_text)
     phones = find_phones(raw_text)
     name = guess_name(raw_text)
@@ -99,6 +100,7 @@ def build_parsed_schema(filename: str, raw_text: str) -> dict:
         "email": email,
         "phones": phones,
         "skills": skills,
+        "skill_mentions": skill_match["counts"],
         "education": education,
         "projects": projects,
         "summary": summary,
@@ -106,50 +108,51 @@ def build_parsed_schema(filename: str, raw_text: str) -> dict:
         "full_text_length": len(raw_text)
     }
 
-@router.post("/parse/resume/{session_id}")
-async def parse_resume(session_id: str):
+def parse_session_resume(session_id: str, store=None) -> dict:
     """
-    Parse the uploaded resume for a given session_id
+    Extract, parse and store the uploaded resume of a session (blocking).
+    Raises FileNotFoundError when the session has no resume.
     """
-    # IMPORTANT: resolve project root safely 🔴
-    BASE_DIR = Path(__file__).resolve().parents[4]
-    STORAGE_DIR = BASE_DIR / "storage"
-
-    resume_dir = STORAGE_DIR / session_id / "resumes"
+    store = store or get_store()
+    resume_dir = store.session_dir(session_id) / "resumes"
 
     if not resume_dir.exists():
-        raise HTTPException(status_code=404, detail="Resume directory not found")
+        raise FileNotFoundError("Resume directory not found")
 
     files = list(resume_dir.iterdir())
     if not files:
-        raise HTTPException(status_code=404, detail="No resume file found")
+        raise FileNotFoundError("No resume file found")
 
     resume_path = files[0]
 
-    # ---- extract text ----
-    if resume_path.suffix.lower() == ".pdf":
-        with pdfplumber.open(resume_path) as pdf:
-            raw_text = "\n".join(
-                page.extract_text() or "" for page in pdf.pages
-            )
-    elif resume_path.suffix.lower() in [".docx", ".doc"]:
-        raw_text = docx2txt.process(str(resume_path))
-    else:
-        raw_text = resume_path.read_text(errors="ignore")
+    # ---- extract text (page-parallel, OCR fallback, cached by content hash) ----
+    extraction = extract_document_text(resume_path)
+    raw_text = extraction["text"]
 
     parsed = build_parsed_schema(resume_path.name, raw_text)
 
-    out_file = STORAGE_DIR / session_id / "parsed_resume.json"
-    out_file.write_text(
-        json.dumps(parsed, indent=2, ensure_ascii=False),
-        encoding="utf-8"
-    )
-
+    parsed_path = store.put_parsed(session_id, parsed)
 
     return {
         "status": "ok",
-        "parsed_path": str(out_file),
+        "parsed_path": parsed_path,
         "skills": parsed["skills"],
         "email": parsed["email"],
-        "name": parsed["name"]
+        "name": parsed["name"],
+        "extraction": {
+            "sha256": extraction["sha256"],
+            "cached": extraction["cached"],
+            "total_ms": extraction["total_ms"],
+            "pages": extraction["pages"]
+        }
     }
+
+@router.post("/parse/resume/{session_id}")
+async def parse_resume(session_id: str):
+    """
+    Parse the uploaded resume for a given session_id
+    """
+    try:
+        return await run_in_pool("io", parse_session_resume, session_id)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
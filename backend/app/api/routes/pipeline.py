@@ -0,0 +1,120 @@
+# backend/app/api/routes/pipeline.py
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from pathlib import Path
+from typing import List, Optional
+import asyncio
+import json
+import uuid
+
+from backend.app.core.inference_pool import run_in_pool
+from backend.app.core.jobs import TERMINAL, get_job_queue, job_view
+from backend.app.core.pipeline import pipeline_status, submit_answer_jobs, submit_pipeline
+from backend.app.core.session_store import get_store
+from backend.app.core.uploads import streamed_upload, upload_openapi
+
+router = APIRouter(tags=["Pipeline"])
+
+# how often the event stream re-reads job states
+_STREAM_POLL_S = 0.25
+
+class PipelineAnswer(BaseModel):
+    question_id: str
+    answer_text: str
+
+class PipelineIn(BaseModel):
+    parse: bool = True
+    plan: bool = True
+    precompute: bool = True
+    answers: List[PipelineAnswer] = []
+
+def _require_session(session_id: str):
+    if not get_store().session_exists(session_id):
+        raise HTTPException(status_code=404, detail="session_id not found")
+
+@router.post("/pipeline/{session_id}", status_code=202)
+async def start_pipeline(session_id: str, payload: PipelineIn):
+    """
+    Queue parse -> plan (+ reference embeddings) -> score(answer) jobs for a
+    session and return at once; poll /pipeline/{pipeline_id} or stream
+    /pipeline/{pipeline_id}/events for progress.
+    """
+    _require_session(session_id)
+    return await run_in_pool(
+        "io", submit_pipeline, session_id,
+        payload.parse, payload.plan, payload.precompute, [a.dict() for a in payload.answers],
+    )
+
+@router.post("/pipeline/{session_id}/answer/audio", status_code=202, openapi_extra=upload_openapi())
+async def queue_audio_answer(session_id: str, question_id: str, request: Request, after: Optional[str] = None):
+    """
+    Save an audio answer and queue transcribe -> score for it. `after` is an
+    optional job id (e.g. the plan job) that scoring must wait for.
+    """
+    _require_session(session_id)
+    answers_dir = await run_in_pool("io", get_store().media_dir, session_id, "answers")
+    async with streamed_upload(request, "audio") as upload:
+        ext = Path(upload.filename or "").suffix or ".wav"
+        dest_path = answers_dir / f"{question_id}_{uuid.uuid4().hex}{ext}"
+        saved = await upload.save(dest_path)
+
+    pipeline_id = uuid.uuid4().hex
+    jobs = await run_in_pool(
+        "io", submit_answer_jobs, session_id, pipeline_id, question_id,
+        None, str(dest_path), [after] if after else None,
+    )
+    return {"pipeline_id": pipeline_id, "session_id": session_id, "audio_sha256": saved["sha256"], "jobs": jobs}
+
+def _pipeline_snapshot(pipeline_id: str) -> dict:
+    jobs = [job_view(j) for j in get_job_queue().list_jobs(pipeline_id=pipeline_id)]
+    if not jobs:
+        raise HTTPException(status_code=404, detail="pipeline not found")
+    counts = {}
+    for j in jobs:
+        counts[j["status"]] = counts.get(j["status"], 0) + 1
+    return {"pipeline_id": pipeline_id, "status": pipeline_status(jobs), "counts": counts, "jobs": jobs}
+
+@router.get("/pipeline/{pipeline_id}")
+async def get_pipeline(pipeline_id: str):
+    return await run_in_pool("io", _pipeline_snapshot, pipeline_id)
+
+@router.get("/pipeline/{pipeline_id}/events")
+async def stream_pipeline(pipeline_id: str):
+    """
+    NDJSON stream: one line per job state change, then a final
+    {"event": "done"} line once every job is finished.
+    """
+    await run_in_pool("io", _pipeline_snapshot, pipeline_id)  # 404 before streaming
+
+    async def events():
+        seen = {}
+        while True:
+            snapshot = await run_in_pool("io", _pipeline_snapshot, pipeline_id)
+            for job in snapshot["jobs"]:
+                if seen.get(job["job_id"]) != job["status"]:
+                    seen[job["job_id"]] = job["status"]
+                    yield json.dumps({"event": "job", **job}, ensure_ascii=False) + "\n"
+            if all(j["status"] in TERMINAL for j in snapshot["jobs"]):
+                yield json.dumps({"event": "done", "status": snapshot["status"], "counts": snapshot["counts"]}) + "\n"
+                return
+            await asyncio.sleep(_STREAM_POLL_S)
+
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = await run_in_pool("io", get_job_queue().get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="job not found")
+    return job_view(job)
+
+@router.delete("/jobs/{job_id}")
+async def cancel_job(job_id: str):
+    """
+    Cancel a queued job (and fail the jobs waiting on it). Running jobs finish.
+    """
+    cancelled = await run_in_pool("io", get_job_queue().cancel, job_id)
+    if not cancelled:
+        raise HTTPException(status_code=409, detail="job is not queued (or does not exist)")
+    return {"status": "cancelled", "job_id": job_id}
@@ -0,0 +1,40 @@
+# backend/app/api/routes/score_batch.py
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from typing import List, Optional
+
+from backend.app.core.batch_scoring import score_items, iter_stored_answers, iter_ndjson
+from backend.app.core.session_store import get_store
+
+router = APIRouter(tags=["Scoring"])
+
+class BatchItem(BaseModel):
+    session_id: str
+    question_id: str
+    answer_text: str
+
+class BatchScoreIn(BaseModel):
+    items: Optional[List[BatchItem]] = None
+    session_ids: Optional[List[str]] = None
+    all_sessions: bool = False
+    write: bool = True
+    explain: bool = True
+
+@router.post("/score/batch")
+def score_batch(payload: BatchScoreIn):
+    """
+    Score many answers at once, streamed back as NDJSON (one result per line).
+    Either pass explicit items, or session_ids / all_sessions to re-score the
+    stored text answers of those sessions.
+    """
+    if payload.items:
+        items = [item.dict() for item in payload.items]
+    elif payload.session_ids or payload.all_sessions:
+        items = iter_stored_answers(get_store(), payload.session_ids or None)
+    else:
+        raise HTTPException(status_code=400, detail="items, session_ids or all_sessions required")
+
+    # sync generator: Starlette iterates it in the threadpool, off the event loop
+    results = score_items(items, write=payload.write, explain=payload.explain)
+    return StreamingResponse(iter_ndjson(results), media_type="application/x-ndjson")
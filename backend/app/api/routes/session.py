@@ -1,14 +1,14 @@
 # backend/app/api/routes/session.py
-from fastapi import APIRouter
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Query
 from pydantic import BaseModel
-import uuid
-import os
-from pathlib import Path
-from typing import List
 
-router = APIRouter(tags=["Session"])
+from backend.app.core.inference_pool import run_in_pool
+from backend.app.core.session_report import get_report, get_report_index, rebuild_report
+from backend.app.core.session_store import get_store
 
-STORAGE_ROOT = Path.cwd() / "storage"
+router = APIRouter(tags=["Session"])
 
 class SessionCreateResponse(BaseModel):
     session_id: str
@@ -16,11 +16,34 @@ class SessionCreateResponse(BaseModel):
 
 @router.post("/session/create", response_model=SessionCreateResponse)
 async def create_session():
-    sid = str(uuid.uuid4())
-    session_dir = STORAGE_ROOT / sid
-    os.makedirs(session_dir, exist_ok=True)
-    # create subfolders
-    (session_dir / "resumes").mkdir(exist_ok=True)
-    (session_dir / "audio").mkdir(exist_ok=True)
-    (session_dir / "text_answers").mkdir(exist_ok=True)
-    return {"session_id": sid, "storage_path": str(session_dir)}
+    # creates storage/<sid>/ with resumes/, audio/ and text_answers/
+    store = get_store()
+    sid = store.create_session()
+    return {"session_id": sid, "storage_path": str(store.session_dir(sid))}
+
+@router.get("/session/{session_id}/report")
+async def session_report(session_id: str, rebuild: bool = False):
+    """
+    Running report of a session: per-type averages, skill coverage, review
+    flags and completed / pending questions. Kept up to date on every score
+    write, so this is a single lookup; rebuild=true recomputes it from the
+    stored score files.
+    """
+    store = get_store()
+    if not store.session_exists(session_id):
+        raise HTTPException(status_code=404, detail="session_id not found")
+    if rebuild:
+        return await run_in_pool("io", rebuild_report, session_id, store)
+    return await run_in_pool("io", get_report, session_id)
+
+@router.get("/sessions/summary")
+async def sessions_summary(
+    since: Optional[float] = Query(None, description="only sessions updated at or after this unix time"),
+    top: int = Query(20, ge=1, le=500),
+):
+    """
+    Cross-session summary (sessions, completion, average scores, review load,
+    per question type and per skill) from the report index, without reading
+    any session directory.
+    """
+    return await run_in_pool("io", get_report_index().summary, since, top)
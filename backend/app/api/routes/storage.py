@@ -0,0 +1,25 @@
+# backend/app/api/routes/storage.py
+from fastapi import APIRouter, HTTPException, Query
+
+from backend.app.core.inference_pool import run_in_pool
+from backend.app.core.storage_lifecycle import get_lifecycle
+
+router = APIRouter(tags=["Storage"])
+
+@router.get("/storage/lifecycle")
+async def lifecycle_status():
+    """
+    Lifecycle thread state, archive totals and the last pass's report
+    (runtime, media files dropped, sessions archived, reclaimed bytes).
+    """
+    return await run_in_pool("io", get_lifecycle().status)
+
+@router.post("/storage/lifecycle/run")
+async def run_lifecycle(dry_run: bool = Query(False, description="only report what would be reclaimed")):
+    """
+    Run one retention / compaction pass now and return its report.
+    """
+    report = await run_in_pool("io", get_lifecycle().run_once, dry_run)
+    if report is None:
+        raise HTTPException(status_code=409, detail="a lifecycle pass is already running")
+    return report
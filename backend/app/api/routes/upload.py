@@ -1,8 +1,10 @@
 # backend/app/api/routes/upload.py
-from fastapi import APIRouter, UploadFile, File, Form, HTTPException
+from fastapi import APIRouter, HTTPException, Request
 from pydantic import BaseModel
-from pathlib import Path
-import shutil
+
+from backend.app.core.inference_pool import run_in_pool
+from backend.app.core.session_store import get_store
+from backend.app.core.uploads import safe_filename, streamed_upload, upload_openapi
 
 router = APIRouter(tags=["Upload"])
 
@@ -10,13 +12,20 @@ class UploadResponse(BaseModel):
     filename: str
     saved_path: str
     session_id: str
+    sha256: str
+    size: int
+    deduplicated: bool
 
-@router.post("/upload/resume", response_model=UploadResponse)
-async def upload_resume(session_id: str = Form(...), file: UploadFile = File(...)):
-    base = Path.cwd() / "storage" / session_id / "resumes"
-    if not base.exists():
-        raise HTTPException(status_code=404, detail="Session not found")
-    out_path = base / file.filename
-    with out_path.open("wb") as f:
-        shutil.copyfileobj(file.file, f)
-    return {"filename": file.filename, "saved_path": str(out_path), "session_id": session_id}
+@router.post("/upload/resume", response_model=UploadResponse, openapi_extra=upload_openapi("session_id"))
+async def upload_resume(request: Request):
+    # multipart body: session_id, file
+    async with streamed_upload(request, "resume") as upload:
+        session_id = upload.field("session_id")
+        store = get_store()
+        if not store.session_exists(session_id):
+            raise HTTPException(status_code=404, detail="Session not found")
+        base = await run_in_pool("io", store.media_dir, session_id, "resumes")
+        filename = safe_filename(upload.filename, "resume")
+        saved = await upload.save(base / filename)
+    return {"filename": filename, "saved_path": saved["path"], "session_id": session_id,
+            "sha256": saved["sha256"], "size": saved["size"], "deduplicated": saved["deduplicated"]}
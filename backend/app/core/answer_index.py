@@ -0,0 +1,585 @@
+"""
+Cross-session answer index.
+
+Every scored answer embedding is appended to one index so reviewers can see
+the most similar past answers to the same question topic and copied answers
+can be flagged, without a linear scan over every stored score file.
+
+On disk (ANSWER_INDEX_DIR):
+  * vectors.f32  - growable float32 memmap of l2-normalized answer vectors
+  * rows.jsonl   - one metadata line per row (session, question, topic, ...);
+                   a row only exists once its line is written
+  * centroids.npy, lists.i32 - IVF coarse quantizer and row -> list assignment
+  * meta.json    - dimension and the row count the IVF was trained on
+
+Below ANSWER_INDEX_IVF_MIN rows every query is an exact matrix-vector
+product. Above it a spherical k-means quantizer is trained in the background
+(and retrained whenever the index doubles); new rows are assigned to their
+nearest list as they are added, and queries scan only the ANSWER_INDEX_NPROBE
+closest lists. Queries restricted to one topic scan that topic's rows exactly
+while it is small. Re-scoring a (session, question) appends a new row and
+retires the old one.
+
+Several processes (gunicorn workers) may share one index: appends and IVF
+swaps take an exclusive flock on .lock and pick their rows from rows.jsonl as
+it is on disk at that moment, after reading the rows the other processes
+appended. Each row is written vector first, list assignment second and
+metadata line last, so a reader that sees the line also sees the rest;
+queries pick up new rows by reading the new tail of rows.jsonl, and a
+retrained quantizer by the changed centroids.npy.
+
+CLI:
+    python -m backend.app.core.answer_index backfill   # index stored text answers
+    python -m backend.app.core.answer_index train      # (re)train the IVF now
+    python -m backend.app.core.answer_index stats
+"""
+
+import argparse
+import fcntl
+import json
+import threading
+import time
+import traceback
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from backend.app.core import config
+from backend.app.core.metrics import timed
+
+_ASSIGN_CHUNK = 8192
+
+
+def question_topic(q_obj: dict) -> str:
+    """
+    Grouping key for "answers to the same question": technical questions are
+    generated per skill, HR questions share fixed ids across sessions.
+    """
+    skill = (q_obj.get("skill") or "").strip().lower()
+    return f"skill:{skill}" if skill else f"question:{q_obj.get('id')}"
+
+
+def _normalize(m: np.ndarray) -> np.ndarray:
+    m = np.asarray(m, dtype=np.float32)
+    norms = np.linalg.norm(m, axis=-1, keepdims=True)
+    return m / np.maximum(norms, 1e-12)
+
+
+def _nearest(X: np.ndarray, C: np.ndarray) -> np.ndarray:
+    """
+    Index of the closest centroid (max inner product) for every row, chunked
+    so the (rows x lists) score matrix stays small.
+    """
+    out = np.empty(len(X), dtype=np.int32)
+    for start in range(0, len(X), _ASSIGN_CHUNK):
+        out[start:start + _ASSIGN_CHUNK] = np.argmax(X[start:start + _ASSIGN_CHUNK] @ C.T, axis=1)
+    return out
+
+
+def spherical_kmeans(X: np.ndarray, k: int, iters: int = 10, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    C = X[rng.choice(len(X), size=k, replace=False)].copy()
+    for _ in range(iters):
+        labels = _nearest(X, C)
+        order = np.argsort(labels, kind="stable")
+        present, starts = np.unique(labels[order], return_index=True)
+        sums = np.add.reduceat(X[order], starts, axis=0)
+        empty = np.ones(k, dtype=bool)
+        empty[present] = False
+        C[present] = sums
+        if empty.any():
+            # re-seed empty lists from random rows
+            C[empty] = X[rng.choice(len(X), size=int(empty.sum()), replace=False)]
+        C = _normalize(C)
+    return C
+
+
+class AnswerIndex:
+    _GROW_ROWS = 4096
+
+    def __init__(self, directory: Path, ivf_min: Optional[int] = None,
+                 nlist: Optional[int] = None, nprobe: Optional[int] = None):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.ivf_min = config.ANSWER_INDEX_IVF_MIN if ivf_min is None else ivf_min
+        self.nlist = config.ANSWER_INDEX_NLIST if nlist is None else nlist
+        self.nprobe = max(1, config.ANSWER_INDEX_NPROBE if nprobe is None else nprobe)
+
+        self._vectors_path = self.directory / "vectors.f32"
+        self._rows_path = self.directory / "rows.jsonl"
+        self._centroids_path = self.directory / "centroids.npy"
+        self._lists_path = self.directory / "lists.i32"
+        self._meta_path = self.directory / "meta.json"
+        self._lock_path = self.directory / ".lock"
+
+        self._lock = threading.RLock()
+        self._dim = None
+        self._capacity = 0
+        self._mm = None
+        self._rows: List[dict] = []
+        self._alive = np.zeros(0, dtype=bool)
+        self._latest: Dict[Tuple[str, str], int] = {}
+        self._topics: Dict[str, List[int]] = {}
+        self._sessions: Dict[str, List[int]] = {}
+        self._centroids: Optional[np.ndarray] = None
+        self._assign = np.zeros(0, dtype=np.int32)
+        self._lists: Optional[List[np.ndarray]] = None
+        self._trained_rows = 0
+        self._training = False
+        # bytes of rows.jsonl already read, and the centroids.npy in use
+        self._rows_offset = 0
+        self._centroids_stamp = None
+        with self._lock:
+            self._refresh()
+
+    # ---- persistence ----
+
+    def _write_meta(self):
+        self._meta_path.write_text(json.dumps({
+            "dim": self._dim, "dtype": "float32", "trained_rows": self._trained_rows,
+        }))
+
+    def _file_lock(self):
+        """
+        Exclusive cross-process lock for appends and IVF swaps (released on close).
+        """
+        f = self._lock_path.open("a")
+        fcntl.flock(f, fcntl.LOCK_EX)
+        return f
+
+    def _refresh(self):
+        """
+        Read what other processes wrote since the last call: new rows.jsonl
+        lines and a retrained quantizer. Caller holds self._lock.
+        """
+        if self._dim is None:
+            if not self._meta_path.exists():
+                return
+            self._dim = int(json.loads(self._meta_path.read_text(encoding="utf-8"))["dim"])
+        try:
+            size = self._rows_path.stat().st_size
+        except FileNotFoundError:
+            size = 0
+        n_before = len(self._rows)
+        if size > self._rows_offset:
+            with self._rows_path.open("rb") as f:
+                f.seek(self._rows_offset)
+                chunk = f.read(size - self._rows_offset)
+            # only whole lines: a concurrent append may be half written
+            complete = chunk[: chunk.rfind(b"\n") + 1]
+            infos = [json.loads(line) for line in complete.decode("utf-8").splitlines() if line]
+            self._rows_offset += len(complete)
+            if len(self._rows) + len(infos) > self._capacity:
+                self._open()
+            # a crash between the vector write and its metadata line leaves an
+            # unreferenced vector row; it is simply overwritten by the next add
+            for info in infos[: max(0, self._capacity - len(self._rows))]:
+                self._register(len(self._rows), info)
+        if self._mm is None and self._vectors_path.exists():
+            self._open()
+
+        n = len(self._rows)
+        stamp = self._stamp(self._centroids_path)
+        if stamp is not None and stamp != self._centroids_stamp:
+            # first load, or another process retrained: take its lists wholesale
+            self._centroids = np.load(self._centroids_path)
+            self._centroids_stamp = stamp
+            if self._meta_path.exists():
+                self._trained_rows = int(json.loads(self._meta_path.read_text(encoding="utf-8")).get("trained_rows", 0))
+            self._assign = self._read_assign(0, n)
+            self._lists = None
+        elif self._centroids is not None and n > self._assign.size:
+            self._assign = np.concatenate([self._assign, self._read_assign(self._assign.size, n)])
+            self._lists = None
+        elif n > n_before:
+            self._lists = None
+
+    @staticmethod
+    def _stamp(path: Path):
+        try:
+            st = path.stat()
+        except FileNotFoundError:
+            return None
+        return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+    def _read_assign(self, start: int, stop: int) -> np.ndarray:
+        """
+        List assignment of rows [start, stop) from lists.i32; rows it does
+        not cover yet are assigned here.
+        """
+        stored = np.zeros(0, dtype=np.int32)
+        if self._lists_path.exists() and stop > start:
+            with self._lists_path.open("rb") as f:
+                f.seek(start * 4)
+                stored = np.frombuffer(f.read((stop - start) * 4), dtype=np.int32)
+            stored = stored[: (stop - start)]
+        if stored.size < stop - start:
+            rest = _nearest(np.asarray(self._mm[start + stored.size:stop]), self._centroids)
+            stored = np.concatenate([stored, rest])
+        return stored.astype(np.int32, copy=False)
+
+    def _write_assign(self, start: int, assign: np.ndarray):
+        """
+        Write rows [start, start + len(assign)) to lists.i32, first filling in
+        any rows before start that the file does not cover yet. Under the flock.
+        """
+        existing = self._lists_path.stat().st_size // 4 if self._lists_path.exists() else 0
+        existing = min(existing, start)
+        data = np.concatenate([self._assign[existing:start], assign]).astype(np.int32)
+        with self._lists_path.open("r+b" if self._lists_path.exists() else "wb") as f:
+            f.seek(existing * 4)
+            f.write(data.tobytes())
+
+    def _open(self):
+        size = self._vectors_path.stat().st_size if self._vectors_path.exists() else 0
+        self._capacity = size // (4 * self._dim)
+        if self._capacity:
+            self._mm = np.memmap(self._vectors_path, dtype=np.float32, mode="r+",
+                                 shape=(self._capacity, self._dim))
+        if self._alive.size < self._capacity:
+            self._alive = np.concatenate([self._alive, np.zeros(self._capacity - self._alive.size, dtype=bool)])
+
+    def _grow(self, rows_needed: int):
+        new_capacity = max(rows_needed, self._capacity + self._GROW_ROWS, self._capacity * 2)
+        if self._mm is not None:
+            # searches may still hold the old mapping; it stays valid for the rows it covers
+            self._mm.flush()
+        with self._vectors_path.open("ab") as f:
+            # another process may already have grown the file further
+            if f.tell() < new_capacity * self._dim * 4:
+                f.truncate(new_capacity * self._dim * 4)
+        self._open()
+
+    def _register(self, row: int, info: dict):
+        key = (info["session_id"], info["question_id"])
+        previous = self._latest.get(key)
+        if previous is not None:
+            self._alive[previous] = False
+        self._latest[key] = row
+        self._alive[row] = True
+        self._rows.append(info)
+        self._topics.setdefault(info.get("topic"), []).append(row)
+        self._sessions.setdefault(info["session_id"], []).append(row)
+
+    # ---- writes ----
+
+    def __len__(self):
+        return len(self._latest)
+
+    def add_many(self, infos: List[dict], vectors) -> List[int]:
+        """
+        Append answers; each info needs session_id, question_id and topic.
+        A (session_id, question_id) already in the index is superseded.
+        """
+        if not infos:
+            return []
+        vecs = _normalize(np.asarray(vectors, dtype=np.float32).reshape(len(infos), -1))
+        with self._lock, self._file_lock():
+            self._refresh()
+            if self._dim is None:
+                self._dim = int(vecs.shape[1])
+                self._write_meta()
+            if vecs.shape[1] != self._dim:
+                raise ValueError(f"embedding dim {vecs.shape[1]} != index dim {self._dim}")
+            if self._rows_path.exists() and self._rows_path.stat().st_size > self._rows_offset:
+                # no writer is active under the lock: this is a line cut short by a crash
+                with self._rows_path.open("ab") as f:
+                    f.truncate(self._rows_offset)
+            start = len(self._rows)
+            end = start + len(infos)
+            if end > self._capacity:
+                self._grow(end)
+            self._mm[start:end] = vecs
+            self._mm.flush()
+
+            if self._centroids is not None:
+                assign = _nearest(vecs, self._centroids)
+                self._write_assign(start, assign)
+                self._assign = np.concatenate([self._assign, assign])
+                self._lists = None
+
+            now = time.time()
+            lines = []
+            for info in infos:
+                info = dict(info, indexed_at=info.get("indexed_at", now))
+                lines.append(json.dumps(info, ensure_ascii=False, separators=(",", ":")) + "\n")
+                self._register(len(self._rows), info)
+            data = "".join(lines).encode("utf-8")
+            with self._rows_path.open("ab") as f:
+                f.write(data)
+            self._rows_offset += len(data)
+            rows = list(range(start, end))
+
+            if self._should_train():
+                self._training = True
+                threading.Thread(target=self._train_safe, name="answer-index-train", daemon=True).start()
+        return rows
+
+    def add(self, info: dict, vector) -> int:
+        return self.add_many([info], [vector])[0]
+
+    def flush(self):
+        with self._lock:
+            if self._mm is not None:
+                self._mm.flush()
+
+    # ---- IVF ----
+
+    def _should_train(self) -> bool:
+        n = len(self._rows)
+        if self._training or n < max(self.ivf_min, 1):
+            return False
+        return self._centroids is None or n >= 2 * self._trained_rows
+
+    def _train_safe(self):
+        try:
+            self.train()
+        except Exception as e:
+            print("Answer index training failed:", e)
+            print(traceback.format_exc())
+        finally:
+            self._training = False
+
+    def train(self, seed: int = 0):
+        """
+        Fit the coarse quantizer on a sample of the current rows, assign every
+        row, then swap it in. Rows added meanwhile are assigned at the swap.
+        """
+        with self._lock:
+            n = len(self._rows)
+            mm = self._mm
+        if n == 0:
+            return
+        t0 = time.perf_counter()
+        nlist = self.nlist or int(4 * np.sqrt(n))
+        nlist = max(1, min(nlist, n))
+        rng = np.random.default_rng(seed)
+        sample_size = min(n, max(50 * nlist, 10000))
+        sample_rows = np.sort(rng.choice(n, size=sample_size, replace=False))
+        centroids = spherical_kmeans(np.asarray(mm[sample_rows]), nlist, seed=seed)
+        assign = _nearest(np.asarray(mm[:n]), centroids)
+
+        with self._lock, self._file_lock():
+            self._refresh()
+            total = len(self._rows)
+            if total > n:
+                assign = np.concatenate([assign, _nearest(np.asarray(self._mm[n:total]), centroids)])
+            # lists first: a reader that sees the new centroids reads the new lists
+            tmp = self._lists_path.with_suffix(".tmp")
+            assign.tofile(tmp)
+            tmp.replace(self._lists_path)
+            with self._centroids_path.with_suffix(".tmp.npy").open("wb") as f:
+                np.save(f, centroids)
+            self._centroids_path.with_suffix(".tmp.npy").replace(self._centroids_path)
+            self._centroids = centroids
+            self._centroids_stamp = self._stamp(self._centroids_path)
+            self._assign = assign
+            self._lists = None
+            self._trained_rows = total
+            self._write_meta()
+        print(f"Answer index: trained {nlist} lists over {n} rows in {time.perf_counter() - t0:.1f}s")
+
+    def _inverted_lists(self) -> Optional[List[np.ndarray]]:
+        if self._centroids is None:
+            return None
+        if self._lists is None:
+            order = np.argsort(self._assign, kind="stable").astype(np.int64)
+            bounds = np.searchsorted(self._assign[order], np.arange(len(self._centroids) + 1))
+            self._lists = [order[bounds[i]:bounds[i + 1]] for i in range(len(self._centroids))]
+        return self._lists
+
+    # ---- queries ----
+
+    def get_vector(self, session_id: str, question_id: str) -> Optional[np.ndarray]:
+        with self._lock:
+            self._refresh()
+            row = self._latest.get((session_id, question_id))
+            return None if row is None else np.array(self._mm[row])
+
+    def get_info(self, session_id: str, question_id: str) -> Optional[dict]:
+        with self._lock:
+            self._refresh()
+            row = self._latest.get((session_id, question_id))
+            return None if row is None else self._rows[row]
+
+    def search(self, vector, k: int = 5, topic: Optional[str] = None,
+               exclude_session: Optional[str] = None, exact: bool = False) -> List[dict]:
+        """
+        Top-k live answers by cosine similarity, best first.
+        """
+        q = _normalize(np.asarray(vector, dtype=np.float32).ravel())
+        with self._lock:
+            self._refresh()
+            n = len(self._rows)
+            if n == 0 or self._mm is None:
+                return []
+            mm = self._mm
+            alive = self._alive[:n].copy()
+            topic_rows = np.asarray(self._topics.get(topic, []), dtype=np.int64) if topic is not None else None
+            lists = None if exact else self._inverted_lists()
+            centroids = self._centroids
+            if exclude_session is not None:
+                alive[self._sessions.get(exclude_session, [])] = False
+
+        if topic_rows is not None and (topic_rows.size <= self.ivf_min or lists is None):
+            candidates = topic_rows  # small topic: exact scan of its rows
+        elif lists is not None:
+            probe = np.argsort(-(centroids @ q))[: self.nprobe]
+            candidates = np.sort(np.concatenate([lists[i] for i in probe]))
+            candidates = candidates[candidates < n]
+            if topic_rows is not None:
+                candidates = candidates[np.isin(candidates, topic_rows, assume_unique=True)]
+        else:
+            candidates = None
+
+        if candidates is None:
+            rows = np.flatnonzero(alive)
+            sims = np.asarray(mm[:n] @ q)[rows]
+        else:
+            rows = candidates[alive[candidates]]
+            sims = np.asarray(mm[rows]) @ q if rows.size else np.zeros(0, dtype=np.float32)
+        if rows.size == 0:
+            return []
+
+        k = min(k, rows.size)
+        top = np.argpartition(-sims, k - 1)[:k]
+        top = top[np.argsort(-sims[top], kind="stable")]
+        return [dict(self._rows[int(rows[i])], similarity=round(float(sims[i]), 4)) for i in top]
+
+    def stats(self) -> dict:
+        with self._lock:
+            self._refresh()
+            return {
+                "rows": len(self._rows),
+                "live": len(self._latest),
+                "dim": self._dim,
+                "topics": len(self._topics),
+                "mode": "ivf" if self._centroids is not None else "flat",
+                "nlist": 0 if self._centroids is None else len(self._centroids),
+                "nprobe": self.nprobe,
+                "trained_rows": self._trained_rows,
+                "training": self._training,
+                "ivf_min": self.ivf_min,
+                "disk_mb": round(self._capacity * (self._dim or 0) * 4 / 1e6, 2),
+            }
+
+
+_index: Optional[AnswerIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_answer_index() -> AnswerIndex:
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = AnswerIndex(Path(config.ANSWER_INDEX_DIR))
+    return _index
+
+
+def _indexable(text: str) -> bool:
+    return len((text or "").split()) >= config.ANSWER_INDEX_MIN_TOKENS
+
+
+def _entry(session_id: str, q_obj: dict, score_obj: dict) -> dict:
+    return {
+        "session_id": session_id,
+        "question_id": q_obj.get("id"),
+        "topic": question_topic(q_obj),
+        "score": score_obj.get("score"),
+        "excerpt": (score_obj.get("answer_excerpt") or "")[:200],
+    }
+
+
+@timed("answer_index")
+def index_and_compare_many(entries: List[Tuple[str, dict, dict]], vectors, k: int = 3) -> List[Optional[dict]]:
+    """
+    Add scored answers ((session_id, q_obj, score_obj) + answer vectors) to
+    the index, then look up the most similar answers to the same topic from
+    other sessions. Adding first means two copies scored in the same batch
+    still find each other. Returns {similar_answers, possible_duplicate} per
+    entry, or None when indexing is disabled or fails (scoring never does)
+    and for answers shorter than ANSWER_INDEX_MIN_TOKENS words.
+    """
+    if not config.ANSWER_INDEX or not entries:
+        return [None] * len(entries)
+    try:
+        keep = [i for i, e in enumerate(entries) if _indexable(e[2].get("answer_excerpt"))]
+        results: List[Optional[dict]] = [None] * len(entries)
+        if not keep:
+            return results
+        index = get_answer_index()
+        infos = [_entry(*entries[i]) for i in keep]
+        kept_vectors = [vectors[i] for i in keep]
+        index.add_many(infos, kept_vectors)
+        for i, info, vec in zip(keep, infos, kept_vectors):
+            similar = index.search(vec, k=k, topic=info["topic"], exclude_session=info["session_id"])
+            results[i] = {
+                "similar_answers": similar,
+                "possible_duplicate": bool(similar) and similar[0]["similarity"] >= config.ANSWER_DUPLICATE_THRESHOLD,
+            }
+        return results
+    except Exception as e:
+        print("Answer indexing failed:", e)
+        print(traceback.format_exc())
+        return [None] * len(entries)
+
+
+def index_and_compare(session_id: str, q_obj: dict, score_obj: dict, vector, k: int = 3) -> Optional[dict]:
+    return index_and_compare_many([(session_id, q_obj, score_obj)], [vector], k=k)[0]
+
+
+def backfill(store=None, chunk_size: int = 256) -> int:
+    """
+    Index stored text answers that are not in the index yet.
+    """
+    from backend.app.core.ml_models import encode_sentence
+    from backend.app.core.scoring import find_question
+    from backend.app.core.session_store import get_store
+
+    store = store or get_store()
+    index = get_answer_index()
+    added = 0
+    pending: List[Tuple[dict, str]] = []
+
+    def _flush():
+        nonlocal added
+        if pending:
+            vecs = encode_sentence([text for _, text in pending], convert_to_tensor=False)
+            index.add_many([info for info, _ in pending], vecs)
+            added += len(pending)
+            pending.clear()
+
+    for session_id in store.list_sessions():
+        try:
+            plan = store.get_plan(session_id)
+        except FileNotFoundError:
+            continue
+        for answer in store.list_text_answers(session_id):
+            q_obj = find_question(plan, answer.get("question_id"))
+            text = answer.get("answer_text") or ""
+            if q_obj is None or not _indexable(text) or index.get_info(session_id, q_obj.get("id")) is not None:
+                continue
+            pending.append((_entry(session_id, q_obj, {"answer_excerpt": text}), text))
+            if len(pending) >= chunk_size:
+                _flush()
+    _flush()
+    index.flush()
+    return added
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cross-session answer index")
+    parser.add_argument("command", choices=["backfill", "train", "stats"])
+    args = parser.parse_args(argv)
+    index = get_answer_index()
+    if args.command == "backfill":
+        print(f"indexed {backfill()} stored answers")
+    elif args.command == "train":
+        index.train()
+    print(json.dumps(index.stats(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
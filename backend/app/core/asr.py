@@ -0,0 +1,312 @@
+"""
+Speech recognition models.
+
+get_asr_pipeline() returns a callable with the transformers ASR pipeline
+interface: it accepts a file path or {"raw": float32 array, "sampling_rate": int}
+and returns {"text": ...}. With ASR_BACKEND=stub (or the "stub" profile) a
+model-free stand-in is returned so tests and load runs work offline.
+
+With ASR_PROCESS_WORKERS > 0, transcribe() is dispatched to a pool of
+long-lived worker processes that each hold their own warm model.
+
+Model and decoding settings can be chosen as one named profile
+(ASR_PROFILE, see ASR_PROFILES), which is what
+`python -m backend.benchmarks.asr_eval` measures; without a profile the
+individual ASR_* settings apply.
+"""
+
+import json
+import threading
+from pathlib import Path
+from typing import Dict, Optional
+
+import numpy as np
+
+from backend.app.core import config
+from backend.app.core.metrics import timed
+
+ASR_SAMPLE_RATE = 16000
+
+
+class StubASR:
+    """
+    Deterministic offline stand-in for the Whisper pipeline.
+    Returns a fixed phrase per second of (non-silent) audio.
+    """
+
+    def __init__(self, phrase: str = "i built machine learning pipelines in python"):
+        self.phrase = phrase
+
+    def _transcribe_one(self, inputs) -> dict:
+        if isinstance(inputs, dict):
+            audio = np.asarray(inputs.get("raw", []), dtype=np.float32)
+            seconds = len(audio) / float(inputs.get("sampling_rate") or ASR_SAMPLE_RATE)
+            if audio.size == 0 or float(np.max(np.abs(audio))) < 1e-4:
+                return {"text": ""}
+        else:
+            seconds = 1.0
+        repeats = max(1, int(round(seconds)))
+        return {"text": " ".join([self.phrase] * repeats)}
+
+    def __call__(self, inputs, **kwargs):
+        if isinstance(inputs, list):
+            return [self._transcribe_one(x) for x in inputs]
+        return self._transcribe_one(inputs)
+
+
+# =========================
+# Named configurations
+# =========================
+
+# candidate production configurations; evaluate them with
+# `python -m backend.benchmarks.asr_eval run` and pick one with ASR_PROFILE=<name>
+ASR_PROFILES: Dict[str, dict] = {
+    "whisper-small": {"backend": "whisper", "model": "openai/whisper-small"},
+    "whisper-small-int8": {"backend": "whisper", "model": "openai/whisper-small", "quantize_int8": True},
+    "whisper-base": {"backend": "whisper", "model": "openai/whisper-base"},
+    "whisper-base-int8": {"backend": "whisper", "model": "openai/whisper-base", "quantize_int8": True},
+    "whisper-tiny": {"backend": "whisper", "model": "openai/whisper-tiny"},
+    "whisper-tiny-int8": {"backend": "whisper", "model": "openai/whisper-tiny", "quantize_int8": True},
+    "whisper-base-chunk15": {"backend": "whisper", "model": "openai/whisper-base", "chunk_length_s": 15},
+    "stub": {"backend": "stub", "model": "stub"},
+}
+
+# keys a profile may set
+PROFILE_KEYS = ("backend", "model", "quantize_int8", "batch_size", "chunk_length_s", "num_beams", "language")
+
+
+def load_profiles(path: Optional[str] = None) -> Dict[str, dict]:
+    """
+    Built-in profiles plus those in ASR_PROFILES_FILE (or path): a JSON
+    object {name: settings} or a list of settings with a "name" each, the
+    same format as an asr_eval matrix file.
+    """
+    profiles = {name: dict(p) for name, p in ASR_PROFILES.items()}
+    path = path if path is not None else config.ASR_PROFILES_FILE
+    if path:
+        data = json.loads(Path(path).read_text(encoding="utf-8"))
+        items = data.items() if isinstance(data, dict) else ((p["name"], p) for p in data)
+        for name, settings in items:
+            unknown = set(settings) - set(PROFILE_KEYS) - {"name"}
+            if unknown:
+                raise RuntimeError(f"ASR profile {name!r} has unknown settings {sorted(unknown)}")
+            profiles[name] = {k: v for k, v in settings.items() if k != "name"}
+    return profiles
+
+
+def resolve_profile(name: Optional[str] = None, profiles: Optional[Dict[str, dict]] = None) -> dict:
+    """
+    Complete settings of a named profile (default ASR_PROFILE). Settings a
+    profile leaves out, and everything when no profile is named, come from
+    the individual ASR_* variables.
+    """
+    settings = {
+        "name": "",
+        "backend": config.ASR_BACKEND,
+        "model": config.ASR_MODEL_NAME,
+        "quantize_int8": config.ASR_QUANTIZE_INT8,
+        "batch_size": config.ASR_BATCH_SIZE,
+        "chunk_length_s": 0,
+        "num_beams": 1,
+        "language": None,
+    }
+    name = config.ASR_PROFILE if name is None else name
+    if not name:
+        return settings
+    profiles = profiles if profiles is not None else load_profiles()
+    if name not in profiles:
+        raise RuntimeError(f"Unknown ASR_PROFILE {name!r}; expected one of {sorted(profiles)}")
+    settings.update(profiles[name])
+    settings["name"] = name
+    return settings
+
+
+# the configuration this process serves with
+PROFILE = resolve_profile()
+
+
+def _call_kwargs(profile: dict) -> dict:
+    generate = {}
+    if profile.get("num_beams", 1) > 1:
+        generate["num_beams"] = int(profile["num_beams"])
+    if profile.get("language"):
+        generate["language"] = profile["language"]
+    return {"generate_kwargs": generate} if generate else {}
+
+
+def build_asr_pipeline(profile: Optional[dict] = None):
+    """
+    Construct a new ASR pipeline (no caching) for a resolved profile
+    (default: PROFILE). Used by the in-process singleton, by every ASR
+    worker process and by the evaluation harness.
+    """
+    profile = profile or PROFILE
+    if profile["backend"] == "stub":
+        return StubASR()
+    # import inside function to avoid heavy import during FastAPI startup
+    try:
+        from transformers import pipeline as _pipeline
+    except Exception as e:
+        # provide a helpful message if transformers isn't importable
+        raise RuntimeError(f"Failed to import transformers.pipeline: {e}")
+    # this will download the model the first time it's called (may be slow)
+    kwargs = {"chunk_length_s": profile["chunk_length_s"]} if profile.get("chunk_length_s") else {}
+    asr = _pipeline("automatic-speech-recognition", model=profile["model"], **kwargs)
+    if profile.get("quantize_int8"):
+        import torch
+        asr.model = torch.quantization.quantize_dynamic(asr.model, {torch.nn.Linear}, dtype=torch.qint8)
+    asr.model.eval()
+    return asr
+
+
+# lazy ASR pipeline singleton; the lock makes sure concurrent first
+# requests load the model only once
+_asr = None
+_asr_lock = threading.Lock()
+def get_asr_pipeline():
+    global _asr
+    if _asr is None:
+        with _asr_lock:
+            if _asr is None:
+                print(f"📥 Loading ASR pipeline ({PROFILE['name'] or PROFILE['model']})...")
+                _asr = build_asr_pipeline(PROFILE)
+                print("✅ ASR pipeline loaded")
+    return _asr
+
+
+def asr_loaded() -> bool:
+    return _asr is not None
+
+
+# =========================
+# ASR worker processes
+# =========================
+
+# per-process model (and its profile) held by each worker
+_worker_asr = None
+_worker_profile = None
+
+
+def _init_worker(profile: dict):
+    global _worker_asr, _worker_profile
+    _worker_profile = profile
+    _worker_asr = build_asr_pipeline(profile)
+
+
+def _worker_transcribe(inputs) -> str:
+    return _run_one(_worker_asr, inputs, _worker_profile)
+
+
+def _worker_transcribe_batch(inputs: list) -> list:
+    return _run_batch(_worker_asr, inputs, _worker_profile)
+
+
+def _worker_ping() -> bool:
+    return _worker_asr is not None
+
+
+class ASRProcessPool:
+    """
+    Long-lived worker processes that each hold a warm (optionally int8
+    quantized) model, so CPU transcription scales across cores instead of
+    contending for the GIL. Uses spawn so workers never inherit torch state.
+    """
+
+    def __init__(self, workers: int, profile: dict):
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+        self.workers = workers
+        self._executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(profile,),
+        )
+        self.ready = False
+
+    def warm_up(self):
+        """
+        Block until every worker has started and loaded its model.
+        """
+        futures = [self._executor.submit(_worker_ping) for _ in range(self.workers)]
+        self.ready = all(f.result() for f in futures)
+        return self.ready
+
+    def transcribe(self, inputs) -> str:
+        return self._executor.submit(_worker_transcribe, inputs).result()
+
+    def transcribe_batch(self, inputs: list) -> list:
+        return self._executor.submit(_worker_transcribe_batch, inputs).result()
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+_process_pool = None
+
+
+def start_asr_process_pool(workers: int) -> ASRProcessPool:
+    """
+    Start the worker processes and install them once every worker has
+    loaded its model. A failed warm-up shuts the pool down and raises, so
+    transcribe() keeps running inline instead of on a broken pool.
+    """
+    global _process_pool
+    if _process_pool is None:
+        pool = ASRProcessPool(workers, PROFILE)
+        try:
+            if not pool.warm_up():
+                raise RuntimeError("ASR worker processes did not load the model")
+        except BaseException:
+            pool.shutdown()
+            raise
+        _process_pool = pool
+    return _process_pool
+
+
+def stop_asr_process_pool():
+    global _process_pool
+    if _process_pool is not None:
+        _process_pool.shutdown()
+        _process_pool = None
+
+
+def asr_status() -> dict:
+    profile = {"profile": PROFILE["name"] or None, "model": PROFILE["model"]}
+    if _process_pool is not None:
+        return {"mode": "process", "workers": _process_pool.workers, "loaded": _process_pool.ready, **profile}
+    return {"mode": "inline", "loaded": asr_loaded(), **profile}
+
+
+def _run_one(asr, inputs, profile: dict) -> str:
+    result = asr(inputs, **_call_kwargs(profile))
+    text = result.get("text") if isinstance(result, dict) else str(result)
+    return (text or "").strip()
+
+
+def _run_batch(asr, inputs: list, profile: dict) -> list:
+    if not inputs:
+        return []
+    results = asr(inputs, batch_size=profile["batch_size"], **_call_kwargs(profile))
+    return [((r.get("text") if isinstance(r, dict) else str(r)) or "").strip() for r in results]
+
+
+@timed("asr", model=PROFILE["model"])
+def transcribe_batch(inputs: list) -> list:
+    """
+    Transcribe several {"raw", "sampling_rate"} segments in batched forward passes.
+    """
+    if _process_pool is not None:
+        return _process_pool.transcribe_batch(inputs)
+    return _run_batch(get_asr_pipeline(), inputs, PROFILE)
+
+
+@timed("asr", model=PROFILE["model"])
+def transcribe(inputs) -> str:
+    """
+    Run ASR on a path or a {"raw", "sampling_rate"} dict and return the stripped text.
+    Dispatched to the worker processes when they are running.
+    """
+    if _process_pool is not None:
+        return _process_pool.transcribe(inputs)
+    return _run_one(get_asr_pipeline(), inputs, PROFILE)
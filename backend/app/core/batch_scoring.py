@@ -0,0 +1,212 @@
+"""
+Bulk answer scoring.
+
+Items are grouped by session so each parsed resume / plan is loaded once.
+Within a chunk every reference and every answer is encoded in one batch and
+all similarities come from a single row-wise cosine over the two matrices.
+
+CLI:
+    python -m backend.app.core.batch_scoring --all
+    python -m backend.app.core.batch_scoring --session <id> [--session <id> ...]
+    python -m backend.app.core.batch_scoring --items items.jsonl --no-write
+"""
+
+import argparse
+import json
+import sys
+import traceback
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+
+from backend.app.core import config
+from backend.app.core.answer_index import index_and_compare_many
+from backend.app.core.reference import build_reference_text, load_reference_embedding
+from backend.app.core.scoring import (
+    load_parsed_and_plan,
+    compute_top_matches_batch,
+    rowwise_cosine,
+    find_question,
+    build_score_obj,
+    write_score,
+)
+from backend.app.core.session_store import SessionStore, get_store, open_store
+
+
+def iter_stored_answers(store: SessionStore, session_ids: Optional[List[str]] = None) -> Iterator[dict]:
+    """
+    Yield {session_id, question_id, answer_text} for every stored text answer
+    of the given sessions, or of all sessions.
+    """
+    for session_id in session_ids or store.list_sessions():
+        for data in store.list_text_answers(session_id):
+            yield {
+                "session_id": data.get("session_id", session_id),
+                "question_id": data.get("question_id"),
+                "answer_text": data.get("answer_text", ""),
+            }
+
+
+def _error(item: dict, detail: str) -> dict:
+    return {
+        "status": "error",
+        "session_id": item.get("session_id"),
+        "question_id": item.get("question_id"),
+        "detail": detail,
+    }
+
+
+def _score_chunk(store: SessionStore, items: List[dict], write: bool, explain: bool) -> Iterator[dict]:
+    from backend.app.core.ml_models import encode_sentence, encode_sentence_cached
+
+    # group by session, loading each parsed resume / plan once
+    by_session: Dict[str, List[dict]] = OrderedDict()
+    for item in items:
+        by_session.setdefault(item.get("session_id"), []).append(item)
+
+    rows = []  # (item, plan, q_obj, ref_text, precomputed_ref or None)
+    for session_id, session_items in by_session.items():
+        try:
+            parsed, plan = load_parsed_and_plan(session_id, store)
+        except FileNotFoundError as e:
+            for item in session_items:
+                yield _error(item, str(e))
+            continue
+        for item in session_items:
+            q_obj = find_question(plan, item.get("question_id"))
+            if q_obj is None:
+                yield _error(item, "question_id not found in interview_plan.json")
+                continue
+            ref_text = build_reference_text(parsed, plan, q_obj)
+            ref_vec = load_reference_embedding(store.session_dir(session_id), q_obj.get("id"), ref_text)
+            rows.append((item, plan, q_obj, ref_text, ref_vec))
+
+    if not rows:
+        return
+
+    # references: precomputed rows, then one cached batch for the rest
+    missing = [r[3] for r in rows if r[4] is None]
+    encoded = iter(encode_sentence_cached(missing)) if missing else iter(())
+    ref_matrix = np.stack([r[4] if r[4] is not None else next(encoded) for r in rows]).astype(np.float32)
+
+    # answers: one batch
+    answers = [r[0].get("answer_text") or "" for r in rows]
+    ans_matrix = np.asarray(encode_sentence(answers, convert_to_tensor=False), dtype=np.float32)
+
+    sims = rowwise_cosine(ref_matrix, ans_matrix)
+
+    refs = [r[3] for r in rows]
+    explanations = compute_top_matches_batch(refs, answers, top_k=6) if explain else [[] for _ in rows]
+
+    score_objs = [
+        build_score_obj(item.get("session_id"), plan, q_obj, float(sim), ref_text, answer_text, top_matches)
+        for (item, plan, q_obj, ref_text, _), answer_text, sim, top_matches in zip(rows, answers, sims, explanations)
+    ]
+    # only written scores are indexed; --no-write runs leave the index untouched
+    if write:
+        similar = index_and_compare_many(
+            [(item.get("session_id"), q_obj, score_obj) for (item, _, q_obj, _, _), score_obj in zip(rows, score_objs)],
+            ans_matrix,
+        )
+    else:
+        similar = [None] * len(rows)
+
+    for (item, _, _, _, _), score_obj, neighbours in zip(rows, score_objs, similar):
+        session_id = item.get("session_id")
+        top_matches = score_obj["top_matches"]
+        if neighbours is not None:
+            score_obj.update(neighbours)
+        result = {
+            "status": "ok",
+            "session_id": session_id,
+            "question_id": score_obj["question_id"],
+            "similarity": score_obj["similarity"],
+            "score": score_obj["score"],
+            "needs_human_review": score_obj["needs_human_review"],
+            "top_matches": top_matches,
+        }
+        if neighbours is not None:
+            result.update(neighbours)
+        if write:
+            result["score_path"] = write_score(session_id, score_obj, store)
+        yield result
+
+
+def score_items(
+    items: Iterable[dict],
+    store: Optional[SessionStore] = None,
+    chunk_size: Optional[int] = None,
+    write: bool = True,
+    explain: bool = True,
+) -> Iterator[dict]:
+    """
+    Score (session_id, question_id, answer_text) items in vectorized chunks.
+    Yields one result dict per item; failures are yielded as status=error
+    rather than aborting the whole run.
+    """
+    store = store or get_store()
+    chunk_size = max(1, chunk_size or config.SCORE_BATCH_CHUNK)
+    chunk = []
+    for item in items:
+        if not (item.get("session_id") and item.get("question_id")):
+            yield _error(item, "session_id and question_id required")
+            continue
+        chunk.append(item)
+        if len(chunk) >= chunk_size:
+            yield from _score_chunk_safe(store, chunk, write, explain)
+            chunk = []
+    if chunk:
+        yield from _score_chunk_safe(store, chunk, write, explain)
+
+
+def _score_chunk_safe(store: SessionStore, chunk: List[dict], write: bool, explain: bool) -> Iterator[dict]:
+    # a chunk is the unit of work: materialize it so a failure half-way
+    # does not report some items twice
+    try:
+        results = list(_score_chunk(store, chunk, write, explain))
+    except Exception as e:
+        print("Error in batch scoring chunk:", e)
+        print(traceback.format_exc())
+        results = [_error(item, f"Internal error scoring answer: {e}") for item in chunk]
+    yield from results
+
+
+def iter_ndjson(results: Iterable[dict]) -> Iterator[str]:
+    for r in results:
+        yield json.dumps(r, ensure_ascii=False) + "\n"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk-score stored or supplied text answers (NDJSON out).")
+    parser.add_argument("--storage", default=config.STORAGE_DIR, help="storage root")
+    parser.add_argument("--store", default=config.SESSION_STORE, help="session store backend (fs / sqlite)")
+    parser.add_argument("--session", action="append", default=[], help="score stored answers of this session")
+    parser.add_argument("--all", action="store_true", help="score stored answers of every session")
+    parser.add_argument("--items", help="NDJSON file of {session_id, question_id, answer_text} ('-' for stdin)")
+    parser.add_argument("--chunk-size", type=int, default=config.SCORE_BATCH_CHUNK)
+    parser.add_argument("--no-write", action="store_true", help="do not write scores/<question_id>.json")
+    parser.add_argument("--no-explain", action="store_true", help="skip top_matches")
+    args = parser.parse_args(argv)
+    store = open_store(Path(args.storage), args.store)
+
+    if args.items:
+        src = sys.stdin if args.items == "-" else open(args.items, encoding="utf-8")
+        items = (json.loads(line) for line in src if line.strip())
+    elif args.session or args.all:
+        items = iter_stored_answers(store, args.session or None)
+    else:
+        parser.error("one of --items, --session or --all is required")
+
+    from backend.app.core.ml_models import load_models
+    load_models()
+
+    for line in iter_ndjson(score_items(items, store, args.chunk_size,
+                                        write=not args.no_write, explain=not args.no_explain)):
+        sys.stdout.write(line)
+    sys.stdout.flush()
+
+
+if __name__ == "__main__":
+    main()
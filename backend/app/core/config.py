@@ -0,0 +1,317 @@
+"""
+Runtime configuration for the backend.
+Every setting can be overridden through an environment variable of the same name.
+"""
+
+import os
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, default))
+    except ValueError:
+        return default
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() not in ("0", "false", "no", "off", "")
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except ValueError:
+        return default
+
+
+# =========================
+# Embedding micro-batching
+# =========================
+
+# largest number of texts sent to the embedding backend in one call
+EMBED_BATCH_SIZE = _env_int("EMBED_BATCH_SIZE", 32)
+# how long the batcher waits for more texts after the first one arrives
+EMBED_BATCH_WAIT_MS = _env_float("EMBED_BATCH_WAIT_MS", 5.0)
+
+# =========================
+# Embedding cache
+# =========================
+
+# in-memory LRU size (number of vectors); 0 disables the memory tier
+EMBED_CACHE_SIZE = _env_int("EMBED_CACHE_SIZE", 4096)
+# directory for the persistent memmap tier; empty disables it
+EMBED_CACHE_DIR = os.getenv("EMBED_CACHE_DIR", "")
+
+# =========================
+# Storage
+# =========================
+
+# root of the per-session directories (storage/<session_id>/...)
+STORAGE_DIR = os.getenv(
+    "STORAGE_DIR",
+    os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "..", "storage")),
+)
+
+# =========================
+# Storage lifecycle
+# =========================
+
+# background retention / compaction / archival passes over STORAGE_DIR
+STORAGE_LIFECYCLE = _env_bool("STORAGE_LIFECYCLE", True)
+STORAGE_LIFECYCLE_INTERVAL_S = _env_float("STORAGE_LIFECYCLE_INTERVAL_S", 3600.0)
+# raw answer audio / video is deleted this long after its answer was scored (0 = keep)
+RETAIN_RAW_MEDIA_HOURS = _env_float("RETAIN_RAW_MEDIA_HOURS", 72.0)
+# sessions idle this long are compacted into one zip under _archive/YYYY/MM/DD/ (0 = never)
+ARCHIVE_IDLE_DAYS = _env_float("ARCHIVE_IDLE_DAYS", 7.0)
+# sessions whose report is complete are archived sooner (0 = only by ARCHIVE_IDLE_DAYS)
+ARCHIVE_COMPLETED_HOURS = _env_float("ARCHIVE_COMPLETED_HOURS", 24.0)
+# sessions (live or archived) idle this long are deleted with their report (0 = keep forever)
+SESSION_RETENTION_DAYS = _env_float("SESSION_RETENTION_DAYS", 0.0)
+
+# =========================
+# Batch scoring
+# =========================
+
+# number of answers encoded and scored together by /score/batch and the CLI
+SCORE_BATCH_CHUNK = _env_int("SCORE_BATCH_CHUNK", 512)
+
+# =========================
+# ASR
+# =========================
+
+# "whisper" (transformers pipeline) or "stub" (offline tests / load runs)
+ASR_BACKEND = os.getenv("ASR_BACKEND", "whisper")
+ASR_MODEL_NAME = os.getenv("ASR_MODEL_NAME", "openai/whisper-small")
+# streaming mode: window length and overlap between consecutive windows (seconds)
+ASR_STREAM_WINDOW_S = _env_float("ASR_STREAM_WINDOW_S", 10.0)
+ASR_STREAM_OVERLAP_S = _env_float("ASR_STREAM_OVERLAP_S", 1.0)
+# load the ASR model during startup instead of on the first request
+ASR_PRELOAD = _env_bool("ASR_PRELOAD", True)
+# >0: transcribe in this many long-lived worker processes, each with a warm model
+ASR_PROCESS_WORKERS = _env_int("ASR_PROCESS_WORKERS", 0)
+# int8 dynamic quantization of the Whisper Linear layers (CPU)
+ASR_QUANTIZE_INT8 = _env_bool("ASR_QUANTIZE_INT8", False)
+# segments sent to the ASR pipeline per forward pass
+ASR_BATCH_SIZE = _env_int("ASR_BATCH_SIZE", 8)
+# named model + decoding configuration (asr.ASR_PROFILES or ASR_PROFILES_FILE),
+# e.g. the one chosen by `python -m backend.benchmarks.asr_eval select`; empty = the settings above
+ASR_PROFILE = os.getenv("ASR_PROFILE", "")
+# JSON file with extra profiles (same format as an asr_eval matrix)
+ASR_PROFILES_FILE = os.getenv("ASR_PROFILES_FILE", "")
+
+# =========================
+# Audio preprocessing
+# =========================
+
+# trim silence / split on pauses before ASR
+AUDIO_VAD = _env_bool("AUDIO_VAD", True)
+# a frame is speech when it is this many dB above the estimated noise floor
+AUDIO_VAD_MARGIN_DB = _env_float("AUDIO_VAD_MARGIN_DB", 12.0)
+# absolute floor (dBFS) below which nothing counts as speech
+AUDIO_VAD_FLOOR_DBFS = _env_float("AUDIO_VAD_FLOOR_DBFS", -50.0)
+# pauses shorter than this stay inside one segment
+AUDIO_MIN_SILENCE_MS = _env_int("AUDIO_MIN_SILENCE_MS", 400)
+# padding kept around each speech segment
+AUDIO_SPEECH_PAD_MS = _env_int("AUDIO_SPEECH_PAD_MS", 200)
+# segments shorter than this are dropped as clicks / noise
+AUDIO_MIN_SPEECH_MS = _env_int("AUDIO_MIN_SPEECH_MS", 250)
+# longer segments are split (Whisper decodes 30 s windows)
+AUDIO_MAX_SEGMENT_S = _env_float("AUDIO_MAX_SEGMENT_S", 30.0)
+
+# =========================
+# Inference worker pools
+# =========================
+
+# each pool runs at most *_WORKERS jobs at once and holds at most *_MAX_QUEUE
+# waiting jobs; beyond that requests are rejected with 503 + Retry-After
+ASR_WORKERS = _env_int("ASR_WORKERS", 1)
+ASR_MAX_QUEUE = _env_int("ASR_MAX_QUEUE", 4)
+EMBED_WORKERS = _env_int("EMBED_WORKERS", 2)
+EMBED_MAX_QUEUE = _env_int("EMBED_MAX_QUEUE", 64)
+IO_WORKERS = _env_int("IO_WORKERS", 8)
+IO_MAX_QUEUE = _env_int("IO_MAX_QUEUE", 256)
+POOL_RETRY_AFTER_S = _env_int("POOL_RETRY_AFTER_S", 2)
+
+# =========================
+# Session store
+# =========================
+
+# "fs" (JSON files under STORAGE_DIR) or "sqlite" (STORAGE_DIR/sessions.db, WAL)
+SESSION_STORE = os.getenv("SESSION_STORE", "fs")
+# parsed resumes / plans kept parsed in memory (read-through, invalidated on write)
+SESSION_CACHE_SIZE = _env_int("SESSION_CACHE_SIZE", 256)
+
+# =========================
+# Resume parsing
+# =========================
+
+# external skills taxonomy (JSON or "skill: synonym, synonym" lines); empty = built-in list
+SKILLS_TAXONOMY_PATH = os.getenv("SKILLS_TAXONOMY_PATH", "")
+# worker processes for page-level PDF extraction (0 = extract inline)
+DOC_EXTRACT_WORKERS = _env_int("DOC_EXTRACT_WORKERS", min(4, os.cpu_count() or 1))
+# PDFs with fewer pages are extracted inline; process fan-out is not worth it
+DOC_PARALLEL_MIN_PAGES = _env_int("DOC_PARALLEL_MIN_PAGES", 3)
+# time limit per page (seconds); a parallel extraction gives up on pages still
+# running after this times the pages per worker, and recycles the pool
+DOC_PAGE_TIMEOUT_S = _env_float("DOC_PAGE_TIMEOUT_S", 60.0)
+# OCR pages without a text layer (pdf2image + pytesseract)
+DOC_OCR = _env_bool("DOC_OCR", True)
+DOC_OCR_DPI = _env_int("DOC_OCR_DPI", 200)
+
+# =========================
+# Uploads
+# =========================
+
+# per-type size limits; larger uploads are rejected with 413
+UPLOAD_MAX_RESUME_MB = _env_float("UPLOAD_MAX_RESUME_MB", 10.0)
+UPLOAD_MAX_AUDIO_MB = _env_float("UPLOAD_MAX_AUDIO_MB", 100.0)
+UPLOAD_MAX_VIDEO_MB = _env_float("UPLOAD_MAX_VIDEO_MB", 500.0)
+# received body bytes are handed to the upload writer in chunks of this size
+UPLOAD_CHUNK_KB = _env_int("UPLOAD_CHUNK_KB", 1024)
+# concurrent uploads being written (each holds one "upload" pool thread) and
+# uploads allowed to wait for one; beyond that uploads get 503 before any write
+UPLOAD_WORKERS = _env_int("UPLOAD_WORKERS", 16)
+UPLOAD_MAX_QUEUE = _env_int("UPLOAD_MAX_QUEUE", 16)
+
+# =========================
+# Explainability
+# =========================
+
+# prefit IDF model for top_matches; fitted from stored references/answers when missing
+EXPLAIN_IDF_PATH = os.getenv("EXPLAIN_IDF_PATH", os.path.join(STORAGE_DIR, "_models", "explain_idf.npz"))
+# fewer documents than this and IDF is meaningless: plain term frequency is used
+EXPLAIN_MIN_CORPUS = _env_int("EXPLAIN_MIN_CORPUS", 20)
+# while too small, the corpus is rescanned (in the background) at most this often
+EXPLAIN_REFIT_S = _env_float("EXPLAIN_REFIT_S", 300.0)
+# distinct texts whose tokenized / weighted form is kept in memory
+EXPLAIN_CACHE_SIZE = _env_int("EXPLAIN_CACHE_SIZE", 4096)
+# semantic span alignment: cap on sentences per side (keeps encode + matrix cost bounded)
+SEMANTIC_MAX_SENTENCES = _env_int("SEMANTIC_MAX_SENTENCES", 24)
+# sentences are truncated to this many characters before encoding
+SEMANTIC_MAX_SENTENCE_CHARS = _env_int("SEMANTIC_MAX_SENTENCE_CHARS", 400)
+
+# =========================
+# Answer index
+# =========================
+
+# index every scored answer embedding for cross-candidate search / duplicate flags
+ANSWER_INDEX = _env_bool("ANSWER_INDEX", True)
+ANSWER_INDEX_DIR = os.getenv("ANSWER_INDEX_DIR", os.path.join(STORAGE_DIR, "_index", "answers"))
+# below this many answers every query is an exact scan; above it an IVF index is trained
+ANSWER_INDEX_IVF_MIN = _env_int("ANSWER_INDEX_IVF_MIN", 20000)
+# IVF inverted lists (0 = 4 * sqrt(n) at training time) and lists probed per query
+ANSWER_INDEX_NLIST = _env_int("ANSWER_INDEX_NLIST", 0)
+ANSWER_INDEX_NPROBE = _env_int("ANSWER_INDEX_NPROBE", 8)
+# cosine at or above which an answer from another session is flagged as a possible copy
+ANSWER_DUPLICATE_THRESHOLD = _env_float("ANSWER_DUPLICATE_THRESHOLD", 0.95)
+# answers with fewer words are neither indexed nor compared ("yes", "I don't know"
+# would all look like copies of each other)
+ANSWER_INDEX_MIN_TOKENS = _env_int("ANSWER_INDEX_MIN_TOKENS", 5)
+
+# =========================
+# Session reports
+# =========================
+
+# update a per-session report (and the cross-session summary) on every score write
+SESSION_REPORTS = _env_bool("SESSION_REPORTS", True)
+REPORT_DB_PATH = os.getenv("REPORT_DB_PATH", os.path.join(STORAGE_DIR, "_index", "reports.db"))
+
+# =========================
+# Embedding backend
+# =========================
+
+# "torch" (SentenceTransformer), "onnx" (ONNX Runtime over an exported model)
+# or "stub" (model-free hashed bag of words, for offline tests / benchmarks)
+EMBED_BACKEND = os.getenv("EMBED_BACKEND", "torch")
+# hub name or local model directory (torch backend, and the source for ONNX export)
+EMBED_MODEL_NAME = os.getenv("EMBED_MODEL_NAME", "all-MiniLM-L6-v2")
+# output of `python -m backend.app.core.embedding_backends export`
+EMBED_ONNX_DIR = os.getenv("EMBED_ONNX_DIR", os.path.join(STORAGE_DIR, "_models", "onnx", "all-MiniLM-L6-v2"))
+# use the dynamically int8-quantized graph when the export produced one
+EMBED_ONNX_INT8 = _env_bool("EMBED_ONNX_INT8", True)
+# ONNX Runtime intra-op threads (0 = runtime default)
+EMBED_ONNX_THREADS = _env_int("EMBED_ONNX_THREADS", 0)
+
+# =========================
+# Startup
+# =========================
+
+# "blocking": load models before accepting connections;
+# "background": listen at once and prewarm in a thread (/api/health/ready gates traffic)
+STARTUP_MODE = os.getenv("STARTUP_MODE", "blocking")
+
+# =========================
+# Serving (gunicorn)
+# =========================
+
+# `gunicorn -c backend/gunicorn_conf.py backend.app.main:app`
+SERVE_BIND = os.getenv("SERVE_BIND", "0.0.0.0:8000")
+SERVE_WORKERS = _env_int("SERVE_WORKERS", 2)
+SERVE_TIMEOUT = _env_int("SERVE_TIMEOUT", 120)
+# load the models once in the master before fork so workers share the weight pages copy-on-write
+SERVE_PRELOAD = _env_bool("SERVE_PRELOAD", True)
+# torch intra-op threads per worker (0 = CPU cores / SERVE_WORKERS)
+SERVE_TORCH_THREADS = _env_int("SERVE_TORCH_THREADS", 0)
+
+# =========================
+# Job pipeline
+# =========================
+
+# "sqlite" (STORAGE_DIR/jobs.db, survives restarts) or "memory"
+JOB_QUEUE = os.getenv("JOB_QUEUE", "sqlite")
+JOB_DB_PATH = os.getenv("JOB_DB_PATH", os.path.join(STORAGE_DIR, "jobs.db"))
+# worker threads executing pipeline jobs in this process (0 = submit only)
+JOB_WORKERS = _env_int("JOB_WORKERS", 4)
+# idle workers re-check the queue this often (jobs submitted by other processes)
+JOB_POLL_MS = _env_float("JOB_POLL_MS", 500.0)
+# attempts per job before it is failed (handler errors only; validation errors fail at once)
+JOB_MAX_ATTEMPTS = _env_int("JOB_MAX_ATTEMPTS", 2)
+# a claimed job is leased to its worker for this long and the lease is renewed
+# every third of it while the job runs; only jobs whose lease ran out (their
+# process died or hung) are taken back and requeued
+JOB_LEASE_S = _env_float("JOB_LEASE_S", 60.0)
+
+# =========================
+# Metrics / profiling
+# =========================
+
+# per-stage / per-route histograms, Server-Timing header and /api/metrics
+METRICS_ENABLED = _env_bool("METRICS_ENABLED", True)
+# honour `X-Profile: 1` request headers with a stack-sampling profiler (debugging only)
+PROFILE_REQUESTS = _env_bool("PROFILE_REQUESTS", False)
+PROFILE_INTERVAL_MS = _env_float("PROFILE_INTERVAL_MS", 5.0)
+PROFILE_DIR = os.getenv("PROFILE_DIR", os.path.join(STORAGE_DIR, "_profiles"))
+# newest profiles kept on disk
+PROFILE_MAX_FILES = _env_int("PROFILE_MAX_FILES", 100)
+
+# =========================
+# Video answers
+# =========================
+
+# frame analyzer: "mediapipe" (face mesh + pose), "opencv" (Haar face
+# detection, no model download) or "stub" (motion statistics only)
+VIDEO_ANALYZER = os.getenv("VIDEO_ANALYZER", "mediapipe")
+# MediaPipe Tasks model files, used when the legacy solutions API is unavailable
+VIDEO_FACE_MODEL = os.getenv("VIDEO_FACE_MODEL", "")
+VIDEO_POSE_MODEL = os.getenv("VIDEO_POSE_MODEL", "")
+# frames always analyzed per second of video
+VIDEO_BASE_FPS = _env_float("VIDEO_BASE_FPS", 1.0)
+# frames per second decoded to a small grayscale thumbnail to look for motion / cuts
+VIDEO_PROBE_FPS = _env_float("VIDEO_PROBE_FPS", 5.0)
+# share of thumbnail pixels (0-1) changed since the last probe that triggers an extra sample
+VIDEO_MOTION_THRESHOLD = _env_float("VIDEO_MOTION_THRESHOLD", 0.04)
+# histogram (Bhattacharyya) distance that counts as a scene change
+VIDEO_SCENE_THRESHOLD = _env_float("VIDEO_SCENE_THRESHOLD", 0.35)
+# hard cap on analyzed frames per answer
+VIDEO_MAX_FRAMES = _env_int("VIDEO_MAX_FRAMES", 600)
+# sampled frames are downscaled so the longer side is at most this
+VIDEO_MAX_SIDE = _env_int("VIDEO_MAX_SIDE", 640)
+# sampled frames per analyzer call, and threads running the analyzers
+VIDEO_BATCH_SIZE = _env_int("VIDEO_BATCH_SIZE", 8)
+VIDEO_FRAME_WORKERS = _env_int("VIDEO_FRAME_WORKERS", 2)
+# concurrent video answers (decode + sampling) and how many may queue
+VIDEO_WORKERS = _env_int("VIDEO_WORKERS", 1)
+VIDEO_MAX_QUEUE = _env_int("VIDEO_MAX_QUEUE", 2)
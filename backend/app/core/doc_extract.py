@@ -0,0 +1,200 @@
+"""
+Document text extraction for resumes.
+
+PDF pages are extracted independently. Multi-page documents are split into
+one contiguous page range per pool worker, so each worker opens the PDF
+once. The whole fan-out shares one deadline (DOC_PAGE_TIMEOUT_S per page
+of the longest range); ranges still running at the deadline are reported
+as "timeout" and the pool is recycled, since a running process task cannot
+be cancelled. Pages without a text layer fall back to OCR
+(pdf2image + pytesseract); pages with text never pay for it. Results are
+cached by the SHA-256 of the file contents under STORAGE_DIR/_cache/text,
+so the same upload is never extracted twice. Every result carries a
+per-page timing breakdown.
+"""
+
+import hashlib
+import json
+import math
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Optional
+
+from backend.app.core import config
+from backend.app.core.metrics import timed
+from backend.app.core.session_store import atomic_write_text
+
+# bump when extraction logic changes so old cache entries are ignored
+_CACHE_VERSION = 1
+
+
+def file_sha256(path: Path, chunk_size: int = 1 << 20) -> str:
+    h = hashlib.sha256()
+    with Path(path).open("rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _cache_path(digest: str) -> Path:
+    return Path(config.STORAGE_DIR) / "_cache" / "text" / digest[:2] / f"{digest}.json"
+
+
+def _ocr_page(path: str, index: int) -> str:
+    from pdf2image import convert_from_path
+    import pytesseract
+    images = convert_from_path(path, dpi=config.DOC_OCR_DPI, first_page=index + 1, last_page=index + 1)
+    return "\n".join(pytesseract.image_to_string(img) for img in images)
+
+
+def _extract_page(pdf, path: str, index: int, ocr: bool) -> dict:
+    t0 = time.perf_counter()
+    text = pdf.pages[index].extract_text() or ""
+    method = "text"
+    if not text.strip():
+        method = "empty"
+        if ocr:
+            try:
+                text = _ocr_page(path, index)
+                method = "ocr"
+            except Exception as e:
+                print(f"OCR failed on page {index + 1} of {path}:", e)
+    return {"page": index + 1, "text": text, "method": method, "ms": round((time.perf_counter() - t0) * 1000.0, 3)}
+
+
+def _extract_range(path: str, start: int, stop: int, ocr: bool) -> list:
+    """
+    Extract pages [start, stop) of one PDF; runs inline or inside a worker process.
+    """
+    import pdfplumber
+    with pdfplumber.open(path) as pdf:
+        return [_extract_page(pdf, path, i, ocr) for i in range(start, stop)]
+
+
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ProcessPoolExecutor(
+                    max_workers=config.DOC_EXTRACT_WORKERS,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+    return _executor
+
+
+def shutdown_extract_pool():
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+
+
+def _recycle_executor(executor: ProcessPoolExecutor):
+    """
+    Replace a pool whose worker hangs on a page: shutdown() cannot stop a
+    running task, so the worker processes are terminated.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is executor:
+            _executor = None
+    processes = list((getattr(executor, "_processes", None) or {}).values())
+    executor.shutdown(wait=False, cancel_futures=True)
+    for proc in processes:
+        proc.terminate()
+    print(f"PDF extraction pool recycled ({len(processes)} worker(s) terminated after a page timeout)")
+
+
+def _timeout_pages(start: int, stop: int, ms: float) -> list:
+    return [{"page": i + 1, "text": "", "method": "timeout", "ms": ms} for i in range(start, stop)]
+
+
+def _extract_pdf(path: Path) -> list:
+    import pdfplumber
+    with pdfplumber.open(path) as pdf:
+        n_pages = len(pdf.pages)
+
+    if config.DOC_EXTRACT_WORKERS <= 0 or n_pages < config.DOC_PARALLEL_MIN_PAGES:
+        return _extract_range(str(path), 0, n_pages, config.DOC_OCR)
+
+    per_worker = math.ceil(n_pages / config.DOC_EXTRACT_WORKERS)
+    ranges = [(start, min(start + per_worker, n_pages)) for start in range(0, n_pages, per_worker)]
+    executor = _get_executor()
+    futures = {executor.submit(_extract_range, str(path), a, b, config.DOC_OCR): (a, b) for a, b in ranges}
+    deadline_s = config.DOC_PAGE_TIMEOUT_S * per_worker
+    _, pending = wait(futures, timeout=deadline_s)
+
+    pages = []
+    for fut, (a, b) in futures.items():
+        if fut in pending:
+            pages.extend(_timeout_pages(a, b, deadline_s * 1000.0))
+            continue
+        try:
+            pages.extend(fut.result())
+        except BrokenProcessPool:
+            # another request recycled the pool under this range: redo it here
+            pages.extend(_extract_range(str(path), a, b, config.DOC_OCR))
+    if pending:
+        _recycle_executor(executor)
+    return sorted(pages, key=lambda p: p["page"])
+
+
+def _extract_uncached(path: Path) -> list:
+    suffix = path.suffix.lower()
+    if suffix == ".pdf":
+        return _extract_pdf(path)
+    t0 = time.perf_counter()
+    if suffix in (".docx", ".doc"):
+        import docx2txt
+        text = docx2txt.process(str(path))
+        method = "docx"
+    else:
+        text = path.read_text(errors="ignore")
+        method = "plain"
+    return [{"page": 1, "text": text or "", "method": method, "ms": round((time.perf_counter() - t0) * 1000.0, 3)}]
+
+
+@timed("extract_text")
+def extract_document_text(path: Path, use_cache: bool = True) -> dict:
+    """
+    Extract the text of a resume file.
+    Returns {"text", "sha256", "cached", "total_ms", "pages": [{page, method, chars, ms}]}.
+    """
+    path = Path(path)
+    t0 = time.perf_counter()
+    digest = file_sha256(path)
+    cache_file = _cache_path(digest)
+
+    if use_cache and cache_file.exists():
+        try:
+            cached = json.loads(cache_file.read_text(encoding="utf-8"))
+            if cached.get("version") == _CACHE_VERSION:
+                cached["cached"] = True
+                cached["total_ms"] = round((time.perf_counter() - t0) * 1000.0, 3)
+                return cached
+        except json.JSONDecodeError:
+            pass
+
+    pages = _extract_uncached(path)
+    result = {
+        "version": _CACHE_VERSION,
+        "sha256": digest,
+        "text": "\n".join(p["text"] for p in pages),
+        "pages": [{"page": p["page"], "method": p["method"], "chars": len(p["text"]), "ms": p["ms"]} for p in pages],
+    }
+    # a timed-out page may extract fine next time: do not cache the gap
+    if use_cache and not any(p["method"] == "timeout" for p in pages):
+        atomic_write_text(cache_file, json.dumps(result, ensure_ascii=False, separators=(",", ":")))
+    result["cached"] = False
+    result["total_ms"] = round((time.perf_counter() - t0) * 1000.0, 3)
+    return result
@@ -0,0 +1,297 @@
+"""
+Sentence embedding backends.
+
+Every backend turns a list of texts into an (n, dim) float32 matrix with the
+same pooling / normalization as the SentenceTransformer it came from, so the
+scoring code never knows which one is running:
+
+  * TorchBackend - SentenceTransformer on PyTorch (the original path)
+  * OnnxBackend  - the transformer exported to ONNX, run by ONNX Runtime on
+                   CPU, optionally with dynamically int8-quantized weights;
+                   tokenization uses the fast `tokenizers` library and the
+                   pooling is done in numpy, so torch is never imported
+  * StubBackend  - model-free hashed bag of words for offline tests and
+                   benchmarks (similar texts get similar vectors, but the
+                   scores mean nothing)
+
+Selected by EMBED_BACKEND. The ONNX model is exported once, offline-capable
+from a local model directory:
+
+    python -m backend.app.core.embedding_backends export --source /models/all-MiniLM-L6-v2 --offline
+"""
+
+import argparse
+import inspect
+import json
+import os
+import re
+import zlib
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+
+from backend.app.core import config
+
+ONNX_MODEL_FILE = "model.onnx"
+ONNX_INT8_FILE = "model_int8.onnx"
+EMBED_CONFIG_FILE = "embedding_config.json"
+
+
+def _model_basename(name: str) -> str:
+    return os.path.basename(os.path.normpath(name)) if os.path.isdir(name) else name
+
+
+def _onnx_model_id(model: str, int8: bool) -> str:
+    return f"{model}:onnx-int8" if int8 else f"{model}:onnx"
+
+
+def embedding_model_id(backend: Optional[str] = None) -> str:
+    """
+    Identity of the configured embedding space, without loading the model.
+    Torch keeps the bare model name so existing caches stay valid; ONNX
+    vectors differ slightly and get their own id. Caches and precomputed
+    vectors are keyed by the loaded backend's model_id instead
+    (ml_models.embedding_model_id), which is what this predicts.
+    """
+    backend = backend or config.EMBED_BACKEND
+    if backend == "stub":
+        return StubBackend.model_name
+    name = _model_basename(config.EMBED_MODEL_NAME)
+    if backend == "onnx":
+        model_dir = Path(config.EMBED_ONNX_DIR)
+        cfg_path = model_dir / EMBED_CONFIG_FILE
+        if cfg_path.exists():
+            name = json.loads(cfg_path.read_text(encoding="utf-8"))["model"]
+        # same fallback as OnnxBackend: no quantized graph means fp32 vectors
+        return _onnx_model_id(name, config.EMBED_ONNX_INT8 and (model_dir / ONNX_INT8_FILE).exists())
+    return name
+
+
+class EmbeddingBackend:
+    name = "base"
+
+    def __init__(self, model_id: str, batch_size: int = 32):
+        self.model_id = model_id
+        self.batch_size = max(1, int(batch_size))
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        raise NotImplementedError
+
+    def info(self) -> dict:
+        return {"backend": self.name, "model": self.model_id}
+
+
+class TorchBackend(EmbeddingBackend):
+    name = "torch"
+
+    def __init__(self, model_name: str, batch_size: int = 32):
+        super().__init__(_model_basename(model_name), batch_size)
+        from sentence_transformers import SentenceTransformer
+        self.model = SentenceTransformer(model_name)
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        vectors = self.model.encode(texts, batch_size=self.batch_size, convert_to_numpy=True)
+        return np.asarray(vectors, dtype=np.float32).reshape(len(texts), -1)
+
+
+class OnnxBackend(EmbeddingBackend):
+    name = "onnx"
+
+    def __init__(self, model_dir: Path, int8: bool = True, threads: int = 0, batch_size: int = 32):
+        model_dir = Path(model_dir)
+        cfg_path = model_dir / EMBED_CONFIG_FILE
+        if not cfg_path.exists():
+            raise RuntimeError(
+                f"No exported ONNX model in {model_dir}; run "
+                "`python -m backend.app.core.embedding_backends export` first"
+            )
+        self.cfg = json.loads(cfg_path.read_text(encoding="utf-8"))
+        graph = model_dir / ONNX_INT8_FILE
+        self.int8 = bool(int8 and graph.exists())
+        if not self.int8:
+            graph = model_dir / ONNX_MODEL_FILE
+        if int8 and not self.int8:
+            print(f"⚠️  No {ONNX_INT8_FILE} in {model_dir}; using the fp32 graph")
+        super().__init__(_onnx_model_id(self.cfg["model"], self.int8), batch_size)
+
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        opts = ort.SessionOptions()
+        opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            opts.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(str(graph), opts, providers=["CPUExecutionProvider"])
+        self._inputs = {i.name for i in self.session.get_inputs()}
+
+        self.tokenizer = Tokenizer.from_file(str(model_dir / "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=int(self.cfg["max_seq_length"]))
+        self.tokenizer.enable_padding(pad_id=int(self.cfg["pad_id"]), pad_token=self.cfg["pad_token"])
+
+    def _run(self, texts: List[str]) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch(texts)
+        ids = np.array([e.ids for e in encodings], dtype=np.int64)
+        mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+        feeds = {"input_ids": ids, "attention_mask": mask}
+        if "token_type_ids" in self._inputs:
+            feeds["token_type_ids"] = np.zeros_like(ids)
+        hidden = self.session.run(None, feeds)[0]
+        if self.cfg.get("pooling") == "cls":
+            pooled = hidden[:, 0]
+        else:
+            m = mask[..., None].astype(np.float32)
+            pooled = (hidden * m).sum(axis=1) / np.maximum(m.sum(axis=1), 1e-9)
+        if self.cfg.get("normalize"):
+            pooled = pooled / np.maximum(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12)
+        return pooled.astype(np.float32)
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        if not texts:
+            return np.zeros((0, int(self.cfg["dim"])), dtype=np.float32)
+        # length-sorted batches pad far less; results are put back in input order
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        out = np.empty((len(texts), int(self.cfg["dim"])), dtype=np.float32)
+        for start in range(0, len(order), self.batch_size):
+            idx = order[start:start + self.batch_size]
+            out[idx] = self._run([texts[i] for i in idx])
+        return out
+
+    def info(self) -> dict:
+        return dict(super().info(), int8=self.int8, providers=self.session.get_providers())
+
+
+class StubBackend(EmbeddingBackend):
+    name = "stub"
+    model_name = "stub-hash"
+
+    def __init__(self, dim: int = 384, batch_size: int = 32):
+        super().__init__(self.model_name, batch_size)
+        self.dim = dim
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for token in re.findall(r"\w+", text.lower()):
+                h = zlib.crc32(token.encode("utf-8"))
+                out[row, h % self.dim] += 1.0 if h & 0x80000000 else -1.0
+        norms = np.linalg.norm(out, axis=1, keepdims=True)
+        return out / np.maximum(norms, 1e-12)
+
+
+def create_backend(name: Optional[str] = None) -> EmbeddingBackend:
+    name = name or config.EMBED_BACKEND
+    if name == "torch":
+        return TorchBackend(config.EMBED_MODEL_NAME, batch_size=config.EMBED_BATCH_SIZE)
+    if name == "onnx":
+        return OnnxBackend(
+            Path(config.EMBED_ONNX_DIR),
+            int8=config.EMBED_ONNX_INT8,
+            threads=config.EMBED_ONNX_THREADS,
+            batch_size=config.EMBED_BATCH_SIZE,
+        )
+    if name == "stub":
+        return StubBackend(batch_size=config.EMBED_BATCH_SIZE)
+    raise ValueError(f"unknown EMBED_BACKEND {name!r} (expected torch, onnx or stub)")
+
+
+# =========================
+# Export
+# =========================
+
+def export_onnx(source: str, out_dir: Path, quantize: bool = True, opset: int = 14) -> dict:
+    """
+    Export the transformer of a SentenceTransformer to ONNX (dynamic batch and
+    sequence axes), save its fast tokenizer and pooling settings next to it,
+    and optionally write a dynamically int8-quantized copy.
+    """
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    st = SentenceTransformer(source, device="cpu")
+    transformer = st[0]
+    hf_model = transformer.auto_model.eval()
+    tokenizer = transformer.tokenizer
+
+    # renamed in newer sentence-transformers
+    dim_fn = getattr(st, "get_embedding_dimension", None) or st.get_sentence_embedding_dimension
+    module_names = [type(m).__name__ for m in st]
+    pooling = "mean"
+    for module in st:
+        if type(module).__name__ == "Pooling" and getattr(module, "pooling_mode_cls_token", False):
+            pooling = "cls"
+
+    sample = tokenizer(["export sample text"], return_tensors="pt")
+    input_names = [n for n in ("input_ids", "attention_mask", "token_type_ids") if n in sample]
+
+    class _LastHidden(torch.nn.Module):
+        def __init__(self, model):
+            super().__init__()
+            self.model = model
+
+        def forward(self, *args):
+            return self.model(**dict(zip(input_names, args))).last_hidden_state
+
+    axes = {n: {0: "batch", 1: "sequence"} for n in input_names}
+    axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+    export_kwargs = {}
+    if "dynamo" in inspect.signature(torch.onnx.export).parameters:
+        # newer torch defaults to the dynamo exporter (needs onnxscript); the
+        # TorchScript exporter handles dynamic_axes for this graph just fine
+        export_kwargs["dynamo"] = False
+    with torch.no_grad():
+        torch.onnx.export(
+            _LastHidden(hf_model),
+            tuple(sample[n] for n in input_names),
+            str(out_dir / ONNX_MODEL_FILE),
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes=axes,
+            opset_version=opset,
+            do_constant_folding=True,
+            **export_kwargs,
+        )
+    tokenizer.save_pretrained(str(out_dir))
+
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        quantize_dynamic(str(out_dir / ONNX_MODEL_FILE), str(out_dir / ONNX_INT8_FILE), weight_type=QuantType.QInt8)
+
+    cfg = {
+        "model": _model_basename(source),
+        "source": str(source),
+        "dim": int(dim_fn()),
+        "max_seq_length": int(st.max_seq_length),
+        "pooling": pooling,
+        "normalize": "Normalize" in module_names,
+        "pad_id": int(tokenizer.pad_token_id),
+        "pad_token": tokenizer.pad_token,
+        "opset": opset,
+        "int8": bool(quantize),
+    }
+    (out_dir / EMBED_CONFIG_FILE).write_text(json.dumps(cfg, indent=2))
+    return cfg
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sentence embedding backends")
+    sub = parser.add_subparsers(dest="command", required=True)
+    exp = sub.add_parser("export", help="export the sentence model to ONNX (+ int8)")
+    exp.add_argument("--source", default=config.EMBED_MODEL_NAME, help="hub name or local model directory")
+    exp.add_argument("--out", default=config.EMBED_ONNX_DIR)
+    exp.add_argument("--no-quantize", action="store_true")
+    exp.add_argument("--opset", type=int, default=14)
+    exp.add_argument("--offline", action="store_true", help="never touch the network (local --source)")
+    args = parser.parse_args(argv)
+
+    if args.offline:
+        os.environ["HF_HUB_OFFLINE"] = "1"
+        os.environ["TRANSFORMERS_OFFLINE"] = "1"
+    cfg = export_onnx(args.source, Path(args.out), quantize=not args.no_quantize, opset=args.opset)
+    print(f"exported {cfg['model']} (dim {cfg['dim']}, {cfg['pooling']} pooling) -> {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+"""
+Content-addressed embedding cache.
+
+Vectors are keyed by sha1(model_name + text), so the same reference text is
+encoded once no matter how many sessions or re-scores ask for it.
+
+Two tiers:
+  * an in-memory LRU bounded by entry count
+  * an optional on-disk store: a growable float32 memmap (vectors.f32) plus an
+    append-only key log (keys.log, one hex key per row) that survives restarts
+
+Several processes (gunicorn workers) may share one disk store: appends take
+an exclusive flock and pick their row from the key log's length under the
+lock, and each process picks up rows added by the others by reading the
+log's new tail.
+"""
+
+import fcntl
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+
+
+def cache_key(model_name: str, text: str) -> str:
+    h = hashlib.sha1()
+    h.update(model_name.encode("utf-8"))
+    h.update(b"\0")
+    h.update(text.encode("utf-8"))
+    return h.hexdigest()
+
+
+class DiskEmbeddingStore:
+    """
+    Append-only memory-mapped float32 matrix of embeddings.
+    Row i of vectors.f32 belongs to line i of keys.log.
+    """
+
+    _GROW_ROWS = 1024
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._vectors_path = self.directory / "vectors.f32"
+        self._keys_path = self.directory / "keys.log"
+        self._meta_path = self.directory / "meta.json"
+        self._lock_path = self.directory / ".lock"
+        self._rows = {}
+        # rows / bytes of keys.log already read by this process
+        self._nrows = 0
+        self._keys_offset = 0
+        self._dim = None
+        self._capacity = 0
+        self._mm = None
+        self._refresh()
+
+    def _refresh(self):
+        """
+        Read rows appended to keys.log since the last call (by any process).
+        """
+        if self._dim is None:
+            if not self._meta_path.exists():
+                return
+            meta = json.loads(self._meta_path.read_text(encoding="utf-8"))
+            self._dim = int(meta["dim"])
+        try:
+            size = self._keys_path.stat().st_size
+        except FileNotFoundError:
+            size = 0
+        if size > self._keys_offset:
+            with self._keys_path.open("rb") as f:
+                f.seek(self._keys_offset)
+                chunk = f.read(size - self._keys_offset)
+            # only whole lines: a concurrent append may be half written
+            complete = chunk[: chunk.rfind(b"\n") + 1]
+            for line in complete.decode("utf-8").split("\n")[:-1]:
+                if line:
+                    self._rows[line] = self._nrows
+                self._nrows += 1
+            self._keys_offset += len(complete)
+        if self._nrows > self._capacity or self._mm is None:
+            self._open()
+
+    def _open(self):
+        size = self._vectors_path.stat().st_size if self._vectors_path.exists() else 0
+        self._mm = None
+        self._capacity = size // (4 * self._dim)
+        if self._capacity:
+            self._mm = np.memmap(self._vectors_path, dtype=np.float32, mode="r+",
+                                 shape=(self._capacity, self._dim))
+
+    def _grow(self, rows_needed: int):
+        new_capacity = max(rows_needed, self._capacity + self._GROW_ROWS)
+        if self._mm is not None:
+            self._mm.flush()
+            self._mm = None
+        with self._vectors_path.open("ab") as f:
+            # another process may already have grown the file further
+            if f.tell() < new_capacity * self._dim * 4:
+                f.truncate(new_capacity * self._dim * 4)
+        self._open()
+
+    def __len__(self):
+        return len(self._rows)
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        row = self._rows.get(key)
+        if row is None:
+            # maybe written by another process since
+            self._refresh()
+            row = self._rows.get(key)
+        if row is None or self._mm is None:
+            return None
+        return np.array(self._mm[row])
+
+    def put(self, key: str, vec: np.ndarray):
+        if key in self._rows:
+            return
+        vec = np.asarray(vec, dtype=np.float32).ravel()
+        with self._lock_path.open("a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                self._refresh()
+                if key in self._rows:
+                    return
+                if self._dim is None:
+                    self._dim = int(vec.shape[0])
+                    self._meta_path.write_text(json.dumps({"dim": self._dim, "dtype": "float32"}))
+                if vec.shape[0] != self._dim:
+                    raise ValueError(f"embedding dim {vec.shape[0]} != store dim {self._dim}")
+                row = self._nrows
+                if row >= self._capacity:
+                    self._grow(row + 1)
+                self._mm[row] = vec
+                self._mm.flush()
+                # vector first, key second: a crash in between leaves an unreferenced row
+                line = (key + "\n").encode("utf-8")
+                with self._keys_path.open("ab") as f:
+                    f.write(line)
+                self._rows[key] = row
+                self._nrows += 1
+                self._keys_offset += len(line)
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def flush(self):
+        if self._mm is not None:
+            self._mm.flush()
+
+
+class EmbeddingCache:
+    """
+    LRU cache of embeddings in front of the encoder, with an optional disk tier.
+    """
+
+    def __init__(self, model_name: str, max_entries: int = 4096, disk_dir: Optional[Path] = None):
+        self.model_name = model_name
+        self.max_entries = max(0, int(max_entries))
+        self._lru = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk = DiskEmbeddingStore(disk_dir) if disk_dir else None
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def key(self, text: str) -> str:
+        return cache_key(self.model_name, text)
+
+    def _remember(self, key: str, vec: np.ndarray):
+        if self.max_entries == 0:
+            return
+        self._lru[key] = vec
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.max_entries:
+            self._lru.popitem(last=False)
+            self.evictions += 1
+
+    def get(self, text: str) -> Optional[np.ndarray]:
+        key = self.key(text)
+        with self._lock:
+            vec = self._lru.get(key)
+            if vec is not None:
+                self._lru.move_to_end(key)
+                self.hits += 1
+                return vec
+            if self._disk is not None:
+                vec = self._disk.get(key)
+                if vec is not None:
+                    self.disk_hits += 1
+                    self._remember(key, vec)
+                    return vec
+            self.misses += 1
+            return None
+
+    def put(self, text: str, vec):
+        key = self.key(text)
+        vec = np.asarray(vec, dtype=np.float32).ravel()
+        with self._lock:
+            self._remember(key, vec)
+            if self._disk is not None:
+                self._disk.put(key, vec)
+
+    def get_many(self, texts: List[str]) -> List[Optional[np.ndarray]]:
+        return [self.get(t) for t in texts]
+
+    def flush(self):
+        with self._lock:
+            if self._disk is not None:
+                self._disk.flush()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            "model": self.model_name,
+            "entries": len(self._lru),
+            "max_entries": self.max_entries,
+            "disk_entries": len(self._disk) if self._disk is not None else 0,
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": round((self.hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+        }
@@ -0,0 +1,271 @@
+"""
+Token-overlap explainability ("top_matches") with a prefit IDF model.
+
+The IDF table is fitted once from a corpus of stored reference texts and
+answers, persisted as an .npz (terms + idf) and reused for every answer,
+instead of fitting a TfidfVectorizer on a two-document corpus per request.
+Terms never seen in the corpus get the highest IDF (they are as rare as it
+gets). Texts are tokenized with the vectorizer's analyzer behind an LRU
+cache, represented sparsely as (terms, weights) arrays, and the top-k shared
+terms are selected with argpartition.
+
+Serving never scans the corpus on the request path: get_explainer() loads the
+persisted model, or starts with the uniform model and fits in a background
+thread. While the model is uniform (corpus below EXPLAIN_MIN_CORPUS) the fit
+is retried every EXPLAIN_REFIT_S, so it switches to real IDF once the corpus
+has grown past the threshold; a model fitted by another worker is picked up
+from disk.
+
+CLI:
+    python -m backend.app.core.explain fit     # (re)fit from storage and save
+"""
+
+import argparse
+import fcntl
+import threading
+import time
+from collections import Counter
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from backend.app.core import config
+
+_NGRAM_RANGE = (1, 2)
+
+
+def _build_analyzer():
+    # same tokenization as the per-request vectorizer this replaces
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    return TfidfVectorizer(stop_words="english", ngram_range=_NGRAM_RANGE).build_analyzer()
+
+
+class ExplainModel:
+    def __init__(self, idf: Dict[str, float], oov_idf: float = 1.0, n_docs: int = 0):
+        self.idf = idf
+        self.oov_idf = float(oov_idf)
+        self.n_docs = n_docs
+        self._analyzer = _build_analyzer()
+        # per-instance caches: references repeat across candidates and re-scores
+        self._tokens = lru_cache(maxsize=config.EXPLAIN_CACHE_SIZE)(self._tokenize)
+        self._weights = lru_cache(maxsize=config.EXPLAIN_CACHE_SIZE)(self._weigh)
+
+    # ---- fitting / persistence ----
+
+    @classmethod
+    def fit(cls, corpus: Iterable[str]) -> "ExplainModel":
+        """
+        Smoothed IDF as in sklearn: ln((1 + n) / (1 + df)) + 1.
+        """
+        analyzer = _build_analyzer()
+        df = Counter()
+        n = 0
+        for doc in corpus:
+            n += 1
+            df.update(set(analyzer(doc or "")))
+        if n < config.EXPLAIN_MIN_CORPUS:
+            return cls.uniform()
+        idf = {t: float(np.log((1.0 + n) / (1.0 + c)) + 1.0) for t, c in df.items()}
+        return cls(idf, oov_idf=float(np.log(1.0 + n) + 1.0), n_docs=n)
+
+    @classmethod
+    def uniform(cls) -> "ExplainModel":
+        """
+        No usable corpus: every term weighs the same (plain term frequency).
+        """
+        return cls({}, oov_idf=1.0, n_docs=0)
+
+    def save(self, path: Path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        terms = np.array(list(self.idf), dtype=str)
+        values = np.array([self.idf[t] for t in terms], dtype=np.float32)
+        tmp = path.with_suffix(".tmp.npz")
+        np.savez_compressed(tmp, terms=terms, idf=values, meta=np.array([self.oov_idf, self.n_docs], dtype=np.float64))
+        tmp.replace(path)
+
+    @classmethod
+    def load(cls, path: Path) -> "ExplainModel":
+        data = np.load(Path(path), allow_pickle=False)
+        oov_idf, n_docs = data["meta"]
+        return cls(dict(zip(data["terms"].tolist(), data["idf"].tolist())), float(oov_idf), int(n_docs))
+
+    # ---- weighting ----
+
+    def _tokenize(self, text: str) -> Tuple[str, ...]:
+        return tuple(self._analyzer(text or ""))
+
+    def _weigh(self, text: str) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Sparse l2-normalized tf-idf of a text: (terms, weights).
+        """
+        counts = Counter(self._tokens(text))
+        if not counts:
+            return np.array([], dtype=object), np.array([], dtype=np.float64)
+        terms = np.array(list(counts), dtype=object)
+        weights = np.array([c * self.idf.get(t, self.oov_idf) for t, c in counts.items()], dtype=np.float64)
+        weights /= np.linalg.norm(weights)
+        return terms, weights
+
+    # ---- explanations ----
+
+    def top_matches(self, reference: str, answer: str, top_k: int = 6) -> List[Dict[str, object]]:
+        """
+        Terms present in both texts, ordered by their weight in the reference.
+        """
+        ref_terms, ref_weights = self._weights(reference)
+        if ref_terms.size == 0:
+            return []
+        ans_tokens = set(self._tokens(answer))
+        mask = np.fromiter((t in ans_tokens for t in ref_terms), dtype=bool, count=ref_terms.size)
+        if not mask.any():
+            return []
+        common_terms = ref_terms[mask]
+        common_weights = ref_weights[mask]
+        k = min(top_k, common_weights.size)
+        top = np.argpartition(-common_weights, k - 1)[:k]
+        top = top[np.argsort(-common_weights[top], kind="stable")]
+        return [{"token": str(common_terms[i]), "ref_tfidf": float(round(common_weights[i], 6))} for i in top]
+
+    def top_matches_batch(self, references: Sequence[str], answers: Sequence[str], top_k: int = 6) -> List[List[Dict[str, object]]]:
+        """
+        Explain many (reference, answer) pairs; repeated references are
+        tokenized and weighted once.
+        """
+        return [self.top_matches(r, a, top_k) for r, a in zip(references, answers)]
+
+    def stats(self) -> dict:
+        info = self._weights.cache_info()
+        return {
+            "terms": len(self.idf),
+            "corpus_docs": self.n_docs,
+            "weight_cache_hits": info.hits,
+            "weight_cache_misses": info.misses,
+        }
+
+
+def iter_corpus(store=None) -> Iterable[str]:
+    """
+    Reference texts and stored answers of every session.
+    """
+    from backend.app.core.reference import build_reference_text
+    from backend.app.core.session_store import get_store
+    store = store or get_store()
+    for session_id in store.list_sessions():
+        try:
+            parsed, plan = store.get_parsed(session_id), store.get_plan(session_id)
+        except FileNotFoundError:
+            parsed = plan = None
+        if plan is not None:
+            for q in plan.get("questions", []):
+                yield build_reference_text(parsed, plan, q)
+        for answer in store.list_text_answers(session_id):
+            yield answer.get("answer_text", "")
+        for score in store.list_scores(session_id):
+            yield score.get("answer_excerpt", "")
+
+
+def fit_and_save(path: Optional[Path] = None, store=None) -> ExplainModel:
+    model = ExplainModel.fit(iter_corpus(store))
+    if model.n_docs:
+        model.save(Path(path or config.EXPLAIN_IDF_PATH))
+    return model
+
+
+_model: Optional[ExplainModel] = None
+_model_lock = threading.Lock()
+_fit_thread: Optional[threading.Thread] = None
+_last_fit_attempt = 0.0
+
+
+def _background_fit():
+    """
+    Replace the uniform model with a persisted or freshly fitted one. Only one
+    process fits at a time; the others pick its result up on a later attempt.
+    """
+    global _model
+    path = Path(config.EXPLAIN_IDF_PATH)
+    try:
+        if path.exists():
+            model = ExplainModel.load(path)
+        else:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(str(path) + ".lock", "a") as lock:
+                try:
+                    fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    return
+                try:
+                    model = ExplainModel.load(path) if path.exists() else fit_and_save(path)
+                finally:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+        if model.n_docs:
+            with _model_lock:
+                _model = model
+            print(f"✅ Explainer IDF model ready ({model.n_docs} documents, {len(model.idf)} terms)")
+    except Exception as e:
+        print("Explainer fit failed, keeping the current model:", e)
+
+
+def _maybe_refit():
+    global _fit_thread, _last_fit_attempt
+    with _model_lock:
+        now = time.time()
+        if _fit_thread is not None and _fit_thread.is_alive():
+            return
+        if _last_fit_attempt and now - _last_fit_attempt < config.EXPLAIN_REFIT_S:
+            return
+        _last_fit_attempt = now
+        _fit_thread = threading.Thread(target=_background_fit, name="explain-fit", daemon=True)
+        _fit_thread.start()
+
+
+def get_explainer(fit: bool = True) -> ExplainModel:
+    """
+    The persisted IDF model, or the uniform model until one is fitted.
+    With fit=False no background fit is started (e.g. in a process about to fork).
+    """
+    global _model
+    model = _model
+    if model is None:
+        with _model_lock:
+            if _model is None:
+                path = Path(config.EXPLAIN_IDF_PATH)
+                _model = ExplainModel.load(path) if path.exists() else ExplainModel.uniform()
+            model = _model
+    if fit and model.n_docs == 0:
+        _maybe_refit()
+    return model
+
+
+def wait_for_fit(timeout: Optional[float] = None):
+    thread = _fit_thread
+    if thread is not None:
+        thread.join(timeout)
+
+
+def reset_explainer():
+    global _model, _fit_thread, _last_fit_attempt
+    wait_for_fit()
+    with _model_lock:
+        _model = None
+        _fit_thread = None
+        _last_fit_attempt = 0.0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Explainability IDF model")
+    parser.add_argument("command", choices=["fit"])
+    parser.add_argument("--out", default=config.EXPLAIN_IDF_PATH)
+    args = parser.parse_args(argv)
+    model = fit_and_save(Path(args.out))
+    if model.n_docs:
+        print(f"fitted IDF over {model.n_docs} documents, {len(model.idf)} terms -> {args.out}")
+    else:
+        print(f"corpus smaller than EXPLAIN_MIN_CORPUS={config.EXPLAIN_MIN_CORPUS}; nothing saved")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""
+Bounded worker pools for blocking work called from async handlers.
+
+Each stage (ASR, embedding, file I/O) gets its own thread pool so a long
+Whisper transcription cannot starve scoring or /api/health. Admission is
+bounded: once workers + queue are full, run() raises PoolSaturated, an
+HTTPException that FastAPI turns into 503 with a Retry-After header.
+Queue-wait and run-time samples per pool make head-of-line blocking visible.
+"""
+
+import asyncio
+import contextvars
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict
+
+from fastapi import HTTPException
+
+from backend.app.core import config
+from backend.app.core.metrics import POOL_RUN_SECONDS, POOL_WAIT_SECONDS
+
+
+class PoolSaturated(HTTPException):
+    def __init__(self, pool: str, retry_after: int):
+        super().__init__(
+            status_code=503,
+            detail=f"{pool} workers are busy, retry later",
+            headers={"Retry-After": str(retry_after)},
+        )
+        self.pool = pool
+
+
+def _summary(samples) -> dict:
+    if not samples:
+        return {"count": 0, "avg_ms": 0.0, "p50_ms": 0.0, "p95_ms": 0.0, "max_ms": 0.0}
+    ordered = sorted(samples)
+    pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+    return {
+        "count": len(ordered),
+        "avg_ms": round(sum(ordered) / len(ordered) * 1000.0, 3),
+        "p50_ms": round(pick(0.50) * 1000.0, 3),
+        "p95_ms": round(pick(0.95) * 1000.0, 3),
+        "max_ms": round(ordered[-1] * 1000.0, 3),
+    }
+
+
+class InferencePool:
+    def __init__(self, name: str, max_workers: int, max_queue: int, retry_after: int = 2, window: int = 1024):
+        self.name = name
+        self.max_workers = max(1, int(max_workers))
+        self.max_queue = max(0, int(max_queue))
+        self.retry_after = retry_after
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=f"pool-{name}")
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._running = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self._waits = deque(maxlen=window)
+        self._runs = deque(maxlen=window)
+
+    def _admit(self):
+        with self._lock:
+            if self._pending >= self.max_workers + self.max_queue:
+                self.rejected += 1
+                raise PoolSaturated(self.name, self.retry_after)
+            self._pending += 1
+
+    def _release(self):
+        with self._lock:
+            self._pending -= 1
+
+    async def run(self, fn: Callable, *args, **kwargs):
+        """
+        Run fn(*args, **kwargs) on this pool and await the result.
+        Raises PoolSaturated immediately when the pool is full.
+        """
+        self._admit()
+        submitted = time.perf_counter()
+
+        def _task():
+            started = time.perf_counter()
+            with self._lock:
+                self._running += 1
+            self._waits.append(started - submitted)
+            POOL_WAIT_SECONDS.observe(started - submitted, self.name)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                ran = time.perf_counter() - started
+                self._runs.append(ran)
+                POOL_RUN_SECONDS.observe(ran, self.name)
+                with self._lock:
+                    self._running -= 1
+
+        try:
+            # run in the caller's context so stage timings reach its request
+            ctx = contextvars.copy_context()
+            result = await asyncio.get_running_loop().run_in_executor(self._executor, ctx.run, _task)
+            self.completed += 1
+            return result
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self._release()
+
+    def stats(self) -> dict:
+        with self._lock:
+            pending, running = self._pending, self._running
+        return {
+            "workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "running": running,
+            "queued": max(0, pending - running),
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "queue_wait": _summary(list(self._waits)),
+            "run_time": _summary(list(self._runs)),
+        }
+
+    def shutdown(self, wait: bool = False):
+        self._executor.shutdown(wait=wait)
+
+
+_pools: Dict[str, InferencePool] = {}
+_pools_lock = threading.Lock()
+
+_POOL_LIMITS = {
+    # with worker processes, one dispatching thread per process
+    "asr": lambda: (max(config.ASR_WORKERS, config.ASR_PROCESS_WORKERS), config.ASR_MAX_QUEUE),
+    "embedding": lambda: (config.EMBED_WORKERS, config.EMBED_MAX_QUEUE),
+    "io": lambda: (config.IO_WORKERS, config.IO_MAX_QUEUE),
+    "video": lambda: (config.VIDEO_WORKERS, config.VIDEO_MAX_QUEUE),
+    # one writer task per in-flight upload, held for the whole request body
+    "upload": lambda: (config.UPLOAD_WORKERS, config.UPLOAD_MAX_QUEUE),
+}
+
+
+def get_pool(name: str) -> InferencePool:
+    """
+    Return the shared pool for a stage: "asr", "embedding", "io", "video" or "upload".
+    """
+    pool = _pools.get(name)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(name)
+            if pool is None:
+                workers, max_queue = _POOL_LIMITS[name]()
+                pool = InferencePool(name, workers, max_queue, config.POOL_RETRY_AFTER_S)
+                _pools[name] = pool
+    return pool
+
+
+async def run_in_pool(name: str, fn: Callable, *args, **kwargs):
+    return await get_pool(name).run(fn, *args, **kwargs)
+
+
+def pool_stats() -> dict:
+    return {name: pool.stats() for name, pool in list(_pools.items())}
+
+
+def shutdown_pools():
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.shutdown()
+        _pools.clear()
@@ -0,0 +1,740 @@
+"""
+Asynchronous job queue and worker pool.
+
+Heavy pipeline stages (resume parsing, plan + reference embeddings, ASR,
+scoring) are submitted as jobs instead of running inside the HTTP request.
+A job may depend on other jobs; it becomes runnable once all of them have
+succeeded and is failed along with them otherwise, so independent branches
+(e.g. the answers to different questions) run in parallel on the workers
+while dependent stages wait.
+
+Two queue backends, selected by JOB_QUEUE:
+
+  * SQLiteJobQueue - STORAGE_DIR/jobs.db (WAL); survives restarts and can be
+                     shared by several processes on one host
+  * MemoryJobQueue - in-process dict, for development and tests
+
+JobWorkers runs JOB_WORKERS threads that claim runnable jobs, call the
+handler registered for the job kind and record its result or error. A claim
+records the worker (host:pid:thread) and a lease of JOB_LEASE_S that the
+process renews while the job runs; jobs whose lease ran out belong to a dead
+or hung process and are requeued by whichever process notices first. Results
+and errors are only recorded for the worker that still holds the claim, so a
+hung worker that wakes up after its job was taken back cannot overwrite the
+run that replaced it.
+"""
+
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import traceback
+import uuid
+from collections import defaultdict
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional
+
+from backend.app.core import config
+from backend.app.core.metrics import JOB_SECONDS
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+TERMINAL = (SUCCEEDED, FAILED, CANCELLED)
+
+
+class JobError(Exception):
+    """
+    Raised by a handler for an expected failure: the job fails without retries.
+    """
+
+
+def _new_job(kind: str, payload: dict, session_id: Optional[str], pipeline_id: Optional[str],
+             depends_on: Iterable[str], max_attempts: int, priority: int) -> dict:
+    now = time.time()
+    return {
+        "job_id": str(uuid.uuid4()),
+        "pipeline_id": pipeline_id,
+        "session_id": session_id,
+        "kind": kind,
+        "payload": payload or {},
+        "depends_on": list(depends_on or ()),
+        "status": QUEUED,
+        "result": None,
+        "error": None,
+        "attempts": 0,
+        "max_attempts": max(1, int(max_attempts)),
+        "priority": int(priority),
+        "worker": None,
+        "lease_until": None,
+        "created_at": now,
+        "started_at": None,
+        "finished_at": None,
+    }
+
+
+def job_view(job: dict) -> dict:
+    """
+    Public representation of a job, with queue-wait and run times.
+    """
+    view = dict(job)
+    started, finished = job.get("started_at"), job.get("finished_at")
+    view["queue_ms"] = round((started - job["created_at"]) * 1000.0, 3) if started else None
+    view["run_ms"] = round((finished - started) * 1000.0, 3) if started and finished else None
+    return view
+
+
+class JobQueue:
+    """
+    Backend interface. Subclasses implement persistence; claim() must hand a
+    job to exactly one worker.
+    """
+
+    def submit(self, kind: str, payload: dict, session_id: Optional[str] = None,
+               pipeline_id: Optional[str] = None, depends_on: Iterable[str] = (),
+               max_attempts: Optional[int] = None, priority: int = 0) -> dict:
+        job = _new_job(kind, payload, session_id, pipeline_id, depends_on,
+                       config.JOB_MAX_ATTEMPTS if max_attempts is None else max_attempts, priority)
+        self._insert(job)
+        return dict(job)
+
+    def claim(self, worker: str) -> Optional[dict]:
+        raise NotImplementedError
+
+    def complete(self, job_id: str, worker: str, result: dict) -> bool:
+        """
+        Record the result of `worker`'s run. Returns False (and changes
+        nothing) when the job is no longer running under that worker.
+        """
+        raise NotImplementedError
+
+    def fail(self, job_id: str, worker: str, error: str, retry: bool = True) -> Optional[str]:
+        """
+        Record a failed attempt of `worker`: requeue while attempts remain (and
+        retry is allowed), otherwise fail the job and every job depending on
+        it. Returns the job's new status, or None when the job is no longer
+        running under that worker.
+        """
+        raise NotImplementedError
+
+    def cancel(self, job_id: str) -> bool:
+        raise NotImplementedError
+
+    def get(self, job_id: str) -> Optional[dict]:
+        raise NotImplementedError
+
+    def list_jobs(self, pipeline_id: Optional[str] = None, session_id: Optional[str] = None,
+                  limit: int = 500) -> List[dict]:
+        raise NotImplementedError
+
+    def counts(self) -> Dict[str, int]:
+        raise NotImplementedError
+
+    def renew_leases(self, claims: Dict[str, str], lease_s: float):
+        """
+        Extend the lease of running jobs this process is working on
+        ({job_id: worker}); jobs claimed by another worker since are skipped.
+        """
+        raise NotImplementedError
+
+    def requeue_expired(self) -> int:
+        """
+        Take back running jobs whose lease ran out: requeue them while attempts
+        remain, fail them otherwise. Returns how many were taken back.
+        """
+        raise NotImplementedError
+
+    def _insert(self, job: dict):
+        raise NotImplementedError
+
+
+class MemoryJobQueue(JobQueue):
+    def __init__(self):
+        self._jobs: Dict[str, dict] = {}
+        self._dependents: Dict[str, List[str]] = defaultdict(list)
+        self._lock = threading.Lock()
+
+    def _insert(self, job: dict):
+        with self._lock:
+            self._jobs[job["job_id"]] = job
+            for dep in job["depends_on"]:
+                self._dependents[dep].append(job["job_id"])
+            self._fail_if_blocked(job)
+
+    def _fail_if_blocked(self, job: dict):
+        # submitted after a dependency already failed / was cancelled
+        for dep in job["depends_on"]:
+            parent = self._jobs.get(dep)
+            if parent is None or parent["status"] in (FAILED, CANCELLED):
+                self._finish(job, FAILED, error=f"dependency {dep} {parent['status'] if parent else 'not found'}")
+                return
+
+    def _finish(self, job: dict, status: str, result=None, error=None):
+        job.update(status=status, result=result, error=error, finished_at=time.time())
+        if status != SUCCEEDED:
+            for child_id in self._dependents.get(job["job_id"], []):
+                child = self._jobs[child_id]
+                if child["status"] == QUEUED:
+                    self._finish(child, FAILED, error=f"dependency {job['job_id']} {status}")
+
+    def _runnable(self, job: dict) -> bool:
+        return job["status"] == QUEUED and all(
+            self._jobs[d]["status"] == SUCCEEDED for d in job["depends_on"] if d in self._jobs
+        )
+
+    def claim(self, worker: str) -> Optional[dict]:
+        with self._lock:
+            runnable = [j for j in self._jobs.values() if self._runnable(j)]
+            if not runnable:
+                return None
+            job = min(runnable, key=lambda j: (-j["priority"], j["created_at"]))
+            now = time.time()
+            job.update(status=RUNNING, worker=worker, started_at=now, lease_until=now + config.JOB_LEASE_S,
+                       attempts=job["attempts"] + 1)
+            return dict(job)
+
+    def _owned(self, job_id: str, worker: str) -> Optional[dict]:
+        job = self._jobs.get(job_id)
+        if job is None or job["status"] != RUNNING or job["worker"] != worker:
+            return None
+        return job
+
+    def complete(self, job_id: str, worker: str, result: dict) -> bool:
+        with self._lock:
+            job = self._owned(job_id, worker)
+            if job is None:
+                return False
+            self._finish(job, SUCCEEDED, result=result)
+            return True
+
+    def fail(self, job_id: str, worker: str, error: str, retry: bool = True) -> Optional[str]:
+        with self._lock:
+            job = self._owned(job_id, worker)
+            if job is None:
+                return None
+            if retry and job["attempts"] < job["max_attempts"]:
+                job.update(status=QUEUED, error=error, worker=None, lease_until=None)
+            else:
+                self._finish(job, FAILED, error=error)
+            return job["status"]
+
+    def cancel(self, job_id: str) -> bool:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job["status"] != QUEUED:
+                return False
+            self._finish(job, CANCELLED, error="cancelled")
+            return True
+
+    def get(self, job_id: str) -> Optional[dict]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def list_jobs(self, pipeline_id=None, session_id=None, limit: int = 500) -> List[dict]:
+        with self._lock:
+            jobs = [
+                dict(j) for j in self._jobs.values()
+                if (pipeline_id is None or j["pipeline_id"] == pipeline_id)
+                and (session_id is None or j["session_id"] == session_id)
+            ]
+        return sorted(jobs, key=lambda j: j["created_at"])[:limit]
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            counts = defaultdict(int)
+            for j in self._jobs.values():
+                counts[j["status"]] += 1
+            return dict(counts)
+
+    def renew_leases(self, claims: Dict[str, str], lease_s: float):
+        with self._lock:
+            until = time.time() + lease_s
+            for job_id, worker in claims.items():
+                job = self._owned(job_id, worker)
+                if job is not None:
+                    job["lease_until"] = until
+
+    def requeue_expired(self) -> int:
+        # in-memory jobs die with the process; nothing to recover
+        return 0
+
+
+class SQLiteJobQueue(JobQueue):
+    """
+    Jobs in one SQLite database (WAL mode, one connection per thread).
+    Claims run in a BEGIN IMMEDIATE transaction, so a job goes to exactly one
+    worker even when several processes share the file.
+    """
+
+    _COLUMNS = (
+        "job_id", "pipeline_id", "session_id", "kind", "payload", "depends_on", "status", "result",
+        "error", "attempts", "max_attempts", "priority", "worker", "created_at", "started_at", "finished_at",
+        "lease_until",
+    )
+    _JSON_COLUMNS = ("payload", "depends_on", "result")
+
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        self._conn().executescript(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                job_id TEXT PRIMARY KEY,
+                pipeline_id TEXT,
+                session_id TEXT,
+                kind TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                depends_on TEXT NOT NULL,
+                status TEXT NOT NULL,
+                result TEXT,
+                error TEXT,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                max_attempts INTEGER NOT NULL DEFAULT 1,
+                priority INTEGER NOT NULL DEFAULT 0,
+                worker TEXT,
+                created_at REAL NOT NULL,
+                started_at REAL,
+                finished_at REAL,
+                lease_until REAL
+            );
+            CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, priority, created_at);
+            CREATE INDEX IF NOT EXISTS jobs_pipeline ON jobs (pipeline_id);
+            CREATE INDEX IF NOT EXISTS jobs_session ON jobs (session_id);
+            CREATE TABLE IF NOT EXISTS job_deps (
+                job_id TEXT NOT NULL,
+                depends_on TEXT NOT NULL,
+                PRIMARY KEY (job_id, depends_on)
+            );
+            CREATE INDEX IF NOT EXISTS job_deps_parent ON job_deps (depends_on);
+            """
+        )
+        columns = {r[1] for r in self._conn().execute("PRAGMA table_info(jobs)")}
+        if "lease_until" not in columns:
+            # queue files created before leases: running jobs there count as expired
+            self._conn().execute("ALTER TABLE jobs ADD COLUMN lease_until REAL")
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.db_path), timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _row(self, row) -> Optional[dict]:
+        if row is None:
+            return None
+        job = dict(zip(self._COLUMNS, row))
+        for col in self._JSON_COLUMNS:
+            job[col] = json.loads(job[col]) if job[col] is not None else None
+        return job
+
+    def _select(self, where: str = "", params=(), suffix: str = "") -> List[dict]:
+        sql = f"SELECT {', '.join(self._COLUMNS)} FROM jobs {where} {suffix}"
+        return [self._row(r) for r in self._conn().execute(sql, params).fetchall()]
+
+    def _insert(self, job: dict):
+        conn = self._conn()
+        values = [json.dumps(job[c]) if c in self._JSON_COLUMNS else job[c] for c in self._COLUMNS]
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                f"INSERT INTO jobs ({', '.join(self._COLUMNS)}) VALUES ({', '.join('?' * len(self._COLUMNS))})", values
+            )
+            conn.executemany(
+                "INSERT OR IGNORE INTO job_deps (job_id, depends_on) VALUES (?, ?)",
+                [(job["job_id"], d) for d in job["depends_on"]],
+            )
+            # submitted after a dependency already failed / was cancelled
+            blocked = conn.execute(
+                "SELECT d.depends_on, p.status FROM job_deps d LEFT JOIN jobs p ON p.job_id = d.depends_on "
+                "WHERE d.job_id = ? AND (p.status IS NULL OR p.status IN (?, ?))",
+                (job["job_id"], FAILED, CANCELLED),
+            ).fetchone()
+            if blocked is not None:
+                self._finish(conn, [job["job_id"]], FAILED, error=f"dependency {blocked[0]} {blocked[1] or 'not found'}")
+                job.update(status=FAILED, error=f"dependency {blocked[0]} {blocked[1] or 'not found'}")
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _finish(self, conn, job_ids: List[str], status: str, result=None, error=None):
+        now = time.time()
+        conn.executemany(
+            "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ? WHERE job_id = ?",
+            [(status, json.dumps(result) if result is not None else None, error, now, j) for j in job_ids],
+        )
+        if status == SUCCEEDED:
+            return
+        # fail everything still queued downstream, level by level
+        frontier = list(job_ids)
+        while frontier:
+            marks = ",".join("?" * len(frontier))
+            children = dict(conn.execute(
+                f"SELECT j.job_id, d.depends_on FROM job_deps d JOIN jobs j ON j.job_id = d.job_id "
+                f"WHERE d.depends_on IN ({marks}) AND j.status = ?", (*frontier, QUEUED),
+            ).fetchall())
+            conn.executemany(
+                "UPDATE jobs SET status = ?, error = ?, finished_at = ? WHERE job_id = ?",
+                [(FAILED, f"dependency {parent} {status if parent in job_ids else FAILED}", now, child)
+                 for child, parent in children.items()],
+            )
+            frontier = list(children)
+
+    def claim(self, worker: str) -> Optional[dict]:
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT j.job_id FROM jobs j WHERE j.status = ? AND NOT EXISTS ("
+                "  SELECT 1 FROM job_deps d JOIN jobs p ON p.job_id = d.depends_on"
+                "  WHERE d.job_id = j.job_id AND p.status != ?"
+                ") ORDER BY j.priority DESC, j.created_at LIMIT 1",
+                (QUEUED, SUCCEEDED),
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            now = time.time()
+            conn.execute(
+                "UPDATE jobs SET status = ?, worker = ?, started_at = ?, lease_until = ?, attempts = attempts + 1 "
+                "WHERE job_id = ?",
+                (RUNNING, worker, now, now + config.JOB_LEASE_S, row[0]),
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return self.get(row[0])
+
+    def complete(self, job_id: str, worker: str, result: dict) -> bool:
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            owned = conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = NULL, finished_at = ? "
+                "WHERE job_id = ? AND status = ? AND worker = ?",
+                (SUCCEEDED, json.dumps(result), time.time(), job_id, RUNNING, worker),
+            ).rowcount == 1
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return owned
+
+    def fail(self, job_id: str, worker: str, error: str, retry: bool = True) -> Optional[str]:
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT attempts, max_attempts FROM jobs WHERE job_id = ? AND status = ? AND worker = ?",
+                (job_id, RUNNING, worker),
+            ).fetchone()
+            if row is None:
+                # taken back after the lease expired; the current run decides
+                conn.execute("COMMIT")
+                return None
+            attempts, max_attempts = row
+            if retry and attempts < max_attempts:
+                conn.execute("UPDATE jobs SET status = ?, error = ?, worker = NULL, lease_until = NULL WHERE job_id = ?",
+                             (QUEUED, error, job_id))
+                status = QUEUED
+            else:
+                self._finish(conn, [job_id], FAILED, error=error)
+                status = FAILED
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return status
+
+    def cancel(self, job_id: str) -> bool:
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT status FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+            ok = row is not None and row[0] == QUEUED
+            if ok:
+                self._finish(conn, [job_id], CANCELLED, error="cancelled")
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return ok
+
+    def get(self, job_id: str) -> Optional[dict]:
+        jobs = self._select("WHERE job_id = ?", (job_id,))
+        return jobs[0] if jobs else None
+
+    def list_jobs(self, pipeline_id=None, session_id=None, limit: int = 500) -> List[dict]:
+        clauses, params = [], []
+        if pipeline_id is not None:
+            clauses.append("pipeline_id = ?")
+            params.append(pipeline_id)
+        if session_id is not None:
+            clauses.append("session_id = ?")
+            params.append(session_id)
+        where = ("WHERE " + " AND ".join(clauses)) if clauses else ""
+        return self._select(where, params, f"ORDER BY created_at LIMIT {int(limit)}")
+
+    def counts(self) -> Dict[str, int]:
+        return dict(self._conn().execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+
+    def renew_leases(self, claims: Dict[str, str], lease_s: float):
+        if not claims:
+            return
+        until = time.time() + lease_s
+        self._conn().executemany(
+            "UPDATE jobs SET lease_until = ? WHERE job_id = ? AND status = ? AND worker = ?",
+            [(until, job_id, RUNNING, worker) for job_id, worker in claims.items()],
+        )
+
+    def requeue_expired(self) -> int:
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            expired = conn.execute(
+                "SELECT job_id, worker, attempts, max_attempts FROM jobs "
+                "WHERE status = ? AND (lease_until IS NULL OR lease_until < ?)",
+                (RUNNING, time.time()),
+            ).fetchall()
+            requeue = [job_id for job_id, _, attempts, max_attempts in expired if attempts < max_attempts]
+            conn.executemany(
+                "UPDATE jobs SET status = ?, error = ?, worker = NULL, lease_until = NULL WHERE job_id = ?",
+                [(QUEUED, f"lease of {worker} expired", job_id) for job_id, worker, _, _ in expired if job_id in requeue],
+            )
+            for job_id, worker, _, _ in expired:
+                if job_id not in requeue:
+                    self._finish(conn, [job_id], FAILED, error=f"lease of {worker} expired")
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return len(expired)
+
+
+# =========================
+# Workers
+# =========================
+
+Handler = Callable[[dict, Dict[str, dict]], dict]
+
+
+class JobWorkers:
+    """
+    Thread pool that drains a JobQueue. A handler gets the job payload and
+    the results of its dependencies ({job_id: result}) and returns a
+    JSON-serializable result dict.
+    """
+
+    def __init__(self, queue: JobQueue, handlers: Dict[str, Handler], workers: int, poll_ms: float):
+        self.queue = queue
+        self.handlers = handlers
+        self.workers = max(1, int(workers))
+        self.poll_s = max(0.01, float(poll_ms) / 1000.0)
+        self._wake = threading.Condition()
+        self._stop = False
+        self._stopped = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._stats_lock = threading.Lock()
+        # owner prefix of this process's claims, and the jobs it is running
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        self._running: Dict[str, str] = {}
+        self.reclaimed = 0
+        self.stale = 0
+        self.busy = 0
+        self.processed = 0
+        self.failed = 0
+        self._run_ms: Dict[str, List[float]] = defaultdict(list)
+
+    def start(self):
+        self._reclaim()
+        for i in range(self.workers):
+            t = threading.Thread(target=self._loop, name=f"job-worker-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+        t = threading.Thread(target=self._lease_loop, name="job-leases", daemon=True)
+        t.start()
+        self._threads.append(t)
+
+    def _reclaim(self):
+        try:
+            recovered = self.queue.requeue_expired()
+        except Exception as e:
+            print("Job lease check error:", e)
+            return
+        if recovered:
+            self.reclaimed += recovered
+            print(f"Job queue: took back {recovered} job(s) whose worker lease expired")
+            self.wake()
+
+    def _lease_loop(self):
+        """
+        Renew the leases of the jobs running here, and take back jobs whose
+        owner stopped renewing (e.g. a worker process that was killed).
+        """
+        interval = max(0.05, config.JOB_LEASE_S / 3.0)
+        while not self._stopped.wait(interval):
+            with self._stats_lock:
+                running = dict(self._running)
+            try:
+                self.queue.renew_leases(running, config.JOB_LEASE_S)
+            except Exception as e:
+                print("Job lease renewal error:", e)
+            self._reclaim()
+
+    def wake(self):
+        with self._wake:
+            self._wake.notify_all()
+
+    def stop(self, timeout: float = 5.0):
+        self._stop = True
+        self._stopped.set()
+        self.wake()
+        for t in self._threads:
+            t.join(timeout)
+        self._threads = []
+
+    def _loop(self):
+        name = f"{self.owner}:{threading.current_thread().name}"
+        while not self._stop:
+            try:
+                job = self.queue.claim(name)
+            except Exception as e:
+                print("Job claim error:", e)
+                job = None
+            if job is None:
+                with self._wake:
+                    if not self._stop:
+                        self._wake.wait(self.poll_s)
+                continue
+            self._run(job)
+            # finished jobs may unblock dependents: let idle workers look
+            self.wake()
+
+    def _run(self, job: dict):
+        job_id, worker = job["job_id"], job["worker"]
+        with self._stats_lock:
+            self.busy += 1
+            self._running[job_id] = worker
+        t0 = time.perf_counter()
+        recorded = True
+        try:
+            handler = self.handlers.get(job["kind"])
+            if handler is None:
+                raise JobError(f"no handler for job kind {job['kind']!r}")
+            deps = {}
+            for dep_id in job["depends_on"]:
+                dep = self.queue.get(dep_id)
+                deps[dep_id] = (dep or {}).get("result") or {}
+            result = handler(job["payload"], deps)
+            recorded = self.queue.complete(job_id, worker, result or {})
+            ok = True
+        except JobError as e:
+            recorded = self.queue.fail(job_id, worker, str(e), retry=False) is not None
+            ok = False
+        except Exception as e:
+            print(f"Job {job['kind']} {job_id} failed:", e)
+            print(traceback.format_exc())
+            recorded = self.queue.fail(job_id, worker, f"{type(e).__name__}: {e}") is not None
+            ok = False
+        if not recorded:
+            print(f"Job {job['kind']} {job_id}: lease of {worker} expired while it ran; outcome dropped")
+        ms = (time.perf_counter() - t0) * 1000.0
+        JOB_SECONDS.observe(ms / 1000.0, job["kind"], "succeeded" if ok else "failed")
+        with self._stats_lock:
+            self.busy -= 1
+            self.stale += 0 if recorded else 1
+            self._running.pop(job_id, None)
+            self.processed += 1
+            self.failed += 0 if ok else 1
+            samples = self._run_ms[job["kind"]]
+            samples.append(ms)
+            del samples[:-200]
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            run_ms = {
+                kind: round(sum(v) / len(v), 3) for kind, v in self._run_ms.items() if v
+            }
+            return {
+                "workers": self.workers,
+                "owner": self.owner,
+                "busy": self.busy,
+                "reclaimed": self.reclaimed,
+                "stale_results": self.stale,
+                "processed": self.processed,
+                "failed_attempts": self.failed,
+                "avg_run_ms": run_ms,
+                "jobs": self.queue.counts(),
+            }
+
+
+_QUEUES = {
+    "sqlite": lambda: SQLiteJobQueue(Path(config.JOB_DB_PATH)),
+    "memory": MemoryJobQueue,
+}
+
+_queue: Optional[JobQueue] = None
+_workers: Optional[JobWorkers] = None
+_lock = threading.Lock()
+
+
+def get_job_queue() -> JobQueue:
+    global _queue
+    if _queue is None:
+        with _lock:
+            if _queue is None:
+                factory = _QUEUES.get(config.JOB_QUEUE)
+                if factory is None:
+                    raise RuntimeError(f"Unknown JOB_QUEUE {config.JOB_QUEUE!r}; expected one of {sorted(_QUEUES)}")
+                _queue = factory()
+    return _queue
+
+
+def start_job_workers(handlers: Dict[str, Handler]) -> Optional[JobWorkers]:
+    global _workers
+    if config.JOB_WORKERS <= 0:
+        return None
+    queue = get_job_queue()
+    with _lock:
+        if _workers is None:
+            _workers = JobWorkers(queue, handlers, config.JOB_WORKERS, config.JOB_POLL_MS)
+            _workers.start()
+    return _workers
+
+
+def stop_job_workers():
+    global _workers
+    with _lock:
+        workers, _workers = _workers, None
+    if workers is not None:
+        workers.stop()
+
+
+def get_job_workers() -> Optional[JobWorkers]:
+    return _workers
+
+
+def submit_job(kind: str, payload: dict, **kwargs) -> dict:
+    """
+    Queue a job and wake the local workers.
+    """
+    job = get_job_queue().submit(kind, payload, **kwargs)
+    if _workers is not None:
+        _workers.wake()
+    return job
+
+
+def job_stats() -> dict:
+    if _workers is not None:
+        return _workers.stats()
+    return {"workers": 0, "jobs": get_job_queue().counts()}
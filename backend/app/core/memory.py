@@ -0,0 +1,151 @@
+"""
+Per-process memory report (Linux /proc) for multi-worker serving.
+
+RSS counts every resident page a process maps, shared or not, so summing it
+over gunicorn workers counts the shared model weights once per worker.
+PSS (proportional set size) splits each shared page between the processes
+mapping it; the PSS sum is the real footprint of the server.
+`rss_sum - pss_sum` is what copy-on-write sharing saves.
+
+    python -m backend.app.core.memory --master <gunicorn master pid>
+    python -m backend.app.core.memory --json
+"""
+
+import argparse
+import json
+import os
+from pathlib import Path
+from typing import Dict, List, Optional
+
+_PROC = Path("/proc")
+# smaps_rollup fields reported, in kB
+_FIELDS = {
+    "Rss": "rss_mb",
+    "Pss": "pss_mb",
+    "Shared_Clean": "shared_clean_mb",
+    "Shared_Dirty": "shared_dirty_mb",
+    "Private_Clean": "private_clean_mb",
+    "Private_Dirty": "private_dirty_mb",
+    "Swap": "swap_mb",
+}
+
+
+def _read_smaps(pid: int) -> Dict[str, float]:
+    totals = {key: 0 for key in _FIELDS}
+    rollup = _PROC / str(pid) / "smaps_rollup"
+    # older kernels have no smaps_rollup: sum the per-mapping smaps instead
+    source = rollup if rollup.exists() else _PROC / str(pid) / "smaps"
+    with open(source, "r", encoding="ascii", errors="replace") as f:
+        for line in f:
+            key, _, rest = line.partition(":")
+            if key in totals:
+                totals[key] += int(rest.split()[0])
+    return {_FIELDS[key]: round(kb / 1024.0, 2) for key, kb in totals.items()}
+
+
+def _cmdline(pid: int) -> str:
+    try:
+        raw = (_PROC / str(pid) / "cmdline").read_bytes()
+    except OSError:
+        return ""
+    return raw.replace(b"\0", b" ").decode("utf-8", "replace").strip()
+
+
+def _ppid(pid: int) -> Optional[int]:
+    try:
+        stat = (_PROC / str(pid) / "stat").read_text()
+    except OSError:
+        return None
+    # the command name may contain spaces: fields start after the last ')'
+    return int(stat.rsplit(")", 1)[1].split()[1])
+
+
+def process_memory(pid: int) -> dict:
+    return {"pid": pid, "cmdline": _cmdline(pid)[:200], **_read_smaps(pid)}
+
+
+def child_pids(parent: int) -> List[int]:
+    children = []
+    for entry in _PROC.iterdir():
+        if entry.name.isdigit() and _ppid(int(entry.name)) == parent:
+            children.append(int(entry.name))
+    return sorted(children)
+
+
+def serving_master() -> Optional[int]:
+    """
+    The gunicorn master of this process, if it runs as a gunicorn worker.
+    """
+    parent = os.getppid()
+    return parent if "gunicorn" in _cmdline(parent) else None
+
+
+def memory_report(master_pid: Optional[int] = None) -> dict:
+    """
+    RSS / PSS of the master and every worker, plus totals. Without a
+    master (plain uvicorn) the report covers this process only.
+    """
+    master_pid = master_pid or serving_master()
+    if master_pid is None:
+        workers = [os.getpid()]
+        master = None
+    else:
+        workers = child_pids(master_pid)
+        master = process_memory(master_pid)
+
+    rows = []
+    for pid in workers:
+        try:
+            rows.append(process_memory(pid))
+        except OSError:
+            # worker exited while we were reading
+            continue
+
+    procs = rows + ([master] if master else [])
+    rss = sum(r["rss_mb"] for r in procs)
+    pss = sum(r["pss_mb"] for r in procs)
+    return {
+        "master": master,
+        "workers": rows,
+        "current_pid": os.getpid(),
+        "totals": {
+            "processes": len(procs),
+            "rss_sum_mb": round(rss, 2),
+            "pss_sum_mb": round(pss, 2),
+            "shared_savings_mb": round(rss - pss, 2),
+            "worker_pss_avg_mb": round(sum(r["pss_mb"] for r in rows) / len(rows), 2) if rows else None,
+            "worker_private_avg_mb": round(
+                sum(r["private_clean_mb"] + r["private_dirty_mb"] for r in rows) / len(rows), 2
+            ) if rows else None,
+        },
+    }
+
+
+def _print_report(report: dict):
+    header = f"{'pid':>8} {'role':<7} {'rss MB':>9} {'pss MB':>9} {'shared MB':>10} {'private MB':>11}"
+    print(header)
+    print("-" * len(header))
+    rows = ([("master", report["master"])] if report["master"] else []) + [("worker", r) for r in report["workers"]]
+    for role, r in rows:
+        shared = r["shared_clean_mb"] + r["shared_dirty_mb"]
+        private = r["private_clean_mb"] + r["private_dirty_mb"]
+        print(f"{r['pid']:>8} {role:<7} {r['rss_mb']:>9.1f} {r['pss_mb']:>9.1f} {shared:>10.1f} {private:>11.1f}")
+    t = report["totals"]
+    print("-" * len(header))
+    print(f"RSS sum {t['rss_sum_mb']:.1f} MB, PSS sum {t['pss_sum_mb']:.1f} MB, saved by sharing {t['shared_savings_mb']:.1f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--master", type=int, default=None, help="gunicorn master pid (default: this process only)")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+    report = memory_report(args.master)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        _print_report(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,516 @@
+"""
+Latency instrumentation and Prometheus text exposition.
+
+Stages are timed with timed(), as a context manager or a decorator:
+
+    with timed("asr", model=config.ASR_MODEL_NAME):
+        ...
+
+    @timed("write_score")
+    def write_score(...): ...
+
+Every timing lands in the interview_stage_seconds histogram. While an HTTP
+request is being handled, MetricsMiddleware also collects that request's
+stages (including the ones run on the worker pools, which inherit the
+request context) and returns them in a Server-Timing header, so a slow
+/answer/audio shows whether the time went to save_upload, asr, encode,
+top_matches or write_score.
+
+Cache, batcher, pool, job and answer-index stats are read at scrape time
+by collectors and exported as gauges / counters; GET /api/metrics serves
+everything in the Prometheus text format.
+
+With PROFILE_REQUESTS=1 a request carrying `X-Profile: 1` is also sampled
+by a stack-sampling profiler. The folded stacks (flamegraph.pl /
+speedscope input) are written to PROFILE_DIR and the response carries an
+X-Profile-Id to fetch them from /api/metrics/profile/{id}.
+"""
+
+import asyncio
+import contextvars
+import functools
+import math
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from backend.app.core import config
+
+# seconds; covers cache hits (sub-ms) up to long Whisper runs
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Tuple[str, ...], values: Tuple, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra is not None:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _num(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = (), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        # label values -> [per-bucket counts..., sum, count]
+        self._series: Dict[Tuple, List[float]] = {}
+
+    def observe(self, value: float, *labelvalues):
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                series = self._series[labelvalues] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+                    break
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._series.items())
+        for values, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, values, ('le', _num(bound)))} {cumulative}")
+            lines.append(f"{self.name}_bucket{_labels(self.labelnames, values, ('le', '+Inf'))} {series[-1]}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, values)} {_num(series[-2])}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, values)} {series[-1]}")
+        return lines
+
+    def summary(self) -> Dict[str, dict]:
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._series.items())
+        return {
+            "/".join(str(v) for v in values if v) or "_": {
+                "count": series[-1],
+                "avg_ms": round(series[-2] / series[-1] * 1000.0, 3) if series[-1] else 0.0,
+            }
+            for values, series in items
+        }
+
+
+class CounterMetric:
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple, float] = defaultdict(float)
+
+    def inc(self, *labelvalues, amount: float = 1.0):
+        with self._lock:
+            self._values[labelvalues] += amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for values, value in items:
+            lines.append(f"{self.name}{_labels(self.labelnames, values)} {_num(value)}")
+        return lines
+
+
+_metrics: List[object] = []
+
+
+def histogram(name: str, help: str, labelnames: Tuple[str, ...] = (), buckets=DEFAULT_BUCKETS) -> Histogram:
+    metric = Histogram(name, help, labelnames, buckets)
+    _metrics.append(metric)
+    return metric
+
+
+def counter(name: str, help: str, labelnames: Tuple[str, ...] = ()) -> CounterMetric:
+    metric = CounterMetric(name, help, labelnames)
+    _metrics.append(metric)
+    return metric
+
+
+STAGE_SECONDS = histogram("interview_stage_seconds", "Time spent per processing stage", ("stage", "model"))
+STAGE_ERRORS = counter("interview_stage_errors_total", "Stages that raised", ("stage",))
+REQUEST_SECONDS = histogram(
+    "interview_http_request_seconds", "HTTP request latency by route", ("method", "route", "status")
+)
+POOL_WAIT_SECONDS = histogram("interview_pool_queue_wait_seconds", "Time queued before a pool worker picked the task up", ("pool",))
+POOL_RUN_SECONDS = histogram("interview_pool_run_seconds", "Time a pool worker spent on the task", ("pool",))
+JOB_SECONDS = histogram("interview_job_seconds", "Pipeline job run time", ("kind", "status"))
+
+
+# =========================
+# Per-request stage breakdown
+# =========================
+
+class RequestState:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.stages: Dict[str, List[float]] = {}
+        # threads currently inside a timed() block of this request (for the profiler)
+        self.threads: Counter = Counter()
+
+    def add(self, stage: str, seconds: float):
+        with self._lock:
+            total = self.stages.setdefault(stage, [0.0, 0])
+            total[0] += seconds
+            total[1] += 1
+
+    def enter_thread(self, ident: int):
+        with self._lock:
+            self.threads[ident] += 1
+
+    def exit_thread(self, ident: int):
+        with self._lock:
+            self.threads[ident] -= 1
+            if self.threads[ident] <= 0:
+                del self.threads[ident]
+
+    def active_threads(self) -> set:
+        with self._lock:
+            return set(self.threads)
+
+    def server_timing(self, total_s: Optional[float] = None) -> str:
+        with self._lock:
+            items = list(self.stages.items())
+        parts = [f"{stage};dur={seconds * 1000.0:.1f}" for stage, (seconds, _) in items]
+        if total_s is not None:
+            parts.append(f"app;dur={total_s * 1000.0:.1f}")
+        return ", ".join(parts)
+
+
+_request: contextvars.ContextVar = contextvars.ContextVar("interview_request_metrics", default=None)
+
+
+def current_request() -> Optional[RequestState]:
+    return _request.get()
+
+
+def detach_request():
+    """
+    Stop attributing stages to the request whose context this task or
+    thread inherited; long-lived workers started from a request call this.
+    """
+    _request.set(None)
+
+
+def record_stage(stage: str, seconds: float, model: str = ""):
+    STAGE_SECONDS.observe(seconds, stage, model)
+    state = _request.get()
+    if state is not None:
+        state.add(stage, seconds)
+
+
+class timed:
+    """
+    Time a block or a function (sync or async) as one stage.
+    """
+
+    def __init__(self, stage: str, model: str = ""):
+        self.stage = stage
+        self.model = model or ""
+        self._t0 = None
+        self._state = None
+
+    def __enter__(self):
+        self._state = _request.get()
+        if self._state is not None:
+            self._state.enter_thread(threading.get_ident())
+        self._t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        record_stage(self.stage, time.perf_counter() - self._t0, self.model)
+        if exc_type is not None:
+            STAGE_ERRORS.inc(self.stage)
+        if self._state is not None:
+            self._state.exit_thread(threading.get_ident())
+        return False
+
+    def __call__(self, fn: Callable):
+        stage, model = self.stage, self.model
+        if asyncio.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with timed(stage, model):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with timed(stage, model):
+                return fn(*args, **kwargs)
+        return wrapper
+
+
+# =========================
+# Collectors (read at scrape time)
+# =========================
+
+Sample = Tuple[str, str, str, Dict[str, str], float]  # name, type, help, labels, value
+_collectors: List[Callable[[], Iterable[Sample]]] = []
+
+
+def register_collector(fn: Callable[[], Iterable[Sample]]):
+    _collectors.append(fn)
+    return fn
+
+
+@register_collector
+def _embedding_samples():
+    from backend.app.core.ml_models import embedding_cache_stats, get_batcher
+    cache = embedding_cache_stats()
+    model = {"model": cache["model"]}
+    for key in ("hits", "disk_hits", "misses", "evictions"):
+        yield f"interview_embedding_cache_{key}_total", "counter", f"Embedding cache {key.replace('_', ' ')}", model, cache[key]
+    yield "interview_embedding_cache_entries", "gauge", "Embedding vectors held in memory", model, cache["entries"]
+    batcher = get_batcher().stats()
+    yield "interview_embedding_batcher_queue_depth", "gauge", "Texts waiting for the micro-batcher", {}, batcher["queue_depth"]
+    yield "interview_embedding_batches_total", "counter", "Micro-batches encoded", {}, batcher["batches"]
+    yield "interview_embedding_batch_items_total", "counter", "Texts encoded through the micro-batcher", {}, batcher["items"]
+    yield "interview_embedding_batcher_rejected_total", "counter", "Texts rejected by a full batcher queue", {}, batcher["rejected"]
+
+
+@register_collector
+def _pool_samples():
+    from backend.app.core.inference_pool import pool_stats
+    for name, stats in pool_stats().items():
+        pool = {"pool": name}
+        yield "interview_pool_running", "gauge", "Tasks running on the pool", pool, stats["running"]
+        yield "interview_pool_queued", "gauge", "Tasks waiting for a pool worker", pool, stats["queued"]
+        for key in ("completed", "failed", "rejected"):
+            yield f"interview_pool_{key}_total", "counter", f"Pool tasks {key}", pool, stats[key]
+
+
+@register_collector
+def _job_samples():
+    from backend.app.core.jobs import get_job_queue, get_job_workers
+    for status, count in get_job_queue().counts().items():
+        yield "interview_jobs", "gauge", "Pipeline jobs by status", {"status": status}, count
+    workers = get_job_workers()
+    if workers is not None:
+        yield "interview_job_workers_busy", "gauge", "Job workers running a job", {}, workers.busy
+
+
+@register_collector
+def _answer_index_samples():
+    if not config.ANSWER_INDEX:
+        return
+    from backend.app.core.answer_index import get_answer_index
+    stats = get_answer_index().stats()
+    yield "interview_answer_index_rows", "gauge", "Answers in the cross-session index", {}, stats["live"]
+    yield "interview_answer_index_ivf", "gauge", "1 when queries use the trained IVF index", {}, int(stats["mode"] == "ivf")
+
+
+@register_collector
+def _storage_samples():
+    from backend.app.core.storage_lifecycle import get_lifecycle
+    manager = get_lifecycle()
+    yield "interview_storage_lifecycle_passes_total", "counter", "Storage lifecycle passes run by this process", {}, manager.passes
+    archive = manager.store.archive.stats()
+    yield "interview_storage_archived_sessions", "gauge", "Sessions compacted into _archive", {}, archive["sessions"]
+    yield "interview_storage_archived_bytes", "gauge", "Bytes held by session archives", {}, archive["bytes_after"]
+    report = manager.last_report
+    if report is not None:
+        yield "interview_storage_lifecycle_reclaimed_bytes", "gauge", "Bytes reclaimed by the last lifecycle pass", {}, report["reclaimed_bytes"]
+        yield "interview_storage_lifecycle_runtime_seconds", "gauge", "Runtime of the last lifecycle pass", {}, report["runtime_s"]
+
+
+def _render_samples() -> List[str]:
+    grouped: Dict[str, dict] = {}
+    for collector in _collectors:
+        try:
+            for name, kind, help, labels, value in collector():
+                entry = grouped.setdefault(name, {"type": kind, "help": help, "samples": []})
+                entry["samples"].append((labels, value))
+        except Exception as e:
+            # one broken collector must not take the whole scrape down
+            print(f"Metrics collector {collector.__name__} failed:", e)
+    lines = []
+    for name, entry in grouped.items():
+        lines.append(f"# HELP {name} {entry['help']}")
+        lines.append(f"# TYPE {name} {entry['type']}")
+        for labels, value in entry["samples"]:
+            names = tuple(labels)
+            lines.append(f"{name}{_labels(names, tuple(labels[n] for n in names))} {_num(value)}")
+    return lines
+
+
+def render_prometheus() -> str:
+    lines = []
+    for metric in _metrics:
+        lines.extend(metric.render())
+    lines.extend(_render_samples())
+    return "\n".join(lines) + "\n"
+
+
+def stage_summary() -> dict:
+    return {"stages": STAGE_SECONDS.summary(), "requests": REQUEST_SECONDS.summary()}
+
+
+# =========================
+# Sampling profiler
+# =========================
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{Path(code.co_filename).stem}:{getattr(code, 'co_qualname', code.co_name)}"
+
+
+def _is_idle(frame) -> bool:
+    # the event loop waiting in select() is not work done for this request
+    return frame.f_code.co_name in ("select", "poll", "_run_once") and "selectors" in frame.f_code.co_filename
+
+
+class SamplingProfiler:
+    """
+    Samples the stacks of the request's threads every interval_ms: the
+    event loop thread plus pool threads currently inside one of the
+    request's timed() stages. Other requests running concurrently on the
+    event loop can show up in its samples; profile on a quiet worker.
+    """
+
+    def __init__(self, state: RequestState, loop_thread: int, interval_ms: float):
+        self.state = state
+        self.loop_thread = loop_thread
+        self.interval = max(0.001, interval_ms / 1000.0)
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def _run(self):
+        me = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            threads = self.state.active_threads() | {self.loop_thread}
+            frames = sys._current_frames()
+            for ident in threads:
+                frame = frames.get(ident)
+                if frame is None or ident == me or _is_idle(frame):
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                self.stacks[";".join(reversed(stack))] += 1
+                self.samples += 1
+
+    def stop(self, wait: bool = True):
+        self._stop.set()
+        if wait:
+            self._thread.join(timeout=1.0)
+
+    def folded(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+def profile_dir() -> Path:
+    return Path(config.PROFILE_DIR)
+
+
+def _save_profile(profile_id: str, profiler: SamplingProfiler):
+    directory = profile_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    (directory / f"{profile_id}.folded").write_text(profiler.folded(), encoding="utf-8")
+    # keep only the newest PROFILE_MAX_FILES profiles
+    files = sorted(directory.glob("*.folded"), key=lambda p: p.stat().st_mtime)
+    for old in files[:-config.PROFILE_MAX_FILES] if config.PROFILE_MAX_FILES > 0 else []:
+        old.unlink(missing_ok=True)
+
+
+def _finish_profile(profile_id: str, profiler: SamplingProfiler):
+    # blocking (thread join + file writes): runs on the io pool
+    profiler.stop()
+    try:
+        _save_profile(profile_id, profiler)
+    except OSError as e:
+        print("Could not save request profile:", e)
+
+
+def load_profile(profile_id: str) -> Optional[str]:
+    if not profile_id.isalnum():
+        return None
+    path = profile_dir() / f"{profile_id}.folded"
+    return path.read_text(encoding="utf-8") if path.exists() else None
+
+
+# =========================
+# Middleware
+# =========================
+
+def _route_label(scope) -> str:
+    # route templates, not raw paths, keep the label set bounded
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+class MetricsMiddleware:
+    """
+    Per-request latency histogram (method, route template, status), the
+    Server-Timing stage breakdown and the opt-in X-Profile profiler.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not config.METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        state = RequestState()
+        token = _request.set(state)
+        profiler = profile_id = None
+        if config.PROFILE_REQUESTS and dict(scope.get("headers") or []).get(b"x-profile") in (b"1", b"true"):
+            profile_id = uuid.uuid4().hex
+            profiler = SamplingProfiler(state, threading.get_ident(), config.PROFILE_INTERVAL_MS)
+            profiler.start()
+
+        t0 = time.perf_counter()
+        status = {"code": 500}
+
+        async def _send(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                headers = list(message.get("headers") or [])
+                timing = state.server_timing(time.perf_counter() - t0)
+                headers.append((b"server-timing", timing.encode("latin-1")))
+                if profile_id is not None:
+                    headers.append((b"x-profile-id", profile_id.encode("latin-1")))
+                message = dict(message, headers=headers)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, _send)
+        finally:
+            REQUEST_SECONDS.observe(
+                time.perf_counter() - t0, scope.get("method", ""), _route_label(scope), str(status["code"])
+            )
+            _request.reset(token)
+            if profiler is not None:
+                from backend.app.core.inference_pool import run_in_pool
+                try:
+                    await run_in_pool("io", _finish_profile, profile_id, profiler)
+                except Exception as e:
+                    # e.g. a saturated io pool: drop the profile, but stop sampling
+                    profiler.stop(wait=False)
+                    print("Could not save request profile:", e)
@@ -3,16 +3,23 @@ Centralized ML model loading and inference utilities.
 All heavy models are loaded once and reused across requests.
 """
 
+import asyncio
 import threading
 from typing import Union, List
 
-from sentence_transformers import SentenceTransformer
+import numpy as np
+
+from backend.app.core import config
+from backend.app.core.embedding_backends import EmbeddingBackend, create_backend
+from backend.app.core.embedding_backends import embedding_model_id as configured_model_id
+from backend.app.core.embedding_cache import EmbeddingCache
+from backend.app.core.inference_pool import PoolSaturated, run_in_pool
+from backend.app.core.metrics import detach_request, timed
 
 # =========================
-# Sentence Transformer
+# Sentence embedding model
 # =========================
 
-_SENTENCE_MODEL_NAME = "all-MiniLM-L6-v2"
 _sentence_model = None
 _sentence_lock = threading.Lock()
 
@@ -26,29 +33,248 @@ def load_models():
     if _sentence_model is None:
         with _sentence_lock:
             if _sentence_model is None:
-                print("📥 Loading SentenceTransformer...")
-                _sentence_model = SentenceTransformer(_SENTENCE_MODEL_NAME)
-                print("✅ SentenceTransformer loaded")
+                print(f"📥 Loading sentence model ({config.EMBED_BACKEND} backend)...")
+                _sentence_model = create_backend()
+                print(f"✅ Sentence model loaded: {_sentence_model.model_id}")
+
+
+def sentence_model_loaded() -> bool:
+    return _sentence_model is not None
+
+
+def sentence_model_info() -> dict:
+    if _sentence_model is None:
+        return {"backend": config.EMBED_BACKEND, "model": configured_model_id()}
+    return _sentence_model.info()
 
 
-def get_sentence_transformer() -> SentenceTransformer:
+def get_embedding_backend() -> EmbeddingBackend:
     """
-    Return the already-loaded SentenceTransformer.
+    Return the embedding backend, loading it on first use. Normally it is
+    already loaded by the startup prewarm; a request that arrives while a
+    background prewarm is still loading waits for it on the lock.
     """
     if _sentence_model is None:
-        raise RuntimeError(
-            "SentenceTransformer not loaded. "
-            "Did you forget to call load_models() in FastAPI lifespan?"
-        )
+        load_models()
     return _sentence_model
 
 
+def embedding_model_id() -> str:
+    """
+    Identity of the embedding space vectors are computed in: the loaded
+    backend's model_id (e.g. an ONNX backend that fell back to fp32 says so).
+    Key anything that stores vectors by this.
+    """
+    return get_embedding_backend().model_id
+
+
 def encode_sentence(
     texts: Union[str, List[str]],
     convert_to_tensor: bool = True
 ):
     """
-    Encode text(s) into embeddings using the shared SentenceTransformer.
+    Encode text(s) into embeddings using the shared backend.
+    A single string gives one vector, a list gives a (n, dim) float32 matrix;
+    convert_to_tensor wraps the result in a torch tensor.
+    """
+    single = isinstance(texts, str)
+    backend = get_embedding_backend()
+    with timed("encode", model=backend.model_id):
+        vectors = backend.encode([texts] if single else list(texts))
+    result = vectors[0] if single else vectors
+    if convert_to_tensor:
+        import torch
+        return torch.from_numpy(np.ascontiguousarray(result))
+    return result
+
+
+# =========================
+# Micro-batching engine
+# =========================
+
+class EmbeddingBatcher:
+    """
+    Collects texts from concurrent requests and encodes them in one forward pass.
+
+    Callers await encode(); a single worker task drains the queue until either
+    max_batch_size texts are collected or max_wait_ms has passed since the first
+    one arrived, runs the backend encode off the event loop and resolves
+    every caller's future with its own row.
+    """
+
+    def __init__(self, max_batch_size: int = 32, max_wait_ms: float = 5.0, max_queue: int = 0):
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        # waiting texts beyond this are rejected with PoolSaturated (0 = unbounded)
+        self.max_queue = max(0, int(max_queue))
+        self._queue = None
+        self._loop = None
+        self._worker = None
+        # counters
+        self.batches = 0
+        self.items = 0
+        self.max_queue_depth = 0
+        self.rejected = 0
+
+    def _ensure_worker(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._worker is None or self._worker.done():
+            # (re)bind to the current loop, e.g. after a test client restart
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run())
+
+    async def encode(self, text: str):
+        """
+        Encode a single text; returns a float32 numpy vector.
+        """
+        self._ensure_worker()
+        if self.max_queue and self._queue.qsize() >= self.max_queue:
+            self.rejected += 1
+            raise PoolSaturated("embedding", config.POOL_RETRY_AFTER_S)
+        fut = self._loop.create_future()
+        await self._queue.put((text, fut))
+        self.max_queue_depth = max(self.max_queue_depth, self._queue.qsize())
+        return await fut
+
+    async def encode_many(self, texts: List[str]):
+        """
+        Encode several texts; they may share a batch with other callers.
+        """
+        return list(await asyncio.gather(*(self.encode(t) for t in texts)))
+
+    async def _collect(self):
+        first = await self._queue.get()
+        batch = [first]
+        deadline = self._loop.time() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - self._loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        # created by whichever request came first; its batches serve everyone
+        detach_request()
+        while True:
+            batch = await self._collect()
+            texts = [text for text, _ in batch]
+            try:
+                vectors = await run_in_pool("embedding", encode_sentence, texts, convert_to_tensor=False)
+            except Exception as e:
+                for _, fut in batch:
+                    if not fut.done():
+                        fut.set_exception(e)
+                continue
+            self.batches += 1
+            self.items += len(batch)
+            for (_, fut), vec in zip(batch, vectors):
+                if not fut.done():
+                    fut.set_result(vec)
+
+    def stats(self) -> dict:
+        return {
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "max_queue_depth": self.max_queue_depth,
+            "rejected": self.rejected,
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch_size": round(self.items / self.batches, 3) if self.batches else 0.0,
+            "batch_fill_ratio": (
+                round(self.items / (self.batches * self.max_batch_size), 4) if self.batches else 0.0
+            ),
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000.0,
+        }
+
+
+_batcher = None
+
+
+def get_batcher() -> EmbeddingBatcher:
+    """
+    Return the process-wide micro-batcher (configured from core.config).
+    """
+    global _batcher
+    if _batcher is None:
+        _batcher = EmbeddingBatcher(
+            config.EMBED_BATCH_SIZE, config.EMBED_BATCH_WAIT_MS, config.EMBED_MAX_QUEUE
+        )
+    return _batcher
+
+
+async def encode_sentence_batched(text: str):
+    """
+    Async counterpart of encode_sentence for request handlers.
+    Concurrent calls are coalesced into a single encode() call.
+    """
+    return await get_batcher().encode(text)
+
+
+# =========================
+# Embedding cache
+# =========================
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_embedding_cache() -> EmbeddingCache:
+    """
+    Return the process-wide embedding cache for the sentence model.
+    Keyed by the loaded backend's model id, so it loads the model first.
+    """
+    global _cache
+    if _cache is None:
+        model_id = embedding_model_id()
+        with _cache_lock:
+            if _cache is None:
+                _cache = EmbeddingCache(
+                    model_id,
+                    max_entries=config.EMBED_CACHE_SIZE,
+                    disk_dir=config.EMBED_CACHE_DIR or None,
+                )
+    return _cache
+
+
+def embedding_cache_stats() -> dict:
+    """
+    Cache stats for health / metrics; never loads the model just to report.
+    """
+    if _cache is None and not sentence_model_loaded():
+        return EmbeddingCache(configured_model_id(), max_entries=config.EMBED_CACHE_SIZE).stats()
+    return get_embedding_cache().stats()
+
+
+def encode_sentence_cached(texts: List[str]):
+    """
+    Synchronous cached encode for a list of texts.
+    Only cache misses are sent to the model, in a single batch.
+    Returns a list of float32 numpy vectors in input order.
+    """
+    cache = get_embedding_cache()
+    vectors = cache.get_many(texts)
+    missing = sorted({t for t, v in zip(texts, vectors) if v is None})
+    if missing:
+        encoded = dict(zip(missing, encode_sentence(missing, convert_to_tensor=False)))
+        for text, vec in encoded.items():
+            cache.put(text, vec)
+        vectors = [v if v is not None else encoded[t] for t, v in zip(texts, vectors)]
+    return vectors
+
+
+async def encode_sentence_cached_async(text: str):
+    """
+    Cached counterpart of encode_sentence_batched: a hit skips the model entirely,
+    a miss joins the current micro-batch and is stored afterwards.
     """
-    model = get_sentence_transformer()
-    return model.encode(texts, convert_to_tensor=convert_to_tensor)
+    cache = get_embedding_cache()
+    vec = cache.get(text)
+    if vec is None:
+        vec = await encode_sentence_batched(text)
+        cache.put(text, vec)
+    return vec
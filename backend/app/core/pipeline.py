@@ -0,0 +1,207 @@
+"""
+Interview pipeline stages as jobs.
+
+A pipeline is a set of jobs sharing a pipeline_id:
+
+    parse ──> plan ──> score(q1)
+                  ├──> score(q2)             text answers
+                  └──> score(q3) <── transcribe(q3)   audio answer
+
+Parsing and planning are sequential. Each answer is an independent branch:
+its transcription starts immediately (it does not need the plan) and its
+scoring waits for both the plan and the transcript. Branches of different
+questions run in parallel on the job workers.
+
+Stage handlers reuse the same functions as the synchronous endpoints.
+"""
+
+import traceback
+import uuid
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from backend.app.core.jobs import JobError, submit_job
+from backend.app.core.session_report import record_plan
+from backend.app.core.session_store import get_store
+
+PARSE = "parse"
+PLAN = "plan"
+TRANSCRIBE = "transcribe"
+SCORE = "score"
+
+
+# =========================
+# Stage handlers
+# =========================
+
+def _parse(payload: dict, deps: Dict[str, dict]) -> dict:
+    from backend.app.api.routes.parse_resume import parse_session_resume
+    try:
+        return parse_session_resume(payload["session_id"])
+    except FileNotFoundError as e:
+        raise JobError(str(e))
+
+
+def _plan(payload: dict, deps: Dict[str, dict]) -> dict:
+    from backend.app.api.routes.interview_plan import build_interview_plan
+    from backend.app.core.reference import precompute_reference_embeddings
+
+    session_id = payload["session_id"]
+    store = get_store()
+    try:
+        parsed = store.get_parsed(session_id)
+    except FileNotFoundError:
+        raise JobError("Parsed resume not found")
+    plan = build_interview_plan(session_id, parsed)
+    plan_path = store.put_plan(session_id, plan)
+    record_plan(session_id, plan)
+
+    reference_embeddings = "skipped"
+    if payload.get("precompute", True):
+        try:
+            precompute_reference_embeddings(store.session_dir(session_id), parsed, plan)
+            reference_embeddings = "ok"
+        except Exception as e:
+            # scoring falls back to encoding the reference on demand
+            print("Reference precompute error:", e)
+            print(traceback.format_exc())
+            reference_embeddings = "failed"
+    return {
+        "status": "ok",
+        "total_questions": len(plan["questions"]),
+        "plan_path": plan_path,
+        "reference_embeddings": reference_embeddings,
+        "questions": [
+            {"id": q["id"], "type": q.get("type"), "skill": q.get("skill"), "question": q.get("question")}
+            for q in plan["questions"]
+        ],
+    }
+
+
+def _transcribe(payload: dict, deps: Dict[str, dict]) -> dict:
+    from backend.app.core.audio_preproc import transcribe_file
+
+    audio_path = Path(payload["audio_path"])
+    if not audio_path.exists():
+        raise JobError(f"audio file not found: {audio_path}")
+    transcript, audio_stats = transcribe_file(audio_path)
+    return {"transcript": transcript, "audio_path": str(audio_path), "audio": audio_stats}
+
+
+def _score(payload: dict, deps: Dict[str, dict]) -> dict:
+    from backend.app.core.batch_scoring import score_items
+
+    session_id = payload["session_id"]
+    question_id = payload["question_id"]
+    answer_text = payload.get("answer_text")
+    source = "text"
+    if answer_text is None:
+        # audio branch: the transcript comes from the transcribe dependency
+        transcribed = next((r for r in deps.values() if "transcript" in r), None)
+        if transcribed is None:
+            raise JobError("answer_text missing and no transcript dependency")
+        answer_text = transcribed["transcript"]
+        source = "audio"
+
+    store = get_store()
+    aid = str(uuid.uuid4())
+    store.put_text_answer(session_id, f"{question_id}_{aid}", {
+        "id": aid,
+        "session_id": session_id,
+        "question_id": question_id,
+        "answer_text": answer_text,
+        "source": source,
+    })
+
+    result = next(iter(score_items(
+        [{"session_id": session_id, "question_id": question_id, "answer_text": answer_text}], store=store,
+    )))
+    if result.get("status") != "ok":
+        raise JobError(result.get("detail", "scoring failed"))
+    if source == "audio":
+        result["transcript"] = answer_text
+    return result
+
+
+HANDLERS = {
+    PARSE: _parse,
+    PLAN: _plan,
+    TRANSCRIBE: _transcribe,
+    SCORE: _score,
+}
+
+
+# =========================
+# Submission
+# =========================
+
+def _summary(job: dict, question_id: Optional[str] = None) -> dict:
+    out = {"job_id": job["job_id"], "kind": job["kind"], "status": job["status"]}
+    if question_id is not None:
+        out["question_id"] = question_id
+    return out
+
+
+def submit_answer_jobs(session_id: str, pipeline_id: str, question_id: str,
+                       answer_text: Optional[str] = None, audio_path: Optional[str] = None,
+                       after: Optional[List[str]] = None) -> List[dict]:
+    """
+    Queue one answer branch: [transcribe ->] score, scoring after `after`.
+    """
+    jobs = []
+    score_deps = list(after or [])
+    if audio_path is not None:
+        transcribe = submit_job(
+            TRANSCRIBE, {"session_id": session_id, "question_id": question_id, "audio_path": str(audio_path)},
+            session_id=session_id, pipeline_id=pipeline_id,
+        )
+        jobs.append(_summary(transcribe, question_id))
+        score_deps.append(transcribe["job_id"])
+    payload = {"session_id": session_id, "question_id": question_id}
+    if audio_path is None:
+        payload["answer_text"] = answer_text or ""
+    score = submit_job(SCORE, payload, session_id=session_id, pipeline_id=pipeline_id, depends_on=score_deps)
+    jobs.append(_summary(score, question_id))
+    return jobs
+
+
+def submit_pipeline(session_id: str, parse: bool = True, plan: bool = True, precompute: bool = True,
+                    answers: Optional[List[dict]] = None) -> dict:
+    """
+    Queue the stages of one session. answers: [{question_id, answer_text}] or
+    [{question_id, audio_path}]; they are scored after the plan when it is
+    part of this pipeline.
+    """
+    pipeline_id = uuid.uuid4().hex
+    jobs = []
+    after: List[str] = []
+    if parse:
+        job = submit_job(PARSE, {"session_id": session_id}, session_id=session_id, pipeline_id=pipeline_id)
+        jobs.append(_summary(job))
+        after = [job["job_id"]]
+    if plan:
+        job = submit_job(PLAN, {"session_id": session_id, "precompute": precompute},
+                         session_id=session_id, pipeline_id=pipeline_id, depends_on=after)
+        jobs.append(_summary(job))
+        after = [job["job_id"]]
+    for answer in answers or []:
+        jobs.extend(submit_answer_jobs(
+            session_id, pipeline_id, answer["question_id"],
+            answer_text=answer.get("answer_text"), audio_path=answer.get("audio_path"), after=after,
+        ))
+    return {"pipeline_id": pipeline_id, "session_id": session_id, "jobs": jobs}
+
+
+def pipeline_status(jobs: List[dict]) -> str:
+    """
+    Aggregate status: failed if any job failed, running while any job is
+    queued or running, succeeded when all did.
+    """
+    statuses = {j["status"] for j in jobs}
+    if not statuses:
+        return "unknown"
+    if "failed" in statuses:
+        return "failed" if statuses <= {"failed", "succeeded", "cancelled"} else "failing"
+    if statuses <= {"succeeded", "cancelled"}:
+        return "succeeded" if "succeeded" in statuses else "cancelled"
+    return "running" if statuses & {"running", "succeeded"} else "queued"
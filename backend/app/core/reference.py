@@ -0,0 +1,130 @@
+"""
+Reference answers for interview questions and their precomputed embeddings.
+
+A question's reference text depends only on the parsed resume and the question
+object, so all of them can be built and embedded once when the plan is created.
+The vectors live next to interview_plan.json:
+
+    reference_embeddings.npy   float32 matrix, one row per question
+    reference_index.json       question ids (row order), text hashes, model name
+                               and the sha1 of the matrix file it describes
+
+Both files are replaced atomically, matrix first; a reader that finds an
+index next to a matrix it does not describe (a crash between the two
+renames) treats the session as not precomputed.
+"""
+
+import hashlib
+import io
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from backend.app.core.metrics import timed
+
+REFERENCE_EMBEDDINGS_FILE = "reference_embeddings.npy"
+REFERENCE_INDEX_FILE = "reference_index.json"
+
+
+def build_reference_text(parsed: dict, plan: dict, question_obj: dict) -> str:
+    if question_obj.get("type") == "technical":
+        skill = question_obj.get("skill") or question_obj.get("question", "")
+        resume_summary = parsed.get("summary", "")
+        projects = parsed.get("projects", []) or []
+        project_snippet = (projects[0][:800]) if projects else ""
+        ref = (
+            f"Describe your experience with {skill}. Mention projects using {skill}, tools/frameworks, "
+            "your role, responsibilities, and any concrete results or metrics. "
+            f"Resume summary: {resume_summary}. Example project excerpt: {project_snippet}"
+        )
+        return ref
+    else:
+        resume_summary = parsed.get("summary", "")
+        return (
+            f"Answer: {question_obj.get('question')}. Include role, duration, achievements. "
+            f"Resume summary: {resume_summary}"
+        )
+
+
+def _text_hash(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def _replace_file(path: Path, data: bytes):
+    # temp file in the same directory + rename: readers see the old or the new file
+    fd, tmp = tempfile.mkstemp(dir=str(path.parent), prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+@timed("reference_precompute")
+def precompute_reference_embeddings(session_dir: Path, parsed: dict, plan: dict) -> dict:
+    """
+    Build every reference text of the plan, embed them in one batch and
+    persist the matrix + index in session_dir.
+    """
+    # imported here so plan creation does not pull the model in at import time
+    from backend.app.core.ml_models import embedding_model_id, encode_sentence_cached
+
+    from backend.app.core.semantic_explain import split_sentences
+
+    questions = plan.get("questions", [])
+    texts = [build_reference_text(parsed, plan, q) for q in questions]
+    # reference sentences ride along in the same batch so semantic
+    # explanations find them in the embedding cache at scoring time
+    sentences = [s for t in texts for s in split_sentences(t)]
+    vectors = encode_sentence_cached(texts + sentences)[: len(texts)] if texts else []
+    matrix = np.asarray(vectors, dtype=np.float32).reshape(len(texts), -1)
+
+    buf = io.BytesIO()
+    np.save(buf, matrix)
+    matrix_bytes = buf.getvalue()
+    index = {
+        "model": embedding_model_id(),
+        "question_ids": [q.get("id") for q in questions],
+        "text_sha1": [_text_hash(t) for t in texts],
+        "matrix_sha1": hashlib.sha1(matrix_bytes).hexdigest(),
+    }
+    session_dir = Path(session_dir)
+    _replace_file(session_dir / REFERENCE_EMBEDDINGS_FILE, matrix_bytes)
+    _replace_file(session_dir / REFERENCE_INDEX_FILE, json.dumps(index, separators=(",", ":")).encode("utf-8"))
+    return {"count": len(texts), "dim": int(matrix.shape[1]) if texts else 0}
+
+
+@timed("reference_load")
+def load_reference_embedding(session_dir: Path, question_id: str, ref_text: str) -> Optional[np.ndarray]:
+    """
+    Return the precomputed vector for question_id, or None if missing or stale
+    (the stored text hash no longer matches the current reference text, or
+    the matrix on disk is not the one the index describes).
+    """
+    session_dir = Path(session_dir)
+    index_path = session_dir / REFERENCE_INDEX_FILE
+    matrix_path = session_dir / REFERENCE_EMBEDDINGS_FILE
+    if not (index_path.exists() and matrix_path.exists()):
+        return None
+    try:
+        index = json.loads(index_path.read_text(encoding="utf-8"))
+        row = index["question_ids"].index(question_id)
+    except (ValueError, KeyError, json.JSONDecodeError):
+        return None
+    from backend.app.core.ml_models import embedding_model_id
+    if index.get("model") != embedding_model_id() or index["text_sha1"][row] != _text_hash(ref_text):
+        return None
+    matrix_bytes = matrix_path.read_bytes()
+    if index.get("matrix_sha1") != hashlib.sha1(matrix_bytes).hexdigest():
+        return None
+    matrix = np.load(io.BytesIO(matrix_bytes))
+    return np.array(matrix[row], dtype=np.float32)
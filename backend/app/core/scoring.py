@@ -0,0 +1,91 @@
+"""
+Answer scoring primitives shared by /score/text, /score/batch and the CLI.
+"""
+
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+
+from backend.app.core.explain import get_explainer
+from backend.app.core.metrics import timed
+from backend.app.core.session_report import record_score
+from backend.app.core.session_store import SessionStore, get_store
+
+DEFAULT_MIN_SCORE = 5.0
+
+@timed("load_session")
+def load_parsed_and_plan(session_id: str, store: Optional[SessionStore] = None):
+    """
+    Parsed resume + interview plan of a session (FileNotFoundError if missing).
+    """
+    store = store or get_store()
+    return store.get_parsed(session_id), store.get_plan(session_id)
+
+@timed("top_matches")
+def compute_top_matches(reference: str, answer: str, top_k: int = 6) -> List[Dict[str, Any]]:
+    """
+    TF-IDF overlap tokens between reference and answer, using the prefit IDF model.
+    Returns list of {token, ref_tfidf} ordered by importance in reference.
+    """
+    try:
+        return get_explainer().top_matches(reference, answer, top_k=top_k)
+    except Exception:
+        # on any failure, return empty explainability to avoid blocking scoring
+        return []
+
+@timed("top_matches")
+def compute_top_matches_batch(references: List[str], answers: List[str], top_k: int = 6) -> List[List[Dict[str, Any]]]:
+    try:
+        return get_explainer().top_matches_batch(references, answers, top_k=top_k)
+    except Exception:
+        return [[] for _ in references]
+
+def cosine_similarity(a, b) -> float:
+    a = np.asarray(a, dtype=np.float32).ravel()
+    b = np.asarray(b, dtype=np.float32).ravel()
+    denom = float(np.linalg.norm(a) * np.linalg.norm(b))
+    return float(np.dot(a, b) / denom) if denom else 0.0
+
+def rowwise_cosine(A: np.ndarray, B: np.ndarray) -> np.ndarray:
+    """
+    Cosine similarity between row i of A and row i of B for every i, in one pass.
+    """
+    A = np.asarray(A, dtype=np.float32)
+    B = np.asarray(B, dtype=np.float32)
+    num = np.einsum("ij,ij->i", A, B)
+    denom = np.linalg.norm(A, axis=1) * np.linalg.norm(B, axis=1)
+    return np.divide(num, denom, out=np.zeros_like(num), where=denom > 0)
+
+def find_question(plan: dict, question_id: str):
+    return next((q for q in plan.get("questions", []) if q.get("id") == question_id), None)
+
+def build_score_obj(session_id: str, plan: dict, q_obj: dict, similarity: float,
+                    ref_text: str, answer_text: str, top_matches: List[Dict[str, Any]]) -> dict:
+    """
+    Map a cosine similarity to the 0-10 score and the human-review flag.
+    """
+    sim_clamped = max(min(float(similarity), 1.0), -1.0)
+    score_0_10 = round(((sim_clamped + 1.0) / 2.0) * 10.0, 2)
+
+    # per-question min_score (if specified in plan)
+    min_score = q_obj.get("min_score", plan.get("default_min_score", DEFAULT_MIN_SCORE))
+    needs_human_review = score_0_10 < float(min_score)
+
+    return {
+        "question_id": q_obj.get("id"),
+        "session_id": session_id,
+        "similarity": float(sim_clamped),
+        "score": float(score_0_10),
+        "min_score": float(min_score),
+        "needs_human_review": bool(needs_human_review),
+        "reference_snippet": ref_text[:1200],
+        "answer_excerpt": answer_text[:1200],
+        "top_matches": top_matches
+    }
+
+@timed("write_score")
+def write_score(session_id: str, score_obj: dict, store: Optional[SessionStore] = None) -> str:
+    store = store or get_store()
+    location = store.put_score(session_id, score_obj["question_id"], score_obj)
+    record_score(session_id, score_obj, store)
+    return location
@@ -0,0 +1,105 @@
+"""
+Semantic span-level explainability.
+
+Token overlap says nothing when a candidate paraphrases the reference.
+Here both texts are split into sentences, every sentence is embedded in a
+single batch, and the full answer x reference cosine matrix picks the
+best-aligned span pairs. Reference sentences repeat across candidates and
+re-scores, so their vectors go through the embedding cache and normally come
+straight from it. Answer sentences are one-off: they are encoded in the same
+batch but never stored, so they do not grow the cache's persistent disk tier.
+
+Cost is bounded by SEMANTIC_MAX_SENTENCES per side: longer texts have
+adjacent sentences merged into that many spans rather than being cut off.
+"""
+
+import re
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from backend.app.core import config
+from backend.app.core.metrics import timed
+
+_SENTENCE_RE = re.compile(r"(?<=[.!?;])\s+|\n+")
+
+
+def split_sentences(text: str, max_sentences: Optional[int] = None, min_chars: int = 3) -> List[str]:
+    """
+    Split into sentences; when there are more than max_sentences, merge
+    neighbours into max_sentences roughly equal spans.
+    """
+    max_sentences = max_sentences or config.SEMANTIC_MAX_SENTENCES
+    sentences = [s.strip() for s in _SENTENCE_RE.split(text or "") if s and len(s.strip()) >= min_chars]
+    if len(sentences) > max_sentences:
+        groups = np.array_split(np.arange(len(sentences)), max_sentences)
+        sentences = [" ".join(sentences[i] for i in g) for g in groups if len(g)]
+    limit = config.SEMANTIC_MAX_SENTENCE_CHARS
+    return [s[:limit] for s in sentences]
+
+
+def _normalize(m: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(m, axis=1, keepdims=True)
+    return m / np.maximum(norms, 1e-12)
+
+
+def _default_encoder(ref_sents: List[str], ans_sents: List[str]) -> List[np.ndarray]:
+    """
+    Reference sentences through the embedding cache, answer sentences
+    uncached; the reference misses and the answer share one forward pass.
+    """
+    from backend.app.core.ml_models import encode_sentence, get_embedding_cache
+    cache = get_embedding_cache()
+    ref_vectors = cache.get_many(ref_sents)
+    missing = sorted({t for t, v in zip(ref_sents, ref_vectors) if v is None})
+    encoded = list(encode_sentence(missing + ans_sents, convert_to_tensor=False))
+    fresh = dict(zip(missing, encoded[: len(missing)]))
+    for text, vec in fresh.items():
+        cache.put(text, vec)
+    ref_vectors = [v if v is not None else fresh[t] for t, v in zip(ref_sents, ref_vectors)]
+    return ref_vectors + encoded[len(missing):]
+
+
+@timed("semantic_explain")
+def semantic_matches(
+    reference: str,
+    answer: str,
+    top_k: int = 3,
+    encode: Optional[Callable[[List[str]], List[np.ndarray]]] = None,
+) -> List[Dict[str, object]]:
+    """
+    Best-aligned (answer span, reference span) pairs with their cosine scores.
+    Each answer span is paired with its closest reference span; the top_k
+    pairs are returned, best first. A custom encode gets the reference
+    sentences followed by the answer sentences in one list.
+    """
+    ref_sents = split_sentences(reference)
+    ans_sents = split_sentences(answer)
+    if not ref_sents or not ans_sents:
+        return []
+
+    if encode is None:
+        vectors = _default_encoder(ref_sents, ans_sents)
+    else:
+        vectors = encode(ref_sents + ans_sents)
+    vectors = np.asarray(vectors, dtype=np.float32)
+    R = _normalize(vectors[: len(ref_sents)])
+    A = _normalize(vectors[len(ref_sents):])
+
+    sim = A @ R.T  # (answer spans, reference spans)
+    best_ref = sim.argmax(axis=1)
+    best_score = sim[np.arange(sim.shape[0]), best_ref]
+
+    k = min(top_k, best_score.size)
+    top = np.argpartition(-best_score, k - 1)[:k]
+    top = top[np.argsort(-best_score[top], kind="stable")]
+    return [
+        {
+            "answer_span": ans_sents[i],
+            "reference_span": ref_sents[best_ref[i]],
+            "answer_index": int(i),
+            "reference_index": int(best_ref[i]),
+            "score": round(float(best_score[i]), 4),
+        }
+        for i in top
+    ]
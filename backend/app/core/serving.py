@@ -0,0 +1,130 @@
+"""
+Copy-on-write model sharing for multi-worker serving.
+
+Run under gunicorn with backend/gunicorn_conf.py. With SERVE_PRELOAD=1 the
+master loads the models once, before it forks the workers. A forked worker
+shares the parent's memory pages until it writes to them, so N workers hold
+one copy of the weights instead of N. Weight pages stay shared as long as
+nothing writes to them:
+
+  * modules are put in eval mode and every parameter gets
+    requires_grad=False, so no gradient buffers are allocated and the weights
+    are never written in place
+  * no inference runs in the master: torch's thread pools are created in
+    each worker on first use (an OpenMP pool from before a fork is not
+    usable in the child)
+  * gc.freeze() moves everything loaded so far into the permanent
+    generation, so a worker's garbage collector does not rewrite the
+    object headers of the shared modules
+
+Only components that are safe to fork are preloaded:
+
+  * the torch sentence model
+  * the inline ASR pipeline
+  * the skills taxonomy
+  * the explainer
+
+The ONNX Runtime session and the ASR worker processes own threads or
+child processes, which do not survive a fork. Each worker loads those
+itself, in its lifespan prewarm.
+
+Check the savings with GET /api/health/memory or
+`python -m backend.app.core.memory --master <pid>`: the PSS of each worker
+stays well below its RSS once the weight pages are shared.
+"""
+
+import gc
+import os
+import sys
+import time
+from typing import Dict
+
+from backend.app.core import config
+
+_preloaded: Dict[str, object] = {"enabled": False, "components": [], "ms": None, "master_pid": None}
+
+
+def freeze_module(module) -> int:
+    """
+    Inference-only torch module: eval mode, no gradients. Returns the
+    number of parameters frozen.
+    """
+    module.eval()
+    count = 0
+    for param in module.parameters():
+        param.requires_grad_(False)
+        count += param.numel()
+    return count
+
+
+def _freeze_torch_models() -> int:
+    frozen = 0
+    from backend.app.core import asr, ml_models
+    backend = ml_models._sentence_model
+    if backend is not None and getattr(backend, "model", None) is not None and hasattr(backend.model, "parameters"):
+        frozen += freeze_module(backend.model)
+    pipeline = asr._asr
+    if pipeline is not None and hasattr(getattr(pipeline, "model", None), "parameters"):
+        frozen += freeze_module(pipeline.model)
+    return frozen
+
+
+def preload_for_fork() -> dict:
+    """
+    Load and freeze the shareable models in the gunicorn master (when_ready
+    hook), then freeze the GC heap. Safe to call when nothing is shareable.
+    """
+    from backend.app.core import asr
+    from backend.app.core.explain import get_explainer
+    from backend.app.core.ml_models import load_models
+    from backend.app.core.skills import get_taxonomy
+
+    t0 = time.perf_counter()
+    components = []
+    get_taxonomy()
+    components.append("skills_taxonomy")
+    if config.EMBED_BACKEND == "onnx":
+        print("ℹ️  ONNX Runtime sessions are not fork-safe; each worker loads its own")
+    else:
+        load_models()
+        components.append("sentence_model")
+    try:
+        # no fitting thread in the master: it would not survive the fork
+        get_explainer(fit=False)
+        components.append("explain_model")
+    except Exception as e:
+        print("Preload: explainer failed, workers will load it:", e)
+    if config.ASR_PRELOAD and config.ASR_PROCESS_WORKERS == 0:
+        asr.get_asr_pipeline()
+        components.append("asr")
+
+    frozen = _freeze_torch_models()
+    gc.collect()
+    gc.freeze()
+
+    _preloaded.update({
+        "enabled": True,
+        "components": components,
+        "frozen_parameters": frozen,
+        "gc_frozen_objects": gc.get_freeze_count(),
+        "ms": round((time.perf_counter() - t0) * 1000.0, 3),
+        "master_pid": os.getpid(),
+    })
+    print(f"✅ Preloaded for fork: {', '.join(components)} ({_preloaded['ms']:.0f} ms, {frozen} frozen parameters)")
+    return dict(_preloaded)
+
+
+def after_fork():
+    """
+    Per-worker setup (gunicorn post_fork hook): size torch's intra-op
+    pool so the workers together do not oversubscribe the cores.
+    """
+    threads = config.SERVE_TORCH_THREADS or max(1, (os.cpu_count() or 1) // max(1, config.SERVE_WORKERS))
+    if "torch" in sys.modules:
+        import torch
+        torch.set_num_threads(threads)
+    os.environ.setdefault("OMP_NUM_THREADS", str(threads))
+
+
+def preload_status() -> dict:
+    return dict(_preloaded)
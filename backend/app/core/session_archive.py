@@ -0,0 +1,333 @@
+"""
+Compressed session archives.
+
+A finished session directory is packed into a single zip at
+
+    STORAGE_DIR/_archive/<YYYY>/<MM>/<DD>/<session_id>.zip
+
+sharded by the date of the session's last activity, so the storage root
+only lists live sessions and backups of old data copy one file per
+session. JSON documents are re-encoded compactly on the way in. Media
+that is already compressed is stored as it is, and everything else is
+deflated. The zip's central directory is the per-member index: one
+document is read by seeking to its entry, without unpacking the rest.
+
+ArchiveIndex (STORAGE_DIR/_index/archive.db, SQLite WAL) maps a session
+id to its archive, so finding it is a primary-key lookup rather than a
+walk over the shards.
+
+Reads are transparent: FileSessionStore serves documents from the live
+directory first and falls back to the archive member. Anything that
+needs the session's files on disk (session_dir(), any document write)
+restores the archive into the live directory first. A restore never
+overwrites a live file, so a file written while the session was being
+archived is kept.
+"""
+
+import fcntl
+import json
+import os
+import shutil
+import sqlite3
+import threading
+import time
+import zipfile
+import zlib
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional
+
+ARCHIVE_DIR = "_archive"
+INDEX_DIR = "_index"
+
+# already compressed: deflating them again costs CPU and saves nothing
+_STORED_SUFFIXES = {".mp3", ".mp4", ".m4a", ".webm", ".ogg", ".opus", ".zip", ".gz", ".jpg", ".jpeg", ".png", ".pdf", ".docx"}
+_LOCK_SLOTS = 1 << 16
+
+
+def _compact_json(raw: bytes) -> bytes:
+    try:
+        return json.dumps(json.loads(raw), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    except (ValueError, UnicodeDecodeError):
+        return raw
+
+
+class ArchiveIndex:
+    """
+    session_id -> archive location plus its size accounting (SQLite, WAL,
+    one connection per thread).
+    """
+
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        self._conn().executescript(
+            """
+            CREATE TABLE IF NOT EXISTS archives (
+                session_id TEXT PRIMARY KEY,
+                path TEXT NOT NULL,
+                last_activity REAL NOT NULL,
+                archived_at REAL NOT NULL,
+                files INTEGER NOT NULL,
+                bytes_before INTEGER NOT NULL,
+                bytes_after INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS archives_activity ON archives (last_activity);
+            """
+        )
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.db_path), timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, session_id: str) -> Optional[dict]:
+        row = self._conn().execute(
+            "SELECT session_id, path, last_activity, archived_at, files, bytes_before, bytes_after "
+            "FROM archives WHERE session_id = ?",
+            (session_id,),
+        ).fetchone()
+        if row is None:
+            return None
+        keys = ("session_id", "path", "last_activity", "archived_at", "files", "bytes_before", "bytes_after")
+        return dict(zip(keys, row))
+
+    def put(self, entry: dict):
+        self._conn().execute(
+            "INSERT OR REPLACE INTO archives "
+            "(session_id, path, last_activity, archived_at, files, bytes_before, bytes_after) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (entry["session_id"], entry["path"], entry["last_activity"], entry["archived_at"],
+             entry["files"], entry["bytes_before"], entry["bytes_after"]),
+        )
+
+    def delete(self, session_id: str):
+        self._conn().execute("DELETE FROM archives WHERE session_id = ?", (session_id,))
+
+    def session_ids(self) -> List[str]:
+        return [r[0] for r in self._conn().execute("SELECT session_id FROM archives ORDER BY session_id")]
+
+    def idle_since(self, cutoff: float) -> List[str]:
+        rows = self._conn().execute("SELECT session_id FROM archives WHERE last_activity < ?", (cutoff,))
+        return [r[0] for r in rows]
+
+    def totals(self) -> dict:
+        n, before, after = self._conn().execute(
+            "SELECT COUNT(*), COALESCE(SUM(bytes_before), 0), COALESCE(SUM(bytes_after), 0) FROM archives"
+        ).fetchone()
+        return {"sessions": n, "bytes_before": before, "bytes_after": after}
+
+
+class SessionArchive:
+    """
+    Archive / restore / read session directories under one storage root.
+    """
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self.index = ArchiveIndex(self.root / INDEX_DIR / "archive.db")
+        self._lock_path = self.root / INDEX_DIR / "session.locks"
+        self._thread_locks = [threading.Lock() for _ in range(64)]
+        # sessions whose lock the current thread holds (session_lock is re-entrant)
+        self._held = threading.local()
+
+    # ---- locking ----
+
+    @contextmanager
+    def session_lock(self, session_id: str):
+        """
+        Serialize archive / restore of one session across threads and
+        processes: a byte-range lock on a shared lock file, keyed by the id.
+        Re-entrant within a thread, so a caller holding it can restore / delete.
+        """
+        held = self._held.__dict__.setdefault("ids", set())
+        if session_id in held:
+            yield
+            return
+        slot = zlib.crc32(session_id.encode("utf-8")) % _LOCK_SLOTS
+        with self._thread_locks[slot % len(self._thread_locks)]:
+            self._lock_path.parent.mkdir(parents=True, exist_ok=True)
+            fd = os.open(str(self._lock_path), os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                fcntl.lockf(fd, fcntl.LOCK_EX, 1, slot)
+                held.add(session_id)
+                try:
+                    yield
+                finally:
+                    held.discard(session_id)
+                    fcntl.lockf(fd, fcntl.LOCK_UN, 1, slot)
+            finally:
+                os.close(fd)
+
+    # ---- lookup ----
+
+    def archive_path(self, session_id: str) -> Optional[Path]:
+        entry = self.index.get(session_id)
+        return Path(entry["path"]) if entry is not None else None
+
+    def is_archived(self, session_id: str) -> bool:
+        return self.index.get(session_id) is not None
+
+    def read_member(self, session_id: str, relpath: str) -> Optional[bytes]:
+        """
+        One file of an archived session, or None when it is not archived / absent.
+        """
+        path = self.archive_path(session_id)
+        if path is None:
+            return None
+        try:
+            with zipfile.ZipFile(path) as zf:
+                return zf.read(relpath)
+        except (KeyError, FileNotFoundError):
+            return None
+
+    def read_folder(self, session_id: str, folder: str) -> Dict[str, bytes]:
+        """
+        {file name: contents} of one folder of an archived session.
+        """
+        path = self.archive_path(session_id)
+        if path is None:
+            return {}
+        prefix = folder.rstrip("/") + "/"
+        try:
+            with zipfile.ZipFile(path) as zf:
+                return {
+                    n[len(prefix):]: zf.read(n)
+                    for n in zf.namelist()
+                    if n.startswith(prefix) and "/" not in n[len(prefix):]
+                }
+        except FileNotFoundError:
+            return {}
+
+    # ---- archive / restore ----
+
+    def shard_dir(self, last_activity: float) -> Path:
+        return self.root / ARCHIVE_DIR / time.strftime("%Y/%m/%d", time.gmtime(last_activity))
+
+    def archive(self, session_id: str, dry_run: bool = False) -> Optional[dict]:
+        """
+        Pack the live session directory into its shard and remove the packed
+        files. Returns the size accounting, or None when there is nothing to
+        pack. Files modified while packing stay live.
+        """
+        live = self.root / session_id
+        with self.session_lock(session_id):
+            files = [p for p in sorted(live.rglob("*")) if p.is_file()]
+            if not files:
+                return None
+            stats = {p: p.stat() for p in files}
+            last_activity = max(st.st_mtime for st in stats.values())
+            # only files this session owns alone free space; hardlinked upload blobs stay in _blobs
+            bytes_before = sum(st.st_size for st in stats.values())
+            owned_bytes = sum(st.st_size for st in stats.values() if st.st_nlink <= 1)
+            existing = self.index.get(session_id)
+            dest = Path(existing["path"]) if existing else self.shard_dir(last_activity) / f"{session_id}.zip"
+            if dry_run:
+                return {"session_id": session_id, "files": len(files), "bytes_before": bytes_before,
+                        "owned_bytes": owned_bytes, "bytes_after": None, "path": str(dest)}
+
+            dest.parent.mkdir(parents=True, exist_ok=True)
+            tmp = dest.with_name(f".{dest.name}.tmp")
+            with zipfile.ZipFile(tmp, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=6) as zf:
+                written = set()
+                for p in files:
+                    rel = p.relative_to(live).as_posix()
+                    data = p.read_bytes()
+                    if p.suffix == ".json":
+                        data = _compact_json(data)
+                    compress = zipfile.ZIP_STORED if p.suffix.lower() in _STORED_SUFFIXES else zipfile.ZIP_DEFLATED
+                    zf.writestr(zipfile.ZipInfo.from_file(p, rel), data, compress_type=compress)
+                    written.add(rel)
+                if existing:
+                    # re-archiving a partly restored session: keep members that are not live
+                    with zipfile.ZipFile(dest) as old:
+                        for info in old.infolist():
+                            if info.filename not in written:
+                                zf.writestr(info, old.read(info.filename))
+            with zipfile.ZipFile(tmp) as zf:
+                bad = zf.testzip()
+            if bad is not None:
+                tmp.unlink()
+                raise RuntimeError(f"archive of {session_id} failed verification at {bad}")
+            os.replace(tmp, dest)
+
+            entry = {
+                "session_id": session_id,
+                "path": str(dest),
+                "last_activity": last_activity,
+                "archived_at": time.time(),
+                "files": len(files),
+                "bytes_before": bytes_before,
+                "bytes_after": dest.stat().st_size,
+            }
+            self.index.put(entry)
+
+            for p, st in stats.items():
+                try:
+                    if p.stat().st_mtime == st.st_mtime:
+                        p.unlink()
+                except FileNotFoundError:
+                    pass
+            for d in sorted((d for d in live.rglob("*") if d.is_dir()), key=lambda d: -len(d.parts)):
+                try:
+                    d.rmdir()
+                except OSError:
+                    pass
+            try:
+                live.rmdir()
+            except OSError:
+                pass
+            return {**entry, "owned_bytes": owned_bytes}
+
+    def restore(self, session_id: str) -> bool:
+        """
+        Unpack an archived session into its live directory (live files win)
+        and drop the archive. Returns False when it was not archived.
+        """
+        with self.session_lock(session_id):
+            entry = self.index.get(session_id)
+            if entry is None:
+                return False
+            live = self.root / session_id
+            live.mkdir(parents=True, exist_ok=True)
+            path = Path(entry["path"])
+            if path.exists():
+                with zipfile.ZipFile(path) as zf:
+                    for info in zf.infolist():
+                        target = live / info.filename
+                        if info.is_dir() or target.exists():
+                            continue
+                        target.parent.mkdir(parents=True, exist_ok=True)
+                        with zf.open(info) as src, open(target, "wb") as out:
+                            shutil.copyfileobj(src, out)
+            self.index.delete(session_id)
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            print(f"♻️  Restored archived session {session_id}")
+            return True
+
+    def delete(self, session_id: str) -> int:
+        """
+        Remove an archived session; returns the bytes freed.
+        """
+        with self.session_lock(session_id):
+            entry = self.index.get(session_id)
+            if entry is None:
+                return 0
+            freed = 0
+            path = Path(entry["path"])
+            if path.exists():
+                freed = path.stat().st_size
+                path.unlink()
+            self.index.delete(session_id)
+            return freed
+
+    def stats(self) -> Dict[str, int]:
+        return self.index.totals()
@@ -0,0 +1,437 @@
+"""
+Incremental session reports.
+
+Every time a score is written (text, audio, video, batch or pipeline
+scoring all go through scoring.write_score) the session's report is
+updated in place instead of being rebuilt from the score files later.
+Writing a new plan (the plan route and the pipeline's plan job call
+record_plan) re-derives the report against it, so pending questions and
+skill coverage follow the current plan before its first answer arrives:
+
+  * answers        - latest score, type, skill and review flag per question
+  * by_type        - answered count, average score and review count per
+                     question type (hr / technical / behavioral)
+  * skills         - per planned skill (the plan's `skill` fields): answered
+                     or not, and its score; skill_coverage is the answered share
+  * needs_review   - questions whose latest score is below their min_score
+  * completed / pending questions of the current plan
+
+Reports live in one SQLite database (REPORT_DB_PATH, WAL) next to the
+answer index: one row per session holding the compact report JSON plus
+the few columns cross-session queries need, and one row per session and
+type / skill facet. The read-modify-write of a report runs in a
+BEGIN IMMEDIATE transaction, so gunicorn workers updating the same
+session never lose an answer. GET /api/session/{id}/report is one
+primary-key lookup, and the cross-session summary is a handful of
+aggregate queries over indexed columns, never a scan of the session
+directories.
+
+Existing sessions are backfilled from their score files with
+`python -m backend.app.core.session_report rebuild`.
+"""
+
+import argparse
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from backend.app.core import config
+from backend.app.core.session_store import SessionStore, dumps_compact, get_store
+
+
+def _round(value: Optional[float], digits: int = 3) -> Optional[float]:
+    return round(value, digits) if value is not None else None
+
+
+def empty_report(session_id: str) -> dict:
+    return {
+        "session_id": session_id,
+        "updated_at": None,
+        "questions_total": 0,
+        "answered": 0,
+        "completed": False,
+        "completed_questions": [],
+        "pending_questions": [],
+        "score": {"avg": None, "min": None, "max": None},
+        "by_type": {},
+        "skills": {},
+        "skill_coverage": None,
+        "needs_review": [],
+        "answers": {},
+    }
+
+
+def _answer_entry(score_obj: dict, q_obj: Optional[dict]) -> dict:
+    q_obj = q_obj or {}
+    return {
+        "type": q_obj.get("type") or score_obj.get("question_type") or "unknown",
+        "skill": q_obj.get("skill") or score_obj.get("skill"),
+        "score": float(score_obj.get("score", 0.0)),
+        "needs_human_review": bool(score_obj.get("needs_human_review", False)),
+        "at": round(time.time(), 3),
+    }
+
+
+def summarize(session_id: str, answers: Dict[str, dict], plan: Optional[dict]) -> dict:
+    """
+    Derive the report from the per-question entries and the current plan.
+    Bounded by the plan size (a handful of questions), not by disk.
+    """
+    report = empty_report(session_id)
+    questions = (plan or {}).get("questions", [])
+    plan_ids = [q.get("id") for q in questions]
+    if plan_ids:
+        # answers to questions of an older plan no longer count
+        current = set(plan_ids)
+        answers = {qid: a for qid, a in answers.items() if qid in current}
+    report["answers"] = answers
+    report["updated_at"] = round(time.time(), 3)
+    report["questions_total"] = len(plan_ids) or len(answers)
+    report["answered"] = len(answers)
+    report["completed_questions"] = [qid for qid in (plan_ids or sorted(answers)) if qid in answers]
+    report["pending_questions"] = [qid for qid in plan_ids if qid not in answers]
+    report["completed"] = bool(plan_ids) and not report["pending_questions"]
+
+    scores = [a["score"] for a in answers.values()]
+    if scores:
+        report["score"] = {"avg": _round(sum(scores) / len(scores)), "min": min(scores), "max": max(scores)}
+
+    by_type: Dict[str, dict] = {}
+    for a in answers.values():
+        t = by_type.setdefault(a["type"], {"count": 0, "score_sum": 0.0, "review": 0})
+        t["count"] += 1
+        t["score_sum"] += a["score"]
+        t["review"] += int(a["needs_human_review"])
+    report["by_type"] = {
+        name: {"count": t["count"], "avg_score": _round(t["score_sum"] / t["count"]), "review": t["review"]}
+        for name, t in sorted(by_type.items())
+    }
+
+    skills = {q["skill"]: {"question_id": q.get("id"), "answered": False, "score": None}
+              for q in questions if q.get("skill")}
+    for qid, a in answers.items():
+        if a.get("skill"):
+            skills[a["skill"]] = {"question_id": qid, "answered": True, "score": a["score"]}
+    report["skills"] = skills
+    if skills:
+        report["skill_coverage"] = _round(sum(s["answered"] for s in skills.values()) / len(skills))
+
+    report["needs_review"] = sorted(qid for qid, a in answers.items() if a["needs_human_review"])
+    return report
+
+
+class ReportIndex:
+    """
+    Session reports in one SQLite database (WAL mode, one connection per
+    thread): the report row per session plus type / skill facet rows for
+    cross-session queries.
+    """
+
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        self.updates = 0
+        self._conn().executescript(
+            """
+            CREATE TABLE IF NOT EXISTS session_reports (
+                session_id TEXT PRIMARY KEY,
+                updated_at REAL NOT NULL,
+                questions_total INTEGER NOT NULL,
+                answered INTEGER NOT NULL,
+                completed INTEGER NOT NULL,
+                score_sum REAL NOT NULL,
+                review_count INTEGER NOT NULL,
+                data TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS session_reports_updated ON session_reports (updated_at);
+            CREATE TABLE IF NOT EXISTS report_facets (
+                session_id TEXT NOT NULL,
+                facet TEXT NOT NULL,
+                name TEXT NOT NULL,
+                answered INTEGER NOT NULL,
+                score_sum REAL NOT NULL,
+                review_count INTEGER NOT NULL,
+                planned INTEGER NOT NULL,
+                PRIMARY KEY (session_id, facet, name)
+            );
+            CREATE INDEX IF NOT EXISTS report_facets_name ON report_facets (facet, name);
+            """
+        )
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.db_path), timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    # ---- per session ----
+
+    def get(self, session_id: str) -> Optional[dict]:
+        row = self._conn().execute("SELECT data FROM session_reports WHERE session_id = ?", (session_id,)).fetchone()
+        return json.loads(row[0]) if row is not None else None
+
+    def _save(self, conn: sqlite3.Connection, report: dict):
+        answers = report["answers"].values()
+        conn.execute(
+            "INSERT OR REPLACE INTO session_reports "
+            "(session_id, updated_at, questions_total, answered, completed, score_sum, review_count, data) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                report["session_id"], report["updated_at"], report["questions_total"], report["answered"],
+                int(report["completed"]), sum(a["score"] for a in answers), len(report["needs_review"]),
+                dumps_compact(report),
+            ),
+        )
+        conn.execute("DELETE FROM report_facets WHERE session_id = ?", (report["session_id"],))
+        rows = []
+        for name, t in report["by_type"].items():
+            score_sum = sum(a["score"] for a in answers if a["type"] == name)
+            rows.append((report["session_id"], "type", name, t["count"], score_sum, t["review"], 0))
+        for name, s in report["skills"].items():
+            entry = report["answers"].get(s["question_id"]) or {}
+            rows.append((
+                report["session_id"], "skill", name, int(s["answered"]), s["score"] or 0.0,
+                int(bool(entry.get("needs_human_review"))), 1,
+            ))
+        conn.executemany("INSERT INTO report_facets VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+
+    def update(self, session_id: str, question_id: str, entry: dict, plan: Optional[dict]) -> dict:
+        """
+        Record one question's latest score and re-derive the report, atomically.
+        """
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT data FROM session_reports WHERE session_id = ?", (session_id,)).fetchone()
+            answers = json.loads(row[0])["answers"] if row is not None else {}
+            answers[question_id] = entry
+            report = summarize(session_id, answers, plan)
+            self._save(conn, report)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        self.updates += 1
+        return report
+
+    def replan(self, session_id: str, plan: Optional[dict]) -> Optional[dict]:
+        """
+        Re-derive an existing report against a new plan, atomically. Answers
+        to questions still in the plan take the plan's type and skill.
+        """
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT data FROM session_reports WHERE session_id = ?", (session_id,)).fetchone()
+            if row is None:
+                # nothing scored yet: get_report() derives it from the plan on read
+                conn.execute("COMMIT")
+                return None
+            questions = {q.get("id"): q for q in (plan or {}).get("questions", [])}
+            answers = json.loads(row[0])["answers"]
+            for qid, entry in answers.items():
+                q_obj = questions.get(qid)
+                if q_obj is not None:
+                    entry["type"] = q_obj.get("type") or entry["type"]
+                    entry["skill"] = q_obj.get("skill") or entry.get("skill")
+            report = summarize(session_id, answers, plan)
+            self._save(conn, report)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        self.updates += 1
+        return report
+
+    def replace(self, report: dict):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._save(conn, report)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def delete(self, session_id: str):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM session_reports WHERE session_id = ?", (session_id,))
+            conn.execute("DELETE FROM report_facets WHERE session_id = ?", (session_id,))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    # ---- cross-session ----
+
+    def summary(self, since: Optional[float] = None, top: int = 20) -> dict:
+        """
+        Aggregate over every session report (optionally updated since a unix
+        time): totals, score averages, review load and per type / skill stats.
+        """
+        conn = self._conn()
+        where, params = ("WHERE updated_at >= ?", (since,)) if since else ("", ())
+        n, completed, answered, score_sum, reviews, avg_of_avgs = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(completed), 0), COALESCE(SUM(answered), 0), COALESCE(SUM(score_sum), 0), "
+            "COALESCE(SUM(review_count), 0), AVG(CASE WHEN answered > 0 THEN score_sum / answered END) "
+            f"FROM session_reports {where}",
+            params,
+        ).fetchone()
+
+        facet_where = "WHERE f.facet = ?"
+        facet_join = "JOIN session_reports r ON r.session_id = f.session_id " if since else ""
+        if since:
+            facet_where += " AND r.updated_at >= ?"
+
+        def facet(name: str) -> List[dict]:
+            rows = conn.execute(
+                "SELECT f.name, COUNT(*), SUM(f.planned), SUM(f.answered), SUM(f.score_sum), SUM(f.review_count) "
+                f"FROM report_facets f {facet_join}{facet_where} "
+                "GROUP BY f.name ORDER BY COUNT(*) DESC, f.name LIMIT ?",
+                (name, *params, top),
+            ).fetchall()
+            out = []
+            for fname, sessions, planned, ans, ssum, rev in rows:
+                item = {"name": fname, "sessions": sessions, "answered": ans,
+                        "avg_score": _round(ssum / ans) if ans else None, "review": rev}
+                if name == "skill":
+                    item["coverage"] = _round(ans / planned) if planned else None
+                out.append(item)
+            return out
+
+        return {
+            "sessions": n,
+            "completed_sessions": completed,
+            "answers": answered,
+            "avg_score": _round(score_sum / answered) if answered else None,
+            "avg_session_score": _round(avg_of_avgs),
+            "needs_review": reviews,
+            "by_type": facet("type"),
+            "skills": facet("skill"),
+            "since": since,
+        }
+
+    def stats(self) -> dict:
+        sessions = self._conn().execute("SELECT COUNT(*) FROM session_reports").fetchone()[0]
+        return {"sessions": sessions, "updates": self.updates, "db_path": str(self.db_path)}
+
+
+_index: Optional[ReportIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_report_index() -> ReportIndex:
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = ReportIndex(Path(config.REPORT_DB_PATH))
+    return _index
+
+
+def record_score(session_id: str, score_obj: dict, store: Optional[SessionStore] = None) -> Optional[dict]:
+    """
+    Fold a freshly written score into its session report. Never fails the
+    scoring call: an error is logged and the report can be rebuilt later.
+    """
+    if not config.SESSION_REPORTS:
+        return None
+    store = store or get_store()
+    try:
+        try:
+            plan = store.get_plan(session_id)
+        except FileNotFoundError:
+            plan = None
+        question_id = score_obj["question_id"]
+        q_obj = next((q for q in (plan or {}).get("questions", []) if q.get("id") == question_id), None)
+        return get_report_index().update(session_id, question_id, _answer_entry(score_obj, q_obj), plan)
+    except Exception as e:
+        print("Session report update failed:", e)
+        return None
+
+
+def record_plan(session_id: str, plan: dict) -> Optional[dict]:
+    """
+    Re-summarize the session's report after a new plan was written. Like
+    record_score it never fails the caller.
+    """
+    if not config.SESSION_REPORTS:
+        return None
+    try:
+        return get_report_index().replan(session_id, plan)
+    except Exception as e:
+        print("Session report update failed:", e)
+        return None
+
+
+def get_report(session_id: str) -> dict:
+    """
+    The session's report; an empty one (with the plan's pending questions)
+    when nothing has been scored yet.
+    """
+    report = get_report_index().get(session_id)
+    if report is not None:
+        return report
+    store = get_store()
+    try:
+        plan = store.get_plan(session_id)
+    except FileNotFoundError:
+        return empty_report(session_id)
+    report = summarize(session_id, {}, plan)
+    report["updated_at"] = None
+    return report
+
+
+def rebuild_report(session_id: str, store: Optional[SessionStore] = None) -> dict:
+    """
+    Recompute a report from the stored score documents (backfill / repair).
+    """
+    store = store or get_store()
+    try:
+        plan = store.get_plan(session_id)
+    except FileNotFoundError:
+        plan = None
+    questions = {q.get("id"): q for q in (plan or {}).get("questions", [])}
+    answers = {}
+    for score in store.list_scores(session_id):
+        qid = score.get("question_id")
+        if qid:
+            answers[qid] = _answer_entry(score, questions.get(qid))
+    report = summarize(session_id, answers, plan)
+    get_report_index().replace(report)
+    return report
+
+
+def rebuild_all(store: Optional[SessionStore] = None) -> int:
+    store = store or get_store()
+    count = 0
+    for session_id in store.list_sessions():
+        rebuild_report(session_id, store)
+        count += 1
+    return count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Session reports")
+    parser.add_argument("command", choices=["rebuild", "summary"])
+    parser.add_argument("--session", default=None, help="rebuild one session only")
+    args = parser.parse_args(argv)
+    if args.command == "rebuild":
+        if args.session:
+            print(json.dumps(rebuild_report(args.session), indent=2))
+            return
+        print(f"rebuilt {rebuild_all()} session reports")
+    print(json.dumps(get_report_index().summary(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,536 @@
+"""
+Session storage.
+
+All routes read and write session documents (parsed resume, interview plan,
+text answers, scores) through a SessionStore instead of building paths and
+parsing JSON themselves. Two implementations:
+
+  * FileSessionStore   - storage/<session_id>/... JSON files, written atomically
+  * SQLiteSessionStore - one WAL-mode sessions.db under the storage root
+
+Binary artifacts (resumes, audio, reference embeddings) always live on disk
+in session_dir(session_id). Parsed resumes and plans are cached parsed in
+memory (read-through). Each cache entry remembers the document's version
+stamp (file mtime / inode, or the row's updated_at) and is only served
+while the stamp is unchanged, so a plan rewritten by another gunicorn
+worker is picked up on the next read. Cached documents are shared, so
+callers must treat them as read-only.
+
+Sessions compacted by the storage lifecycle (core/session_archive.py) stay
+readable through the same API: document reads fall back to the archive and
+session_dir() / document writes restore the session to disk first, under
+the session's archive lock. last_activity() and delete_session() give the
+lifecycle one view of a session across its files, archive and backend rows.
+"""
+
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from backend.app.core import config
+from backend.app.core.session_archive import SessionArchive
+
+PARSED = "parsed_resume"
+PLAN = "interview_plan"
+SCORE = "score"
+TEXT_ANSWER = "text_answer"
+VIDEO_FEATURES = "video_features"
+
+# documents worth keeping parsed: read on every scoring call
+_CACHED_KINDS = (PARSED, PLAN)
+
+SESSION_SUBDIRS = ("resumes", "audio", "text_answers")
+
+
+def dumps_compact(data) -> str:
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+
+
+def atomic_write_text(path: Path, text: str):
+    """
+    Write to a temp file in the same directory and rename over the target,
+    so readers never see a half-written document.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=str(path.parent), prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+class SessionStore:
+    """
+    Base class: document API + read-through cache. Subclasses implement
+    _create, _delete, _exists, _read, _write, _last_write, _list and
+    _list_sessions.
+    """
+
+    def __init__(self, root: Path, cache_size: int = 256):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.cache_size = max(0, int(cache_size))
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+        # bumped on every write so a read that raced a write is not cached
+        self._versions = {}
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self._archive = None
+        self._archive_lock = threading.Lock()
+
+    @property
+    def archive(self) -> SessionArchive:
+        if self._archive is None:
+            with self._archive_lock:
+                if self._archive is None:
+                    self._archive = SessionArchive(self.root)
+        return self._archive
+
+    # ---- paths for binary artifacts ----
+
+    def _live_dir(self, session_id: str) -> Path:
+        return self.root / session_id
+
+    def session_dir(self, session_id: str) -> Path:
+        """
+        The session's directory on disk, restored from its archive if the
+        lifecycle compacted it. A partly archived session (files written
+        while it was packed stayed live) is restored too. Restoring unpacks
+        the whole archive: from async code, call it on the io pool.
+        """
+        if self.archive.is_archived(session_id):
+            self.archive.restore(session_id)
+        return self._live_dir(session_id)
+
+    def media_dir(self, session_id: str, folder: str) -> Path:
+        """
+        session_dir() / folder, created if missing (uploads land here).
+        """
+        path = self.session_dir(session_id) / folder
+        path.mkdir(parents=True, exist_ok=True)
+        return path
+
+    # ---- sessions ----
+
+    def create_session(self) -> str:
+        sid = str(uuid.uuid4())
+        session_dir = self._live_dir(sid)
+        session_dir.mkdir(parents=True, exist_ok=True)
+        for sub in SESSION_SUBDIRS:
+            (session_dir / sub).mkdir(exist_ok=True)
+        self._create(sid)
+        return sid
+
+    def session_exists(self, session_id: str) -> bool:
+        return self._exists(session_id)
+
+    def list_sessions(self) -> List[str]:
+        return self._list_sessions()
+
+    def last_activity(self, session_id: str) -> Optional[float]:
+        """
+        Time of the session's latest write: files in its directory, its
+        archive and backend rows. None when nothing was ever written.
+        """
+        candidates = [self._last_write(session_id)]
+        entry = self.archive.index.get(session_id)
+        if entry is not None:
+            candidates.append(entry["last_activity"])
+        live = self._live_dir(session_id)
+        if live.is_dir():
+            # files only: deleting raw media touches its directory, not the session's activity
+            for p in live.rglob("*"):
+                try:
+                    if p.is_file():
+                        candidates.append(p.stat().st_mtime)
+                except FileNotFoundError:
+                    continue
+        candidates = [c for c in candidates if c is not None]
+        return max(candidates) if candidates else None
+
+    def delete_session(self, session_id: str):
+        """
+        Remove a session everywhere: live directory, archive, backend rows
+        and cached documents.
+        """
+        with self.archive.session_lock(session_id):
+            live = self._live_dir(session_id)
+            if live.is_dir():
+                shutil.rmtree(live, ignore_errors=True)
+            self.archive.delete(session_id)
+            self._delete(session_id)
+        self.invalidate(session_id)
+
+    # ---- cache ----
+
+    def _cache_get(self, key, stamp):
+        with self._cache_lock:
+            entry = self._cache.get(key)
+            if entry is not None and entry[0] == stamp:
+                self._cache.move_to_end(key)
+                self.cache_hits += 1
+                return entry[1]
+            self.cache_misses += 1
+            return None
+
+    def _cache_put(self, key, value, version: int, stamp):
+        if self.cache_size == 0:
+            return
+        with self._cache_lock:
+            if self._versions.get(key, 0) != version:
+                return
+            self._cache[key] = (stamp, value)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def invalidate(self, session_id: str, kind: Optional[str] = None, key: str = ""):
+        with self._cache_lock:
+            if kind is not None:
+                self._versions[(session_id, kind, key)] = self._versions.get((session_id, kind, key), 0) + 1
+            for k in [k for k in self._cache if k[0] == session_id and (kind is None or k[1] == kind)]:
+                del self._cache[k]
+
+    # ---- documents ----
+
+    def get_doc(self, session_id: str, kind: str, key: str = "") -> dict:
+        """
+        Return a document or raise FileNotFoundError.
+        """
+        cache_key = (session_id, kind, key)
+        if kind not in _CACHED_KINDS:
+            return self._read(session_id, kind, key)
+        # stamp before reading: a write racing the read leaves a stale stamp, never stale data
+        stamp = self._stamp(session_id, kind, key)
+        if stamp is None:
+            return self._read(session_id, kind, key)
+        cached = self._cache_get(cache_key, stamp)
+        if cached is not None:
+            return cached
+        with self._cache_lock:
+            version = self._versions.get(cache_key, 0)
+        data = self._read(session_id, kind, key)
+        self._cache_put(cache_key, data, version, stamp)
+        return data
+
+    def put_doc(self, session_id: str, kind: str, data: dict, key: str = "") -> str:
+        """
+        Persist a document; returns a location string for API responses.
+        """
+        location = self._write(session_id, kind, key, data)
+        if kind in _CACHED_KINDS:
+            self.invalidate(session_id, kind, key)
+        return location
+
+    def list_docs(self, session_id: str, kind: str) -> List[dict]:
+        return self._list(session_id, kind)
+
+    # ---- typed helpers ----
+
+    def get_parsed(self, session_id: str) -> dict:
+        return self.get_doc(session_id, PARSED)
+
+    def put_parsed(self, session_id: str, data: dict) -> str:
+        return self.put_doc(session_id, PARSED, data)
+
+    def get_plan(self, session_id: str) -> dict:
+        return self.get_doc(session_id, PLAN)
+
+    def put_plan(self, session_id: str, data: dict) -> str:
+        return self.put_doc(session_id, PLAN, data)
+
+    def get_score(self, session_id: str, question_id: str) -> dict:
+        return self.get_doc(session_id, SCORE, question_id)
+
+    def put_score(self, session_id: str, question_id: str, data: dict) -> str:
+        return self.put_doc(session_id, SCORE, data, key=question_id)
+
+    def list_scores(self, session_id: str) -> List[dict]:
+        return self.list_docs(session_id, SCORE)
+
+    def put_text_answer(self, session_id: str, key: str, data: dict) -> str:
+        return self.put_doc(session_id, TEXT_ANSWER, data, key=key)
+
+    def list_text_answers(self, session_id: str) -> List[dict]:
+        return self.list_docs(session_id, TEXT_ANSWER)
+
+    def put_video_features(self, session_id: str, question_id: str, data: dict) -> str:
+        return self.put_doc(session_id, VIDEO_FEATURES, data, key=question_id)
+
+    def list_video_features(self, session_id: str) -> List[dict]:
+        return self.list_docs(session_id, VIDEO_FEATURES)
+
+    def stats(self) -> dict:
+        return {
+            "backend": type(self).__name__,
+            "cached_docs": len(self._cache),
+            "cache_size": self.cache_size,
+            "cache_hits": self.cache_hits,
+            "cache_misses": self.cache_misses,
+        }
+
+    # ---- backend hooks ----
+
+    def _create(self, session_id: str):
+        raise NotImplementedError
+
+    def _delete(self, session_id: str):
+        raise NotImplementedError
+
+    def _last_write(self, session_id: str) -> Optional[float]:
+        """
+        Latest document write kept outside the session directory, if any.
+        """
+        raise NotImplementedError
+
+    def _exists(self, session_id: str) -> bool:
+        raise NotImplementedError
+
+    def _read(self, session_id: str, kind: str, key: str) -> dict:
+        raise NotImplementedError
+
+    def _stamp(self, session_id: str, kind: str, key: str):
+        """
+        Cheap version token of a stored document (changes on every write),
+        or None when it does not exist.
+        """
+        raise NotImplementedError
+
+    def _write(self, session_id: str, kind: str, key: str, data: dict) -> str:
+        raise NotImplementedError
+
+    def _list(self, session_id: str, kind: str) -> List[dict]:
+        raise NotImplementedError
+
+    def _list_sessions(self) -> List[str]:
+        raise NotImplementedError
+
+
+class FileSessionStore(SessionStore):
+    """
+    storage/<session_id>/parsed_resume.json, interview_plan.json,
+    scores/<question_id>.json, text_answers/<key>.json and
+    video_features/<question_id>.json.
+    """
+
+    _DIRS = {SCORE: "scores", TEXT_ANSWER: "text_answers", VIDEO_FEATURES: "video_features"}
+
+    def _relpath(self, kind: str, key: str) -> str:
+        if kind in (PARSED, PLAN):
+            return f"{kind}.json"
+        return f"{self._DIRS[kind]}/{key}.json"
+
+    def _path(self, session_id: str, kind: str, key: str) -> Path:
+        return self._live_dir(session_id) / self._relpath(kind, key)
+
+    def _create(self, session_id: str):
+        pass
+
+    def _delete(self, session_id: str):
+        # documents are files in the session directory
+        pass
+
+    def _last_write(self, session_id: str) -> Optional[float]:
+        return None
+
+    def _exists(self, session_id: str) -> bool:
+        return self._live_dir(session_id).is_dir() or self.archive.is_archived(session_id)
+
+    def _stamp(self, session_id: str, kind: str, key: str):
+        try:
+            st = self._path(session_id, kind, key).stat()
+        except FileNotFoundError:
+            entry = self.archive.index.get(session_id)
+            return ("archive", entry["archived_at"]) if entry is not None else None
+        # atomic writes replace the file: a new inode even within one mtime tick
+        return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+    def _read(self, session_id: str, kind: str, key: str) -> dict:
+        path = self._path(session_id, kind, key)
+        if path.exists():
+            return json.loads(path.read_text(encoding="utf-8", errors="ignore"))
+        raw = self.archive.read_member(session_id, self._relpath(kind, key))
+        if raw is None:
+            raise FileNotFoundError(f"{path.name} not found at {path}")
+        return json.loads(raw.decode("utf-8", errors="ignore"))
+
+    def _write(self, session_id: str, kind: str, key: str, data: dict) -> str:
+        path = self._path(session_id, kind, key)
+        # a pass archiving the session cannot run between the restore and the write
+        with self.archive.session_lock(session_id):
+            self.session_dir(session_id)
+            atomic_write_text(path, dumps_compact(data))
+        return str(path)
+
+    def _list(self, session_id: str, kind: str) -> List[dict]:
+        folder = self._live_dir(session_id) / self._DIRS[kind]
+        # live documents win over archived copies of the same name
+        found = self.archive.read_folder(session_id, self._DIRS[kind])
+        if folder.exists():
+            for f in folder.glob("*.json"):
+                try:
+                    found[f.name] = f.read_bytes()
+                except FileNotFoundError:
+                    continue
+        docs = []
+        for name in sorted(found):
+            if not name.endswith(".json"):
+                continue
+            try:
+                docs.append(json.loads(found[name].decode("utf-8", errors="ignore")))
+            except json.JSONDecodeError:
+                continue
+        return docs
+
+    def _list_sessions(self) -> List[str]:
+        live = {p.name for p in self.root.iterdir() if p.is_dir() and not p.name.startswith((".", "_"))}
+        return sorted(live.union(self.archive.index.session_ids()))
+
+
+class SQLiteSessionStore(SessionStore):
+    """
+    Documents in one SQLite database (WAL mode, one connection per thread).
+    """
+
+    DB_NAME = "sessions.db"
+
+    def __init__(self, root: Path, cache_size: int = 256):
+        super().__init__(root, cache_size)
+        self.db_path = self.root / self.DB_NAME
+        self._local = threading.local()
+        conn = self._conn()
+        conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS sessions (
+                session_id TEXT PRIMARY KEY,
+                created_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS docs (
+                session_id TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                key TEXT NOT NULL DEFAULT '',
+                data TEXT NOT NULL,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (session_id, kind, key)
+            );
+            """
+        )
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.db_path), timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _location(self, session_id: str, kind: str, key: str) -> str:
+        return f"sqlite://{self.db_path}#{session_id}/{kind}/{key}".rstrip("/")
+
+    def _create(self, session_id: str):
+        self._conn().execute(
+            "INSERT OR IGNORE INTO sessions (session_id, created_at) VALUES (?, ?)", (session_id, time.time())
+        )
+
+    def _delete(self, session_id: str):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM docs WHERE session_id = ?", (session_id,))
+            conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _last_write(self, session_id: str) -> Optional[float]:
+        row = self._conn().execute(
+            "SELECT MAX(t) FROM ("
+            "  SELECT MAX(updated_at) AS t FROM docs WHERE session_id = ?"
+            "  UNION ALL SELECT created_at FROM sessions WHERE session_id = ?"
+            ")",
+            (session_id, session_id),
+        ).fetchone()
+        return row[0] if row is not None else None
+
+    def _exists(self, session_id: str) -> bool:
+        row = self._conn().execute("SELECT 1 FROM sessions WHERE session_id = ?", (session_id,)).fetchone()
+        return row is not None
+
+    def _read(self, session_id: str, kind: str, key: str) -> dict:
+        row = self._conn().execute(
+            "SELECT data FROM docs WHERE session_id = ? AND kind = ? AND key = ?", (session_id, kind, key)
+        ).fetchone()
+        if row is None:
+            raise FileNotFoundError(f"{kind} not found for session {session_id}")
+        return json.loads(row[0])
+
+    def _stamp(self, session_id: str, kind: str, key: str):
+        row = self._conn().execute(
+            "SELECT updated_at FROM docs WHERE session_id = ? AND kind = ? AND key = ?", (session_id, kind, key)
+        ).fetchone()
+        return row[0] if row is not None else None
+
+    def _write(self, session_id: str, kind: str, key: str, data: dict) -> str:
+        self._conn().execute(
+            "INSERT OR REPLACE INTO docs (session_id, kind, key, data, updated_at) VALUES (?, ?, ?, ?, ?)",
+            (session_id, kind, key, dumps_compact(data), time.time()),
+        )
+        return self._location(session_id, kind, key)
+
+    def _list(self, session_id: str, kind: str) -> List[dict]:
+        rows = self._conn().execute(
+            "SELECT data FROM docs WHERE session_id = ? AND kind = ? ORDER BY key", (session_id, kind)
+        ).fetchall()
+        return [json.loads(r[0]) for r in rows]
+
+    def _list_sessions(self) -> List[str]:
+        return [r[0] for r in self._conn().execute("SELECT session_id FROM sessions ORDER BY session_id")]
+
+
+_STORES: Dict[str, type] = {
+    "fs": FileSessionStore,
+    "sqlite": SQLiteSessionStore,
+}
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def open_store(root: Path, backend: Optional[str] = None) -> SessionStore:
+    """
+    Open a store of the given backend ("fs" / "sqlite", default SESSION_STORE) at root.
+    """
+    backend = backend or config.SESSION_STORE
+    cls = _STORES.get(backend)
+    if cls is None:
+        raise RuntimeError(f"Unknown SESSION_STORE {backend!r}; expected one of {sorted(_STORES)}")
+    return cls(Path(root), config.SESSION_CACHE_SIZE)
+
+
+def get_store() -> SessionStore:
+    """
+    Return the process-wide session store selected by SESSION_STORE.
+    """
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = open_store(Path(config.STORAGE_DIR))
+    return _store
@@ -0,0 +1,159 @@
+"""
+Skills taxonomy engine.
+
+The taxonomy (canonical skill -> synonyms) is compiled once into a single
+regular expression built from a character trie of all surface forms, so
+matching is one left-to-right pass over the text regardless of how many
+skills are known, instead of one substring scan per skill.
+
+Terms only match on token boundaries: "c" no longer matches every word that
+contains the letter c, while "c++", "c#" and "node.js" still match.
+
+Taxonomy files (SKILLS_TAXONOMY_PATH) are either JSON
+    {"postgresql": ["postgres", "psql"], "python": []}
+or text, one skill per line
+    postgresql: postgres, psql
+"""
+
+import json
+import re
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from backend.app.core import config
+
+DEFAULT_TAXONOMY: Dict[str, List[str]] = {
+    "python": [],
+    "java": [],
+    "c": [],
+    "c++": ["cpp"],
+    "pytorch": ["torch"],
+    "tensorflow": [],
+    "keras": [],
+    "scikit-learn": ["sklearn", "scikit learn"],
+    "machine learning": [],
+    "deep learning": [],
+    "nlp": ["natural language processing"],
+    "computer vision": [],
+    "opencv": [],
+    "sql": [],
+    "mysql": [],
+    "postgresql": ["postgres"],
+    "mongodb": ["mongo"],
+    "docker": [],
+    "kubernetes": ["k8s"],
+    "aws": ["amazon web services"],
+    "linux": [],
+    "react": ["reactjs", "react.js"],
+    "angular": ["angularjs"],
+    "nodejs": ["node.js", "node js"],
+    "fastapi": [],
+}
+
+# characters that continue a skill token: "c" must not match inside "c++" or "abc"
+_TOKEN_CHARS = r"\w+#"
+
+
+def _trie_regex(terms: Iterable[str]) -> str:
+    """
+    Build a regex alternation from a trie of terms so shared prefixes are
+    tested once (e.g. "java|javascript" -> "java(?:script)?").
+    """
+    trie: dict = {}
+    for term in terms:
+        node = trie
+        for ch in term:
+            node = node.setdefault(ch, {})
+        node[""] = True
+
+    def emit(node: dict) -> str:
+        if "" in node and len(node) == 1:
+            return ""
+        branches = []
+        optional = "" in node
+        for ch in sorted(k for k in node if k):
+            branches.append(re.escape(ch) + emit(node[ch]))
+        if len(branches) == 1 and not optional:
+            return branches[0]
+        body = "(?:" + "|".join(branches) + ")"
+        return body + "?" if optional else body
+
+    return emit(trie)
+
+
+class SkillTaxonomy:
+    def __init__(self, entries: Dict[str, List[str]]):
+        self.canonical: Dict[str, str] = {}
+        for skill, synonyms in entries.items():
+            skill_l = skill.strip().lower()
+            if not skill_l:
+                continue
+            for form in [skill_l] + [s.strip().lower() for s in synonyms or []]:
+                if form:
+                    self.canonical.setdefault(form, skill_l)
+        self.skills = sorted(set(self.canonical.values()))
+        pattern = _trie_regex(self.canonical) if self.canonical else r"(?!x)x"
+        self._regex = re.compile(
+            rf"(?<![{_TOKEN_CHARS}])(?:{pattern})(?![{_TOKEN_CHARS}])"
+        )
+
+    def __len__(self):
+        return len(self.skills)
+
+    def finditer(self, text: str):
+        """
+        Yield (start, end, canonical_skill, matched_text) in one pass.
+        """
+        lower = text.lower()
+        for m in self._regex.finditer(lower):
+            form = m.group(0)
+            # optional trie suffixes are greedy, so the longest form wins
+            yield m.start(), m.end(), self.canonical[form], text[m.start():m.end()]
+
+    def match(self, text: str) -> dict:
+        spans = []
+        counts = Counter()
+        for start, end, skill, surface in self.finditer(text):
+            spans.append({"skill": skill, "start": start, "end": end, "text": surface})
+            counts[skill] += 1
+        return {"skills": sorted(counts), "counts": dict(counts), "spans": spans}
+
+
+def load_taxonomy_file(path: Path) -> Dict[str, List[str]]:
+    path = Path(path)
+    raw = path.read_text(encoding="utf-8")
+    if path.suffix.lower() == ".json":
+        data = json.loads(raw)
+        if isinstance(data, list):
+            return {s: [] for s in data}
+        return {k: list(v or []) for k, v in data.items()}
+    entries: Dict[str, List[str]] = {}
+    for line in raw.splitlines():
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        skill, _, synonyms = line.partition(":")
+        entries[skill.strip()] = [s.strip() for s in synonyms.split(",") if s.strip()]
+    return entries
+
+
+_taxonomy: Optional[SkillTaxonomy] = None
+_taxonomy_lock = threading.Lock()
+
+
+def get_taxonomy() -> SkillTaxonomy:
+    """
+    Return the compiled taxonomy (SKILLS_TAXONOMY_PATH or the built-in list),
+    loading and compiling it on first use.
+    """
+    global _taxonomy
+    if _taxonomy is None:
+        with _taxonomy_lock:
+            if _taxonomy is None:
+                entries = dict(DEFAULT_TAXONOMY)
+                if config.SKILLS_TAXONOMY_PATH:
+                    entries = load_taxonomy_file(Path(config.SKILLS_TAXONOMY_PATH))
+                _taxonomy = SkillTaxonomy(entries)
+    return _taxonomy
@@ -0,0 +1,237 @@
+"""
+Startup profiling, background prewarm and readiness.
+
+Routers are imported through timed_import(), which records how long each one
+took and which heavy ML / document libraries it dragged in. Those should
+only load lazily inside handlers or during prewarm, never at import time.
+
+Prewarm runs a list of named steps (skills taxonomy, sentence model,
+explainability model, ASR, lazily imported libraries). With
+STARTUP_MODE=blocking the lifespan hook runs them before the server accepts
+connections, as before. With STARTUP_MODE=background it starts them in a
+thread and the server listens at once: /api/health/live answers immediately,
+and /api/health/ready returns 503 until every required step has finished, so
+the load balancer only routes ML traffic to a warm worker.
+
+    python -m backend.app.core.startup      # print the import profile of the app
+"""
+
+import importlib
+import sys
+import threading
+import time
+import traceback
+from typing import Callable, Dict, List, Optional
+
+from backend.app.core import config
+
+# libraries that must never be imported as a side effect of importing a router
+HEAVY_MODULES = (
+    "torch", "torchaudio", "transformers", "sentence_transformers", "onnxruntime",
+    "sklearn", "pdfplumber", "docx2txt", "pdf2image", "pytesseract", "cv2", "mediapipe",
+)
+
+_STARTED_AT = time.time()
+_import_profile: List[dict] = []
+
+
+def _loaded_heavy() -> set:
+    return {name for name in HEAVY_MODULES if name in sys.modules}
+
+
+def timed_import(module_name: str):
+    """
+    Import a module, recording its wall time and any heavy libraries it pulled in.
+    """
+    before = _loaded_heavy()
+    t0 = time.perf_counter()
+    module = importlib.import_module(module_name)
+    ms = (time.perf_counter() - t0) * 1000.0
+    heavy = sorted(_loaded_heavy() - before)
+    _import_profile.append({"module": module_name, "ms": round(ms, 3), "heavy_imports": heavy})
+    if heavy:
+        print(f"⚠️  importing {module_name} loaded {', '.join(heavy)} ({ms:.0f} ms)")
+    return module
+
+
+def import_profile() -> dict:
+    return {
+        "modules": list(_import_profile),
+        "total_ms": round(sum(m["ms"] for m in _import_profile), 3),
+        "heavy_loaded": sorted(_loaded_heavy()),
+    }
+
+
+# =========================
+# Prewarm
+# =========================
+
+class PrewarmStep:
+    def __init__(self, name: str, fn: Callable[[], object], required: bool = False):
+        self.name = name
+        self.fn = fn
+        self.required = required
+        self.status = "pending"
+        self.ms = None
+        self.error = None
+
+    def run(self):
+        self.status = "running"
+        t0 = time.perf_counter()
+        try:
+            self.fn()
+            self.status = "ok"
+        except Exception as e:
+            # a failed step is left to the lazy loaders; it only blocks readiness if required
+            self.status = "failed"
+            self.error = str(e)
+            print(f"Prewarm step {self.name} failed:", e)
+            print(traceback.format_exc())
+        finally:
+            self.ms = round((time.perf_counter() - t0) * 1000.0, 3)
+
+    def as_dict(self) -> dict:
+        return {"name": self.name, "status": self.status, "required": self.required, "ms": self.ms, "error": self.error}
+
+
+def _load_sentence_model():
+    from backend.app.core.ml_models import load_models
+    load_models()
+
+
+def _load_taxonomy():
+    from backend.app.core.skills import get_taxonomy
+    get_taxonomy()
+
+
+def _load_explainer():
+    from backend.app.core.explain import get_explainer
+    get_explainer()
+
+
+def _load_asr():
+    from backend.app.core import asr
+    if config.ASR_PROCESS_WORKERS > 0 and asr.PROFILE["backend"] != "stub":
+        print(f"📥 Starting {config.ASR_PROCESS_WORKERS} ASR worker process(es)...")
+        asr.start_asr_process_pool(config.ASR_PROCESS_WORKERS)
+        print("✅ ASR workers ready")
+    elif config.ASR_PRELOAD:
+        asr.get_asr_pipeline()
+
+
+def _import_lazy_libraries():
+    # modules only imported inside handlers; pay for them here instead of on the first request
+    for name in ("pdfplumber", "docx2txt", "sklearn.feature_extraction.text"):
+        try:
+            importlib.import_module(name)
+        except ImportError as e:
+            print(f"Prewarm: {name} unavailable ({e})")
+
+
+def asr_required() -> bool:
+    # a lazily loaded ASR model (ASR_PRELOAD=0) does not gate readiness
+    from backend.app.core.asr import PROFILE
+    return config.ASR_PRELOAD or (config.ASR_PROCESS_WORKERS > 0 and PROFILE["backend"] != "stub")
+
+
+def default_steps() -> List[PrewarmStep]:
+    return [
+        PrewarmStep("skills_taxonomy", _load_taxonomy),
+        PrewarmStep("sentence_model", _load_sentence_model, required=True),
+        PrewarmStep("explain_model", _load_explainer),
+        PrewarmStep("asr", _load_asr, required=asr_required()),
+        PrewarmStep("lazy_imports", _import_lazy_libraries),
+    ]
+
+
+class Prewarmer:
+    def __init__(self, steps: List[PrewarmStep]):
+        self.steps = steps
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._thread: Optional[threading.Thread] = None
+        self._done = threading.Event()
+
+    def run(self):
+        self.started_at = time.time()
+        try:
+            for step in self.steps:
+                step.run()
+        finally:
+            self.finished_at = time.time()
+            self._done.set()
+
+    def start(self):
+        self._thread = threading.Thread(target=self.run, name="prewarm", daemon=True)
+        self._thread.start()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self._done.wait(timeout)
+
+    @property
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    def status(self) -> dict:
+        return {
+            "mode": config.STARTUP_MODE,
+            "done": self.done,
+            "duration_s": round(self.finished_at - self.started_at, 3) if self.finished_at else None,
+            "steps": [s.as_dict() for s in self.steps],
+        }
+
+
+_prewarmer: Optional[Prewarmer] = None
+
+
+def start_prewarm(background: bool) -> Prewarmer:
+    global _prewarmer
+    _prewarmer = Prewarmer(default_steps())
+    if background:
+        _prewarmer.start()
+    else:
+        _prewarmer.run()
+    return _prewarmer
+
+
+def get_prewarmer() -> Optional[Prewarmer]:
+    return _prewarmer
+
+
+def readiness() -> Dict[str, object]:
+    """
+    Ready = every required model is loaded. Checked against the models
+    themselves, not the prewarm steps, so a model loaded lazily still counts.
+    """
+    from backend.app.core.asr import asr_status
+    from backend.app.core.ml_models import sentence_model_loaded
+
+    checks = {"sentence_model": sentence_model_loaded()}
+    if asr_required():
+        checks["asr"] = bool(asr_status()["loaded"])
+    return {
+        "ready": all(checks.values()),
+        "checks": checks,
+        "prewarm": _prewarmer.status() if _prewarmer is not None else None,
+    }
+
+
+def uptime_s() -> float:
+    return round(time.time() - _STARTED_AT, 3)
+
+
+def main():
+    t0 = time.perf_counter()
+    timed_import("backend.app.main")
+    total = (time.perf_counter() - t0) * 1000.0
+    # run with -m this file is __main__; the app recorded into the imported module
+    from backend.app.core.startup import import_profile as profile_of_app
+    rows = sorted(profile_of_app()["modules"], key=lambda m: -m["ms"])
+    print(f"import backend.app.main: {total:.1f} ms")
+    for row in rows:
+        heavy = f"  heavy: {', '.join(row['heavy_imports'])}" if row["heavy_imports"] else ""
+        print(f"  {row['ms']:9.1f} ms  {row['module']}{heavy}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,365 @@
+"""
+Storage lifecycle: retention, compaction and archival of session data.
+
+A background thread (started by the app lifespan when STORAGE_LIFECYCLE=1)
+runs one pass every STORAGE_LIFECYCLE_INTERVAL_S. Each pass:
+
+  1. expiry      - sessions idle for SESSION_RETENTION_DAYS are deleted,
+                   live or archived, together with their report row
+  2. raw media   - answer audio / video (answers/, audio/, video/) older
+                   than RETAIN_RAW_MEDIA_HOURS is deleted once its question
+                   has a score written after the upload; the transcript,
+                   score and features derived from it are kept
+  3. compaction  - sessions idle for ARCHIVE_IDLE_DAYS, or whose report is
+                   complete and idle for ARCHIVE_COMPLETED_HOURS, are packed
+                   into STORAGE_DIR/_archive/YYYY/MM/DD/<id>.zip
+                   (core/session_archive.py); reads stay transparent
+  4. blobs       - deduplicated upload blobs no session links to any more
+                   are removed from _blobs/
+
+Only one process runs a pass at a time (a non-blocking flock on
+_index/lifecycle.lock), so every gunicorn worker can start the thread.
+Each pass writes its report (runtime, per-step counts, reclaimed bytes)
+to _index/lifecycle_last.json, which GET /api/storage/lifecycle serves.
+
+    python -m backend.app.core.storage_lifecycle run [--dry-run]
+    python -m backend.app.core.storage_lifecycle report
+"""
+
+import argparse
+import fcntl
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+from backend.app.core import config
+from backend.app.core.session_archive import INDEX_DIR
+from backend.app.core.session_store import SessionStore, atomic_write_text, get_store
+
+# session folders holding raw uploaded media, named <question_id>_<...>
+MEDIA_DIRS = ("answers", "audio", "video")
+_REPORT_FILE = "lifecycle_last.json"
+_HOUR = 3600.0
+_DAY = 86400.0
+
+
+def _report_path(root: Path) -> Path:
+    return root / INDEX_DIR / _REPORT_FILE
+
+
+def _tree_bytes(live: Path) -> int:
+    total = 0
+    for p in live.rglob("*"):
+        try:
+            st = p.stat()
+        except FileNotFoundError:
+            continue
+        # hardlinked upload blobs are freed by the blob step, not here
+        if p.is_file() and st.st_nlink <= 1:
+            total += st.st_size
+    return total
+
+
+def _scored_at(live: Path, report: Optional[dict]) -> Dict[str, float]:
+    """
+    {question_id: time its latest score was written}, from the report, or
+    from the score files when reports are off.
+    """
+    if report and report.get("answers"):
+        return {qid: a["at"] for qid, a in report["answers"].items() if a.get("at")}
+    scores = live / "scores"
+    if not scores.is_dir():
+        return {}
+    return {p.stem: p.stat().st_mtime for p in scores.glob("*.json")}
+
+
+def _new_report(dry_run: bool) -> dict:
+    return {
+        "started_at": round(time.time(), 3),
+        "runtime_s": None,
+        "dry_run": dry_run,
+        "sessions_scanned": 0,
+        "expired_sessions": {"sessions": 0, "bytes": 0},
+        "retention": {"files": 0, "bytes": 0},
+        "compaction": {"sessions": 0, "files": 0, "bytes_before": 0, "bytes_after": 0},
+        "blobs": {"removed": 0, "bytes": 0},
+        "reclaimed_bytes": 0,
+        "errors": [],
+    }
+
+
+class LifecycleManager:
+    """
+    One lifecycle pass over a store's root (run_once), optionally repeated
+    on a daemon thread (start / stop).
+    """
+
+    def __init__(self, store: SessionStore, interval_s: float = 3600.0):
+        self.store = store
+        self.root = store.root
+        self.interval_s = max(1.0, float(interval_s))
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.passes = 0
+        self.last_report: Optional[dict] = None
+
+    # ---- thread ----
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name="storage-lifecycle", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _loop(self):
+        while not self._stop.wait(self.interval_s):
+            try:
+                self.run_once()
+            except Exception as e:
+                print("Storage lifecycle pass failed:", e)
+
+    # ---- pass ----
+
+    def run_once(self, dry_run: bool = False) -> Optional[dict]:
+        """
+        Run one pass and return its report, or None when another process
+        holds the lifecycle lock.
+        """
+        lock_path = self.root / INDEX_DIR / "lifecycle.lock"
+        lock_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(lock_path, "a") as lock:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return None
+            try:
+                return self._run(dry_run)
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _run(self, dry_run: bool) -> dict:
+        t0 = time.perf_counter()
+        now = time.time()
+        report = _new_report(dry_run)
+        reports = None
+        if config.SESSION_REPORTS:
+            from backend.app.core.session_report import get_report_index
+            reports = get_report_index()
+
+        archive = self.store.archive
+        live_ids = [
+            p.name for p in self.root.iterdir()
+            if p.is_dir() and not p.name.startswith((".", "_"))
+        ]
+        report["sessions_scanned"] = len(live_ids) + archive.index.totals()["sessions"]
+
+        if config.SESSION_RETENTION_DAYS > 0:
+            cutoff = now - config.SESSION_RETENTION_DAYS * _DAY
+            # live directories, archives and sessions that only exist as backend rows
+            for sid in sorted(set(live_ids).union(self.store.list_sessions())):
+                last = self.store.last_activity(sid)
+                if last is not None and last < cutoff:
+                    self._step(report, sid, self._expire, sid, reports, dry_run)
+                    if sid in live_ids:
+                        live_ids.remove(sid)
+
+        for sid in live_ids:
+            self._step(report, sid, self._sweep_session, sid, now, reports, dry_run)
+
+        self._step(report, "_blobs", self._collect_blobs, now, dry_run)
+
+        report["reclaimed_bytes"] = (
+            report["expired_sessions"]["bytes"]
+            + report["retention"]["bytes"]
+            + report["blobs"]["bytes"]
+            + report["compaction"]["bytes_before"] - report["compaction"]["bytes_after"]
+        )
+        report["runtime_s"] = round(time.perf_counter() - t0, 3)
+        if not dry_run:
+            atomic_write_text(_report_path(self.root), json.dumps(report, indent=2))
+        self.passes += 1
+        self.last_report = report
+        print(
+            f"🧹 Storage lifecycle{' (dry run)' if dry_run else ''}: "
+            f"reclaimed {report['reclaimed_bytes'] / 1e6:.1f} MB in {report['runtime_s']}s "
+            f"({report['retention']['files']} media files, {report['compaction']['sessions']} sessions archived, "
+            f"{report['expired_sessions']['sessions']} expired)"
+        )
+        return report
+
+    @staticmethod
+    def _step(report: dict, subject: str, fn, *args):
+        # one broken session must not stop the pass
+        try:
+            fn(report, *args)
+        except Exception as e:
+            report["errors"].append({"session_id": subject, "error": f"{type(e).__name__}: {e}"})
+
+    # ---- steps ----
+
+    def _expire(self, report: dict, sid: str, reports, dry_run: bool):
+        live = self.root / sid
+        freed = _tree_bytes(live) if live.is_dir() else 0
+        entry = self.store.archive.index.get(sid)
+        if entry is not None:
+            freed += entry["bytes_after"]
+        if not dry_run:
+            self.store.delete_session(sid)
+            if reports is not None:
+                reports.delete(sid)
+        report["expired_sessions"]["sessions"] += 1
+        report["expired_sessions"]["bytes"] += freed
+
+    def _sweep_session(self, report: dict, sid: str, now: float, reports, dry_run: bool):
+        session_report = reports.get(sid) if reports is not None else None
+        if config.RETAIN_RAW_MEDIA_HOURS > 0:
+            self._drop_raw_media(report, sid, now - config.RETAIN_RAW_MEDIA_HOURS * _HOUR, session_report, dry_run)
+        self._maybe_archive(report, sid, now, session_report, dry_run)
+
+    def _drop_raw_media(self, report: dict, sid: str, cutoff: float, session_report: Optional[dict], dry_run: bool):
+        live = self.root / sid
+        scored = _scored_at(live, session_report)
+        if not scored:
+            return
+        for folder in MEDIA_DIRS:
+            media = live / folder
+            if not media.is_dir():
+                continue
+            for p in media.iterdir():
+                qid = p.name.split("_", 1)[0]
+                if qid not in scored or not p.is_file():
+                    continue
+                st = p.stat()
+                # keep uploads that are recent or newer than their last score (not processed yet)
+                if st.st_mtime >= cutoff or scored[qid] < st.st_mtime:
+                    continue
+                if not dry_run:
+                    p.unlink()
+                report["retention"]["files"] += 1
+                if st.st_nlink <= 1:
+                    report["retention"]["bytes"] += st.st_size
+
+    def _maybe_archive(self, report: dict, sid: str, now: float, session_report: Optional[dict], dry_run: bool):
+        idle_after = None
+        if config.ARCHIVE_IDLE_DAYS > 0:
+            idle_after = config.ARCHIVE_IDLE_DAYS * _DAY
+        if config.ARCHIVE_COMPLETED_HOURS > 0 and session_report and session_report.get("completed"):
+            completed_after = config.ARCHIVE_COMPLETED_HOURS * _HOUR
+            idle_after = completed_after if idle_after is None else min(idle_after, completed_after)
+        if idle_after is None:
+            return
+        last = self.store.last_activity(sid)
+        if last is None or now - last < idle_after:
+            return
+        result = self.store.archive.archive(sid, dry_run=dry_run)
+        if result is None:
+            return
+        if not dry_run:
+            self.store.invalidate(sid)
+        c = report["compaction"]
+        c["sessions"] += 1
+        c["files"] += result["files"]
+        # hardlinked blobs stay on disk: only count what the session owned
+        c["bytes_before"] += result["owned_bytes"]
+        c["bytes_after"] += result["bytes_after"] if result["bytes_after"] is not None else result["owned_bytes"]
+
+    def _collect_blobs(self, report: dict, now: float, dry_run: bool):
+        from backend.app.core.uploads import blob_root
+        root = blob_root()
+        if not root.is_dir():
+            return
+        # a blob younger than this may be mid-upload, about to be linked
+        cutoff = now - _HOUR
+        for shard in root.iterdir():
+            if not shard.is_dir():
+                continue
+            for p in shard.iterdir():
+                try:
+                    st = p.stat()
+                except FileNotFoundError:
+                    continue
+                if not p.is_file() or p.name.startswith(".") or st.st_nlink > 1 or st.st_mtime >= cutoff:
+                    continue
+                if not dry_run:
+                    p.unlink()
+                report["blobs"]["removed"] += 1
+                report["blobs"]["bytes"] += st.st_size
+
+    # ---- status ----
+
+    def status(self) -> dict:
+        return {
+            "enabled": config.STORAGE_LIFECYCLE,
+            "running": self._thread is not None,
+            "interval_s": self.interval_s,
+            "passes": self.passes,
+            "archive": self.store.archive.stats(),
+            "last_report": self.last_report or load_last_report(self.root),
+        }
+
+
+def load_last_report(root: Optional[Path] = None) -> Optional[dict]:
+    path = _report_path(Path(root or config.STORAGE_DIR))
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+_manager: Optional[LifecycleManager] = None
+_lock = threading.Lock()
+
+
+def get_lifecycle() -> LifecycleManager:
+    global _manager
+    if _manager is None:
+        with _lock:
+            if _manager is None:
+                _manager = LifecycleManager(get_store(), config.STORAGE_LIFECYCLE_INTERVAL_S)
+    return _manager
+
+
+def start_lifecycle() -> Optional[LifecycleManager]:
+    if not config.STORAGE_LIFECYCLE:
+        return None
+    manager = get_lifecycle()
+    manager.start()
+    return manager
+
+
+def stop_lifecycle():
+    if _manager is not None:
+        _manager.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+    run = sub.add_parser("run", help="run one lifecycle pass now")
+    run.add_argument("--dry-run", action="store_true", help="report what would be reclaimed without deleting")
+    sub.add_parser("report", help="print the last pass's report")
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        report = get_lifecycle().run_once(dry_run=args.dry_run)
+        if report is None:
+            print("Another process is running a lifecycle pass")
+            return 1
+    else:
+        report = load_last_report()
+        if report is None:
+            print("No lifecycle pass has run yet")
+            return 1
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,203 @@
+"""
+Incremental ASR over audio that is still arriving.
+
+Incoming PCM is cut into fixed-length windows that overlap by a small margin
+so words on a boundary are heard in full at least once. Each window is
+transcribed as soon as it is complete, and the partial texts are stitched
+together by dropping the longest word run that repeats across a boundary.
+"""
+
+import asyncio
+import math
+from typing import Callable, List, Optional
+
+import numpy as np
+
+from backend.app.core.asr import ASR_SAMPLE_RATE, transcribe
+
+
+def pcm16_to_float32(data: bytes) -> np.ndarray:
+    """
+    Little-endian signed 16-bit PCM -> float32 in [-1, 1].
+    """
+    if len(data) % 2:
+        data = data[:-1]
+    return np.frombuffer(data, dtype="<i2").astype(np.float32) / 32768.0
+
+
+def resample_linear(audio: np.ndarray, src_rate: int, dst_rate: int = ASR_SAMPLE_RATE) -> np.ndarray:
+    if src_rate == dst_rate or audio.size == 0:
+        return audio
+    n_out = int(round(audio.size * dst_rate / float(src_rate)))
+    x_old = np.linspace(0.0, 1.0, num=audio.size, endpoint=False)
+    x_new = np.linspace(0.0, 1.0, num=n_out, endpoint=False)
+    return np.interp(x_new, x_old, audio).astype(np.float32)
+
+
+class StreamResampler:
+    """
+    Linear resampling of a signal that arrives in chunks. The output
+    position and the last input sample carry over between chunks, so the
+    result matches resampling the whole signal at once: no drift from
+    per-chunk rounding and no step at chunk boundaries.
+    """
+
+    def __init__(self, src_rate: int, dst_rate: int = ASR_SAMPLE_RATE):
+        self.src_rate = int(src_rate)
+        self.dst_rate = int(dst_rate)
+        self.step = self.src_rate / float(self.dst_rate)
+        self._prev = np.zeros(0, dtype=np.float32)
+        # next output sample, in input samples from the start of _prev
+        self._pos = 0.0
+
+    def process(self, audio: np.ndarray) -> np.ndarray:
+        if self.src_rate == self.dst_rate or audio.size == 0:
+            return audio
+        buf = np.concatenate([self._prev, audio.astype(np.float32, copy=False)])
+        last = buf.size - 1
+        n = int(math.floor((last - self._pos) / self.step)) + 1 if self._pos <= last else 0
+        t = self._pos + self.step * np.arange(n)
+        out = np.interp(t, np.arange(buf.size), buf).astype(np.float32)
+        self._pos += self.step * n - last
+        self._prev = buf[-1:]
+        return out
+
+
+def merge_overlap(previous: str, new: str, max_words: int = 12) -> str:
+    """
+    Append new to previous, removing the longest run of words that ends
+    previous and starts new (the part both windows heard).
+    """
+    if not previous:
+        return new
+    if not new:
+        return previous
+    prev_words = previous.split()
+    new_words = new.split()
+    norm = lambda w: w.strip(".,!?;:").lower()
+    limit = min(max_words, len(prev_words), len(new_words))
+    for n in range(limit, 0, -1):
+        if [norm(w) for w in prev_words[-n:]] == [norm(w) for w in new_words[:n]]:
+            new_words = new_words[n:]
+            break
+    return " ".join(prev_words + new_words)
+
+
+class AudioWindower:
+    """
+    Buffers float32 samples and emits overlapping fixed-length windows.
+    """
+
+    def __init__(self, window_s: float, overlap_s: float, sample_rate: int = ASR_SAMPLE_RATE):
+        self.sample_rate = sample_rate
+        self.window = max(1, int(window_s * sample_rate))
+        overlap = int(min(max(overlap_s, 0.0), window_s / 2.0) * sample_rate)
+        self.step = self.window - overlap
+        self._buf = np.zeros(0, dtype=np.float32)
+        self.total_samples = 0
+
+    def feed(self, samples: np.ndarray) -> List[np.ndarray]:
+        self._buf = np.concatenate([self._buf, samples.astype(np.float32, copy=False)])
+        self.total_samples += samples.size
+        windows = []
+        while self._buf.size >= self.window:
+            windows.append(self._buf[: self.window].copy())
+            self._buf = self._buf[self.step:]
+        return windows
+
+    def flush(self) -> Optional[np.ndarray]:
+        """
+        Return the final partial window, if it holds more than the overlap
+        already covered by the previous window.
+        """
+        overlap = self.window - self.step
+        covered = overlap if self.total_samples >= self.window else 0
+        rest = self._buf
+        self._buf = np.zeros(0, dtype=np.float32)
+        if rest.size <= covered:
+            return None
+        return rest
+
+
+class StreamingTranscriber:
+    """
+    Feed PCM as it arrives; windows are transcribed in order on a worker
+    while more audio is received. on_partial(index, window_text, transcript)
+    is awaited after every window.
+    """
+
+    def __init__(
+        self,
+        window_s: float,
+        overlap_s: float,
+        source_rate: int = ASR_SAMPLE_RATE,
+        on_partial: Optional[Callable] = None,
+        run_asr: Optional[Callable] = None,
+    ):
+        self.source_rate = source_rate
+        self.resampler = StreamResampler(source_rate)
+        self.windower = AudioWindower(window_s, overlap_s)
+        self.on_partial = on_partial
+        self.transcript = ""
+        self.windows_done = 0
+        self._queue = asyncio.Queue()
+        self._worker = asyncio.get_running_loop().create_task(self._run())
+        self._chunks: List[np.ndarray] = []
+        # run_asr(inputs) -> awaitable str; defaults to transcribe() on the default executor
+        self._run_asr = run_asr or (
+            lambda inputs: asyncio.get_running_loop().run_in_executor(None, transcribe, inputs)
+        )
+
+    async def _run(self):
+        while True:
+            window = await self._queue.get()
+            if window is None:
+                return
+            text = await self._run_asr({"raw": window, "sampling_rate": ASR_SAMPLE_RATE})
+            self.transcript = merge_overlap(self.transcript, text)
+            index = self.windows_done
+            self.windows_done += 1
+            if self.on_partial is not None:
+                await self.on_partial(index, text, self.transcript)
+
+    async def feed_pcm16(self, data: bytes):
+        self.check()
+        samples = self.resampler.process(pcm16_to_float32(data))
+        self._chunks.append(samples)
+        for window in self.windower.feed(samples):
+            await self._queue.put(window)
+
+    async def finish(self) -> str:
+        rest = self.windower.flush()
+        if rest is not None:
+            await self._queue.put(rest)
+        await self._queue.put(None)
+        await self._worker
+        return self.transcript
+
+    def cancel(self):
+        self._worker.cancel()
+
+    @property
+    def worker(self) -> asyncio.Task:
+        return self._worker
+
+    def check(self):
+        """
+        Re-raise the error that stopped the ASR worker (ASR failure,
+        PoolSaturated), if any.
+        """
+        if self._worker.done() and not self._worker.cancelled():
+            error = self._worker.exception()
+            if error is not None:
+                raise error
+
+    def audio(self) -> np.ndarray:
+        """
+        Everything received so far, at 16 kHz.
+        """
+        return np.concatenate(self._chunks) if self._chunks else np.zeros(0, dtype=np.float32)
+
+    @property
+    def seconds_received(self) -> float:
+        return self.windower.total_samples / float(ASR_SAMPLE_RATE)
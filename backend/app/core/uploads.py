@@ -0,0 +1,361 @@
+"""
+Upload handling for resumes, audio and video.
+
+Upload routes read the raw multipart request body themselves instead of
+letting the form parser spool the file first: the body is parsed as it
+arrives and the file part is written straight into a temp file in the blob
+store, hashing as it goes, so every byte is written to disk once. Parsing,
+hashing and writing run as one task on the "upload" pool per request; the
+event loop only hands it the received chunks (coalesced to UPLOAD_CHUNK_KB)
+through a bounded queue, which also back-pressures fast clients. The pool is
+entered before anything is written, so a saturated server answers 503
+up front rather than in the middle of an upload.
+
+The finished file is stored once, content-addressed, as
+STORAGE_DIR/_blobs/<sha[:2]>/<sha256><ext>, and the session gets a hardlink
+to it, so a retried or repeated upload costs no extra disk.
+
+Size limits are enforced twice: UploadLimitMiddleware rejects requests whose
+Content-Length is already too large before the body is read, and the
+streaming parser aborts as soon as the limit is crossed.
+"""
+
+import asyncio
+import hashlib
+import os
+import queue
+import shutil
+import tempfile
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Dict, Optional
+
+from fastapi import HTTPException, Request
+from starlette.responses import JSONResponse
+
+try:
+    from python_multipart.multipart import MultipartParser, parse_options_header
+except ImportError:  # python-multipart < 0.0.13
+    from multipart.multipart import MultipartParser, parse_options_header
+
+from backend.app.core import config
+from backend.app.core.inference_pool import run_in_pool
+from backend.app.core.metrics import timed
+
+# multipart framing overhead allowed on top of the file size limit
+_FORM_OVERHEAD = 64 * 1024
+# plain form fields next to the file (ids) are small
+_MAX_FIELDS_BYTES = 64 * 1024
+# coalesced chunks buffered between the event loop and the writer task
+_QUEUE_CHUNKS = 4
+_ABORT = object()
+
+
+def max_upload_bytes(kind: str) -> int:
+    limits = {
+        "resume": config.UPLOAD_MAX_RESUME_MB,
+        "audio": config.UPLOAD_MAX_AUDIO_MB,
+        "video": config.UPLOAD_MAX_VIDEO_MB,
+    }
+    return int(limits[kind] * 1024 * 1024)
+
+
+def blob_root() -> Path:
+    return Path(config.STORAGE_DIR) / "_blobs"
+
+
+def blob_path(digest: str, suffix: str = "") -> Path:
+    return blob_root() / digest[:2] / f"{digest}{suffix.lower()}"
+
+
+def safe_filename(name: Optional[str], default: str = "upload") -> str:
+    """
+    Drop any client-supplied directory components.
+    """
+    name = Path(name or "").name
+    return name or default
+
+
+def _link_into(blob: Path, dest: Path):
+    """
+    Hardlink the blob into the session; copy when linking is not possible
+    (e.g. another filesystem).
+    """
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    if dest.exists():
+        if os.path.samefile(blob, dest):
+            return
+        dest.unlink()
+    try:
+        os.link(blob, dest)
+    except OSError:
+        shutil.copyfile(blob, dest)
+
+
+def _finalize(tmp_path: Path, digest: str, suffix: str, dest: Path) -> bool:
+    """
+    Move the temp file into the blob store (or drop it if that content is
+    already stored) and link it to dest. Returns True when deduplicated.
+    """
+    blob = blob_path(digest, suffix)
+    blob.parent.mkdir(parents=True, exist_ok=True)
+    deduplicated = blob.exists()
+    if deduplicated:
+        tmp_path.unlink()
+    else:
+        os.replace(tmp_path, blob)
+    _link_into(blob, dest)
+    return deduplicated
+
+
+def _unlink_quietly(path: Path):
+    try:
+        path.unlink()
+    except OSError:
+        pass
+
+
+def _receive_multipart(chunks: queue.Queue, boundary: bytes, limit: int, kind: str, file_field: str) -> dict:
+    """
+    Writer task: parse the multipart body from the queue, writing the file
+    part into a blob-store temp file while hashing it, and collecting the
+    other (small) fields. Ends at the None sentinel; _ABORT drops the file.
+    """
+    tmp_dir = blob_root() / "tmp"
+    tmp_dir.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=str(tmp_dir), suffix=".part")
+    tmp_path = Path(tmp_name)
+    out = os.fdopen(fd, "wb")
+    h = hashlib.sha256()
+    state = {"size": 0, "fields_bytes": 0, "filename": None, "seen_file": False}
+    fields: Dict[str, bytearray] = {}
+    part = {}
+
+    def on_part_begin():
+        part.clear()
+        part["headers"] = {}
+        part["field"] = b""
+        part["value"] = b""
+
+    def on_header_field(data, start, end):
+        part["field"] += data[start:end]
+
+    def on_header_value(data, start, end):
+        part["value"] += data[start:end]
+
+    def on_header_end():
+        part["headers"][part["field"].lower()] = part["value"]
+        part["field"] = b""
+        part["value"] = b""
+
+    def on_headers_finished():
+        _, options = parse_options_header(part["headers"].get(b"content-disposition", b""))
+        name = options.get(b"name", b"").decode("utf-8", "replace")
+        part["is_file"] = name == file_field and b"filename" in options
+        if part["is_file"]:
+            if state["seen_file"]:
+                raise HTTPException(status_code=400, detail=f"only one {file_field!r} part is accepted")
+            state["seen_file"] = True
+            state["filename"] = options[b"filename"].decode("utf-8", "replace")
+        else:
+            part["buf"] = fields.setdefault(name, bytearray())
+
+    def on_part_data(data, start, end):
+        if part["is_file"]:
+            state["size"] += end - start
+            if state["size"] > limit:
+                raise HTTPException(status_code=413, detail=f"{kind} upload exceeds {limit} bytes")
+            view = memoryview(data)[start:end]
+            h.update(view)
+            out.write(view)
+        else:
+            state["fields_bytes"] += end - start
+            if state["fields_bytes"] > _MAX_FIELDS_BYTES:
+                raise HTTPException(status_code=413, detail="form fields too large")
+            part["buf"] += data[start:end]
+
+    parser = MultipartParser(boundary, {
+        "on_part_begin": on_part_begin,
+        "on_header_field": on_header_field,
+        "on_header_value": on_header_value,
+        "on_header_end": on_header_end,
+        "on_headers_finished": on_headers_finished,
+        "on_part_data": on_part_data,
+    })
+    try:
+        with out:
+            while True:
+                chunk = chunks.get()
+                if chunk is None:
+                    break
+                if chunk is _ABORT:
+                    raise RuntimeError("upload aborted")
+                parser.write(chunk)
+            parser.finalize()
+        if not state["seen_file"]:
+            raise HTTPException(status_code=422, detail=f"multipart field {file_field!r} (a file) is required")
+    except BaseException:
+        _unlink_quietly(tmp_path)
+        raise
+    return {
+        "tmp_path": tmp_path,
+        "sha256": h.hexdigest(),
+        "size": state["size"],
+        "filename": state["filename"],
+        "fields": {k: v.decode("utf-8", "replace") for k, v in fields.items()},
+    }
+
+
+async def _hand_over(chunks: queue.Queue, item, writer: asyncio.Future):
+    """
+    Queue item for the writer task; waits while the queue is full and
+    surfaces the writer's error if it stopped (size limit, bad body).
+    """
+    while True:
+        if writer.done():
+            writer.result()
+            raise RuntimeError("upload writer stopped early")
+        try:
+            chunks.put_nowait(item)
+            return
+        except queue.Full:
+            await asyncio.wait({writer}, timeout=0.005)
+
+
+class StreamedUpload:
+    """
+    A received upload waiting in the blob store's temp dir: its form fields,
+    client filename, size and hash. save() moves it into the blob store and
+    links it to its destination; unsaved uploads are dropped on exit.
+    """
+
+    def __init__(self, received: dict, kind: str):
+        self.kind = kind
+        self.fields: Dict[str, str] = received["fields"]
+        self.filename: Optional[str] = received["filename"]
+        self.size: int = received["size"]
+        self.sha256: str = received["sha256"]
+        self._tmp_path: Optional[Path] = received["tmp_path"]
+
+    def field(self, name: str) -> str:
+        value = self.fields.get(name)
+        if not value:
+            raise HTTPException(status_code=422, detail=f"form field {name!r} is required")
+        return value
+
+    async def save(self, dest: Path) -> dict:
+        """
+        Returns {"path", "sha256", "size", "deduplicated"}.
+        """
+        dest = Path(dest)
+        tmp_path, self._tmp_path = self._tmp_path, None
+        try:
+            deduplicated = await run_in_pool("io", _finalize, tmp_path, self.sha256, dest.suffix, dest)
+        except BaseException:
+            _unlink_quietly(tmp_path)
+            raise
+        return {"path": str(dest), "sha256": self.sha256, "size": self.size, "deduplicated": deduplicated}
+
+    def discard(self):
+        if self._tmp_path is not None:
+            _unlink_quietly(self._tmp_path)
+            self._tmp_path = None
+
+
+@timed("save_upload")
+async def receive_upload(request: Request, kind: str, file_field: str = "file") -> StreamedUpload:
+    """
+    Stream a multipart/form-data request body into the blob store's temp dir.
+    Raises HTTPException(413) once the per-kind size limit is exceeded.
+    """
+    limit = max_upload_bytes(kind)
+    content_type, options = parse_options_header(request.headers.get("content-type", ""))
+    boundary = options.get(b"boundary")
+    if content_type != b"multipart/form-data" or not boundary:
+        raise HTTPException(status_code=415, detail="expected a multipart/form-data upload")
+    chunk_size = max(4096, config.UPLOAD_CHUNK_KB * 1024)
+
+    chunks: queue.Queue = queue.Queue(maxsize=_QUEUE_CHUNKS)
+    writer = asyncio.ensure_future(
+        run_in_pool("upload", _receive_multipart, chunks, boundary, limit, kind, file_field)
+    )
+    received = 0
+    pending = bytearray()
+    try:
+        async for chunk in request.stream():
+            received += len(chunk)
+            # chunked bodies carry no Content-Length for the middleware to check
+            if received > limit + _FORM_OVERHEAD:
+                raise HTTPException(status_code=413, detail=f"{kind} upload exceeds {limit} bytes")
+            pending += chunk
+            if len(pending) >= chunk_size:
+                await _hand_over(chunks, bytes(pending), writer)
+                pending.clear()
+        if pending:
+            await _hand_over(chunks, bytes(pending), writer)
+        await _hand_over(chunks, None, writer)
+        return StreamedUpload(await writer, kind)
+    except BaseException:
+        if not writer.done():
+            # unblock the writer (it may be waiting on a full or an empty queue) and let it clean up
+            while True:
+                try:
+                    chunks.get_nowait()
+                except queue.Empty:
+                    break
+            chunks.put_nowait(_ABORT)
+        await asyncio.gather(writer, return_exceptions=True)
+        raise
+
+
+@asynccontextmanager
+async def streamed_upload(request: Request, kind: str, file_field: str = "file"):
+    """
+    async with streamed_upload(request, "audio") as upload:
+        ... validate upload.fields ...
+        saved = await upload.save(dest)
+
+    The temp file is removed if the block exits without saving it.
+    """
+    upload = await receive_upload(request, kind, file_field)
+    try:
+        yield upload
+    finally:
+        upload.discard()
+
+
+def upload_openapi(*form_fields: str, file_field: str = "file") -> dict:
+    """
+    openapi_extra for routes that read their multipart body themselves.
+    """
+    properties = {file_field: {"type": "string", "format": "binary"}}
+    properties.update({name: {"type": "string"} for name in form_fields})
+    return {"requestBody": {"required": True, "content": {"multipart/form-data": {"schema": {
+        "type": "object", "required": [file_field, *form_fields], "properties": properties,
+    }}}}}
+
+
+class UploadLimitMiddleware:
+    """
+    Reject uploads whose declared Content-Length is over the limit for
+    their route before any of the body is read.
+    """
+
+    def __init__(self, app, routes: dict):
+        # {"/api/upload/resume": "resume", ...}
+        self.app = app
+        self.routes = routes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope.get("method") == "POST":
+            kind = self.routes.get(scope.get("path", "").rstrip("/"))
+            if kind is not None:
+                length = dict(scope.get("headers") or []).get(b"content-length")
+                if length is not None and length.isdigit() and int(length) > max_upload_bytes(kind) + _FORM_OVERHEAD:
+                    response = JSONResponse(
+                        status_code=413,
+                        content={"detail": f"{kind} upload exceeds {max_upload_bytes(kind)} bytes"},
+                    )
+                    await response(scope, receive, send)
+                    return
+        await self.app(scope, receive, send)
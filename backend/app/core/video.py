@@ -0,0 +1,438 @@
+"""
+Video answer analysis: non-verbal signals from sampled frames.
+
+The recording is decoded as a stream with OpenCV, one frame in memory at a
+time. Running landmark models on every frame of a 5-minute 30 fps answer
+(9000 frames) is far too slow, so frames are sampled adaptively:
+
+  * probe: VIDEO_PROBE_FPS frames per second are decoded and shrunk to a
+    64x36 grayscale thumbnail; the others are only grabbed (demuxed,
+    never converted)
+  * base:  one frame every 1 / VIDEO_BASE_FPS seconds is always analyzed
+  * extra: a probed frame is also analyzed when more than
+    VIDEO_MOTION_THRESHOLD of its thumbnail changed since the previous probe
+    (motion) or its histogram moved by more than VIDEO_SCENE_THRESHOLD
+    (cut / camera change)
+
+Sampled frames go to the analyzer in batches of VIDEO_BATCH_SIZE on a
+small thread pool (one analyzer per thread), so decoding and landmark
+inference overlap. Analyzers (VIDEO_ANALYZER):
+
+  * mediapipe - face mesh (face presence, head orientation as a gaze
+                proxy) and pose (shoulder tilt, centering); the legacy
+                solutions API when installed, otherwise the Tasks API with
+                VIDEO_FACE_MODEL / VIDEO_POSE_MODEL model files
+  * opencv    - the Haar face cascade shipped with OpenCV: face presence
+                and frontal-face gaze proxy, no posture; needs no downloads
+  * stub      - no model: motion statistics only (tests, load runs)
+
+Only aggregate, non-identifying features are kept. Ratios are weighted by
+the stretch of video each sample stands for, so the extra samples taken
+during motion do not skew them.
+"""
+
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from backend.app.core import config
+from backend.app.core.metrics import timed
+
+_THUMB = (64, 36)
+# grey levels a thumbnail pixel must change by to count as moving
+_PIXEL_DELTA = 24
+
+
+# =========================
+# Analyzers
+# =========================
+
+def _angle_deg(a, b) -> float:
+    return float(np.degrees(np.arctan2(b[1] - a[1], b[0] - a[0])))
+
+
+def face_features(landmarks: List[tuple]) -> dict:
+    """
+    Head-orientation proxies from face mesh landmarks (normalized x, y):
+    yaw = nose offset from the eye midpoint in eye-distance units,
+    pitch = nose height between the eyes and the mouth (about 0.55 when level).
+    """
+    nose, left_eye, right_eye, mouth = landmarks[1], landmarks[33], landmarks[263], landmarks[13]
+    eye_mid = ((left_eye[0] + right_eye[0]) / 2.0, (left_eye[1] + right_eye[1]) / 2.0)
+    eye_dist = max(1e-6, abs(right_eye[0] - left_eye[0]))
+    yaw = (nose[0] - eye_mid[0]) / eye_dist
+    span = max(1e-6, mouth[1] - eye_mid[1])
+    pitch = (nose[1] - eye_mid[1]) / span - 0.55
+    return {
+        "yaw": round(float(yaw), 4),
+        "pitch": round(float(pitch), 4),
+        "gaze_on_camera": bool(abs(yaw) < 0.15 and abs(pitch) < 0.15),
+    }
+
+
+def pose_features(landmarks: List[tuple], min_visibility: float = 0.5) -> dict:
+    """
+    Posture from pose landmarks (x, y, visibility): shoulder tilt and whether
+    the shoulders are centered in the frame.
+    """
+    left, right = landmarks[11], landmarks[12]
+    if min(left[2], right[2]) < min_visibility:
+        return {"posture_visible": False}
+    tilt = _angle_deg(right, left)
+    # the angle of a level line is 0 or +-180 depending on which shoulder is first
+    tilt = tilt - 180.0 if tilt > 90.0 else tilt + 180.0 if tilt < -90.0 else tilt
+    center = (left[0] + right[0]) / 2.0
+    return {
+        "posture_visible": True,
+        "shoulder_tilt_deg": round(abs(float(tilt)), 3),
+        "centered": bool(abs(center - 0.5) < 0.15),
+    }
+
+
+class FrameAnalyzer:
+    name = "base"
+
+    def analyze(self, frames: List[np.ndarray]) -> List[dict]:
+        """
+        frames: RGB uint8 arrays. Returns one feature dict per frame.
+        """
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class StubAnalyzer(FrameAnalyzer):
+    name = "stub"
+
+    def analyze(self, frames):
+        return [{} for _ in frames]
+
+
+class OpenCVFaceAnalyzer(FrameAnalyzer):
+    name = "opencv"
+
+    def __init__(self):
+        import cv2
+        self._cv2 = cv2
+        path = getattr(cv2, "data", None) and cv2.data.haarcascades + "haarcascade_frontalface_default.xml"
+        self.cascade = cv2.CascadeClassifier(path) if path else None
+        if self.cascade is None or self.cascade.empty():
+            # some wheels (opencv 5 headless) no longer bundle the cascades
+            raise RuntimeError("OpenCV face cascade not found in this build; install opencv-python-headless<5 or use VIDEO_ANALYZER=mediapipe")
+
+    def analyze(self, frames):
+        cv2 = self._cv2
+        out = []
+        for frame in frames:
+            gray = cv2.equalizeHist(cv2.cvtColor(frame, cv2.COLOR_RGB2GRAY))
+            min_side = max(24, min(gray.shape) // 8)
+            faces = self.cascade.detectMultiScale(gray, scaleFactor=1.2, minNeighbors=5, minSize=(min_side, min_side))
+            # the frontal cascade only fires on roughly frontal faces: use that as the gaze proxy
+            out.append({"faces": int(len(faces)), "gaze_on_camera": bool(len(faces))})
+        return out
+
+
+class MediaPipeAnalyzer(FrameAnalyzer):
+    name = "mediapipe"
+
+    def __init__(self):
+        import mediapipe as mp
+        self._mp = mp
+        self._legacy = hasattr(mp, "solutions")
+        if self._legacy:
+            self.face = mp.solutions.face_mesh.FaceMesh(static_image_mode=True, max_num_faces=2)
+            self.pose = mp.solutions.pose.Pose(static_image_mode=True, model_complexity=0)
+            return
+        if not (config.VIDEO_FACE_MODEL and config.VIDEO_POSE_MODEL):
+            raise RuntimeError(
+                "mediapipe without the solutions API needs VIDEO_FACE_MODEL and VIDEO_POSE_MODEL "
+                "(face_landmarker.task / pose_landmarker_lite.task); or set VIDEO_ANALYZER=opencv"
+            )
+        vision = mp.tasks.vision
+        self.face = vision.FaceLandmarker.create_from_options(vision.FaceLandmarkerOptions(
+            base_options=mp.tasks.BaseOptions(model_asset_path=config.VIDEO_FACE_MODEL),
+            running_mode=vision.RunningMode.IMAGE, num_faces=2,
+        ))
+        self.pose = vision.PoseLandmarker.create_from_options(vision.PoseLandmarkerOptions(
+            base_options=mp.tasks.BaseOptions(model_asset_path=config.VIDEO_POSE_MODEL),
+            running_mode=vision.RunningMode.IMAGE,
+        ))
+
+    def _landmarks(self, frame):
+        if self._legacy:
+            face = self.face.process(frame).multi_face_landmarks or []
+            pose = self.pose.process(frame).pose_landmarks
+            faces = [[(p.x, p.y) for p in f.landmark] for f in face]
+            body = [(p.x, p.y, p.visibility) for p in pose.landmark] if pose is not None else None
+            return faces, body
+        image = self._mp.Image(image_format=self._mp.ImageFormat.SRGB, data=np.ascontiguousarray(frame))
+        faces = [[(p.x, p.y) for p in f] for f in self.face.detect(image).face_landmarks]
+        poses = self.pose.detect(image).pose_landmarks
+        body = [(p.x, p.y, p.visibility if p.visibility is not None else 1.0) for p in poses[0]] if poses else None
+        return faces, body
+
+    def analyze(self, frames):
+        out = []
+        for frame in frames:
+            faces, body = self._landmarks(frame)
+            features = {"faces": len(faces)}
+            if faces:
+                features.update(face_features(faces[0]))
+            if body is not None:
+                features.update(pose_features(body))
+            else:
+                features["posture_visible"] = False
+            out.append(features)
+        return out
+
+    def close(self):
+        self.face.close()
+        self.pose.close()
+
+
+_ANALYZERS = {
+    "mediapipe": MediaPipeAnalyzer,
+    "opencv": OpenCVFaceAnalyzer,
+    "stub": StubAnalyzer,
+}
+
+_local = threading.local()
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _thread_analyzer() -> FrameAnalyzer:
+    # landmark graphs are not thread-safe: one analyzer per frame worker
+    analyzer = getattr(_local, "analyzer", None)
+    if analyzer is None:
+        factory = _ANALYZERS.get(config.VIDEO_ANALYZER)
+        if factory is None:
+            raise RuntimeError(f"Unknown VIDEO_ANALYZER {config.VIDEO_ANALYZER!r}; expected one of {sorted(_ANALYZERS)}")
+        analyzer = _local.analyzer = factory()
+    return analyzer
+
+
+def _analyze_batch(frames: List[np.ndarray]) -> List[dict]:
+    with timed("video_analyze", model=config.VIDEO_ANALYZER):
+        return _thread_analyzer().analyze(frames)
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=max(1, config.VIDEO_FRAME_WORKERS), thread_name_prefix="video-frames")
+    return _executor
+
+
+def shutdown_video_pool():
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False)
+            _executor = None
+
+
+# =========================
+# Adaptive sampling
+# =========================
+
+class AdaptiveSampler:
+    """
+    Decides, per probed thumbnail, whether the full frame is analyzed.
+    """
+
+    def __init__(self, base_fps: float, motion_threshold: float, scene_threshold: float):
+        self.base_interval = 1.0 / base_fps if base_fps > 0 else float("inf")
+        self.motion_threshold = motion_threshold
+        self.scene_threshold = scene_threshold
+        self._prev = None
+        self._prev_hist = None
+        self._last_sample_t = None
+        self.motion: List[float] = []
+
+    def decide(self, t: float, thumb: np.ndarray, hist: np.ndarray, scene_distance) -> Optional[str]:
+        # share of the thumbnail that changed visibly since the last probe
+        motion = 0.0 if self._prev is None else float(np.mean(np.abs(thumb - self._prev) > _PIXEL_DELTA))
+        scene = 0.0 if self._prev_hist is None else float(scene_distance(self._prev_hist, hist))
+        self.motion.append(motion)
+        self._prev, self._prev_hist = thumb, hist
+
+        reason = None
+        if self._last_sample_t is None or t - self._last_sample_t >= self.base_interval - 1e-6:
+            reason = "base"
+        elif scene > self.scene_threshold:
+            reason = "scene"
+        elif motion > self.motion_threshold:
+            reason = "motion"
+        if reason is not None:
+            self._last_sample_t = t
+        return reason
+
+
+def _resize_max_side(cv2, frame: np.ndarray, max_side: int) -> np.ndarray:
+    h, w = frame.shape[:2]
+    scale = max_side / float(max(h, w))
+    if scale < 1.0:
+        frame = cv2.resize(frame, (int(w * scale), int(h * scale)), interpolation=cv2.INTER_AREA)
+    return frame
+
+
+# =========================
+# Summary
+# =========================
+
+def _weighted_ratio(values: List[Optional[bool]], weights: List[float]) -> Optional[float]:
+    pairs = [(bool(v), w) for v, w in zip(values, weights) if v is not None]
+    total = sum(w for _, w in pairs)
+    return round(sum(w for v, w in pairs if v) / total, 4) if total > 0 else None
+
+
+def _mean_abs(values: List[Optional[float]]) -> Optional[float]:
+    vals = [abs(v) for v in values if v is not None]
+    return round(float(np.mean(vals)), 4) if vals else None
+
+
+def summarize_features(times: List[float], features: List[dict], duration_s: float, motion: List[float]) -> dict:
+    """
+    Time-weighted per-answer summary of the per-frame features.
+    """
+    ends = times[1:] + [max(duration_s, times[-1] if times else 0.0)]
+    weights = [max(1e-3, e - t) for t, e in zip(times, ends)]
+    faces = [f.get("faces") for f in features]
+    has_face = [None if n is None else n > 0 for n in faces]
+    tilts = [f.get("shoulder_tilt_deg") for f in features]
+    motion_arr = np.asarray(motion or [0.0], dtype=np.float32)
+    return {
+        "face_presence_ratio": _weighted_ratio(has_face, weights),
+        "multiple_faces_ratio": _weighted_ratio([None if n is None else n > 1 for n in faces], weights),
+        # only frames with a face say anything about where it looks
+        "gaze_on_camera_ratio": _weighted_ratio(
+            [f.get("gaze_on_camera") if p else None for f, p in zip(features, has_face)], weights
+        ),
+        "head_yaw_mean_abs": _mean_abs([f.get("yaw") for f in features]),
+        "head_pitch_mean_abs": _mean_abs([f.get("pitch") for f in features]),
+        "posture": {
+            "visible_ratio": _weighted_ratio([f.get("posture_visible") for f in features], weights),
+            "shoulder_tilt_deg_mean": _mean_abs(tilts),
+            "shoulder_tilt_deg_max": round(max(t for t in tilts if t is not None), 3) if any(t is not None for t in tilts) else None,
+            "centered_ratio": _weighted_ratio([f.get("centered") for f in features], weights),
+        },
+        "movement": {
+            "mean": round(float(motion_arr.mean()), 5),
+            "p95": round(float(np.percentile(motion_arr, 95)), 5),
+            "high_motion_ratio": round(float((motion_arr > config.VIDEO_MOTION_THRESHOLD).mean()), 4),
+        },
+    }
+
+
+# =========================
+# Pipeline
+# =========================
+
+def analyze_video(path: Path) -> dict:
+    """
+    Stream-decode a video, sample frames adaptively, run the analyzer over
+    them on the frame workers and return the per-answer feature summary
+    with sampling counts and throughput (blocking; call from a pool).
+    """
+    import cv2
+
+    t0 = time.perf_counter()
+    cap = cv2.VideoCapture(str(path))
+    if not cap.isOpened():
+        raise ValueError(f"could not open video {Path(path).name}")
+    fps = float(cap.get(cv2.CAP_PROP_FPS) or 0.0)
+    if not 1.0 <= fps <= 240.0:
+        fps = 30.0
+    probe_every = max(1, int(round(fps / max(config.VIDEO_PROBE_FPS, config.VIDEO_BASE_FPS, 1e-3))))
+    sampler = AdaptiveSampler(config.VIDEO_BASE_FPS, config.VIDEO_MOTION_THRESHOLD, config.VIDEO_SCENE_THRESHOLD)
+    scene_distance = lambda a, b: cv2.compareHist(a, b, cv2.HISTCMP_BHATTACHARYYA)
+
+    executor = _get_executor()
+    max_in_flight = 2 * max(1, config.VIDEO_FRAME_WORKERS)
+    batch: List[np.ndarray] = []
+    pending: List[Future] = []
+    results: List[dict] = []
+    times: List[float] = []
+    reasons: Dict[str, int] = {"base": 0, "motion": 0, "scene": 0}
+    frames_total = probed = 0
+    truncated = False
+
+    def flush():
+        nonlocal batch
+        if batch:
+            pending.append(executor.submit(_analyze_batch, batch))
+            batch = []
+        # bounded look-ahead: decoding never runs far ahead of the analyzers
+        while len(pending) > max_in_flight:
+            results.extend(pending.pop(0).result())
+
+    try:
+        with timed("video_decode"):
+            index = 0
+            while True:
+                if index % probe_every:
+                    if not cap.grab():
+                        break
+                    index += 1
+                    frames_total += 1
+                    continue
+                ok, frame = cap.read()
+                if not ok:
+                    break
+                t = index / fps
+                index += 1
+                frames_total += 1
+                probed += 1
+
+                gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+                thumb = cv2.resize(gray, _THUMB, interpolation=cv2.INTER_AREA).astype(np.float32)
+                hist = cv2.calcHist([gray], [0], None, [32], [0, 256])
+                cv2.normalize(hist, hist)
+                reason = sampler.decide(t, thumb, hist, scene_distance)
+                if reason is None or truncated:
+                    continue
+                if len(times) >= config.VIDEO_MAX_FRAMES:
+                    truncated = True
+                    continue
+                reasons[reason] += 1
+                times.append(t)
+                rgb = cv2.cvtColor(_resize_max_side(cv2, frame, config.VIDEO_MAX_SIDE), cv2.COLOR_BGR2RGB)
+                batch.append(rgb)
+                if len(batch) >= config.VIDEO_BATCH_SIZE:
+                    flush()
+            flush()
+        decode_s = time.perf_counter() - t0
+        for fut in pending:
+            results.extend(fut.result())
+    finally:
+        cap.release()
+
+    wall_s = time.perf_counter() - t0
+    duration_s = frames_total / fps
+    summary = {
+        "analyzer": config.VIDEO_ANALYZER,
+        "duration_s": round(duration_s, 3),
+        "fps": round(fps, 3),
+        "frames_total": frames_total,
+        "frames_probed": probed,
+        "frames_processed": len(results),
+        "sampled_by": reasons,
+        "truncated": truncated,
+        **summarize_features(times, results, duration_s, sampler.motion),
+        "timing": {
+            "wall_s": round(wall_s, 3),
+            "decode_s": round(decode_s, 3),
+            "frames_processed_per_s": round(len(results) / wall_s, 2) if wall_s > 0 else None,
+            "frames_decoded_per_s": round(frames_total / decode_s, 1) if decode_s > 0 else None,
+            "realtime_factor": round(wall_s / duration_s, 4) if duration_s else None,
+        },
+    }
+    return summary
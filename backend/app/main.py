@@ -1,18 +1,78 @@
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from backend.app.api.routes.health import router as health_router
-from backend.app.api.routes.session import router as session_router
-from backend.app.api.routes.upload import router as upload_router
-from backend.app.api.routes.answer import router as answer_router
-from backend.app.api.routes.parse_resume import router as parse_router
-from backend.app.api.routes.interview_plan import router as plan_router
-from backend.app.api.routes.score_text import router as score_router
-from backend.app.api.routes.answer_audio import router as answer_audio_router
+from backend.app.core import config
+from backend.app.core.metrics import MetricsMiddleware
+from backend.app.core.startup import start_prewarm, timed_import
+from backend.app.core.uploads import UploadLimitMiddleware
+
+# route modules import only light dependencies; heavy libraries load inside
+# handlers or during prewarm (see GET /api/health/startup for the profile)
+ROUTERS = (
+    "health",
+    "session",
+    "upload",
+    "answer",
+    "parse_resume",
+    "interview_plan",
+    "score_text",
+    "score_batch",
+    "answer_audio",
+    "answer_video",
+    "answer_index",
+    "pipeline",
+    "storage",
+    "metrics",
+)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Preload models (skills taxonomy, sentence model, explainability IDF, ASR).
+    STARTUP_MODE=blocking finishes this before serving; STARTUP_MODE=background
+    serves at once and warms up in a thread, with /api/health/ready
+    reporting 503 until the required models are loaded. A failed load is
+    logged and left to the lazy loaders instead of preventing startup.
+    """
+    from backend.app.core import asr
+    from backend.app.core.doc_extract import shutdown_extract_pool
+    from backend.app.core.inference_pool import shutdown_pools
+    from backend.app.core.jobs import start_job_workers, stop_job_workers
+    from backend.app.core.pipeline import HANDLERS
+    from backend.app.core.storage_lifecycle import start_lifecycle, stop_lifecycle
+    from backend.app.core.video import shutdown_video_pool
+
+    if config.STARTUP_MODE == "background":
+        start_prewarm(background=True)
+    else:
+        await asyncio.to_thread(start_prewarm, False)
+
+    # pipeline job workers (JOB_WORKERS=0: this process only submits)
+    await asyncio.to_thread(start_job_workers, HANDLERS)
+
+    # retention / compaction passes (one process at a time across workers)
+    start_lifecycle()
+
+    yield
+
+    stop_lifecycle()
+    stop_job_workers()
+
+    if config.ANSWER_INDEX:
+        from backend.app.core.answer_index import get_answer_index
+        get_answer_index().flush()
+    asr.stop_asr_process_pool()
+    shutdown_extract_pool()
+    shutdown_video_pool()
+    shutdown_pools()
 
 app = FastAPI(
     title="Multimodal AI Interview Simulator",
-    version="0.1.0"
+    version="0.1.0",
+    lifespan=lifespan
 )
 
 # CORS (Frontend will connect later)
@@ -24,15 +84,22 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# reject oversized uploads from Content-Length before reading the body
+app.add_middleware(
+    UploadLimitMiddleware,
+    routes={
+        "/api/upload/resume": "resume",
+        "/api/answer/audio": "audio",
+        "/api/answer/video": "video",
+    },
+)
+
+# per-route / per-stage latency, Server-Timing and the X-Profile hook
+app.add_middleware(MetricsMiddleware)
+
 # Routes
-app.include_router(health_router, prefix="/api")
-app.include_router(session_router, prefix="/api")
-app.include_router(upload_router, prefix="/api")
-app.include_router(answer_router, prefix="/api")
-app.include_router(parse_router, prefix="/api")
-app.include_router(plan_router, prefix="/api")
-app.include_router(score_router, prefix="/api")
-app.include_router(answer_audio_router, prefix="/api")
+for _name in ROUTERS:
+    app.include_router(timed_import(f"backend.app.api.routes.{_name}").router, prefix="/api")
 
 @app.get("/")
 def root():
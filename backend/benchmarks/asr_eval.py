@@ -0,0 +1,374 @@
+"""
+Offline ASR speed / accuracy evaluation.
+
+    python -m backend.benchmarks.asr_eval run --dataset data/asr_eval --out asr_results.json
+    python -m backend.benchmarks.asr_eval run --dataset data/asr_eval --profiles whisper-small whisper-base-int8
+    python -m backend.benchmarks.asr_eval run --dataset data/asr_eval --matrix asr_matrix.json
+    python -m backend.benchmarks.asr_eval select asr_results.json --max-wer 0.15
+
+The dataset is a local directory in one of three layouts:
+
+  * manifest.jsonl   - one {"audio": "<path relative to the dir>", "text": "..."} per line
+  * audio + .txt     - clip.wav next to clip.txt (any format decode_audio reads)
+  * datasets on disk - a Hugging Face `datasets` dataset written with
+                       save_to_disk (--audio-column / --text-column)
+
+Each configuration is an ASR profile (backend/app/core/asr.py ASR_PROFILES,
+or a --matrix JSON file in the ASR_PROFILES_FILE format). Each profile is
+evaluated in its own spawned process, so load time and peak memory belong
+to that model alone. The clips go through the production path:
+
+  * decode to 16 kHz mono
+  * VAD segmentation (unless --no-vad)
+  * batched ASR with the profile's batch size and decoding settings
+
+Per configuration the report gives:
+
+  * WER and CER (jiwer, on lower-cased text with punctuation removed)
+  * real-time factor, as processing time over audio duration, end to end
+    and ASR only
+  * per-clip latency p50 / p95
+  * model load time
+  * peak RSS, and the RSS the model added
+
+`select` picks the fastest configuration (lowest RTF) whose WER is within
+--max-wer, and prints the ASR_PROFILE setting to serve it with.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import queue as queue_module
+import re
+import resource
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+
+AUDIO_SUFFIXES = (".wav", ".flac", ".mp3", ".ogg", ".m4a", ".webm")
+_PUNCT = re.compile(r"[^\w\s']")
+
+
+# =========================
+# Dataset
+# =========================
+
+def normalize_text(text: str) -> str:
+    text = _PUNCT.sub(" ", (text or "").lower())
+    return " ".join(text.split())
+
+
+def _rss_mb() -> float:
+    with open("/proc/self/status", encoding="ascii") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024.0
+    return 0.0
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is in kB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+def _export_hf_dataset(path: Path, audio_column: str, text_column: str, workdir: Path, limit: int) -> List[dict]:
+    from datasets import load_from_disk
+
+    from backend.app.core.audio_preproc import _resample
+    from backend.benchmarks.synthetic import wav_bytes
+
+    ds = load_from_disk(str(path))
+    if hasattr(ds, "keys") and not hasattr(ds, "column_names"):
+        # a DatasetDict: evaluate its first split
+        ds = ds[sorted(ds.keys())[0]]
+    items = []
+    for i, row in enumerate(ds):
+        if limit and i >= limit:
+            break
+        audio = row[audio_column]
+        samples = _resample(np.asarray(audio["array"], dtype=np.float32), int(audio["sampling_rate"]))
+        clip = workdir / f"{i:05d}.wav"
+        clip.write_bytes(wav_bytes(samples))
+        items.append({"id": str(i), "audio": str(clip), "text": row[text_column]})
+    return items
+
+
+def load_dataset_dir(path: Path, workdir: Path, audio_column: str = "audio", text_column: str = "text",
+                     limit: int = 0) -> List[dict]:
+    """
+    [{"id", "audio" (file path), "text"}] from one of the supported layouts.
+    """
+    path = Path(path)
+    manifest = path / "manifest.jsonl"
+    if manifest.exists():
+        items = []
+        for line in manifest.read_text(encoding="utf-8").splitlines():
+            if line.strip():
+                row = json.loads(line)
+                items.append({"id": row.get("id") or Path(row["audio"]).stem,
+                              "audio": str(path / row["audio"]), "text": row["text"]})
+    elif (path / "dataset_info.json").exists() or (path / "dataset_dict.json").exists():
+        return _export_hf_dataset(path, audio_column, text_column, workdir, limit)
+    else:
+        items = [
+            {"id": f.stem, "audio": str(f), "text": f.with_suffix(".txt").read_text(encoding="utf-8").strip()}
+            for f in sorted(path.iterdir())
+            if f.suffix.lower() in AUDIO_SUFFIXES and f.with_suffix(".txt").exists()
+        ]
+    if not items:
+        raise SystemExit(f"no audio / transcript pairs found in {path}")
+    return items[:limit] if limit else items
+
+
+# =========================
+# One configuration (runs in its own process)
+# =========================
+
+def evaluate_profile(profile: dict, items: List[dict], vad: bool, warmup: bool) -> dict:
+    """
+    Load one profile and transcribe every clip through the production
+    preprocessing; returns hypotheses plus timing and memory.
+    """
+    os.environ["AUDIO_VAD"] = "1" if vad else "0"
+    from backend.app.core.asr import _run_batch, build_asr_pipeline
+    from backend.app.core.audio_preproc import preprocess_audio
+
+    rss_before = _rss_mb()
+    t0 = time.perf_counter()
+    asr = build_asr_pipeline(profile)
+    load_s = time.perf_counter() - t0
+    rss_loaded = _rss_mb()
+
+    if warmup and items:
+        # first call pays for lazy initialisation (kernels, tokenizer caches)
+        prep = preprocess_audio(Path(items[0]["audio"]))
+        _run_batch(asr, [{"raw": s, "sampling_rate": prep.sample_rate} for s in prep.segments[:1]], profile)
+
+    clips = []
+    for item in items:
+        t1 = time.perf_counter()
+        prep = preprocess_audio(Path(item["audio"]))
+        t2 = time.perf_counter()
+        texts = _run_batch(asr, [{"raw": s, "sampling_rate": prep.sample_rate} for s in prep.segments], profile)
+        t3 = time.perf_counter()
+        clips.append({
+            "id": item["id"],
+            "hypothesis": " ".join(t for t in texts if t).strip(),
+            "duration_s": prep.duration_s,
+            "total_s": t3 - t1,
+            "asr_s": t3 - t2,
+        })
+    return {
+        "load_s": load_s,
+        "rss_before_mb": rss_before,
+        "rss_loaded_mb": rss_loaded,
+        "peak_rss_mb": _peak_rss_mb(),
+        "clips": clips,
+    }
+
+
+def _child(profile: dict, items: List[dict], vad: bool, warmup: bool, queue):
+    try:
+        queue.put({"ok": True, **evaluate_profile(profile, items, vad, warmup)})
+    except BaseException as e:
+        queue.put({"ok": False, "error": f"{type(e).__name__}: {e}"})
+
+
+def run_isolated(profile: dict, items: List[dict], vad: bool, warmup: bool, timeout_s: float) -> dict:
+    ctx = multiprocessing.get_context("spawn")
+    queue = ctx.Queue()
+    proc = ctx.Process(target=_child, args=(profile, items, vad, warmup, queue), daemon=True)
+    proc.start()
+    deadline = time.monotonic() + timeout_s
+    while True:
+        try:
+            result = queue.get(timeout=1.0)
+            break
+        except queue_module.Empty:
+            # a crashed child (e.g. killed for memory) never reports back
+            if not proc.is_alive():
+                result = {"ok": False, "error": f"evaluation process exited with code {proc.exitcode}"}
+                break
+            if time.monotonic() > deadline:
+                proc.kill()
+                result = {"ok": False, "error": f"timed out after {timeout_s:.0f} s"}
+                break
+    proc.join(10)
+    return result
+
+
+# =========================
+# Scoring
+# =========================
+
+def score_result(name: str, profile: dict, items: List[dict], raw: dict) -> dict:
+    entry = {"name": name, "profile": profile}
+    if not raw["ok"]:
+        entry.update({"ok": False, "error": raw["error"]})
+        return entry
+
+    import jiwer
+
+    refs = [normalize_text(item["text"]) for item in items]
+    hyps = [normalize_text(clip["hypothesis"]) for clip in raw["clips"]]
+    # jiwer rejects empty references; a silent clip with no hypothesis is simply correct
+    pairs = [(r, h) for r, h in zip(refs, hyps) if r]
+    audio_s = sum(c["duration_s"] for c in raw["clips"])
+    total_s = sum(c["total_s"] for c in raw["clips"])
+    asr_s = sum(c["asr_s"] for c in raw["clips"])
+    latencies = np.asarray([c["total_s"] for c in raw["clips"]]) * 1000.0
+    entry.update({
+        "ok": True,
+        "clips": len(raw["clips"]),
+        "audio_s": round(audio_s, 3),
+        "wer": round(float(jiwer.wer([r for r, _ in pairs], [h for _, h in pairs])), 4) if pairs else None,
+        "cer": round(float(jiwer.cer([r for r, _ in pairs], [h for _, h in pairs])), 4) if pairs else None,
+        "rtf": round(total_s / audio_s, 4) if audio_s else None,
+        "asr_rtf": round(asr_s / audio_s, 4) if audio_s else None,
+        "p50_ms": round(float(np.percentile(latencies, 50)), 1) if latencies.size else None,
+        "p95_ms": round(float(np.percentile(latencies, 95)), 1) if latencies.size else None,
+        "load_s": round(raw["load_s"], 3),
+        "peak_rss_mb": round(raw["peak_rss_mb"], 1),
+        "model_rss_mb": round(raw["rss_loaded_mb"] - raw["rss_before_mb"], 1),
+        "errors": [
+            {"id": c["id"], "reference": item["text"], "hypothesis": c["hypothesis"]}
+            for item, c in zip(items, raw["clips"])
+            if normalize_text(item["text"]) != normalize_text(c["hypothesis"])
+        ][:20],
+    })
+    return entry
+
+
+def print_table(results: List[dict]):
+    header = f"{'profile':<24} {'WER':>7} {'CER':>7} {'RTF':>7} {'ASR RTF':>8} {'p95 ms':>9} {'load s':>7} {'peak MB':>8}"
+    print(header)
+    print("-" * len(header))
+
+    def fmt(value, spec):
+        return format(value, spec) if value is not None else "-"
+
+    for r in results:
+        if not r["ok"]:
+            print(f"{r['name']:<24} failed: {r['error']}")
+            continue
+        print(
+            f"{r['name']:<24} {fmt(r['wer'], '>7.3f')} {fmt(r['cer'], '>7.3f')} {fmt(r['rtf'], '>7.3f')} "
+            f"{fmt(r['asr_rtf'], '>8.3f')} {fmt(r['p95_ms'], '>9.1f')} {r['load_s']:>7.2f} {r['peak_rss_mb']:>8.1f}"
+        )
+
+
+def select(results: List[dict], max_wer: float, max_rtf: Optional[float] = None, by: str = "rtf") -> Optional[dict]:
+    """
+    The best configuration (lowest `by`) among those within the WER / RTF limits.
+    """
+    eligible = [
+        r for r in results
+        if r.get("ok") and r.get("wer") is not None and r["wer"] <= max_wer
+        and (max_rtf is None or (r.get("rtf") is not None and r["rtf"] <= max_rtf))
+    ]
+    if not eligible:
+        return None
+    return min(eligible, key=lambda r: (r.get(by) if r.get(by) is not None else float("inf"), r["wer"]))
+
+
+# =========================
+# CLI
+# =========================
+
+def run(args) -> dict:
+    from backend.app.core.asr import load_profiles, resolve_profile
+
+    profiles = load_profiles(args.matrix or "")
+    if args.profiles:
+        names = args.profiles
+    elif args.matrix:
+        data = json.loads(Path(args.matrix).read_text(encoding="utf-8"))
+        names = list(data) if isinstance(data, dict) else [p["name"] for p in data]
+    else:
+        names = [n for n in profiles if n != "stub"]
+    unknown = [n for n in names if n not in profiles]
+    if unknown:
+        raise SystemExit(f"unknown profiles {unknown}; known: {sorted(profiles)}")
+
+    with tempfile.TemporaryDirectory(prefix="asr_eval_") as tmp:
+        items = load_dataset_dir(Path(args.dataset), Path(tmp), args.audio_column, args.text_column, args.limit)
+        print(f"{len(items)} clips from {args.dataset}")
+        results = []
+        for name in names:
+            profile = resolve_profile(name, profiles)
+            print(f"→ {name} ({profile['model']})", flush=True)
+            raw = run_isolated(profile, items, vad=not args.no_vad, warmup=not args.no_warmup, timeout_s=args.timeout)
+            results.append(score_result(name, profile, items, raw))
+
+    from backend.benchmarks.suite import _git_commit
+    report = {
+        "dataset": str(args.dataset),
+        "clips": len(items),
+        "matrix": str(Path(args.matrix).resolve()) if args.matrix else None,
+        "vad": not args.no_vad,
+        "environment": {
+            "git_commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        },
+        "results": results,
+    }
+    print()
+    print_table(results)
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="ASR speed / accuracy evaluation over a local dataset")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run_ = sub.add_parser("run", help="evaluate ASR profiles on a dataset")
+    run_.add_argument("--dataset", required=True, help="directory with manifest.jsonl, audio+.txt pairs or a saved dataset")
+    run_.add_argument("--profiles", nargs="+", help="profile names (default: every profile in --matrix, or all built-ins)")
+    run_.add_argument("--matrix", help="JSON file of extra profiles (ASR_PROFILES_FILE format)")
+    run_.add_argument("--audio-column", default="audio")
+    run_.add_argument("--text-column", default="text")
+    run_.add_argument("--limit", type=int, default=0, help="evaluate the first N clips only")
+    run_.add_argument("--no-vad", action="store_true", help="transcribe whole clips instead of VAD segments")
+    run_.add_argument("--no-warmup", action="store_true")
+    run_.add_argument("--timeout", type=float, default=3600.0, help="seconds allowed per profile")
+    run_.add_argument("--out", help="write results JSON here")
+
+    sel = sub.add_parser("select", help="choose the production profile from a results JSON")
+    sel.add_argument("results")
+    sel.add_argument("--max-wer", type=float, required=True)
+    sel.add_argument("--max-rtf", type=float, default=None)
+    sel.add_argument("--by", choices=("rtf", "asr_rtf", "p95_ms", "peak_rss_mb", "wer"), default="rtf")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "select":
+        report = json.loads(Path(args.results).read_text())
+        print_table(report["results"])
+        best = select(report["results"], args.max_wer, args.max_rtf, args.by)
+        if best is None:
+            print(f"\nno profile within WER {args.max_wer}" + (f" and RTF {args.max_rtf}" if args.max_rtf else ""))
+            sys.exit(1)
+        print(f"\nselected {best['name']}: WER {best['wer']}, RTF {best['rtf']}, peak {best['peak_rss_mb']} MB")
+        print(f"ASR_PROFILE={best['name']}")
+        from backend.app.core.asr import ASR_PROFILES
+        if best["name"] not in ASR_PROFILES and report.get("matrix"):
+            print(f"ASR_PROFILES_FILE={report['matrix']}")
+        return
+
+    report = run(args)
+    if args.out:
+        Path(args.out).write_text(json.dumps(report, indent=2))
+        print(f"results -> {args.out}")
+
+
+if __name__ == "__main__":
+    main()
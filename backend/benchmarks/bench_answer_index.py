@@ -0,0 +1,90 @@
+"""
+Answer index: IVF recall and latency vs exact search.
+
+    python -m backend.benchmarks.bench_answer_index --sizes 10000 100000 --nprobe 4 8 16
+
+Vectors are synthetic clustered 384-d embeddings (answers to the same
+question cluster together), written to a temporary index directory.
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from backend.app.core.answer_index import AnswerIndex
+
+
+def synthetic_vectors(n: int, dim: int, clusters: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim)).astype(np.float32)
+    labels = rng.integers(0, clusters, size=n)
+    return centers[labels] + 0.6 * rng.normal(size=(n, dim)).astype(np.float32)
+
+
+def _timed_search(index, queries, k, exact):
+    results, times = [], []
+    for q in queries:
+        t0 = time.perf_counter()
+        hits = index.search(q, k=k, exact=exact)
+        times.append(time.perf_counter() - t0)
+        results.append({(h["session_id"], h["question_id"]) for h in hits})
+    return results, np.asarray(times) * 1000.0
+
+
+def run(sizes, nprobes, dim: int = 384, k: int = 10, queries: int = 200) -> list:
+    rows = []
+    for n in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            index = AnswerIndex(Path(tmp), ivf_min=n + 1)  # no background training
+            vectors = synthetic_vectors(n, dim, clusters=max(8, n // 200))
+            infos = [{"session_id": f"s{i}", "question_id": "q", "topic": "skill:bench"} for i in range(n)]
+            t0 = time.perf_counter()
+            for start in range(0, n, 4096):
+                index.add_many(infos[start:start + 4096], vectors[start:start + 4096])
+            add_s = time.perf_counter() - t0
+
+            rng = np.random.default_rng(1)
+            qs = vectors[rng.choice(n, size=queries, replace=False)] + 0.3 * rng.normal(size=(queries, dim)).astype(np.float32)
+            truth, exact_ms = _timed_search(index, qs, k, exact=True)
+
+            t0 = time.perf_counter()
+            index.train()
+            train_s = time.perf_counter() - t0
+            for nprobe in nprobes:
+                index.nprobe = nprobe
+                approx, ivf_ms = _timed_search(index, qs, k, exact=False)
+                recall = np.mean([len(a & t) / len(t) for a, t in zip(approx, truth)])
+                rows.append({
+                    "n": n,
+                    "nlist": index.stats()["nlist"],
+                    "nprobe": nprobe,
+                    f"recall@{k}": round(float(recall), 4),
+                    "exact_p50_ms": round(float(np.percentile(exact_ms, 50)), 3),
+                    "ivf_p50_ms": round(float(np.percentile(ivf_ms, 50)), 3),
+                    "ivf_p95_ms": round(float(np.percentile(ivf_ms, 95)), 3),
+                    "add_rows_s": round(n / add_s),
+                    "train_s": round(train_s, 2),
+                })
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[4, 8, 16])
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args(argv)
+    rows = run(args.sizes, args.nprobe, args.dim, args.k, args.queries)
+    header = list(rows[0])
+    print("  ".join(f"{h:>13}" for h in header))
+    for row in rows:
+        print("  ".join(f"{str(row[h]):>13}" for h in header))
+
+
+if __name__ == "__main__":
+    main()
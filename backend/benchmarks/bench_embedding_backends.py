@@ -0,0 +1,114 @@
+"""
+Embedding backends: parity and encode throughput.
+
+    python -m backend.app.core.embedding_backends export            # once
+    python -m backend.benchmarks.bench_embedding_backends --backends torch onnx
+
+Parity: every backend is compared against the first one on (reference,
+answer) pairs and the cosine differences are reported; the pass/fail check
+is backend/tests/test_embedding_backends.py. Throughput is texts/second at
+several batch sizes plus single-text p50 latency.
+"""
+
+import argparse
+import random
+import time
+
+import numpy as np
+
+from backend.app.core import config
+from backend.app.core.embedding_backends import create_backend
+
+_REFERENCES = [
+    "Explain your experience with Python for data processing and building ML pipelines.",
+    "Describe how you deployed a machine learning model to production using Docker.",
+    "Walk through a SQL query you optimized and how you measured the improvement.",
+    "How did you use React to build a responsive dashboard?",
+    "Describe a challenging problem you faced and how you solved it.",
+    "Can you explain your experience with Kubernetes and autoscaling services?",
+]
+_ANSWERS = [
+    "I wrote pandas and numpy scripts to clean data and trained scikit-learn models in a pipeline.",
+    "We containerized the model with Docker and served it behind FastAPI on a small cluster.",
+    "I added an index and rewrote a correlated subquery as a join, cutting runtime from 9s to 300ms.",
+    "I built the dashboard with React hooks and CSS grid so it worked on mobile.",
+    "Our nightly job kept failing, so I added retries, alerts and idempotent writes.",
+    "I have not used that technology.",
+    "Honestly I mostly cooked pasta during that internship.",
+]
+
+
+def pairs():
+    return [(r, a) for r in _REFERENCES for a in _ANSWERS]
+
+
+def _cosine_rows(A: np.ndarray, B: np.ndarray) -> np.ndarray:
+    A = A / np.linalg.norm(A, axis=1, keepdims=True)
+    B = B / np.linalg.norm(B, axis=1, keepdims=True)
+    return np.einsum("ij,ij->i", A, B)
+
+
+def parity(base, other) -> dict:
+    refs, answers = zip(*pairs())
+    texts = list(refs) + list(answers)
+    va, vb = base.encode(texts), other.encode(texts)
+    n = len(refs)
+    sims_a = _cosine_rows(va[:n], va[n:])
+    sims_b = _cosine_rows(vb[:n], vb[n:])
+    same_text = _cosine_rows(va, vb)
+    diff = np.abs(sims_a - sims_b)
+    return {
+        "pairs": n,
+        "max_abs_cosine_diff": round(float(diff.max()), 5),
+        "mean_abs_cosine_diff": round(float(diff.mean()), 5),
+        # the 0-10 score is (cos + 1) * 5
+        "max_score_diff": round(float(diff.max() * 5.0), 4),
+        "min_vector_agreement": round(float(same_text.min()), 5),
+    }
+
+
+def throughput(backend, batch_sizes, seconds: float = 3.0) -> dict:
+    rng = random.Random(0)
+    corpus = [f"{rng.choice(_ANSWERS)} {rng.choice(_REFERENCES)}" for _ in range(512)]
+    backend.encode(corpus[:8])  # warm-up
+    out = {}
+    for bs in batch_sizes:
+        done, t0 = 0, time.perf_counter()
+        while time.perf_counter() - t0 < seconds:
+            start = done % (len(corpus) - bs)
+            backend.encode(corpus[start:start + bs])
+            done += bs
+        out[f"bs{bs}_texts_s"] = round(done / (time.perf_counter() - t0), 1)
+    lat = []
+    for text in corpus[:100]:
+        t0 = time.perf_counter()
+        backend.encode([text])
+        lat.append((time.perf_counter() - t0) * 1000.0)
+    out["single_p50_ms"] = round(float(np.percentile(lat, 50)), 3)
+    return out
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--backends", nargs="+", default=["torch", "onnx"])
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--seconds", type=float, default=3.0)
+    args = parser.parse_args(argv)
+
+    backends = []
+    for name in args.backends:
+        t0 = time.perf_counter()
+        backend = create_backend(name)
+        backends.append(backend)
+        print(f"{name}: {backend.info()} loaded in {time.perf_counter() - t0:.2f}s")
+
+    for other in backends[1:]:
+        print(f"parity {backends[0].model_id} vs {other.model_id}: {parity(backends[0], other)}")
+
+    for backend in backends:
+        print(f"throughput {backend.model_id} (threads={config.EMBED_ONNX_THREADS or 'default'}): "
+              f"{throughput(backend, args.batch_sizes, args.seconds)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Semantic explainability latency vs answer length.
+
+    python -m backend.benchmarks.bench_semantic_explain                 # stub encoder, offline
+    python -m backend.benchmarks.bench_semantic_explain --model         # real MiniLM
+
+The stub encoder hashes words into a fixed-size vector and sleeps a fixed
+per-text cost, so the sentence cap's effect on latency is visible offline.
+"""
+
+import argparse
+import hashlib
+import random
+import time
+
+import numpy as np
+
+from backend.app.core import config
+from backend.app.core.semantic_explain import semantic_matches
+
+_WORDS = ("python pipeline model data training deployed latency team project api "
+          "service docker kubernetes metrics improved reduced built designed tested").split()
+
+
+def stub_encoder(dim: int = 384, per_text_ms: float = 0.5):
+    def encode(texts):
+        time.sleep(per_text_ms * len(texts) / 1000.0)
+        out = np.zeros((len(texts), dim), dtype=np.float32)
+        for i, text in enumerate(texts):
+            for word in text.lower().split():
+                h = int(hashlib.md5(word.encode()).hexdigest(), 16)
+                out[i, h % dim] += 1.0
+        return list(out)
+    return encode
+
+
+def synthetic_answer(sentences: int, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    return " ".join(
+        " ".join(rng.choice(_WORDS) for _ in range(rng.randint(8, 20))).capitalize() + "."
+        for _ in range(sentences)
+    )
+
+
+def run(lengths, use_model: bool, repeat: int = 5, budget_ms: float = 250.0) -> list:
+    if use_model:
+        from backend.app.core.ml_models import load_models
+        load_models()
+        encode = None
+    else:
+        encode = stub_encoder()
+    reference = synthetic_answer(6, seed=42)
+    rows = []
+    for n in lengths:
+        answer = synthetic_answer(n, seed=n)
+        best = float("inf")
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            semantic_matches(reference, answer, top_k=3, encode=encode)
+            best = min(best, time.perf_counter() - t0)
+        ms = best * 1000.0
+        rows.append({
+            "answer_sentences": n,
+            "encoded_spans": min(n, config.SEMANTIC_MAX_SENTENCES),
+            "latency_ms": round(ms, 3),
+            "within_budget": ms <= budget_ms,
+        })
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--lengths", type=int, nargs="+", default=[5, 20, 50, 200, 1000])
+    parser.add_argument("--model", action="store_true", help="use the real sentence model")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=250.0)
+    args = parser.parse_args(argv)
+    rows = run(args.lengths, args.model, args.repeat, args.budget_ms)
+    header = list(rows[0])
+    print("  ".join(f"{h:>16}" for h in header))
+    for row in rows:
+        print("  ".join(f"{str(row[h]):>16}" for h in header))
+
+
+if __name__ == "__main__":
+    main()
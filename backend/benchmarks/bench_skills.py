@@ -0,0 +1,84 @@
+"""
+Skills matching microbenchmark: compiled taxonomy vs per-skill substring scan.
+
+    python -m backend.benchmarks.bench_skills --sizes 25 250 2500 25000
+"""
+
+import argparse
+import random
+import string
+import time
+
+from backend.app.core.skills import DEFAULT_TAXONOMY, SkillTaxonomy
+
+
+def synthetic_taxonomy(size: int, seed: int = 0) -> dict:
+    rng = random.Random(seed)
+    entries = dict(DEFAULT_TAXONOMY)
+    while len(entries) < size:
+        word = "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(4, 12)))
+        if rng.random() < 0.3:
+            word += " " + "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(3, 8)))
+        entries[word] = [word.replace(" ", "-")] if " " in word else []
+    return entries
+
+
+def synthetic_resume(taxonomy: dict, words: int = 1500, seed: int = 1) -> str:
+    rng = random.Random(seed)
+    skills = list(taxonomy)
+    vocab = ["worked", "on", "the", "team", "built", "services", "using", "and", "with", "data", "models"]
+    out = []
+    for _ in range(words):
+        out.append(rng.choice(skills) if rng.random() < 0.05 else rng.choice(vocab))
+    return " ".join(out)
+
+
+def naive_extract(text: str, skills) -> list:
+    lower = text.lower()
+    return sorted(s for s in skills if s in lower)
+
+
+def bench(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000.0
+
+
+def run(sizes, words: int = 1500, repeat: int = 5) -> list:
+    rows = []
+    for size in sizes:
+        entries = synthetic_taxonomy(size)
+        text = synthetic_resume(entries, words)
+        t0 = time.perf_counter()
+        taxonomy = SkillTaxonomy(entries)
+        compile_ms = (time.perf_counter() - t0) * 1000.0
+        forms = list(taxonomy.canonical)
+        rows.append({
+            "taxonomy_size": len(taxonomy),
+            "surface_forms": len(forms),
+            "text_chars": len(text),
+            "compile_ms": round(compile_ms, 3),
+            "compiled_match_ms": round(bench(lambda: taxonomy.match(text), repeat), 3),
+            "naive_scan_ms": round(bench(lambda: naive_extract(text, forms), repeat), 3),
+        })
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[25, 250, 2500, 25000])
+    parser.add_argument("--words", type=int, default=1500)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+    rows = run(args.sizes, args.words, args.repeat)
+    header = list(rows[0])
+    print("  ".join(f"{h:>18}" for h in header))
+    for row in rows:
+        print("  ".join(f"{row[h]:>18}" for h in header))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+Upload path benchmark: the multipart body streamed + hashed + deduplicated
+straight into the blob store vs the old spooled form + shutil.copyfileobj
+double copy, on large synthetic files.
+
+    python -m backend.benchmarks.bench_uploads --sizes-mb 10 100 500
+"""
+
+import argparse
+import asyncio
+import os
+import shutil
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+
+_BOUNDARY = "benchboundary7d3a"
+
+
+def _make_upload(path: Path):
+    from starlette.datastructures import UploadFile
+    return UploadFile(file=path.open("rb"), filename=path.name)
+
+
+def multipart_request(path: Path, fields: dict = None, chunk_size: int = 64 * 1024):
+    """
+    A starlette Request whose body is a multipart/form-data upload of path
+    (plus plain fields), delivered in chunk_size pieces like a real socket.
+    """
+    from starlette.requests import Request
+
+    head = b"".join(
+        f'--{_BOUNDARY}\r\nContent-Disposition: form-data; name="{k}"\r\n\r\n{v}\r\n'.encode()
+        for k, v in (fields or {}).items()
+    )
+    head += (f'--{_BOUNDARY}\r\nContent-Disposition: form-data; name="file"; filename="{path.name}"\r\n'
+             f"Content-Type: application/octet-stream\r\n\r\n").encode()
+    tail = f"\r\n--{_BOUNDARY}--\r\n".encode()
+    length = len(head) + path.stat().st_size + len(tail)
+
+    def body():
+        yield head
+        with path.open("rb") as f:
+            while True:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+        yield tail
+
+    pieces = body()
+
+    async def receive():
+        chunk = next(pieces, None)
+        if chunk is None:
+            return {"type": "http.request", "body": b"", "more_body": False}
+        return {"type": "http.request", "body": chunk, "more_body": True}
+
+    scope = {"type": "http", "method": "POST", "path": "/", "query_string": b"", "headers": [
+        (b"content-type", f"multipart/form-data; boundary={_BOUNDARY}".encode()),
+        (b"content-length", str(length).encode()),
+    ]}
+    return Request(scope, receive)
+
+
+def _synthetic_file(directory: Path, size_mb: int) -> Path:
+    path = directory / f"synthetic_{size_mb}mb.wav"
+    block = os.urandom(1024 * 1024)
+    with path.open("wb") as f:
+        for _ in range(size_mb):
+            f.write(block)
+    return path
+
+
+def _measure(fn):
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def run(sizes_mb, workdir: Path) -> list:
+    # storage for the blob store must be configured before importing uploads
+    os.environ["STORAGE_DIR"] = str(workdir / "storage")
+    from backend.app.core import config
+    config.STORAGE_DIR = os.environ["STORAGE_DIR"]
+    config.UPLOAD_MAX_AUDIO_MB = max(sizes_mb) * 2
+    from backend.app.core.uploads import receive_upload
+
+    rows = []
+    for size_mb in sizes_mb:
+        src = _synthetic_file(workdir, size_mb)
+
+        def legacy():
+            dest = workdir / "legacy.bin"
+            upload = _make_upload(src)
+            with dest.open("wb") as f:
+                shutil.copyfileobj(upload.file, f)
+            upload.file.close()
+            dest.unlink()
+
+        def streamed(name):
+            async def go():
+                upload = await receive_upload(multipart_request(src), "audio")
+                return await upload.save(workdir / "session" / name)
+            return asyncio.run(go())
+
+        _, legacy_s, legacy_peak = _measure(legacy)
+        first, first_s, first_peak = _measure(lambda: streamed("first.wav"))
+        second, second_s, _ = _measure(lambda: streamed("retry.wav"))
+        rows.append({
+            "size_mb": size_mb,
+            "legacy_mb_s": round(size_mb / legacy_s, 1),
+            "legacy_peak_kb": round(legacy_peak / 1024, 1),
+            "streamed_mb_s": round(size_mb / first_s, 1),
+            "streamed_peak_kb": round(first_peak / 1024, 1),
+            "retry_dedup": second["deduplicated"],
+            "extra_disk_mb": 0 if second["deduplicated"] else size_mb,
+        })
+        src.unlink()
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes-mb", type=int, nargs="+", default=[10, 100, 500])
+    args = parser.parse_args(argv)
+    with tempfile.TemporaryDirectory() as tmp:
+        rows = run(args.sizes_mb, Path(tmp))
+    header = list(rows[0])
+    print("  ".join(f"{h:>16}" for h in header))
+    for row in rows:
+        print("  ".join(f"{str(row[h]):>16}" for h in header))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,426 @@
+"""
+Benchmark suite for the parse, plan, ASR and scoring hot paths.
+
+    python -m backend.benchmarks.suite run --mode stub --out bench.json
+    python -m backend.benchmarks.suite run --mode local --concurrency 1 8 32 --requests 300 --out bench.json
+    python -m backend.benchmarks.suite compare bench.json --baseline baseline.json --tolerance 0.15
+    python -m backend.benchmarks.suite run --mode stub --baseline baseline.json     # run, then compare
+
+Modes (both run offline, against a throwaway STORAGE_DIR):
+
+  * stub  - EMBED_BACKEND=stub and ASR_BACKEND=stub: no models, measures
+            the code around them (parsing, planning, VAD, I/O, scoring glue)
+  * local - the configured embedding / ASR models (EMBED_MODEL_NAME may be
+            a local directory), with the Hugging Face hub switched off
+
+`run` does two things:
+
+  * microbenchmarks: each hot function called in a loop:
+    build_parsed_schema, build_interview_plan, precompute_reference_embeddings,
+    encode_sentence, compute_top_matches, semantic_matches, transcribe_file,
+    score_text_answer and answer_audio
+  * load: the FastAPI app driven in-process through httpx's ASGI transport
+    (lifespan included) at each --concurrency level, per scenario
+
+Every entry reports p50 / p95 / p99 latency and operations (requests) per
+second. The results are written as JSON with the run's environment.
+`compare` flags entries whose p50 / p95 got slower, or whose throughput
+dropped, by more than --tolerance against a baseline file. It exits with
+status 1 when something regressed.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import numpy as np
+
+LOAD_SCENARIOS = ("score_text", "plan", "parse", "answer_audio")
+LOWER_IS_BETTER = ("p50_ms", "p95_ms")
+HIGHER_IS_BETTER = ("ops_s",)
+
+
+def configure(mode: str, storage_dir: Path):
+    """
+    Environment for the run; must happen before anything imports core.config.
+    """
+    os.environ["STORAGE_DIR"] = str(storage_dir)
+    os.environ["STARTUP_MODE"] = "blocking"
+    os.environ["JOB_WORKERS"] = "0"
+    os.environ["PROFILE_REQUESTS"] = "0"
+    os.environ["HF_HUB_OFFLINE"] = "1"
+    os.environ["TRANSFORMERS_OFFLINE"] = "1"
+    if mode == "stub":
+        os.environ["EMBED_BACKEND"] = "stub"
+        os.environ["ASR_BACKEND"] = "stub"
+        os.environ["ASR_PROFILE"] = ""
+        os.environ["ASR_PROCESS_WORKERS"] = "0"
+
+
+def summarize(latencies_s: List[float], wall_s: Optional[float] = None, errors: int = 0, **extra) -> dict:
+    ms = np.asarray(latencies_s, dtype=np.float64) * 1000.0
+    if ms.size == 0:
+        return {"count": 0, "errors": errors, **extra}
+    wall = wall_s if wall_s is not None else float(ms.sum()) / 1000.0
+    return {
+        "count": int(ms.size),
+        "errors": errors,
+        "mean_ms": round(float(ms.mean()), 4),
+        "p50_ms": round(float(np.percentile(ms, 50)), 4),
+        "p95_ms": round(float(np.percentile(ms, 95)), 4),
+        "p99_ms": round(float(np.percentile(ms, 99)), 4),
+        "ops_s": round(ms.size / wall, 2) if wall > 0 else None,
+        **extra,
+    }
+
+
+async def measure(fn: Callable, iterations: int, warmup: int = 3, is_async: bool = False) -> dict:
+    """
+    Call fn(i) `iterations` times after `warmup` untimed calls.
+    """
+    for i in range(warmup):
+        if is_async:
+            await fn(i)
+        else:
+            fn(i)
+    times = []
+    for i in range(iterations):
+        t0 = time.perf_counter()
+        if is_async:
+            await fn(i)
+        else:
+            fn(i)
+        times.append(time.perf_counter() - t0)
+    return summarize(times)
+
+
+# =========================
+# Fixture sessions
+# =========================
+
+class Fixtures:
+    def __init__(self, client, seed: int, sessions: int, audio_s: float, workdir: Path):
+        from backend.benchmarks.synthetic import synthetic_resume, synthetic_speech, wav_bytes
+        self.client = client
+        self.rng = np.random.default_rng(seed)
+        self.resumes = [synthetic_resume(self.rng) for _ in range(max(sessions, 8))]
+        self.sessions: List[dict] = []
+        self.sessions_count = sessions
+        self.wav = wav_bytes(synthetic_speech(self.rng, audio_s))
+        self.wav_path = workdir / "answer.wav"
+        self.wav_path.write_bytes(self.wav)
+
+    async def setup(self):
+        """
+        Create sessions through the API: upload a resume, parse it and plan.
+        """
+        for i in range(self.sessions_count):
+            sid = (await self.client.post("/api/session/create")).json()["session_id"]
+            r = await self.client.post(
+                "/api/upload/resume", data={"session_id": sid},
+                files={"file": ("resume.txt", self.resumes[i].encode("utf-8"), "text/plain")},
+            )
+            r.raise_for_status()
+            (await self.client.post(f"/api/parse/resume/{sid}")).raise_for_status()
+            (await self.client.post(f"/api/interview/plan/{sid}")).raise_for_status()
+            self.sessions.append({"session_id": sid, "questions": self._questions(sid)})
+
+    def refresh(self):
+        # re-planning gives questions new ids
+        for session in self.sessions:
+            session["questions"] = self._questions(session["session_id"])
+
+    @staticmethod
+    def _questions(sid: str) -> List[dict]:
+        from backend.app.core.session_store import get_store
+        return get_store().get_plan(sid)["questions"]
+
+    def pick(self, i: int):
+        session = self.sessions[i % len(self.sessions)]
+        question = session["questions"][i % len(session["questions"])]
+        return session["session_id"], question
+
+    def answer(self, question: dict) -> str:
+        from backend.benchmarks.synthetic import synthetic_answer
+        return synthetic_answer(self.rng, question.get("skill") or "")
+
+
+# =========================
+# Microbenchmarks
+# =========================
+
+async def run_micro(fx: Fixtures, iterations: int) -> Dict[str, dict]:
+    from backend.app.api.routes.answer_audio import answer_audio
+    from backend.app.api.routes.interview_plan import build_interview_plan
+    from backend.app.api.routes.parse_resume import build_parsed_schema
+    from backend.app.api.routes.score_text import score_text_answer
+    from backend.app.core.audio_preproc import transcribe_file
+    from backend.app.core.ml_models import encode_sentence
+    from backend.app.core.reference import precompute_reference_embeddings
+    from backend.app.core.scoring import compute_top_matches
+    from backend.app.core.semantic_explain import semantic_matches
+    from backend.app.core.session_store import get_store
+    from backend.benchmarks.bench_uploads import multipart_request
+
+    store = get_store()
+    sid0 = fx.sessions[0]["session_id"]
+    parsed0 = store.get_parsed(sid0)
+    plan0 = store.get_plan(sid0)
+    answers = [fx.answer(q) for q in plan0["questions"]]
+    refs = [q.get("question", "") + " " + " ".join(parsed0.get("skills", [])) for q in plan0["questions"]]
+    bench_dir = fx.wav_path.parent / "reference"
+    bench_dir.mkdir(exist_ok=True)
+
+    async def score(i):
+        sid, q = fx.pick(i)
+        await score_text_answer({"session_id": sid, "question_id": q["id"], "answer_text": answers[i % len(answers)]})
+
+    async def audio(i):
+        sid, q = fx.pick(i)
+        await answer_audio(sid, q["id"], multipart_request(fx.wav_path))
+
+    cases = [
+        ("parse.build_parsed_schema", lambda i: build_parsed_schema("resume.txt", fx.resumes[i % len(fx.resumes)]), iterations * 4, False),
+        ("plan.build_interview_plan", lambda i: build_interview_plan(sid0, parsed0), iterations * 4, False),
+        ("plan.precompute_reference_embeddings", lambda i: precompute_reference_embeddings(bench_dir, parsed0, plan0), max(5, iterations // 4), False),
+        ("embed.encode_sentence", lambda i: encode_sentence(f"{answers[i % len(answers)]} {i}", convert_to_tensor=False), iterations, False),
+        ("embed.encode_sentence_batch32", lambda i: encode_sentence([f"{a} {i}" for a in (answers * 32)[:32]], convert_to_tensor=False), max(5, iterations // 4), False),
+        ("score.compute_top_matches", lambda i: compute_top_matches(refs[i % len(refs)], answers[i % len(answers)]), iterations * 4, False),
+        ("score.semantic_matches", lambda i: semantic_matches(refs[i % len(refs)], answers[i % len(answers)]), iterations, False),
+        ("score.score_text_answer", score, iterations, True),
+        ("audio.transcribe_file", lambda i: transcribe_file(fx.wav_path), max(5, iterations // 4), False),
+        ("audio.answer_audio", audio, max(5, iterations // 4), True),
+    ]
+    results = {}
+    for name, fn, n, is_async in cases:
+        results[name] = await measure(fn, n, is_async=is_async)
+        print(f"  {name:<40} p50 {results[name]['p50_ms']:>9.3f} ms  p95 {results[name]['p95_ms']:>9.3f} ms")
+    return results
+
+
+# =========================
+# Load harness
+# =========================
+
+def _scenario(name: str, fx: Fixtures) -> Callable[[int], Awaitable[int]]:
+    """
+    One request of a scenario; returns the HTTP status.
+    """
+    client = fx.client
+
+    async def score_text(i):
+        sid, q = fx.pick(i)
+        r = await client.post("/api/score/text", json={"session_id": sid, "question_id": q["id"], "answer_text": fx.answer(q)})
+        return r.status_code
+
+    async def plan(i):
+        sid, _ = fx.pick(i)
+        return (await client.post(f"/api/interview/plan/{sid}")).status_code
+
+    async def parse(i):
+        sid, _ = fx.pick(i)
+        return (await client.post(f"/api/parse/resume/{sid}")).status_code
+
+    async def answer_audio(i):
+        # called in-process: /api/answer/audio is also declared by the answer
+        # router (the plain upload endpoint), which is registered first
+        from fastapi import HTTPException
+        from backend.app.api.routes.answer_audio import answer_audio as handler
+        from backend.benchmarks.bench_uploads import multipart_request
+        sid, q = fx.pick(i)
+        try:
+            await handler(sid, q["id"], multipart_request(fx.wav_path))
+            return 200
+        except HTTPException as e:
+            return e.status_code
+
+    return {"score_text": score_text, "plan": plan, "parse": parse, "answer_audio": answer_audio}[name]
+
+
+async def run_load(fx: Fixtures, scenario: str, concurrency: int, requests: int) -> dict:
+    call = _scenario(scenario, fx)
+    latencies: List[float] = []
+    statuses: Dict[int, int] = {}
+    next_index = iter(range(requests))
+
+    async def worker():
+        for i in next_index:
+            t0 = time.perf_counter()
+            try:
+                status = await call(i)
+            except Exception as e:
+                print(f"  {scenario} request failed: {e}")
+                status = 599
+            latencies.append(time.perf_counter() - t0)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall = time.perf_counter() - t0
+    errors = sum(n for s, n in statuses.items() if s >= 400)
+    return summarize(
+        latencies, wall, errors,
+        concurrency=concurrency, rejected_503=statuses.get(503, 0),
+        statuses={str(k): v for k, v in sorted(statuses.items())},
+    )
+
+
+# =========================
+# Run / compare
+# =========================
+
+def _git_commit() -> Optional[str]:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5)
+        return out.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def environment(mode: str) -> dict:
+    from backend.app.core import config
+    from backend.app.core.asr import PROFILE
+    from backend.app.core.embedding_backends import embedding_model_id
+    return {
+        "mode": mode,
+        "git_commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "embedding": {"backend": config.EMBED_BACKEND, "model": embedding_model_id()},
+        "asr": {"backend": PROFILE["backend"], "model": PROFILE["model"], "profile": PROFILE["name"]},
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+    }
+
+
+async def run_suite(args, workdir: Path) -> dict:
+    import httpx
+
+    from backend.app.main import app
+
+    results: Dict[str, dict] = {}
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=600.0) as client:
+            fx = Fixtures(client, args.seed, args.sessions, args.audio_seconds, workdir)
+            await fx.setup()
+            if not args.skip_micro:
+                print("microbenchmarks")
+                for name, row in (await run_micro(fx, args.iterations)).items():
+                    results[f"micro.{name}"] = row
+            if not args.skip_load:
+                print("load")
+                for scenario in args.scenarios:
+                    for concurrency in args.concurrency:
+                        n = args.requests if scenario != "answer_audio" else max(concurrency, args.requests // 4)
+                        row = await run_load(fx, scenario, concurrency, n)
+                        results[f"load.{scenario}.c{concurrency}"] = row
+                        fx.refresh()
+                        print(
+                            f"  {scenario:<13} c={concurrency:<4} {row['ops_s']:>8} req/s  p50 {row['p50_ms']:>9.2f}"
+                            f"  p95 {row['p95_ms']:>9.2f}  p99 {row['p99_ms']:>9.2f} ms  errors {row['errors']}"
+                        )
+    return {
+        "environment": environment(args.mode),
+        "params": {
+            "iterations": args.iterations, "requests": args.requests, "concurrency": args.concurrency,
+            "sessions": args.sessions, "audio_seconds": args.audio_seconds, "seed": args.seed,
+        },
+        "results": results,
+    }
+
+
+def compare(current: dict, baseline: dict, tolerance: float, min_ms: float = 0.05) -> List[dict]:
+    """
+    One row per (entry, metric) present in both runs. `regressed` is set when
+    the change is worse than `tolerance` (a fraction); latencies below min_ms
+    are too noisy to judge and are ignored.
+    """
+    rows = []
+    for name, cur in sorted(current["results"].items()):
+        base = baseline["results"].get(name)
+        if base is None:
+            continue
+        for metric in LOWER_IS_BETTER + HIGHER_IS_BETTER:
+            b, c = base.get(metric), cur.get(metric)
+            if not b or c is None:
+                continue
+            change = (c - b) / b
+            if metric in LOWER_IS_BETTER:
+                regressed = change > tolerance and b >= min_ms
+            else:
+                regressed = change < -tolerance
+            rows.append({"entry": name, "metric": metric, "baseline": b, "current": c,
+                         "change_pct": round(change * 100.0, 1), "regressed": regressed})
+    return rows
+
+
+def print_comparison(rows: List[dict], current: dict, baseline: dict) -> bool:
+    cur_env, base_env = current.get("environment", {}), baseline.get("environment", {})
+    for key in ("mode", "embedding", "asr", "cpus"):
+        if cur_env.get(key) != base_env.get(key):
+            print(f"warning: {key} differs from the baseline ({base_env.get(key)} -> {cur_env.get(key)})")
+    regressions = [r for r in rows if r["regressed"]]
+    for r in rows:
+        flag = "REGRESSION" if r["regressed"] else ""
+        print(f"  {r['entry']:<48} {r['metric']:<7} {r['baseline']:>11} -> {r['current']:>11}  {r['change_pct']:>+7.1f}%  {flag}")
+    print(f"{len(regressions)} regression(s) in {len(rows)} comparisons")
+    return not regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark suite for the parse, plan, ASR and scoring paths")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run = sub.add_parser("run", help="run microbenchmarks and the load harness")
+    run.add_argument("--mode", choices=("stub", "local"), default="stub")
+    run.add_argument("--iterations", type=int, default=50, help="calls per microbenchmark (scaled per case)")
+    run.add_argument("--requests", type=int, default=200, help="requests per load scenario and concurrency")
+    run.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    run.add_argument("--scenarios", nargs="+", choices=LOAD_SCENARIOS, default=list(LOAD_SCENARIOS))
+    run.add_argument("--sessions", type=int, default=8)
+    run.add_argument("--audio-seconds", type=float, default=8.0)
+    run.add_argument("--seed", type=int, default=0)
+    run.add_argument("--skip-micro", action="store_true")
+    run.add_argument("--skip-load", action="store_true")
+    run.add_argument("--out", help="write results JSON here")
+    run.add_argument("--baseline", help="compare against this results JSON afterwards")
+    run.add_argument("--tolerance", type=float, default=0.15)
+
+    cmp_ = sub.add_parser("compare", help="compare a results JSON with a baseline")
+    cmp_.add_argument("current")
+    cmp_.add_argument("--baseline", required=True)
+    cmp_.add_argument("--tolerance", type=float, default=0.15)
+
+    args = parser.parse_args(argv)
+
+    if args.command == "compare":
+        current = json.loads(Path(args.current).read_text())
+        baseline = json.loads(Path(args.baseline).read_text())
+        ok = print_comparison(compare(current, baseline, args.tolerance), current, baseline)
+        sys.exit(0 if ok else 1)
+
+    with tempfile.TemporaryDirectory(prefix="interview_bench_") as tmp:
+        workdir = Path(tmp)
+        configure(args.mode, workdir / "storage")
+        report = asyncio.run(run_suite(args, workdir))
+
+    if args.out:
+        Path(args.out).write_text(json.dumps(report, indent=2))
+        print(f"results -> {args.out}")
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())
+        ok = print_comparison(compare(report, baseline, args.tolerance), report, baseline)
+        sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Deterministic synthetic inputs for the benchmarks: resumes, answers and
+speech-like audio. Every generator takes a numpy Generator so runs with the
+same seed produce the same inputs.
+"""
+
+import io
+import wave
+from typing import List
+
+import numpy as np
+
+from backend.app.core.skills import DEFAULT_TAXONOMY
+
+SKILLS = list(DEFAULT_TAXONOMY)
+
+FIRST_NAMES = ["Aisha", "Ravi", "Maria", "Chen", "Omar", "Sara", "Lukas", "Priya", "Diego", "Hana"]
+LAST_NAMES = ["Khan", "Patel", "Garcia", "Wang", "Haddad", "Silva", "Meyer", "Iyer", "Lopez", "Sato"]
+DEGREES = ["Bachelor of Science in Computer Science", "Master of Science in Data Science", "B.Tech in Information Technology"]
+VERBS = ["built", "designed", "implemented", "optimized", "deployed", "maintained", "migrated", "tested"]
+OBJECTS = [
+    "a recommendation service", "an ETL pipeline", "a REST API", "a dashboard", "a chatbot",
+    "a fraud detection model", "a mobile app", "a search index", "a CI workflow", "a data warehouse",
+]
+FILLER = [
+    "in my last role", "together with the team", "to reduce latency", "for thousands of users",
+    "with clear documentation", "under a tight deadline", "and wrote unit tests", "end to end",
+]
+
+
+def _pick(rng: np.random.Generator, items: List[str], k: int) -> List[str]:
+    return [items[i] for i in rng.choice(len(items), size=min(k, len(items)), replace=False)]
+
+
+def synthetic_resume(rng: np.random.Generator, n_skills: int = 12, n_projects: int = 3, n_jobs: int = 2) -> str:
+    name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+    skills = _pick(rng, SKILLS, n_skills)
+    lines = [
+        name,
+        f"{name.lower().replace(' ', '.')}@example.com | +1 555 {rng.integers(1000000, 9999999)}",
+        "",
+        "Summary",
+        f"Software engineer with {rng.integers(1, 12)} years of experience in {', '.join(skills[:3])}.",
+        "",
+        "Skills",
+        ", ".join(skills),
+        "",
+        "Experience",
+    ]
+    for _ in range(n_jobs):
+        start = int(rng.integers(2010, 2021))
+        lines.append(f"Engineer at Company {rng.integers(1, 99)} ({start} - {start + int(rng.integers(1, 4))})")
+        for _ in range(3):
+            lines.append(f"- {rng.choice(VERBS).capitalize()} {rng.choice(OBJECTS)} using {rng.choice(skills)} {rng.choice(FILLER)}.")
+    lines += ["", "Projects"]
+    for i in range(n_projects):
+        used = _pick(rng, skills, 2)
+        lines.append(f"Project {i + 1}: {rng.choice(VERBS)} {rng.choice(OBJECTS)} with {used[0]} and {used[-1]}.")
+    year = int(rng.integers(2008, 2020))
+    lines += ["", "Education", f"{rng.choice(DEGREES)}, {year} - {year + 4}"]
+    return "\n".join(lines) + "\n"
+
+
+def synthetic_answer(rng: np.random.Generator, skill: str = "", sentences: int = 4) -> str:
+    """
+    A plausible spoken answer, mentioning the question's skill when given.
+    """
+    topic = skill or rng.choice(SKILLS)
+    out = [f"I have used {topic} for about {rng.integers(1, 8)} years."]
+    for _ in range(max(0, sentences - 1)):
+        out.append(
+            f"I {rng.choice(VERBS)} {rng.choice(OBJECTS)} with {topic if rng.random() < 0.6 else rng.choice(SKILLS)} "
+            f"{rng.choice(FILLER)}."
+        )
+    return " ".join(out)
+
+
+def synthetic_speech(rng: np.random.Generator, seconds: float = 8.0, sample_rate: int = 16000) -> np.ndarray:
+    """
+    Speech-like mono float32 audio: voiced harmonic bursts of 0.3-1.5 s
+    separated by short pauses with low background noise, so the VAD finds
+    several segments the way it does on real answers.
+    """
+    n = int(seconds * sample_rate)
+    audio = (0.002 * rng.normal(size=n)).astype(np.float32)
+    pos = int(0.2 * sample_rate)
+    while pos < n:
+        length = int(rng.uniform(0.3, 1.5) * sample_rate)
+        end = min(n, pos + length)
+        t = np.arange(end - pos) / sample_rate
+        f0 = rng.uniform(100, 220)
+        voiced = sum(np.sin(2 * np.pi * f0 * h * t) / h for h in (1, 2, 3))
+        envelope = np.sin(np.pi * np.arange(end - pos) / max(1, end - pos))
+        audio[pos:end] += (0.3 * voiced * envelope).astype(np.float32)
+        pos = end + int(rng.uniform(0.15, 0.6) * sample_rate)
+    return np.clip(audio, -1.0, 1.0)
+
+
+def wav_bytes(audio: np.ndarray, sample_rate: int = 16000) -> bytes:
+    pcm = (np.clip(audio, -1.0, 1.0) * 32767.0).astype("<i2")
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(sample_rate)
+        w.writeframes(pcm.tobytes())
+    return buf.getvalue()
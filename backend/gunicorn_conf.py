@@ -0,0 +1,29 @@
+"""
+gunicorn settings for multi-worker serving:
+
+    gunicorn -c backend/gunicorn_conf.py backend.app.main:app
+
+With SERVE_PRELOAD=1 (default) the app is imported and the models are
+loaded in the master before the workers are forked, so every worker shares
+one copy of the weights (see backend/app/core/serving.py).
+"""
+
+from backend.app.core import config as app_config
+
+bind = app_config.SERVE_BIND
+workers = app_config.SERVE_WORKERS
+worker_class = "uvicorn.workers.UvicornWorker"
+timeout = app_config.SERVE_TIMEOUT
+preload_app = app_config.SERVE_PRELOAD
+
+
+def when_ready(server):
+    # master, after the app import and before the first fork
+    if app_config.SERVE_PRELOAD:
+        from backend.app.core.serving import preload_for_fork
+        preload_for_fork()
+
+
+def post_fork(server, worker):
+    from backend.app.core.serving import after_fork
+    after_fork()
@@ -0,0 +1,57 @@
+"""
+Offline test setup: stub embedding and ASR backends, a throwaway storage
+root and no background threads. The environment is set before the app
+(and with it backend.app.core.config) is imported.
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+os.environ.update({
+    "STORAGE_DIR": tempfile.mkdtemp(prefix="interview-tests-"),
+    "EMBED_BACKEND": "stub",
+    "ASR_BACKEND": "stub",
+    "ASR_PROFILE": "",
+    "ASR_PROCESS_WORKERS": "0",
+    "ASR_STREAM_WINDOW_S": "2.0",
+    "ASR_STREAM_OVERLAP_S": "0.5",
+    "STARTUP_MODE": "blocking",
+    "JOB_WORKERS": "0",
+    "STORAGE_LIFECYCLE": "0",
+    "PROFILE_REQUESTS": "0",
+    "HF_HUB_OFFLINE": "1",
+    "TRANSFORMERS_OFFLINE": "1",
+})
+
+
+@pytest.fixture(scope="session")
+def client():
+    from fastapi.testclient import TestClient
+
+    from backend.app.main import app
+
+    with TestClient(app) as c:
+        yield c
+
+
+@pytest.fixture
+def planned_session(client):
+    """
+    A session with a parsed resume and an interview plan; returns
+    (session_id, first question id).
+    """
+    from backend.app.core.session_store import get_store
+
+    sid = client.post("/api/session/create").json()["session_id"]
+    store = get_store()
+    store.put_parsed(sid, {"skills": ["python", "machine learning"], "raw_text": "python machine learning engineer"})
+    assert client.post(f"/api/interview/plan/{sid}").status_code == 200
+    return sid, store.get_plan(sid)["questions"][0]["id"]
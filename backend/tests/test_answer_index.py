@@ -0,0 +1,43 @@
+"""
+Answer index: instances sharing a directory (as gunicorn workers do) and the short-answer cutoff.
+"""
+
+import numpy as np
+
+from backend.app.core import answer_index, config
+from backend.app.core.answer_index import AnswerIndex
+
+
+def _info(sid, qid):
+    return {"session_id": sid, "question_id": qid, "topic": "skill:python"}
+
+
+def test_instances_sharing_a_directory_do_not_overwrite_rows(tmp_path):
+    a, b = AnswerIndex(tmp_path), AnswerIndex(tmp_path)
+    va, vb = np.eye(4)[0], np.eye(4)[1]
+    a.add(_info("s1", "q1"), va)
+    b.add(_info("s2", "q1"), vb)  # b has not seen a's row yet
+    a.add(_info("s3", "q1"), va + vb)
+
+    reopened = AnswerIndex(tmp_path)
+    assert reopened.stats()["rows"] == 3
+    assert np.allclose(reopened.get_vector("s2", "q1"), vb)
+    assert np.allclose(reopened.get_vector("s1", "q1"), va)
+    # each instance sees the others' rows without reopening
+    assert b.get_info("s3", "q1") is not None
+    assert a.search(vb, k=1)[0]["session_id"] == "s2"
+
+
+def test_short_answers_are_not_indexed(monkeypatch, tmp_path):
+    monkeypatch.setattr(config, "ANSWER_INDEX_DIR", str(tmp_path))
+    monkeypatch.setattr(answer_index, "_index", None)
+    q = {"id": "q1", "skill": "python"}
+    long_answer = {"answer_excerpt": "I wrote Python services for five years"}
+    results = answer_index.index_and_compare_many(
+        [("s1", q, {"answer_excerpt": "yes"}), ("s2", q, long_answer)],
+        [np.ones(4), np.ones(4)],
+    )
+    assert results[0] is None
+    assert results[1] == {"similar_answers": [], "possible_duplicate": False}
+    assert answer_index.get_answer_index().stats()["rows"] == 1
+    monkeypatch.setattr(answer_index, "_index", None)
@@ -0,0 +1,53 @@
+"""
+/answer/video writes a score only when both the speech and the video branch succeed.
+"""
+
+import pytest
+
+from backend.app.api.routes import answer_video
+from backend.app.core import video
+from backend.app.core.session_store import get_store
+
+SPEECH = "I have used Python for years to build production data pipelines"
+
+
+def _post(client, sid, qid):
+    return client.post(f"/api/answer/video?session_id={sid}&question_id={qid}",
+                       files={"file": ("answer.mp4", b"\0" * 256, "video/mp4")})
+
+
+@pytest.fixture
+def fake_media(monkeypatch):
+    state = {"transcript": SPEECH, "video": {"analyzer": "stub"}}
+
+    def analyze(path):
+        if isinstance(state["video"], Exception):
+            raise state["video"]
+        return state["video"]
+
+    monkeypatch.setattr(video, "analyze_video", analyze)
+    monkeypatch.setattr(answer_video, "transcribe_file", lambda path: (state["transcript"], {"speech_s": 3.0}))
+    return state
+
+
+def test_failed_video_branch_writes_no_score(client, planned_session, fake_media):
+    sid, qid = planned_session
+    fake_media["video"] = RuntimeError("decoder crashed")
+    assert _post(client, sid, qid).status_code == 500
+    assert get_store().list_scores(sid) == []
+
+    fake_media["video"] = {"analyzer": "stub"}
+    r = _post(client, sid, qid)
+    assert r.status_code == 200
+    assert r.json()["score"] is not None
+    assert len(get_store().list_scores(sid)) == 1
+
+
+def test_silent_recording_is_not_scored(client, planned_session, fake_media):
+    sid, qid = planned_session
+    fake_media["transcript"] = "  "
+    r = _post(client, sid, qid)
+    assert r.status_code == 200
+    body = r.json()
+    assert body["score"] is None and body["video"] == {"analyzer": "stub"}
+    assert get_store().list_scores(sid) == []
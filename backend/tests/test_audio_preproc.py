@@ -0,0 +1,34 @@
+import numpy as np
+
+from backend.app.core.asr import ASR_SAMPLE_RATE
+from backend.app.core.audio_preproc import detect_speech
+
+SR = ASR_SAMPLE_RATE
+
+
+def tone(seconds: float, amplitude: float = 0.3) -> np.ndarray:
+    t = np.arange(int(seconds * SR)) / float(SR)
+    return (amplitude * np.sin(2 * np.pi * 220.0 * t)).astype(np.float32)
+
+
+def test_audio_without_pauses_is_kept_whole():
+    steady = tone(5.0)
+    assert detect_speech(steady, SR) == [(0, steady.size)]
+
+    rng = np.random.default_rng(0)
+    t = np.arange(5 * SR) / float(SR)
+    noise = (0.2 * rng.standard_normal(t.size) * (1.0 + 0.3 * np.sin(2 * np.pi * 3.0 * t))).astype(np.float32)
+    assert detect_speech(noise, SR) == [(0, noise.size)]
+
+
+def test_silence_has_no_speech():
+    assert detect_speech(np.zeros(3 * SR, dtype=np.float32), SR) == []
+    assert detect_speech(tone(3.0, amplitude=1e-4), SR) == []
+
+
+def test_pauses_split_and_trim_speech():
+    silence = np.zeros(SR, dtype=np.float32)
+    audio = np.concatenate([silence, tone(1.0), silence, tone(1.0), silence])
+    spans = detect_speech(audio, SR)
+    assert len(spans) == 2
+    assert spans[0][0] > 0.5 * SR and spans[1][1] < 4.5 * SR
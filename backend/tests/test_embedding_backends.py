@@ -0,0 +1,62 @@
+"""
+Embedding space ids, and ONNX vs torch embedding parity. The parity test
+needs onnxruntime, sentence-transformers with EMBED_MODEL_NAME available
+offline, and an exported model in EMBED_ONNX_DIR
+(`python -m backend.app.core.embedding_backends export`); skipped otherwise.
+
+    EMBED_ONNX_DIR=storage/_models/onnx/all-MiniLM-L6-v2 python -m pytest backend/tests/test_embedding_backends.py
+"""
+
+from pathlib import Path
+
+import pytest
+
+from backend.app.core import config
+from backend.app.core.embedding_backends import (
+    EMBED_CONFIG_FILE, ONNX_INT8_FILE, OnnxBackend, TorchBackend, embedding_model_id,
+)
+from backend.benchmarks.bench_embedding_backends import parity
+
+# max |cosine diff| between backends on the scoring pairs (0.1 points of the 0-10 score)
+TOLERANCE = 0.02
+
+
+def test_onnx_model_id_follows_the_graph_that_loads(monkeypatch, tmp_path):
+    # without a quantized graph OnnxBackend runs fp32: its vectors must not share the int8 id
+    (tmp_path / EMBED_CONFIG_FILE).write_text('{"model": "mini"}')
+    monkeypatch.setattr(config, "EMBED_ONNX_DIR", str(tmp_path))
+    monkeypatch.setattr(config, "EMBED_ONNX_INT8", True)
+    assert embedding_model_id("onnx") == "mini:onnx"
+    (tmp_path / ONNX_INT8_FILE).write_bytes(b"")
+    assert embedding_model_id("onnx") == "mini:onnx-int8"
+    monkeypatch.setattr(config, "EMBED_ONNX_INT8", False)
+    assert embedding_model_id("onnx") == "mini:onnx"
+
+
+@pytest.fixture(scope="module")
+def onnx_dir() -> Path:
+    # checked before the (slow) torch model load
+    pytest.importorskip("onnxruntime")
+    model_dir = Path(config.EMBED_ONNX_DIR)
+    if not (model_dir / EMBED_CONFIG_FILE).exists():
+        pytest.skip(f"no exported ONNX model in {model_dir}")
+    return model_dir
+
+
+@pytest.fixture(scope="module")
+def torch_backend():
+    pytest.importorskip("sentence_transformers")
+    try:
+        return TorchBackend(config.EMBED_MODEL_NAME)
+    except Exception as e:
+        pytest.skip(f"torch model {config.EMBED_MODEL_NAME} unavailable: {e}")
+
+
+@pytest.mark.parametrize("int8", [True, False], ids=["int8", "fp32"])
+def test_onnx_cosines_match_torch(onnx_dir, torch_backend, int8):
+    onnx_backend = OnnxBackend(onnx_dir, int8=int8)
+    if onnx_backend.int8 != int8:
+        pytest.skip("export has no int8 graph")
+
+    result = parity(torch_backend, onnx_backend)
+    assert result["max_abs_cosine_diff"] <= TOLERANCE, result
@@ -0,0 +1,40 @@
+"""
+The explainer starts uniform and refits in the background once the corpus is big enough.
+"""
+
+from backend.app.core import config, explain
+
+
+def test_uniform_model_refits_when_corpus_grows(monkeypatch, tmp_path):
+    monkeypatch.setattr(config, "EXPLAIN_IDF_PATH", str(tmp_path / "idf.npz"))
+    monkeypatch.setattr(config, "EXPLAIN_MIN_CORPUS", 3)
+    monkeypatch.setattr(config, "EXPLAIN_REFIT_S", 0.0)
+    corpus = ["python and sql"]
+    monkeypatch.setattr(explain, "iter_corpus", lambda store=None: list(corpus))
+    explain.reset_explainer()
+    try:
+        model = explain.get_explainer()
+        assert model.n_docs == 0
+        explain.wait_for_fit()
+        assert explain.get_explainer(fit=False).n_docs == 0
+        assert not (tmp_path / "idf.npz").exists()
+
+        corpus += ["docker and kubernetes", "python web services"]
+        explain.get_explainer()
+        explain.wait_for_fit()
+        assert explain.get_explainer(fit=False).n_docs == 3
+        assert (tmp_path / "idf.npz").exists()
+    finally:
+        explain.reset_explainer()
+
+
+def test_semantic_matches_caches_reference_sentences_only():
+    from backend.app.core.ml_models import get_embedding_cache
+    from backend.app.core.semantic_explain import semantic_matches
+
+    cache = get_embedding_cache()
+    reference = "Python services on AWS. Containers with Docker."
+    answer = "I built APIs in Python last year. We shipped them in containers."
+    assert semantic_matches(reference, answer)
+    assert cache.get("Python services on AWS.") is not None
+    assert cache.get("I built APIs in Python last year.") is None
@@ -0,0 +1,98 @@
+"""
+Job leases: only jobs whose owner stopped renewing are taken back, and only
+the current owner of a job records its outcome.
+"""
+
+import time
+
+import pytest
+
+from backend.app.core import config
+from backend.app.core.jobs import FAILED, QUEUED, RUNNING, SUCCEEDED, JobWorkers, MemoryJobQueue, SQLiteJobQueue
+
+
+def test_live_claims_are_not_requeued(monkeypatch, tmp_path):
+    monkeypatch.setattr(config, "JOB_LEASE_S", 0.3)
+    a = SQLiteJobQueue(tmp_path / "jobs.db")
+    b = SQLiteJobQueue(tmp_path / "jobs.db")  # another process on the same file
+    job = a.submit("noop", {}, max_attempts=2)
+    claimed = a.claim("host-a:1:job-worker-0")
+    assert claimed["job_id"] == job["job_id"]
+    assert claimed["lease_until"] > time.time()
+
+    # b starting up must leave a's running job alone
+    assert b.requeue_expired() == 0
+    time.sleep(0.2)
+    a.renew_leases({job["job_id"]: "host-a:1:job-worker-0"}, config.JOB_LEASE_S)
+    time.sleep(0.2)
+    assert b.requeue_expired() == 0
+    assert b.get(job["job_id"])["status"] == RUNNING
+
+    # a stops renewing (died): the lease runs out and b takes the job back
+    time.sleep(0.35)
+    assert b.requeue_expired() == 1
+    requeued = b.get(job["job_id"])
+    assert requeued["status"] == QUEUED and requeued["worker"] is None
+    assert "host-a:1" in requeued["error"]
+
+    # out of attempts: an expired lease fails the job instead
+    b.claim("host-b:2:job-worker-0")
+    time.sleep(0.35)
+    assert b.requeue_expired() == 1
+    assert b.get(job["job_id"])["status"] == FAILED
+
+
+def test_workers_renew_leases_of_running_jobs(monkeypatch, tmp_path):
+    monkeypatch.setattr(config, "JOB_LEASE_S", 0.3)
+    queue = SQLiteJobQueue(tmp_path / "jobs.db")
+    other = SQLiteJobQueue(tmp_path / "jobs.db")
+    seen = {}
+
+    def slow(payload, deps):
+        # outlives several lease periods; another process keeps checking
+        for _ in range(8):
+            time.sleep(0.1)
+            seen["requeued"] = seen.get("requeued", 0) + other.requeue_expired()
+        return {"ok": True}
+
+    workers = JobWorkers(queue, {"slow": slow}, workers=1, poll_ms=20)
+    job = queue.submit("slow", {})
+    workers.start()
+    try:
+        deadline = time.time() + 5
+        while queue.get(job["job_id"])["status"] != "succeeded" and time.time() < deadline:
+            time.sleep(0.05)
+    finally:
+        workers.stop()
+    done = queue.get(job["job_id"])
+    assert done["status"] == "succeeded"
+    assert done["attempts"] == 1 and seen["requeued"] == 0
+    assert done["worker"].startswith(workers.owner + ":")
+
+
+@pytest.mark.parametrize("backend", ["sqlite", "memory"])
+def test_late_outcome_of_an_expired_claim_is_dropped(monkeypatch, tmp_path, backend):
+    monkeypatch.setattr(config, "JOB_LEASE_S", 0.1)
+    queue = SQLiteJobQueue(tmp_path / "jobs.db") if backend == "sqlite" else MemoryJobQueue()
+    job = queue.submit("noop", {}, max_attempts=3)
+    queue.claim("host-a:1:job-worker-0")
+    time.sleep(0.15)
+    if backend == "memory":
+        # in-memory jobs are never requeued; stand in for another process taking it back
+        queue._jobs[job["job_id"]].update(status=QUEUED, worker=None)
+    else:
+        assert queue.requeue_expired() == 1
+    monkeypatch.setattr(config, "JOB_LEASE_S", 60)
+    assert queue.claim("host-b:2:job-worker-0")["job_id"] == job["job_id"]
+
+    # a wakes up late: neither its failure nor its result may touch b's run
+    assert queue.fail(job["job_id"], "host-a:1:job-worker-0", "late error") is None
+    assert queue.get(job["job_id"])["status"] == RUNNING
+    assert queue.claim("host-c:3:job-worker-0") is None
+    assert queue.complete(job["job_id"], "host-a:1:job-worker-0", {"from": "a"}) is False
+    queue.renew_leases({job["job_id"]: "host-a:1:job-worker-0"}, 0.0)
+    assert queue.get(job["job_id"])["lease_until"] > time.time()
+
+    assert queue.complete(job["job_id"], "host-b:2:job-worker-0", {"from": "b"}) is True
+    done = queue.get(job["job_id"])
+    assert done["status"] == SUCCEEDED and done["result"] == {"from": "b"}
@@ -0,0 +1,24 @@
+"""
+Session reports follow plan writes, not only score writes.
+"""
+
+from backend.app.core.session_store import get_store
+
+
+def test_new_plan_resummarizes_report(client, planned_session):
+    sid, qid = planned_session
+    r = client.post("/api/score/text", json={"session_id": sid, "question_id": qid,
+                                             "answer_text": "I build machine learning models in Python every day"})
+    assert r.status_code == 200
+    report = client.get(f"/api/session/{sid}/report").json()
+    assert report["answered"] == 1 and qid in report["completed_questions"]
+
+    # a new resume -> new plan without that skill: the report follows at once
+    store = get_store()
+    store.put_parsed(sid, {"skills": ["kubernetes"], "raw_text": "kubernetes operator"})
+    assert client.post(f"/api/interview/plan/{sid}").status_code == 200
+    plan_ids = [q["id"] for q in store.get_plan(sid)["questions"]]
+    report = client.get(f"/api/session/{sid}/report").json()
+    assert report["questions_total"] == len(plan_ids)
+    assert "kubernetes" in report["skills"] and "python" not in report["skills"]
+    assert set(report["pending_questions"]) | set(report["completed_questions"]) == set(plan_ids)
@@ -0,0 +1,101 @@
+import time
+
+import pytest
+
+from backend.app.core.session_store import open_store
+
+
+@pytest.mark.parametrize("backend", ["fs", "sqlite"])
+def test_cached_plan_follows_writes_from_another_process(tmp_path, backend):
+    # two stores on one root stand in for two gunicorn workers
+    worker_a = open_store(tmp_path, backend)
+    worker_b = open_store(tmp_path, backend)
+    sid = worker_a.create_session()
+
+    worker_a.put_plan(sid, {"questions": [{"id": "q1"}]})
+    assert worker_b.get_plan(sid)["questions"][0]["id"] == "q1"
+    assert worker_b.get_plan(sid)["questions"][0]["id"] == "q1"
+    assert worker_b.cache_hits == 1
+
+    worker_a.put_plan(sid, {"questions": [{"id": "q2"}]})
+    assert worker_b.get_plan(sid)["questions"][0]["id"] == "q2"
+
+
+@pytest.mark.parametrize("backend", ["fs", "sqlite"])
+def test_missing_document_raises(tmp_path, backend):
+    store = open_store(tmp_path, backend)
+    sid = store.create_session()
+    with pytest.raises(FileNotFoundError):
+        store.get_plan(sid)
+
+
+@pytest.mark.parametrize("backend", ["fs", "sqlite"])
+def test_last_activity_follows_document_writes(tmp_path, backend):
+    store = open_store(tmp_path, backend)
+    sid = store.create_session()
+    store.put_plan(sid, {"questions": []})
+    first = store.last_activity(sid)
+    assert first is not None
+
+    time.sleep(0.05)
+    store.put_score(sid, "q1", {"score": 1.0})
+    assert store.last_activity(sid) > first
+
+
+@pytest.mark.parametrize("backend", ["fs", "sqlite"])
+def test_delete_session_removes_documents_and_archive(tmp_path, backend):
+    store = open_store(tmp_path, backend)
+    sid = store.create_session()
+    store.put_plan(sid, {"questions": []})
+    (store.session_dir(sid) / "notes.txt").write_text("raw")
+    store.archive.archive(sid)
+    assert store.archive.is_archived(sid)
+
+    store.delete_session(sid)
+    assert not store.session_exists(sid)
+    assert not store.archive.is_archived(sid)
+    assert sid not in store.list_sessions()
+    assert store.last_activity(sid) is None
+    with pytest.raises(FileNotFoundError):
+        store.get_plan(sid)
+
+
+def test_partly_archived_session_is_restored_before_writes(tmp_path):
+    store = open_store(tmp_path, "fs")
+    sid = store.create_session()
+    store.put_plan(sid, {"questions": [{"id": "q1"}]})
+    store.put_score(sid, "q1", {"score": 1.0})
+    store.archive.archive(sid)
+    # a file written while the session was packed keeps its directory live
+    (tmp_path / sid / "answers").mkdir(parents=True)
+    (tmp_path / sid / "answers" / "q1.wav").write_bytes(b"RIFF")
+
+    store.put_score(sid, "q2", {"score": 0.5})
+    assert not store.archive.is_archived(sid)
+    assert (tmp_path / sid / "interview_plan.json").exists()
+    assert (tmp_path / sid / "scores" / "q1.json").exists()
+    assert (tmp_path / sid / "answers" / "q1.wav").exists()
+
+
+def test_retention_expires_sqlite_sessions(tmp_path, monkeypatch):
+    from backend.app.core import config
+    from backend.app.core.storage_lifecycle import LifecycleManager
+
+    monkeypatch.setattr(config, "SESSION_RETENTION_DAYS", 1.0)
+    monkeypatch.setattr(config, "SESSION_REPORTS", False)
+    store = open_store(tmp_path, "sqlite")
+    old, fresh = store.create_session(), store.create_session()
+    store.put_plan(old, {"questions": []})
+    store.put_plan(fresh, {"questions": []})
+    stale = time.time() - 3 * 86400
+    conn = store._conn()
+    conn.execute("UPDATE docs SET updated_at = ? WHERE session_id = ?", (stale, old))
+    conn.execute("UPDATE sessions SET created_at = ? WHERE session_id = ?", (stale, old))
+
+    report = LifecycleManager(store).run_once()
+    assert report["errors"] == []
+    assert report["expired_sessions"]["sessions"] == 1
+    assert store.list_sessions() == [fresh]
+    store.invalidate(old)
+    with pytest.raises(FileNotFoundError):
+        store.get_plan(old)
@@ -0,0 +1,142 @@
+import json
+
+import numpy as np
+import pytest
+
+from backend.app.core.streaming_asr import AudioWindower, StreamResampler, merge_overlap
+
+STUB_PHRASE = "i built machine learning pipelines in python"
+
+
+def tone(seconds: float, rate: int) -> np.ndarray:
+    t = np.arange(int(seconds * rate)) / float(rate)
+    return (0.3 * np.sin(2 * np.pi * 220.0 * t)).astype(np.float32)
+
+
+def pcm16(audio: np.ndarray) -> bytes:
+    return (np.clip(audio, -1.0, 1.0) * 32767).astype("<i2").tobytes()
+
+
+def stream(ws, audio: np.ndarray, rate: int, chunk_s: float = 0.25):
+    step = int(chunk_s * rate)
+    for i in range(0, audio.size, step):
+        ws.send_bytes(pcm16(audio[i:i + step]))
+
+
+def receive_until_final(ws) -> list:
+    messages = []
+    while True:
+        msg = json.loads(ws.receive_text())
+        messages.append(msg)
+        if msg["type"] in ("final", "error"):
+            return messages
+
+
+# ---- units ----
+
+def test_merge_overlap_drops_repeated_words():
+    assert merge_overlap("we trained the model", "the model on gpus") == "we trained the model on gpus"
+    assert merge_overlap("", "hello") == "hello"
+    assert merge_overlap("hello", "") == "hello"
+
+
+def test_windower_overlaps_and_flushes_tail():
+    w = AudioWindower(window_s=1.0, overlap_s=0.25, sample_rate=100)
+    windows = w.feed(np.arange(260, dtype=np.float32))
+    assert [int(x[0]) for x in windows] == [0, 75, 150]
+    assert all(x.size == 100 for x in windows)
+    # 225..259 left: more than the 25-sample overlap the last window already heard
+    rest = w.flush()
+    assert rest is not None and int(rest[0]) == 225 and rest.size == 35
+
+
+@pytest.mark.parametrize("src_rate", [8000, 22050, 44100, 48000])
+def test_resampler_chunked_matches_whole(src_rate):
+    audio = tone(1.3, src_rate)
+    whole = StreamResampler(src_rate).process(audio)
+
+    resampler = StreamResampler(src_rate)
+    rng = np.random.default_rng(0)
+    parts, i = [], 0
+    while i < audio.size:
+        n = int(rng.integers(1, 2000))
+        parts.append(resampler.process(audio[i:i + n]))
+        i += n
+    chunked = np.concatenate(parts)
+
+    assert chunked.size == whole.size
+    assert abs(whole.size - round(audio.size * 16000 / src_rate)) <= 1
+    np.testing.assert_allclose(chunked, whole, atol=1e-6)
+
+
+def test_resampler_passthrough_at_16k():
+    audio = tone(0.1, 16000)
+    assert StreamResampler(16000).process(audio) is audio
+
+
+# ---- websocket ----
+
+def test_stream_sends_partials_then_scored_final(client, planned_session):
+    sid, qid = planned_session
+    with client.websocket_connect(f"/api/answer/audio/stream?session_id={sid}&question_id={qid}") as ws:
+        stream(ws, tone(5.0, 16000), 16000)
+        ws.send_text("end")
+        messages = receive_until_final(ws)
+
+    partials = [m for m in messages if m["type"] == "partial"]
+    final = messages[-1]
+    assert final["type"] == "final", final
+    # 2 s windows with 0.5 s overlap over 5 s of audio
+    assert [p["window"] for p in partials] == list(range(len(partials))) and len(partials) >= 3
+    assert STUB_PHRASE in final["transcript"]
+    assert final["windows"] == len(partials)
+    assert final["audio_seconds"] == pytest.approx(5.0, abs=0.01)
+    assert 0.0 <= final["score"] <= 10.0
+
+
+def test_stream_resamples_client_rate(client, planned_session):
+    sid, qid = planned_session
+    url = f"/api/answer/audio/stream?session_id={sid}&question_id={qid}&sample_rate=8000"
+    with client.websocket_connect(url) as ws:
+        stream(ws, tone(3.0, 8000), 8000, chunk_s=0.1)
+        ws.send_text(json.dumps({"event": "end"}))
+        final = receive_until_final(ws)[-1]
+    assert final["type"] == "final", final
+    assert final["audio_seconds"] == pytest.approx(3.0, abs=0.01)
+
+
+@pytest.mark.parametrize("rate", [0, -16000])
+def test_stream_rejects_bad_sample_rate(client, planned_session, rate):
+    sid, qid = planned_session
+    url = f"/api/answer/audio/stream?session_id={sid}&question_id={qid}&sample_rate={rate}"
+    with client.websocket_connect(url) as ws:
+        msg = ws.receive_json()
+        closed = ws.receive()
+    assert msg["type"] == "error" and msg["status_code"] == 400
+    assert closed["type"] == "websocket.close" and closed["code"] == 1003
+
+
+def test_stream_unknown_session(client):
+    with client.websocket_connect("/api/answer/audio/stream?session_id=missing&question_id=q") as ws:
+        msg = ws.receive_json()
+        closed = ws.receive()
+    assert msg["status_code"] == 404
+    assert closed["code"] == 1008
+
+
+def test_stream_reports_asr_failure_before_end(client, planned_session, monkeypatch):
+    from backend.app.api.routes import answer_audio
+
+    def broken(inputs):
+        raise RuntimeError("asr backend crashed")
+
+    monkeypatch.setattr(answer_audio, "transcribe", broken)
+    sid, qid = planned_session
+    with client.websocket_connect(f"/api/answer/audio/stream?session_id={sid}&question_id={qid}") as ws:
+        # one full window, and no "end": the error must arrive anyway
+        stream(ws, tone(2.5, 16000), 16000)
+        msg = ws.receive_json()
+        closed = ws.receive()
+    assert msg["type"] == "error" and msg["status_code"] == 500
+    assert "asr backend crashed" in msg["detail"]
+    assert closed["code"] == 1011
@@ -0,0 +1,46 @@
+"""
+Multipart uploads streamed into the blob store.
+"""
+
+from backend.app.core import config
+from backend.app.core.uploads import blob_root
+
+
+def _session(client) -> str:
+    return client.post("/api/session/create").json()["session_id"]
+
+
+def test_resume_upload_is_stored_once(client):
+    sid = _session(client)
+    body = b"%PDF-1.4 resume " * 1000
+    first = client.post("/api/upload/resume", data={"session_id": sid},
+                        files={"file": ("my resume.pdf", body, "application/pdf")})
+    assert first.status_code == 200, first.text
+    doc = first.json()
+    assert doc["size"] == len(body)
+    assert doc["filename"] == "my resume.pdf"
+    assert doc["deduplicated"] is False
+
+    again = client.post("/api/upload/resume", data={"session_id": sid},
+                        files={"file": ("copy.pdf", body, "application/pdf")}).json()
+    assert again["deduplicated"] is True
+    assert again["sha256"] == doc["sha256"]
+    assert open(again["saved_path"], "rb").read() == body
+
+
+def test_upload_over_limit_is_rejected(client, monkeypatch):
+    monkeypatch.setattr(config, "UPLOAD_MAX_RESUME_MB", 1)
+    sid = _session(client)
+    r = client.post("/api/upload/resume", data={"session_id": sid},
+                    files={"file": ("big.pdf", b"x" * (2 * 1024 * 1024), "application/pdf")})
+    assert r.status_code == 413
+    # the partial temp file is gone
+    assert not list((blob_root() / "tmp").glob("*.part"))
+
+
+def test_upload_needs_fields_and_session(client):
+    files = {"file": ("a.wav", b"RIFF", "audio/wav")}
+    assert client.post("/api/answer/audio", data={"question_id": "q1"}, files=files).status_code == 422
+    assert client.post("/api/upload/resume", data={"session_id": "nope"}, files=files).status_code == 404
+    assert client.post("/api/upload/resume", data={"session_id": "x"}).status_code in (415, 422)
+    assert not list((blob_root() / "tmp").glob("*.part"))